@@ -0,0 +1,102 @@
+"""
+Benchmarks the time taken to generate a network against the number of nodes in it.
+
+Each size is generated with a fixed average degree by both the original
+``network_creator`` generators and their ``_sparse`` variants. The original
+generators build and walk a dense adjacency matrix and place each node by
+checking it against every other node, so they are skipped above ``--dense-limit``
+nodes.
+
+Usage::
+
+    python scripts/benchmark_network_creation.py --sizes 1000 5000 20000 100000
+"""
+import argparse
+import random
+import time
+import warnings
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from yawning_titan.networks import network_creator
+from yawning_titan.networks.network import Network
+
+
+def get_generators(
+    size: int, average_degree: float
+) -> Dict[str, Callable[[], Network]]:
+    """
+    Get a pair of original and sparse generators of each kind of network for a given size.
+
+    :param size: The number of nodes in the network, approximately for the star and P2P networks.
+    :param average_degree: The average number of edges per node.
+    :return: The generators by name.
+    """
+    probability = min(1.0, average_degree / size)
+    group_size = 50
+    group_connectivity = min(1.0, average_degree / group_size)
+    return {
+        "mesh": lambda: network_creator.create_mesh(size, probability),
+        "mesh_sparse": lambda: network_creator.create_mesh_sparse(size, probability),
+        "star": lambda: network_creator.create_star(
+            size // group_size, group_size, group_connectivity
+        ),
+        "star_sparse": lambda: network_creator.create_star_sparse(
+            size // group_size, group_size, group_connectivity
+        ),
+        "p2p": lambda: network_creator.create_p2p(size // 2, 0.1, probability * 2),
+        "p2p_sparse": lambda: network_creator.create_p2p_sparse(
+            size // 2, 0.1, probability * 2
+        ),
+        "ring": lambda: network_creator.create_ring(0.3, size),
+        "ring_sparse": lambda: network_creator.create_ring_sparse(0.3, size),
+        "gnp": lambda: network_creator.gnp_random_connected_graph(size, probability),
+        "gnp_sparse": lambda: network_creator.gnp_random_connected_graph_sparse(
+            size, probability
+        ),
+    }
+
+
+def benchmark_network_creation(
+    size: int, average_degree: float = 4, dense_limit: int = 2000
+) -> Dict[str, Optional[float]]:
+    """
+    Time the generation of each kind of network of a given size.
+
+    :param size: The number of nodes in the network.
+    :param average_degree: The average number of edges per node.
+    :param dense_limit: The largest size to time the original generators at.
+    :return: The time in seconds taken by each generator, None for those skipped.
+    """
+    random.seed(size)
+    np.random.seed(size)
+    times: Dict[str, Optional[float]] = {}
+    for name, generator in get_generators(size, average_degree).items():
+        if not name.endswith("_sparse") and size > dense_limit:
+            times[name] = None
+            continue
+        start = time.perf_counter()
+        generator()
+        times[name] = time.perf_counter() - start
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[500, 1000, 2000, 10000]
+    )
+    parser.add_argument("--average-degree", type=float, default=4)
+    parser.add_argument("--dense-limit", type=int, default=2000)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    names = list(get_generators(1, 1))
+    print(f"{'nodes':>8} " + " ".join(f"{name + ' (s)':>16}" for name in names))
+    for n in args.sizes:
+        result = benchmark_network_creation(n, args.average_degree, args.dense_limit)
+        cells = [
+            "-" if result[name] is None else f"{result[name]:.3f}" for name in names
+        ]
+        print(f"{n:>8} " + " ".join(f"{cell:>16}" for cell in cells))
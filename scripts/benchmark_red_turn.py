@@ -0,0 +1,73 @@
+"""
+Benchmarks the cost of a single red agent turn against the number of nodes in the network.
+
+Mesh networks with a fixed average degree are generated for each size and the
+red agent from the default game mode takes a number of turns on each, with the
+network being reset periodically so that red keeps finding new targets.
+
+Usage::
+
+    python scripts/benchmark_red_turn.py --sizes 50 100 250 500 1000 --turns 200
+"""
+import argparse
+import random
+import time
+import warnings
+from typing import Dict, List
+
+import numpy as np
+
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+from yawning_titan.envs.generic.core.red_interface import RedInterface
+from yawning_titan.game_modes.game_mode_db import default_game_mode
+from yawning_titan.networks.network_creator import create_mesh
+
+
+def benchmark_red_turn(
+    size: int, turns: int, reset_every: int = 20, average_degree: float = 6
+) -> Dict[str, float]:
+    """
+    Time red agent turns on a mesh network of a given size.
+
+    :param size: The number of nodes in the network.
+    :param turns: The number of red turns to time.
+    :param reset_every: Reset the network interface after this many turns.
+    :param average_degree: The average number of edges per node.
+    :return: The mean and median time per turn in milliseconds.
+    """
+    random.seed(size)
+    np.random.seed(size)
+    network = create_mesh(size=size, connectivity=min(1.0, average_degree / size))
+    network.num_of_random_entry_nodes = 3
+    network.reset_random_entry_nodes()
+
+    game_mode = default_game_mode()
+    network_interface = NetworkInterface(game_mode=game_mode, network=network)
+    red = RedInterface(network_interface)
+
+    times: List[float] = []
+    for turn in range(turns):
+        if turn % reset_every == 0:
+            network_interface.reset()
+            red = RedInterface(network_interface)
+        start = time.perf_counter()
+        network_interface.reset_stored_attacks()
+        red.perform_action()
+        times.append(time.perf_counter() - start)
+    return {
+        "mean_ms": 1000 * float(np.mean(times)),
+        "median_ms": 1000 * float(np.median(times)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    print(f"{'nodes':>8} {'mean (ms)':>12} {'median (ms)':>12}")
+    for n in args.sizes:
+        result = benchmark_red_turn(n, args.turns)
+        print(f"{n:>8} {result['mean_ms']:>12.3f} {result['median_ms']:>12.3f}")
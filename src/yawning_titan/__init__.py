@@ -116,6 +116,15 @@ The path to the users videos directory as an instance of `Path` or `PosixPath`,
 Users videos are stored at: ~/yawning_titan/videos.
 """
 
+TRAJECTORIES_DIR: Final[Union[Path, WindowsPath, PosixPath]] = (
+    _YT_USER_DIRS / "trajectories"
+)
+"""
+The path to the users trajectories directory as an instance of `Path` or `PosixPath`, depending on the OS.
+
+Users trajectories are stored at: ~/yawning_titan/trajectories.
+"""
+
 AGENTS_DIR: Final[Union[Path, WindowsPath, PosixPath]] = _YT_USER_DIRS / "agents"
 """
 The path to the users agents directory as an instance of `Path` or `PosixPath`, depending on the OS.
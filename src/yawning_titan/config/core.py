@@ -400,6 +400,7 @@ class ConfigItem:
         """
         self.__dict__[__name] = __value
         if __name == "value":
+            self._increment_version()
             self.validate()
 
     def to_dict(
@@ -449,6 +450,13 @@ class ConfigItem:
         :param value: The value to be set.
         """
         self.__dict__["value"] = value
+        self._increment_version()
+
+    def _increment_version(self):
+        """Increment the version of the group holding the item, if any."""
+        parent = self.__dict__.get("_parent")
+        if parent is not None:
+            parent._increment_version()
 
     def stringify(self) -> Any:
         """This is here to allow stringify methods to be call on both :class: `ConfigItem` and :class: `ConfigGroup` classes."""
@@ -475,6 +483,31 @@ class ConfigGroup(ConfigBase, ABC):
             self.__dict__[__name].value = __value
         else:
             self.__dict__[__name] = __value
+            if isinstance(__value, (ConfigItem, ConfigGroup)):
+                __value.__dict__["_parent"] = self
+                self._increment_version()
+
+    @property
+    def version(self) -> int:
+        """
+        A counter incremented whenever the value or structure of an element of the group is changed.
+
+        The version changes whenever the value of a :class:`ConfigItem` held by
+        the group (or by any group nested within it) is set, or an element is
+        replaced, so anything derived from the group can tell whether it is stale
+        by recording the version it was derived at. Mutating a value in place
+        (e.g. appending to a list value) is not tracked.
+
+        :return: The current version of the group.
+        """
+        return self.__dict__.get("_version", 0)
+
+    def _increment_version(self):
+        """Increment the version of the group and of every group it is nested within."""
+        self.__dict__["_version"] = self.version + 1
+        parent = self.__dict__.get("_parent")
+        if parent is not None:
+            parent._increment_version()
 
     def validate(
         self, raise_overall_exception: Optional[bool] = False
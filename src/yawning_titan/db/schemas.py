@@ -489,6 +489,15 @@ class ObservationSpaceSchema:
     RED_AGENT_SKILL: Final[
         YawningTitanQuery
     ] = YawningTitanQuery().observation_space.red_agent_skill
+    EDGE_LIST: Final[
+        YawningTitanQuery
+    ] = YawningTitanQuery().observation_space.edge_list
+    NEIGHBOURHOOD_SUMMARY: Final[
+        YawningTitanQuery
+    ] = YawningTitanQuery().observation_space.neighbourhood_summary
+    NEIGHBOURHOOD_HOPS: Final[
+        YawningTitanQuery
+    ] = YawningTitanQuery().observation_space.neighbourhood_hops
 
 
 class GameRulesSchema:
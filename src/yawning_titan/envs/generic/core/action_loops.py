@@ -2,30 +2,163 @@
 The ``ActionLoop`` class helps reduce boilerplate code when evaluating an agent within a target environment.
 
 Serves a similar function to library helpers such as Stable Baselines 3 ``evaluate_policy()".
+
+The steps of each episode are logged to an ``EpisodeLog``, a set of growable
+columns that is turned into a ``pandas.DataFrame`` once, at the end of the
+episode, so that logging a step takes the same time however long the episode.
+
+When ``gif_action_loop`` saves a GIF or WebM, each step only captures the state
+of the network as a ``FrameDescriptor``. The frames are drawn in a process pool
+and streamed to the files by a ``FrameRecorder``, see
+:mod:`yawning_titan.envs.generic.helpers.frame_renderer`.
 """
 
+import contextlib
+import inspect
 import os
-import re
-import string
+import warnings
+from concurrent.futures import Executor
 from datetime import datetime
 from pathlib import Path
-from threading import Thread
-from typing import Any
+from typing import Any, Dict, List, Optional, Sequence, Union
 from uuid import uuid4
 
 import imageio
-import matplotlib.pyplot as plt
-import moviepy.editor as mp
+import numpy as np
 import pandas as pd
 
-from yawning_titan import APP_IMAGES_DIR, IMAGES_DIR, VIDEOS_DIR
+from yawning_titan import IMAGES_DIR, VIDEOS_DIR
 from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
+from yawning_titan.envs.generic.helpers.frame_renderer import (
+    FRAME_RATE,
+    HOLD_LAST_FRAME,
+    FrameCapture,
+    FrameDescriptor,
+    FrameRecorder,
+    create_frame_executor,
+    get_webm_writer,
+)
+
+
+class _Column:
+    """A growable numpy array, starting with the dtype of the first value and widened as needed."""
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._array: Optional[np.ndarray] = None
+        self._size = 0
+
+    def append(self, value: Any):
+        value_dtype = (
+            np.asarray(value).dtype if np.ndim(value) == 0 else np.dtype(object)
+        )
+        if value_dtype.kind not in "biuf":
+            value_dtype = np.dtype(object)
+        if self._array is None:
+            self._array = np.empty(self._capacity, dtype=value_dtype)
+        elif self._array.dtype != value_dtype and self._array.dtype != object:
+            dtype = np.result_type(self._array.dtype, value_dtype)
+            self._array = self._array.astype(dtype)
+        if self._size == len(self._array):
+            grown = np.empty(2 * len(self._array), dtype=self._array.dtype)
+            grown[: self._size] = self._array
+            self._array = grown
+        self._array[self._size] = value
+        self._size += 1
+
+    def to_array(self) -> np.ndarray:
+        if self._array is None:
+            return np.empty(0, dtype=object)
+        return self._array[: self._size].copy()
+
+
+class EpisodeLog:
+    """A columnar log of the actions, rewards and info of the steps of an episode."""
+
+    def __init__(
+        self, info_fields: Optional[Sequence[str]] = None, capacity: int = 256
+    ):
+        """
+        Initialise an empty log.
+
+        Args:
+            info_fields: The entries of the info of each step to log as columns of their own, along with whether
+                each step is done. Defaults to logging the whole info dict of each step in an ``info`` column, the
+                original format of the ``ActionLoop`` results
+            capacity: The number of steps to allocate room for up front, doubled whenever it is reached
+        """
+        self.info_fields = None if info_fields is None else list(info_fields)
+        self._capacity = capacity
+        self.clear()
+
+    def clear(self):
+        """Remove every step from the log."""
+        self._actions = _Column(self._capacity)
+        self._rewards = _Column(self._capacity)
+        self._dones = _Column(self._capacity)
+        self._fields = {
+            name: _Column(self._capacity) for name in self.info_fields or []
+        }
+        self._infos: List[Dict] = []
+
+    def __len__(self) -> int:
+        return self._actions._size
+
+    def append(self, action: Any, reward: float, done: bool, info: Dict):
+        """
+        Log a step.
+
+        Args:
+            action: The action taken
+            reward: The reward for the step
+            done: Whether the episode is done
+            info: The info returned by the step
+        """
+        self._actions.append(action)
+        self._rewards.append(reward)
+        if self.info_fields is None:
+            self._infos.append(info)
+            return
+        self._dones.append(done)
+        for name, column in self._fields.items():
+            column.append(info.get(name))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Get the log as a DataFrame with a row per step.
+
+        Returns:
+            The ``action`` and ``rewards`` of each step, followed by either its ``info`` or whether it is ``done``
+            and its ``info_fields``
+        """
+        columns = {
+            "action": self._actions.to_array(),
+            "rewards": self._rewards.to_array(),
+        }
+        if self.info_fields is None:
+            columns["info"] = self._infos
+        else:
+            columns["done"] = self._dones.to_array()
+            columns.update(
+                {name: column.to_array() for name, column in self._fields.items()}
+            )
+        return pd.DataFrame(columns)
 
 
 class ActionLoop:
     """A class that represents different post-training action loops for agents."""
 
-    def __init__(self, env, agent, filename=None, episode_count=None):
+    def __init__(
+        self,
+        env,
+        agent,
+        filename=None,
+        episode_count=None,
+        info_fields: Optional[Sequence[str]] = None,
+        output_directory: Optional[Union[str, Path]] = None,
+        keep_results: bool = True,
+        render_workers: Optional[int] = None,
+    ):
         """
         Initialise Class.
 
@@ -34,6 +167,14 @@ class ActionLoop:
             agent: The agent to run in the environment
             filename: The save name for the action lop
             episode_count: The number of episodes to go through
+            info_fields: The entries of the info of each step to log as columns, rather than the whole info dict,
+                see ``EpisodeLog``
+            output_directory: A directory to write the log of each episode to as a CSV file once it ends, without
+                the info dicts
+            keep_results: Whether to keep the log of each episode to return at the end of the loop. Turning this
+                off along with setting an ``output_directory`` keeps the memory used by long evaluations flat
+            render_workers: The number of processes drawing the frames of a saved GIF or WebM. Defaults to the
+                number of CPUs, with 0 drawing them in this process
         """
         if filename is None:
             filename = uuid4()
@@ -41,6 +182,25 @@ class ActionLoop:
         self.agent = agent
         self.filename = filename
         self.episode_count = episode_count
+        self.episode_log = EpisodeLog(info_fields)
+        self.output_directory = output_directory
+        self.keep_results = keep_results
+        self.render_workers = render_workers
+
+    def _end_episode(self, episode: int, complete_results: List[pd.DataFrame]):
+        """Turn the log of an episode into a DataFrame, writing and keeping it as configured, and clear the log."""
+        results = self.episode_log.to_dataframe()
+        self.episode_log.clear()
+        if self.output_directory is not None:
+            os.makedirs(self.output_directory, exist_ok=True)
+            results.drop(columns="info", errors="ignore").to_csv(
+                os.path.join(
+                    self.output_directory, f"{self.filename}_episode_{episode}.csv"
+                ),
+                index=False,
+            )
+        if self.keep_results:
+            complete_results.append(results)
 
     def gif_action_loop(
         self,
@@ -68,108 +228,55 @@ class ActionLoop:
             gif_output_directory: Directory where the GIF will be output
             webm_output_directory: Directory where the WEBM file will be output
         """
-        gif_uuid = str(uuid4())
+        frame_executor = None
+        if save_gif or save_webm:
+            frame_executor = create_frame_executor(self.render_workers)
 
         complete_results = []
-        for i in range(self.episode_count):
-            results = pd.DataFrame(
-                columns=["action", "rewards", "info"]
-            )  # temporary log to satisfy repeatability tests until logging can be full implemented
-            obs = self.env.reset()
-            done = False
-            frame_names = []
-            current_image = 0
-
-            while not done:
-                # gets the agents prediction for the best next action to take
-                action, _states = self.agent.predict(obs, deterministic=deterministic)
-
-                # TODO: setup logging properly here
-                # logging.info(f'Blue Agent Action: {action}')
-                # step the env
-                obs, rewards, done, info = self.env.step(action)
-
-                results.loc[len(results.index)] = [action, rewards, info]
-
-                # TODO: setup logging properly here
-                # logging.info(f'Observations: {obs.flatten()} Rewards:{rewards} Done:{done}')
-                # self.env.render(episode=i+1)
+        try:
+            for i in range(self.episode_count):
+                self.episode_log.clear()
+                obs = self.env.reset()
+                done = False
 
+                recorder = None
                 if save_gif or save_webm:
-                    current_name = os.path.join(
-                        APP_IMAGES_DIR, f"{gif_uuid}_{current_image}.png"
+                    capture = self._get_frame_capture(*args, **kwargs)
+                    recorder = self._get_frame_recorder(
+                        save_gif,
+                        save_webm,
+                        gif_output_directory,
+                        webm_output_directory,
+                        frame_executor,
                     )
-                    current_image += 1
 
-                    # set the size of the gif image
-                    self._get_render_figure(current_name)
+                with recorder or contextlib.nullcontext():
+                    while not done:
+                        # gets the agents prediction for the best next action to take
+                        action, _states = self.agent.predict(
+                            obs, deterministic=deterministic
+                        )
 
-                    frame_names.append(current_name)
+                        # TODO: setup logging properly here
+                        # logging.info(f'Blue Agent Action: {action}')
+                        # step the env
+                        obs, rewards, done, info = self.env.step(action)
 
-                if render_network:
-                    self.env.render(*args, **kwargs)
+                        self.episode_log.append(action, rewards, done, info)
 
-            # get current time
-            string_time = datetime.now().strftime("%d-%m-%Y_%H-%M")
+                        if recorder is not None:
+                            # only the state of the network is captured here, it is drawn by the frame executor
+                            recorder.add_frame(
+                                capture.layout, self._capture_frame(capture)
+                            )
 
-            generate_render_thread = []
+                        if render_network:
+                            self.env.render(*args, **kwargs)
 
-            def natural_sort_key(s, _nsre=re.compile("([0-9]+)")):
-                return [
-                    int(text) if text.isdigit() else text.lower()
-                    for text in _nsre.split(s)
-                ]
-
-            frame_names = sorted(frame_names, key=natural_sort_key)
-
-            if save_gif:
-                if gif_output_directory is None:
-                    gif_output_directory = IMAGES_DIR
-                gif_path = os.path.join(
-                    gif_output_directory,
-                    f"{self.filename}_{string_time}_{self.episode_count}.gif",
-                )
-
-                # gif generator thread
-                gif_thread = Thread(
-                    target=self.generate_gif,
-                    args=(
-                        gif_path,
-                        frame_names,
-                    ),
-                )
-
-                generate_render_thread.append(gif_thread)
-
-            if save_webm:
-                if webm_output_directory is None:
-                    webm_output_directory = VIDEOS_DIR
-                webm_path = os.path.join(
-                    webm_output_directory,
-                    f"{self.filename}_{string_time}_{self.episode_count}.webm",
-                )
-
-                # video generator thread
-                video_thread = Thread(
-                    target=self.generate_webm,
-                    args=(
-                        webm_path,
-                        frame_names,
-                    ),
-                )
-
-                generate_render_thread.append(video_thread)
-
-            # if any threads were added to generate threads list, run them
-            if len(generate_render_thread):
-                for thread in generate_render_thread:
-                    thread.start()
-                    thread.join()
-
-                # clean up once done
-                self.render_cleanup(frame_names)
-
-            complete_results.append(results)
+                self._end_episode(i, complete_results)
+        finally:
+            if frame_executor is not None:
+                frame_executor.shutdown()
 
         if not prompt_to_close:
             self.env.close()
@@ -179,9 +286,7 @@ class ActionLoop:
         """Indefinitely act within the environment using a trained agent."""
         complete_results = []
         for i in range(self.episode_count):
-            results = pd.DataFrame(
-                columns=["action", "rewards", "info"]
-            )  # temporary log to satisfy repeatability tests until logging can be full implemented
+            self.episode_log.clear()
             obs = self.env.reset()
             done = False
             while not done:
@@ -189,13 +294,15 @@ class ActionLoop:
                 # TODO: setup logging properly here
                 # logging.info(f'Blue Agent Action: {action}')
                 obs, rewards, done, info = self.env.step(action)
-                results.loc[len(results.index)] = [action, rewards, info]
-            complete_results.append(results)
+                self.episode_log.append(action, rewards, done, info)
+            self._end_episode(i, complete_results)
         return complete_results
 
     def random_action_loop(self, deterministic=False):
         """Indefinitely act within the environment taking random actions."""
+        complete_results = []
         for i in range(self.episode_count):
+            self.episode_log.clear()
             obs = self.env.reset()
             done = False
             reward = 0
@@ -204,45 +311,113 @@ class ActionLoop:
                     obs, reward, done, deterministic=deterministic
                 )
                 ob, reward, done, ep_history = self.env.step(action)
+                self.episode_log.append(action, reward, done, ep_history)
                 if done:
                     break
+            self._end_episode(i, complete_results)
+        return complete_results
 
-    @classmethod
-    def _get_render_figure(cls, gif_name: string) -> Any:
-        fig = plt.gcf()
-        # save the current image
-        plt.savefig(gif_name, bbox_inches="tight", dpi=100)
-
-        return fig
+    def _get_frame_capture(self, *args, **kwargs) -> FrameCapture:
+        """Capture the layout of the network of the env, showing what the ``render`` arguments would show."""
+        render_arguments = inspect.signature(self.env.render).bind_partial(
+            *args, **kwargs
+        )
+        network_interface = self.env.network_interface
+        return FrameCapture(
+            network_interface.current_graph,
+            target_node=network_interface.get_target_node(),
+            show_only_blue_view=render_arguments.arguments.get(
+                "show_only_blue_view", False
+            ),
+            show_node_names=render_arguments.arguments.get("show_node_names", False),
+        )
+
+    def _capture_frame(self, capture: FrameCapture) -> FrameDescriptor:
+        """Capture the current state of the env, the same as it is drawn by ``render``."""
+        network_interface = self.env.network_interface
+        if capture.layout.show_only_blue_view:
+            attacks = network_interface.detected_attacks
+        else:
+            attacks = network_interface.true_attacks
+        return capture.capture(
+            self.env.current_duration,
+            round(self.env.current_reward, 2),
+            attacks,
+            self.env.made_safe_nodes,
+            network_interface.topology_version,
+        )
+
+    def _get_frame_recorder(
+        self,
+        save_gif: bool,
+        save_webm: bool,
+        gif_output_directory: Optional[Path],
+        webm_output_directory: Optional[Path],
+        frame_executor: Optional[Executor],
+    ) -> FrameRecorder:
+        """Open a recorder writing the frames of an episode to a GIF and/or WebM file."""
+        # get current time
+        string_time = datetime.now().strftime("%d-%m-%Y_%H-%M")
+        gif_path = webm_path = None
+        if save_gif:
+            if gif_output_directory is None:
+                gif_output_directory = IMAGES_DIR
+            gif_path = os.path.join(
+                gif_output_directory,
+                f"{self.filename}_{string_time}_{self.episode_count}.gif",
+            )
+        if save_webm:
+            if webm_output_directory is None:
+                webm_output_directory = VIDEOS_DIR
+            webm_path = os.path.join(
+                webm_output_directory,
+                f"{self.filename}_{string_time}_{self.episode_count}.webm",
+            )
+        return FrameRecorder(gif_path, webm_path, executor=frame_executor)
+
+    @staticmethod
+    def _warn_deprecated(name: str):
+        warnings.warn(
+            DeprecationWarning(
+                f"ActionLoop.{name} is deprecated and will be removed in a future release. gif_action_loop "
+                f"no longer saves frames as image files, it streams them to the GIF and WebM with a FrameRecorder."
+            ),
+            stacklevel=3,
+        )
 
     def generate_gif(self, gif_path, frame_names):
-        """Generate GIF from images."""
-        # TODO: Full docstring.
+        """
+        Generate a GIF from image files, skipping the first and holding the last.
+
+        Deprecated, ``gif_action_loop`` writes GIFs with a ``FrameRecorder``.
+        """
+        self._warn_deprecated("generate_gif")
         with imageio.get_writer(gif_path, mode="I") as writer:
-            # create a gif from the images
-            for frame_num, filename in enumerate(frame_names):
-                # skip first frame because it is empty
-                if filename == frame_names[0]:
-                    continue
-                # read image
+            image = None
+            for filename in frame_names[1:]:
                 image = imageio.imread(filename)
-                # add image to GIF
                 writer.append_data(image)
-
-                # if the last frame, add more of it so the result can be seen longer
-                if frame_num == len(frame_names) - 1:
-                    for _ in range(10):
-                        writer.append_data(image)
+            if image is not None:
+                for _ in range(HOLD_LAST_FRAME):
+                    writer.append_data(image)
 
     def generate_webm(self, webm_path, frame_names):
-        """Create webm from image files."""
-        # TODO: Full docstring.
-        clip = mp.ImageSequenceClip(frame_names[1:], fps=5)
-        clip.write_gif(webm_path, program="ffmpeg")
+        """
+        Generate a WebM from image files, skipping the first.
+
+        Deprecated, ``gif_action_loop`` writes WebMs with a ``FrameRecorder``.
+        """
+        self._warn_deprecated("generate_webm")
+        with get_webm_writer(webm_path, FRAME_RATE) as writer:
+            for filename in frame_names[1:]:
+                writer.append_data(imageio.imread(filename))
 
     def render_cleanup(self, frame_names):
-        """Delete the frames image files."""
-        # TODO: Full docstring.
-        # delete images
+        """
+        Delete the frames image files.
+
+        Deprecated, ``gif_action_loop`` no longer writes any image files.
+        """
+        self._warn_deprecated("render_cleanup")
         for filename in set(frame_names):
             os.remove(filename)
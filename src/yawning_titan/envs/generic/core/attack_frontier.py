@@ -0,0 +1,310 @@
+"""
+An incrementally maintained index of the safe nodes that red can attack from the nodes it has compromised.
+
+Red chooses its targets from the frontier of the compromised part of the
+network: the safe nodes connected to at least one compromised node. Rebuilding
+the frontier from every compromised node and its connections costs O(N + E) on
+every call, and the red agents choose a target several times a turn.
+:class:`AttackFrontier` instead keeps the frontier, and which compromised node
+each frontier node would be attacked from, up to date as the network changes:
+
+- The :class:`~yawning_titan.envs.generic.core.network_interface.NetworkInterface`
+  tells it when it adds or removes a node or an edge of the current graph,
+  which covers isolating and reconnecting nodes and placing deceptive nodes.
+- Changes to the compromised status of the nodes are picked up from the node
+  state store on the next query by comparing it against the statuses the
+  frontier was last updated with, so every way of compromising a node or making
+  it safe is covered while only the nodes that changed are visited.
+
+The frontier nodes are kept in a deterministic order, by an integer rank given
+to every node from the order of their uuids, which is also the order the nodes
+were previously sorted into before a target was chosen.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from logging import getLogger
+from operator import attrgetter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from yawning_titan.networks.node import Node
+
+if TYPE_CHECKING:
+    from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+_LOGGER = getLogger(__name__)
+
+_uuid = attrgetter("uuid")
+
+
+class AttackFrontier:
+    """The safe nodes of the current graph connected to at least one compromised node, kept in rank order."""
+
+    def __init__(self, network_interface: NetworkInterface):
+        """
+        The AttackFrontier constructor.
+
+        The frontier is empty until :meth:`rebuild` is called.
+
+        :param network_interface: The network interface whose current graph the frontier is of.
+        """
+        self.network_interface = network_interface
+        self._rank: Dict[Node, int] = {}
+        self._slot_nodes: Dict[int, Node] = {}
+        self._compromised: np.ndarray = np.zeros(0, dtype=np.int8)
+        self._entry_nodes: List[Node] = []
+        # every compromised node connected to each frontier node and the one it is attacked from
+        self._attackers: Dict[Node, Dict[Node, None]] = {}
+        self._attacker: Dict[Node, Node] = {}
+        # the frontier nodes and their ranks, sorted by rank
+        self._order: List[Node] = []
+        self._order_ranks: List[int] = []
+
+    def __contains__(self, node: Node) -> bool:
+        self.sync()
+        return node in self._attacker
+
+    @property
+    def entry_nodes(self) -> List[Node]:
+        """The entry nodes of the current graph in rank order, as of the last rebuild."""
+        return list(self._entry_nodes)
+
+    def rebuild(self):
+        """
+        Rebuild the frontier from scratch from the current graph.
+
+        Called when the network interface is created and reset, after which the frontier is kept up to date
+        incrementally.
+        """
+        network_interface = self.network_interface
+        graph = network_interface.current_graph
+        order, nodes = graph._get_state_order()
+
+        ranked = {node: None for node in nodes}
+        ranked.update(
+            (node, None) for node in network_interface.available_deceptive_nodes
+        )
+        self._rank = {node: i for i, node in enumerate(sorted(ranked, key=_uuid))}
+
+        self._slot_nodes = dict(zip(order.tolist(), nodes))
+        self._compromised = graph.state_store.true_compromised_status.copy()
+        self._entry_nodes = self.sort_nodes(n for n in nodes if n.entry_node)
+
+        self._attackers = {}
+        self._attacker = {}
+        self._order = []
+        self._order_ranks = []
+        sparse_topology = network_interface.sparse_topology
+        if sparse_topology is not None:
+            # find the whole frontier at once then record every attacking node of each frontier node
+            frontier, attackers = sparse_topology.get_frontier()
+            for node, attacker in zip(frontier, attackers):
+                self._attacker[node] = attacker
+                self._attackers[node] = {
+                    n: None for n in graph.neighbors(node) if self._is_compromised(n)
+                }
+            self._order = self.sort_nodes(frontier)
+            self._order_ranks = [self._rank[n] for n in self._order]
+            return
+        compromised = self._compromised[order].tolist()
+        for node, status in zip(nodes, compromised):
+            if status:
+                for neighbour in graph.neighbors(node):
+                    if not self._is_compromised(neighbour):
+                        self._add_attacker(neighbour, node)
+
+    def sync(self):
+        """Bring the frontier up to date with any changes to the compromised status of the nodes since the last query."""
+        statuses = (
+            self.network_interface.current_graph.state_store.true_compromised_status
+        )
+        if statuses.shape != self._compromised.shape:
+            # the store has grown so its slots may have moved
+            self.rebuild()
+            return
+        changed = np.flatnonzero(statuses != self._compromised)
+        if len(changed) == 0:
+            return
+        for slot, status in zip(changed.tolist(), statuses[changed].tolist()):
+            self._compromised[slot] = status
+            node = self._slot_nodes.get(slot)
+            if node is None:
+                continue
+            if status:
+                self._node_compromised(node)
+            else:
+                self._node_made_safe(node)
+
+    def get_candidates(self) -> List[Node]:
+        """
+        Get the nodes in the frontier.
+
+        :return: A new list of the safe nodes connected to a compromised node, in rank order.
+        """
+        self.sync()
+        return list(self._order)
+
+    def get_targets(self) -> List[Node]:
+        """
+        Get every node red can attack from any of the nodes it has compromised.
+
+        :return: A new list of the frontier nodes and the safe entry nodes, in rank order.
+        """
+        self.sync()
+        targets = list(self._order)
+        ranks = None
+        for node in self._entry_nodes:
+            if node not in self._attacker and not self._is_compromised(node):
+                if ranks is None:
+                    ranks = list(self._order_ranks)
+                rank = self._get_rank(node)
+                i = bisect_left(ranks, rank)
+                ranks.insert(i, rank)
+                targets.insert(i, node)
+        return targets
+
+    def get_attacker(self, node: Node) -> Optional[Node]:
+        """
+        Get the compromised node a frontier node is attacked from.
+
+        When a frontier node is connected to several compromised nodes it is attacked from the one that comes last in
+        the current graph.
+
+        :param node: A node in the frontier.
+        :return: The attacking node, None if the node is not in the frontier.
+        """
+        self.sync()
+        return self._attacker.get(node)
+
+    def sort_nodes(self, nodes: Iterable[Node]) -> List[Node]:
+        """
+        Sort nodes into rank order.
+
+        :param nodes: The nodes of the current graph to sort.
+        :return: A new list of the nodes in rank order.
+        """
+        return sorted(nodes, key=self._get_rank)
+
+    def node_added(self, node: Node):
+        """
+        Add a node that has just been added to the current graph, before any of its edges.
+
+        :param node: The new node.
+        """
+        slot = node.state_index
+        self._slot_nodes[slot] = node
+        if slot < len(self._compromised):
+            # otherwise the store has grown and the frontier is rebuilt on the next query
+            self._compromised[slot] = node.true_compromised_status
+        if node.entry_node:
+            self._entry_nodes = self.sort_nodes(self._entry_nodes + [node])
+
+    def node_removed(self, node: Node):
+        """
+        Remove a node that is about to be removed from the current graph, along with its edges.
+
+        :param node: The node being removed.
+        """
+        for neighbour in list(self.network_interface.current_graph.neighbors(node)):
+            self.edge_removed(node, neighbour)
+        if node in self._attacker:
+            self._remove_from_frontier(node)
+        self._slot_nodes.pop(node.state_index, None)
+        if node in self._entry_nodes:
+            self._entry_nodes.remove(node)
+
+    def edge_added(self, node1: Node, node2: Node):
+        """
+        Update the frontier for an edge that has just been added to the current graph.
+
+        :param node1: The node at one end of the edge.
+        :param node2: The node at the other end of the edge.
+        """
+        compromised1 = self._is_compromised(node1)
+        compromised2 = self._is_compromised(node2)
+        if compromised1 and not compromised2:
+            self._add_attacker(node2, node1)
+        elif compromised2 and not compromised1:
+            self._add_attacker(node1, node2)
+
+    def edge_removed(self, node1: Node, node2: Node):
+        """
+        Update the frontier for an edge that has just been removed from the current graph.
+
+        :param node1: The node at one end of the edge.
+        :param node2: The node at the other end of the edge.
+        """
+        compromised1 = self._is_compromised(node1)
+        compromised2 = self._is_compromised(node2)
+        if compromised1 and not compromised2:
+            self._remove_attacker(node2, node1)
+        elif compromised2 and not compromised1:
+            self._remove_attacker(node1, node2)
+
+    def _is_compromised(self, node: Node) -> bool:
+        """Whether a node was compromised as of the last update of the frontier."""
+        return bool(self._compromised[node.state_index])
+
+    def _get_rank(self, node: Node) -> int:
+        rank = self._rank.get(node)
+        if rank is None:
+            # a node that was not in the network or among the deceptive nodes when the frontier was built
+            _LOGGER.debug(f"Re-ranking the attack frontier to include node {node}.")
+            self._rank[node] = len(self._rank)
+            self._rank = {n: i for i, n in enumerate(sorted(self._rank, key=_uuid))}
+            self._order_ranks = [self._rank[n] for n in self._order]
+            rank = self._rank[node]
+        return rank
+
+    def _node_compromised(self, node: Node):
+        """Update the frontier for a node that has just been compromised."""
+        if node in self._attacker:
+            self._remove_from_frontier(node)
+        for neighbour in self.network_interface.current_graph.neighbors(node):
+            if not self._is_compromised(neighbour):
+                self._add_attacker(neighbour, node)
+
+    def _node_made_safe(self, node: Node):
+        """Update the frontier for a node that has just been made safe."""
+        for neighbour in self.network_interface.current_graph.neighbors(node):
+            if self._is_compromised(neighbour):
+                self._add_attacker(node, neighbour)
+            else:
+                self._remove_attacker(neighbour, node)
+
+    def _add_attacker(self, node: Node, attacker: Node):
+        """Record that a safe node can be attacked from a compromised node."""
+        attackers = self._attackers.get(node)
+        if attackers is None:
+            self._attackers[node] = {attacker: None}
+            self._attacker[node] = attacker
+            rank = self._get_rank(node)
+            i = bisect_left(self._order_ranks, rank)
+            self._order_ranks.insert(i, rank)
+            self._order.insert(i, node)
+            return
+        attackers[attacker] = None
+        position = self.network_interface._adjacency_position
+        if position[attacker] > position[self._attacker[node]]:
+            self._attacker[node] = attacker
+
+    def _remove_attacker(self, node: Node, attacker: Node):
+        """Record that a safe node can no longer be attacked from a compromised node."""
+        attackers = self._attackers.get(node)
+        if attackers is None or attacker not in attackers:
+            return
+        del attackers[attacker]
+        if not attackers:
+            self._remove_from_frontier(node)
+        elif self._attacker[node] == attacker:
+            position = self.network_interface._adjacency_position
+            self._attacker[node] = max(attackers, key=position.__getitem__)
+
+    def _remove_from_frontier(self, node: Node):
+        del self._attackers[node]
+        del self._attacker[node]
+        i = bisect_left(self._order_ranks, self._rank[node])
+        del self._order_ranks[i]
+        del self._order[i]
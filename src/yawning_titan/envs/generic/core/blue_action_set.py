@@ -86,11 +86,11 @@ class BlueActionSet:
 
         # Settings change the effects of making a node safe
         if (
-            self.network_interface.game_mode.blue.action_set.make_node_safe.increases_vulnerability.value
+            self.network_interface.rules.blue_action_set_make_node_safe_increases_vulnerability
         ):
             # Modifies the vulnerability by a set amount (cannot increase it past the limit in the config file)
             change_amount = (
-                self.network_interface.game_mode.blue.action_set.make_node_safe.vulnerability_change.value
+                self.network_interface.rules.blue_action_set_make_node_safe_vulnerability_change
             )
             new_vulnerability_score = change_amount + node.vulnerability_score
             # checks to make sure that the new value does not go out of the range for vulnerability
@@ -101,7 +101,7 @@ class BlueActionSet:
             node.vulnerability_score = new_vulnerability_score
 
         elif (
-            self.network_interface.game_mode.blue.action_set.make_node_safe.gives_random_vulnerability.value
+            self.network_interface.rules.blue_action_set_make_node_safe_gives_random_vulnerability
         ):
             # Gives the node a new random vulnerability
             new_vulnerability_score = round(random.uniform(lower, upper), 2)
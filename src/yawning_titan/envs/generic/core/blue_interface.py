@@ -22,36 +22,36 @@ class BlueInterface(BlueActionSet):
         action_number = 0
         self.deceptive_actions = 0
         # all of the actions that blue can do
-        if self.network_interface.game_mode.blue.action_set.reduce_vulnerability.value:
+        if self.network_interface.rules.blue_action_set_reduce_vulnerability:
             # Checks if the action is enabled in the settings file
             self.action_dict[action_number] = self.reduce_node_vulnerability
             action_number += 1
-        if self.network_interface.game_mode.blue.action_set.restore_node.value:
+        if self.network_interface.rules.blue_action_set_restore_node:
             self.action_dict[action_number] = self.restore_node
             action_number += 1
-        if self.network_interface.game_mode.blue.action_set.make_node_safe.use.value:
+        if self.network_interface.rules.blue_action_set_make_node_safe_use:
             self.action_dict[action_number] = self.make_safe_node
             action_number += 1
-        if self.network_interface.game_mode.blue.action_set.isolate_node.value:
+        if self.network_interface.rules.blue_action_set_isolate_node:
             self.action_dict[action_number] = self.isolate_node
             action_number += 1
-        if self.network_interface.game_mode.blue.action_set.reconnect_node.value:
+        if self.network_interface.rules.blue_action_set_reconnect_node:
             self.action_dict[action_number] = self.reconnect_node
             action_number += 1
 
         # deceptive actions -> since the number of edges is not equal to the number of nodes this has to be done
         # separately
-        if self.network_interface.game_mode.blue.action_set.deceptive_nodes.use.value:
+        if self.network_interface.rules.blue_action_set_deceptive_nodes_use:
             self.deceptive_actions = self.network_interface.base_graph.number_of_edges()
 
         # global actions (don't apply to a single node)
         self.global_action_dict = {}
         global_action_number = 0
-        if self.network_interface.game_mode.blue.action_set.scan.value:
+        if self.network_interface.rules.blue_action_set_scan:
             # scans all of the nodes in the network
             self.global_action_dict[global_action_number] = self.scan_all_nodes
             global_action_number += 1
-        if self.network_interface.game_mode.blue.action_set.do_nothing.value:
+        if self.network_interface.rules.blue_action_set_do_nothing:
             # does nothing
             self.global_action_dict[global_action_number] = self.do_nothing
             global_action_number += 1
@@ -2,44 +2,124 @@ from __future__ import annotations
 
 import copy
 import itertools
-import json
 import math
 import random
-from collections import defaultdict
-from datetime import datetime
 from logging import getLogger
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Final, List, Optional, Tuple, Union
 
 import networkx as nx
 import numpy as np
 
+from yawning_titan.envs.generic.core.attack_frontier import AttackFrontier
+from yawning_titan.envs.generic.core.observation_buffer import (
+    ENTRY_NODES,
+    HIGH_VALUE_NODES,
+    NEIGHBOURHOOD_FEATURES,
+    NODE_CONNECTIONS,
+    TARGET_NODE,
+    ObservationBuffer,
+)
+from yawning_titan.envs.generic.core.sparse_topology import SparseTopology
+from yawning_titan.game_modes.compiled_rules import CompiledRules
 from yawning_titan.game_modes.game_mode import GameMode
 from yawning_titan.networks.network import Network
 from yawning_titan.networks.node import Node
+from yawning_titan.networks.node_state import STATE_FIELDS, NodeStateStore
 
 _LOGGER = getLogger(__name__)
 
+TOPOLOGY_BACKENDS: Final[Tuple[str, ...]] = ("networkx", "sparse")
+"""The supported ways of answering neighbour queries on the current and base graphs."""
+
+
+def _node_key(node: Node) -> int:
+    return hash(node.uuid)
+
+
+def _edge_key(node1: Node, node2: Node) -> int:
+    if node1.uuid < node2.uuid:
+        return hash((node1.uuid, node2.uuid))
+    return hash((node2.uuid, node1.uuid))
+
+
+def get_topology_hash(graph: nx.Graph) -> int:
+    """
+    Get a hash of the uuids of the nodes and of the pairs of nodes joined by edges in a graph.
+
+    The hash is the exclusive or of a key for each node and each edge, so it can be kept up to date as nodes and
+    edges are added and removed without visiting the rest of the graph, as :attr:`NetworkInterface.topology_hash`
+    is. Unlike :attr:`~yawning_titan.networks.network.Network.structure_hash` it is only stable within one process.
+
+    :param graph: The graph.
+    :return: The hash.
+    """
+    topology_hash = 0
+    for node in graph.nodes:
+        topology_hash ^= _node_key(node)
+    for node1, node2 in graph.edges:
+        topology_hash ^= _edge_key(node1, node2)
+    return topology_hash
+
 
 class NetworkInterface:
     """The primary interface between both red and blue agents and the underlying environment."""
 
-    def __init__(self, game_mode: GameMode, network: Network):
+    def __init__(
+        self,
+        game_mode: GameMode,
+        network: Network,
+        reset_from_snapshot: bool = True,
+        state_store: Optional[NodeStateStore] = None,
+        topology_backend: str = "networkx",
+    ):
         """
         Initialise the Network Interface and initialises all the necessary components.
 
         :param game_mode: the :class:`~yawning_titan.game_modes.game_mode.GameMode` that defines the abilities of the agents.
         :param network: the :class:`~yawning_titan.networks.network.Network` that defines the network within which the agents act.
+        :param reset_from_snapshot: If True, `reset` restores the graphs in place from a snapshot of their initial state.
+            If False, the graphs are replaced with deep copies of the initial network on every reset.
+        :param state_store: An optional :class:`~yawning_titan.networks.node_state.NodeStateStore` to hold the node
+            state of the current graph in, e.g. a row of a :class:`~yawning_titan.networks.node_state.NodeStateStack`.
+            It needs at least `get_state_store_capacity` slots. If not given a new store is created.
+        :param topology_backend: How neighbour queries are answered, one of :data:`TOPOLOGY_BACKENDS`. With
+            ``"sparse"`` they are answered from a :class:`~yawning_titan.envs.generic.core.sparse_topology.SparseTopology`
+            and the dense adjacency matrix is only kept when the observation space includes the node connections.
+
+        :raise ValueError: When ``topology_backend`` isn't supported.
         """
+        if topology_backend not in TOPOLOGY_BACKENDS:
+            msg = f"topology_backend must be one of {TOPOLOGY_BACKENDS}, got '{topology_backend}'."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        self.topology_backend = topology_backend
         # opens the fle the user has specified to be the location of the game_mode
 
         self.game_mode: GameMode = game_mode
+        # the flat values of the game mode read by the step hot path
+        self.rules: CompiledRules = self.game_mode.compiled_rules
         self.current_graph: Network = network
+        self.reset_from_snapshot = reset_from_snapshot
 
-        self.random_seed = self.game_mode.miscellaneous.random_seed.value
+        self.random_seed = self.rules.miscellaneous_random_seed
+        self.random_generator: np.random.Generator = None
+        self.seed_random_generator()
 
         # initialise the base graph
-        self.base_graph = copy.deepcopy(self.current_graph)
-        self.initial_base_graph = copy.deepcopy(self.current_graph)
+        self.base_graph = self.__copy_graph(self.current_graph)
+        if self.reset_from_snapshot:
+            # the current graph is restored in place, so it must not be the network that was passed in
+            self.current_graph = self.__copy_graph(self.current_graph)
+            self.initial_base_graph = None
+            self._initial_snapshot = self.current_graph.snapshot()
+            self._base_snapshot = self.base_graph.snapshot()
+        else:
+            self.initial_base_graph = self.__copy_graph(self.current_graph)
+
+        # back the current graphs node state with contiguous arrays
+        self._state_store = self.current_graph.attach_state_store(
+            self.get_state_store_capacity(), store=state_store
+        )
 
         # initialises the deceptive nodes and their names and amount
         self.initialise_deceptive_nodes()
@@ -55,10 +135,14 @@ class NetworkInterface:
 
         self.red_current_location: Node = None
 
-        # a list of all of the failed attacks that occurred on this turn
-        self.true_attacks = []
-        # a list of all the failed attacks that blue has been able to detect
-        self.detected_attacks = []
+        # the chances of blue discovering each kind of attack
+        self.initialise_attack_discovery_chances()
+
+        # the attacks that occurred on this turn and which of them blue has been able to detect
+        self.reset_stored_attacks()
+
+        # placing each deceptive node adds at most one edge, so this bounds the number of edges in an episode
+        self._initial_num_edges = self.current_graph.number_of_edges()
 
         edges_per_node = len(self.current_graph.edges) / (
             2 * len(self.current_graph.nodes)
@@ -66,7 +150,64 @@ class NetworkInterface:
 
         self.connectivity = -math.exp(-0.1 * edges_per_node) + 1
 
-        self.adj_matrix = nx.to_numpy_array(self.current_graph)
+        # the observation is written in place into a single preallocated buffer
+        self.observation_buffer = ObservationBuffer(self)
+
+        # incremented whenever a node or edge of the current graph is added or removed, so that anything derived from
+        # the structure of the current graph can be cached until it next changes
+        self.topology_version = 0
+        # a hash of the nodes and edges of the current graph, kept up to date incrementally (see `get_topology_hash`)
+        self.topology_hash = 0
+        self._target_distances: Optional[Dict[Node, int]] = None
+        self._target_distances_key: Optional[Tuple[int, Node]] = None
+
+        # a persistent adjacency matrix with room for every deceptive node, kept in step with the current graph
+        self._adjacency: Optional[np.ndarray] = None
+        self.__allocate_adjacency()
+        self.reset_adjacency()
+
+        # the topology as sparse index arrays, if used to answer the neighbour queries
+        self.sparse_topology: Optional[SparseTopology] = None
+        if self.topology_backend == "sparse":
+            self.sparse_topology = SparseTopology(
+                self,
+                self._base_snapshot.edge_index if self.reset_from_snapshot else None,
+            )
+
+        # the safe nodes red can attack from the nodes it has compromised, kept up to date as the network changes
+        self.attack_frontier = AttackFrontier(self)
+        self.attack_frontier.rebuild()
+
+    @property
+    def adj_matrix(self) -> np.ndarray:
+        """
+        The adjacency matrix of the current graph.
+
+        This is a view onto the persistent adjacency buffer, so it reflects any later changes to the current graph.
+        When the sparse topology backend does not keep an adjacency buffer a new matrix is built instead.
+        """
+        if self._adjacency is None:
+            return self.sparse_topology.to_current_matrix(self._adjacency_nodes)
+        n = len(self._adjacency_nodes)
+        return self._adjacency[:n, :n]
+
+    @property
+    def true_attacks(self) -> List[List[Node]]:
+        """A list of the `[attacking_node, target_node]` pairs of all the attacks that occurred on this turn."""
+        return [
+            list(attack) for attack in zip(self._attacking_nodes, self._target_nodes)
+        ]
+
+    @property
+    def detected_attacks(self) -> List[List[Node]]:
+        """A list of the `[attacking_node, target_node]` pairs of the attacks on this turn that blue has detected."""
+        detected = self._attack_detected.tolist()
+        return [
+            list(attack)
+            for attack in itertools.compress(
+                zip(self._attacking_nodes, self._target_nodes), detected
+            )
+        ]
 
     """
     GETTERS
@@ -75,16 +216,22 @@ class NetworkInterface:
     """
 
     def get_shortest_distances_to_target(self, nodes: List[Node]) -> List[float]:
-        """Get a list of the shortest distances from each node to the target."""
-        # TODO: add option where only shortest distance provided
+        """
+        Get a list of the shortest distances from each node to the target.
 
-        dist_matrix = dict(
-            nx.single_source_shortest_path_length(
-                self.current_graph, self.get_target_node()
+        The distances from the target to every node are found with a single breadth first search, which is cached
+        until the topology of the current graph or the target node changes.
+        """
+        # TODO: add option where only shortest distance provided
+        target = self.get_target_node()
+        key = (self.topology_version, target)
+        if self._target_distances_key != key:
+            self._target_distances = dict(
+                nx.single_source_shortest_path_length(self.current_graph, target)
             )
-        )
-        distances = [dist_matrix[n] for n in nodes]
-        return distances
+            self._target_distances_key = key
+        distances = self._target_distances
+        return [distances[n] for n in nodes]
 
     def get_target_node(self) -> Node:
         """
@@ -94,7 +241,7 @@ class NetworkInterface:
             The target node if it exists
         """
         return self.current_graph.get_node_from_name(
-            self.game_mode.red.target_mechanism.target_specific_node.target.value
+            self.rules.red_target_mechanism_target_specific_node_target
         )
 
     def get_total_num_nodes(self) -> int:
@@ -136,6 +283,8 @@ class NetworkInterface:
         Returns:
             A list of nodes
         """
+        if self.sparse_topology is not None:
+            return self.sparse_topology.get_current_neighbours(node)
         return [
             self.current_graph.get_node_from_uuid(n.uuid)
             for n in self.current_graph.neighbors(node)
@@ -151,6 +300,8 @@ class NetworkInterface:
         Returns:
             A list of nodes
         """
+        if self.sparse_topology is not None:
+            return self.sparse_topology.get_base_neighbours(node)
         return [
             self.base_graph.get_node_from_uuid(n.uuid)
             for n in self.base_graph.neighbors(node)
@@ -178,6 +329,13 @@ class NetworkInterface:
         Returns:
             A dictionary of attributes
         """
+        if key in STATE_FIELDS:
+            # read the whole attribute column from the node state store at once
+            values = self.current_graph.get_state_array(key).tolist()
+            nodes = self.current_graph.get_nodes()
+            if key_by_uuid:
+                return dict(zip((n.uuid for n in nodes), values))
+            return dict(zip(nodes, values))
         if key_by_uuid:
             return {n.uuid: getattr(n, key) for n in self.current_graph.get_nodes()}
         return {n: getattr(n, key) for n in self.current_graph.get_nodes()}
@@ -202,154 +360,42 @@ class NetworkInterface:
         """Get a dictionary of node positions."""
         return self.get_attributes_from_key("node_position", key_by_uuid=False)
 
+    def get_state_store_capacity(self) -> int:
+        """Get the number of node state slots needed to hold every node including all deceptive nodes."""
+        return (
+            self.current_graph.number_of_nodes()
+            + self.rules.blue_action_set_deceptive_nodes_max_number
+        )
+
+    def get_max_num_edges(self) -> int:
+        """Get the most edges the current graph can have, including an edge for every deceptive node."""
+        return (
+            self._initial_num_edges
+            + self.rules.blue_action_set_deceptive_nodes_max_number
+        )
+
     def get_number_unused_deceptive_nodes(self):
         """Get the current number of unused deceptive nodes."""
         return (
-            self.game_mode.blue.action_set.deceptive_nodes.max_number.value
+            self.rules.blue_action_set_deceptive_nodes_max_number
             - self.current_deceptive_nodes
         )
 
-    def get_current_observation(self) -> np.array:
+    def get_current_observation(self, copy: bool = True) -> np.array:
         """
         Get the current observation of the environment.
 
         The composition of the observation space is based on the configuration file used for the scenario.
 
+        :param copy: If True a copy of the observation is returned. If False the observation buffer itself is
+            returned, which is overwritten by the next call.
+
         Returns:
             numpy array containing the above details
         """
-        # number of spaces open for deceptive nodes
-        open_spaces = self.get_number_unused_deceptive_nodes()
-
-        # Builds the observation space using multiple different metrics from the env
-
-        # Gets the adj matrix for the current graph
-        node_connections = []
-
-        # Gets the isolation states for each node
-        isolated_state = []
-        if self.game_mode.observation_space.node_connections.value:
-            node_connections = self.adj_matrix
-            # pads the array to account for any missing deceptive nodes that may not have been placed yet
-            node_connections = np.pad(node_connections, (0, open_spaces), "constant")
-
-            # array used to keep track of which nodes are being isolated
-            isolated_state = np.asarray(
-                list(self.get_attributes_from_key("isolated").values())
-            ).astype(int)
-
-            # pad array to account for deceptive nodes
-            isolated_state = np.pad(isolated_state, (0, open_spaces), "constant")
-
-        # Gets the current safe/compromised status of all of the nodes
-        compromised_state = []
-        if self.game_mode.observation_space.compromised_status.value:
-            compromised_state = np.asarray(
-                list(
-                    self.get_attributes_from_key(
-                        "blue_view_compromised_status"
-                    ).values()
-                )
-            )
-            compromised_state = np.pad(compromised_state, (0, open_spaces), "constant")
-        # Gets the vulnerability score of all of the nodes
-        vulnerabilities = []
-        if self.game_mode.observation_space.vulnerabilities.value:
-            vulnerabilities = np.asarray(
-                list(self.get_attributes_from_key("vulnerability_score").values())
-            )
-            vulnerabilities = np.pad(vulnerabilities, (0, open_spaces), "constant")
-
-        # Gets the average vulnerability of all the nodes
-        avg_vuln = []
-        if self.game_mode.observation_space.average_vulnerability.value:
-            all_vuln = self.get_attributes_from_key("vulnerability_score").values()
-            avg_vuln = [sum(all_vuln) / len(all_vuln)]
-
-        # Gets the connectivity of the graph, closer to 1 means more edges per node
-        connectivity = []
-        if self.game_mode.observation_space.graph_connectivity.value:
-            connectivity = [self.connectivity]
-
-        # Gets the attacks that the blue agent detected
-        attacking_nodes = []
-        attacked_nodes = []
-        if (
-            self.game_mode.observation_space.attacking_nodes.value
-            or self.game_mode.observation_space.attacked_nodes.value
-        ):
-            attacking = {n: 0 for n in self.current_graph.get_nodes()}
-            attacked = {n: 0 for n in self.current_graph.get_nodes()}
-            for node_set in self.detected_attacks:
-                if node_set[0] is not None:
-                    # extract the attacking node (as long as the attacking node is not None)
-                    attacking[node_set[0]] = 1
-                # extract the node that was attacked
-                attacked[node_set[1]] = 1
-            if self.game_mode.observation_space.attacking_nodes.value:
-                # attacking nodes
-                attacking_nodes = list(attacking.values())
-                attacking_nodes = np.pad(attacking_nodes, (0, open_spaces), "constant")
-            if self.game_mode.observation_space.attacked_nodes.value:
-                # nodes attacked
-                attacked_nodes = list(attacked.values())
-                attacked_nodes = np.pad(attacked_nodes, (0, open_spaces), "constant")
-
-        # Gets the locations of any special nodes in the network (entry nodes and high value nodes)
-        entry_nodes = []
-        nodes = []
-        target_nodes = []
-
-        if self.game_mode.observation_space.special_nodes.value:
-            # gets the entry nodes
-            entry_nodes = {n: 0 for n in self.current_graph.get_nodes()}
-            for n in self.current_graph.entry_nodes:
-                entry_nodes[n] = 1
-            entry_nodes = list(entry_nodes.values())
-            entry_nodes = np.pad(entry_nodes, (0, open_spaces), "constant")
-
-            if self.game_mode.game_rules.blue_loss_condition.target_node_lost.value:
-                # gets the target node
-                target_nodes = {n: 0 for n in self.current_graph.get_nodes()}
-                target_nodes[self.get_target_node()] = 1
-                target_nodes = list(target_nodes.values())
-                target_nodes = np.pad(target_nodes, (0, open_spaces), "constant")
-
-            if self.game_mode.game_rules.blue_loss_condition.high_value_node_lost.value:
-                # gets the high value node nodes
-                nodes = {n: 0 for n in self.current_graph.get_nodes()}
-
-                # set high value nodes to 1
-                for node in self.current_graph.high_value_nodes:
-                    nodes[node] = 1
-
-                nodes = list(nodes.values())
-                nodes = np.pad(nodes, (0, open_spaces), "constant")
-
-        # gets the skill of the red agent
-        skill = []
-        if self.game_mode.observation_space.red_agent_skill.value:
-            skill = [self.game_mode.red.agent_attack.skill.value.value]
-
-        # combines all of the env observations together to create the observation that the blue agent gets
-        obs = np.concatenate(
-            (
-                node_connections,
-                isolated_state,
-                compromised_state,
-                vulnerabilities,
-                avg_vuln,
-                connectivity,
-                attacking_nodes,
-                attacked_nodes,
-                entry_nodes,
-                nodes,
-                target_nodes,
-                skill,
-            ),
-            axis=None,
-            dtype=np.float32,
-        )
+        obs = self.observation_buffer.update()
+        if copy:
+            return obs.copy()
         return obs
 
     def get_observation_size_base(self, with_feather: bool) -> int:
@@ -371,31 +417,36 @@ class NetworkInterface:
 
         # calculate the size of the observation space
         # the size depends on what observations are turned on/off in the config file
-        if self.game_mode.observation_space.node_connections.value:
+        if self.rules.observation_space_node_connections:
             # add node connections to observation size
             observation_size += node_connections
             # add isolated nodes to observation size
             observation_size += max_number_of_nodes
-        if self.game_mode.observation_space.compromised_status.value:
+        if self.rules.observation_space_edge_list:
+            # both ends of every edge
+            observation_size += 2 * self.get_max_num_edges()
+        if self.rules.observation_space_neighbourhood_summary:
+            observation_size += NEIGHBOURHOOD_FEATURES * max_number_of_nodes
+        if self.rules.observation_space_compromised_status:
             observation_size += max_number_of_nodes
-        if self.game_mode.observation_space.vulnerabilities.value:
+        if self.rules.observation_space_vulnerabilities:
             observation_size += max_number_of_nodes
-        if self.game_mode.observation_space.average_vulnerability.value:
+        if self.rules.observation_space_average_vulnerability:
             observation_size += 1
-        if self.game_mode.observation_space.graph_connectivity.value:
+        if self.rules.observation_space_graph_connectivity:
             observation_size += 1
-        if self.game_mode.observation_space.attacking_nodes.value:
+        if self.rules.observation_space_attacking_nodes:
             observation_size += max_number_of_nodes
-        if self.game_mode.observation_space.attacked_nodes.value:
+        if self.rules.observation_space_attacked_nodes:
             observation_size += max_number_of_nodes
-        if self.game_mode.observation_space.special_nodes.value:
+        if self.rules.observation_space_special_nodes:
             observation_size += max_number_of_nodes
-            if self.game_mode.game_rules.blue_loss_condition.target_node_lost.value:
+            if self.rules.game_rules_blue_loss_condition_target_node_lost:
                 observation_size += max_number_of_nodes
-            if self.game_mode.game_rules.blue_loss_condition.high_value_node_lost.value:
+            if self.rules.game_rules_blue_loss_condition_high_value_node_lost:
                 observation_size += max_number_of_nodes
 
-        if self.game_mode.observation_space.red_agent_skill.value:
+        if self.rules.observation_space_red_agent_skill:
             observation_size += 1
         return observation_size
 
@@ -412,7 +463,7 @@ class NetworkInterface:
     def initialise_deceptive_nodes(self):
         """Create a separate list of :class: `~yawning_titan.networks.node.Node` objects take represent deceptive nodes."""
         self.available_deceptive_nodes: List[Node] = []
-        for i in range(self.game_mode.blue.action_set.deceptive_nodes.max_number.value):
+        for i in range(self.rules.blue_action_set_deceptive_nodes_max_number):
             name = "d" + str(i)
             deceptive_node = Node(
                 name=name,
@@ -428,107 +479,213 @@ class NetworkInterface:
         for i, node_pair in enumerate(edges):
             self.edge_map[i] = node_pair
 
+    def initialise_attack_discovery_chances(self):
+        """
+        Look up the chance of blue discovering each kind of attack from the game mode.
+
+        The chances are held as percentage thresholds that a roll between 0 and 99 must be below, ordered by the
+        attack categories used in `update_stored_attacks`. A disabled kind of discovery has a threshold of 0.
+        """
+        rules = self.rules
+        self._attack_discovery_thresholds = np.array(
+            [
+                # successful attacks on deceptive nodes
+                100
+                * rules.blue_attack_discovery_succeeded_attacks_known_compromise_chance_deceptive_node,
+                # failed attacks on deceptive nodes
+                100 * rules.blue_attack_discovery_failed_attacks_chance_deceptive_node,
+                # failed attacks on standard nodes
+                100 * rules.blue_attack_discovery_failed_attacks_chance_standard_node
+                if rules.blue_attack_discovery_failed_attacks_use
+                else 0,
+                # successful attacks on standard nodes that blue knows are compromised (the chance is compared
+                # against the roll without being scaled to a percentage)
+                rules.blue_attack_discovery_succeeded_attacks_known_compromise_chance_standard_node
+                if rules.blue_attack_discovery_succeeded_attacks_known_compromise_use
+                else 0,
+                # successful attacks on standard nodes that blue does not know are compromised
+                100
+                * rules.blue_attack_discovery_succeeded_attacks_unknown_compromise_chance_standard_node
+                if rules.blue_attack_discovery_succeeded_attacks_unknown_compromise_use
+                else 0,
+            ],
+            dtype=float,
+        )
+
     def update_stored_attacks(
         self, attacking_nodes: List[Node], target_nodes: List[Node], success: List[bool]
     ):
         """
         Update this turns current attacks.
 
-        This function collects all of the failed attacks and stores them for the
-        blue agent to use in their action decision
+        This function collects all of the attacks and the subset of them that blue detects and stores them for the
+        blue agent to use in their action decision. The attacks are held as arrays of state store slots, with one
+        detection roll drawn for every attack at once.
 
         Args:
             attacking_nodes: Nodes red has attacked from
             target_nodes: Nodes red is attacking
             success: If the attacks were a success or not
         """
-        # Runs through all the nodes attacked
-        for attacking_node, target_node, success in zip(
-            attacking_nodes, target_nodes, success
-        ):
-            # Deceptive nodes have a different chance of detecting attacks
-            if target_node.deceptive_node:
-                if success:
-                    # chance of seeing the attack if the attack succeeded
-                    if (
-                        100
-                        * self.game_mode.blue.attack_discovery.succeeded_attacks_known_compromise.chance.deceptive_node.value
-                        > random.randint(0, 99)
-                    ):
-                        self.detected_attacks.append([attacking_node, target_node])
-                else:
-                    # chance of seeing the attack if the attack fails
-                    if (
-                        100
-                        * self.game_mode.blue.attack_discovery.failed_attacks.chance.deceptive_node.value
-                        > random.randint(0, 99)
-                    ):
-                        self.detected_attacks.append([attacking_node, target_node])
-            else:
-                # If the attack did not succeed
-                if success is False:
-                    if self.game_mode.blue.attack_discovery.failed_attacks.use.value:
-                        if (
-                            100
-                            * self.game_mode.blue.attack_discovery.failed_attacks.chance.standard_node.value
-                            > random.randint(0, 99)
-                        ):
-                            # Adds the attack to the list of current attacks for this turn
-                            self.detected_attacks.append([attacking_node, target_node])
-                else:
-                    # If the attack succeeded and the blue agent detected it
-                    if target_node.blue_view_compromised_status == 1:
-                        if (
-                            self.game_mode.blue.attack_discovery.succeeded_attacks_known_compromise.use.value
-                        ):
-                            if (
-                                self.game_mode.blue.attack_discovery.succeeded_attacks_known_compromise.chance.standard_node.value
-                                > random.randint(0, 99)
-                            ):
-                                self.detected_attacks.append(
-                                    [attacking_node, target_node]
-                                )
-                    else:
-                        # If the attack succeeded but blue did not detect it
-                        if (
-                            self.game_mode.blue.attack_discovery.succeeded_attacks_unknown_compromise.use.value
-                        ):
-                            if (
-                                100
-                                * self.game_mode.blue.attack_discovery.succeeded_attacks_unknown_compromise.chance.standard_node.value
-                                > random.randint(0, 99)
-                            ):
-                                self.detected_attacks.append(
-                                    [attacking_node, target_node]
-                                )
-            # Also compiles a list of all the attacks even those that blue did not "see"
-            self.true_attacks.append([attacking_node, target_node])
+        # the attacks are paired up in order, as with zip any unpaired trailing entries are ignored
+        n = min(len(attacking_nodes), len(target_nodes), len(success))
+        if n == 0:
+            return
+        attacking_nodes = list(attacking_nodes[:n])
+        target_nodes = list(target_nodes[:n])
+        success = np.array(success[:n], dtype=bool)
+
+        target_slots = self.__get_state_slots(target_nodes)
+        source_slots = self.__get_state_slots(attacking_nodes)
+        store = self.current_graph.state_store
+        if None in target_slots:
+            # the targets are not all backed by the current graphs state store so read their state directly
+            deceptive = np.array([n.deceptive_node for n in target_nodes], dtype=bool)
+            known = np.array(
+                [n.blue_view_compromised_status == 1 for n in target_nodes], dtype=bool
+            )
+            target_slots = [-1 if slot is None else slot for slot in target_slots]
+        else:
+            target_slots = np.array(target_slots, dtype=np.intp)
+            deceptive = store.deceptive_node[target_slots]
+            known = store.blue_view_compromised_status[target_slots] == 1
+        source_slots = [-1 if slot is None else slot for slot in source_slots]
+
+        # Deceptive nodes have a different chance of detecting attacks, for standard nodes it depends on whether the
+        # attack succeeded and if it did whether blue already knows about the compromise
+        category = np.where(
+            deceptive,
+            np.where(success, 0, 1),
+            np.where(~success, 2, np.where(known, 3, 4)),
+        )
+        rolls = self.random_generator.integers(0, 100, size=len(target_nodes))
+        detected = self._attack_discovery_thresholds[category] > rolls
+
+        # Also compiles a list of all the attacks even those that blue did not "see"
+        self._attacking_nodes.extend(attacking_nodes)
+        self._target_nodes.extend(target_nodes)
+        self._attack_sources = np.concatenate(
+            (self._attack_sources, np.array(source_slots, dtype=np.intp))
+        )
+        self._attack_targets = np.concatenate(
+            (self._attack_targets, np.array(target_slots, dtype=np.intp))
+        )
+        self._attack_detected = np.concatenate((self._attack_detected, detected))
+
+    def __get_state_slots(self, nodes: List[Node]) -> List[Optional[int]]:
+        """Get the state store slot of each node, None for nodes (or attacks from outside the network) without one."""
+        return [None if node is None else node.state_index for node in nodes]
 
     """
     RESET METHODS
     The following block of code contains the methods that are used to reset some portion of the network interface
     """
 
+    def reset_adjacency(self, edge_index: Optional[np.ndarray] = None):
+        """
+        Rebuild the adjacency buffer in place from the current graph.
+
+        :param edge_index: An optional (2, n) array of the node indices at either end of every edge in the current
+            graph. If not given the edges are read from the current graph.
+        """
+        self._adjacency_nodes: List[Node] = list(self.current_graph.nodes)
+        self._adjacency_position: Dict[Node, int] = {
+            node: i for i, node in enumerate(self._adjacency_nodes)
+        }
+        self.observation_buffer.mark_dirty(NODE_CONNECTIONS)
+        self.topology_version += 1
+        self.topology_hash = get_topology_hash(self.current_graph)
+        if self._adjacency is None:
+            return
+        self._adjacency.fill(0)
+        edges = edge_index
+        if edges is None:
+            edges = (
+                np.array(
+                    [
+                        (self._adjacency_position[u], self._adjacency_position[v])
+                        for u, v in self.current_graph.edges
+                    ],
+                    dtype=np.intp,
+                )
+                .reshape(-1, 2)
+                .T
+            )
+        self._adjacency[edges[0], edges[1]] = 1
+        self._adjacency[edges[1], edges[0]] = 1
+
+    def __allocate_adjacency(self):
+        """Allocate the adjacency buffer if it is needed and not yet allocated, it is filled by `reset_adjacency`."""
+        if self._adjacency is not None:
+            return
+        if (
+            self.topology_backend == "sparse"
+            and not self.rules.observation_space_node_connections
+        ):
+            return
+        self._adjacency = np.zeros(
+            (self.get_state_store_capacity(), self.get_state_store_capacity())
+        )
+
     def reset_stored_attacks(self):
         """
         Reset the attacks list.
 
         This needs to be called every timestep to ensure that only the current attacks are contained.
         """
-        self.true_attacks = []
-        self.detected_attacks: List[List[Node]] = []
+        self._attacking_nodes: List[Optional[Node]] = []
+        self._target_nodes: List[Node] = []
+        # the state store slots of the attacking (-1 for attacks from outside the network) and target nodes
+        self._attack_sources = np.empty(0, dtype=np.intp)
+        self._attack_targets = np.empty(0, dtype=np.intp)
+        self._attack_detected = np.empty(0, dtype=bool)
+
+    def seed_random_generator(self):
+        """
+        Seed the generator used to resolve batches of attacks.
+
+        The generator is seeded with the game modes random seed if one is set. Otherwise it is seeded from the global
+        numpy random state, so seeding numpy is enough to make the attacks repeatable.
+        """
+        if self.random_seed is not None:
+            seed = self.random_seed
+        else:
+            seed = np.random.randint(0, 2**31 - 1)
+        self.random_generator = np.random.default_rng(seed)
+
+    def refresh_rules(self):
+        """
+        Point `rules` at the current compiled rules of the game mode.
+
+        The compiled rules are immutable, so if the game mode has been edited since they were compiled they are
+        recompiled and replaced here.
+        """
+        self.rules = self.game_mode.compiled_rules
 
     def reset(self):
         """Reset the network back to its default state."""
+        # pick up any edits made to the game mode
+        self.refresh_rules()
+
         # red location
         self.red_current_location = None
 
-        # resets the network graph from the saved base graph
-        self.current_graph = copy.deepcopy(self.initial_base_graph)
-        self.base_graph = copy.deepcopy(self.initial_base_graph)
+        # attacks are resolved from a freshly seeded generator each episode
+        self.seed_random_generator()
 
-        # resets the edge map to match the new current graph
-        self.initialise_edge_map()
+        # resets the network graph from the saved base graph
+        if self.reset_from_snapshot:
+            self.current_graph.restore(self._initial_snapshot)
+            self.base_graph.restore(self._base_snapshot)
+        else:
+            self.current_graph.detach_state_store()
+            self.current_graph = copy.deepcopy(self.initial_base_graph)
+            self.current_graph.attach_state_store(store=self._state_store)
+            self.base_graph = copy.deepcopy(self.initial_base_graph)
+
+        # resets the edge map to match the new current graph, a restored graph has the same edges as before
+        if not self.reset_from_snapshot:
+            self.initialise_edge_map()
         self.initialise_deceptive_nodes()
 
         # pointers and helpers for deceptive nodes are reset
@@ -537,27 +694,51 @@ class NetworkInterface:
         self.reached_max_deceptive_nodes = False
 
         # any previous attacks are removed
+        self.initialise_attack_discovery_chances()
         self.reset_stored_attacks()
 
-        # updates the stored adj matrix
-        self.adj_matrix = nx.to_numpy_array(self.current_graph)
+        # updates the stored adj matrix, a restored graph has the same edges as its snapshot
+        self.__allocate_adjacency()
+        if self.reset_from_snapshot:
+            self.reset_adjacency(self._initial_snapshot.edge_index)
+        else:
+            self.reset_adjacency()
 
-        if self.game_mode.on_reset.choose_new_entry_nodes.value:
+        if self.rules.on_reset_choose_new_entry_nodes:
             self.current_graph.reset_random_entry_nodes()
 
         # set high value nodes
-        if self.game_mode.on_reset.choose_new_high_value_nodes.value:
+        if self.rules.on_reset_choose_new_high_value_nodes:
             self.current_graph.reset_random_high_value_nodes()
 
-        if self.game_mode.on_reset.randomise_vulnerabilities.value:
+        if self.rules.on_reset_randomise_vulnerabilities:
             self.current_graph.reset_random_vulnerabilities()
 
+        if self.sparse_topology is not None:
+            self.sparse_topology.reset()
+
+        # the special nodes may have changed
+        self.observation_buffer.mark_all_dirty()
+        self.attack_frontier.rebuild()
+
     """
     STANDARD METHODS
     The following block of code contains the standard methods that are used to interact with the network interface in
     in some complex way.
     """
 
+    @staticmethod
+    def __copy_graph(graph: Network) -> Network:
+        """
+        Deep copy a graph without a node state store.
+
+        Only the current graph is backed by a state store, the copies used as
+        the base graphs hold their node state on the nodes themselves.
+        """
+        graph_copy = copy.deepcopy(graph)
+        graph_copy.detach_state_store()
+        return graph_copy
+
     def __push_red(self):
         """
         Remove red from the target node and move to a new location.
@@ -625,15 +806,15 @@ class NetworkInterface:
                 )
             elif not node1.isolated:
                 # one node is isolated: add the node to the graph and add a single edge to the non-isolated node
-                self.current_graph.add_node(deceptive_node)
-                self.current_graph.add_edge(node1, deceptive_node)
+                self.__add_node(deceptive_node, self.current_graph)
+                self.__add_edge(node1, deceptive_node, self.current_graph)
             elif not node2.isolated:
                 # one node is isolated: add the node to the graph and add a single edge to the non-isolated node
-                self.current_graph.add_node(deceptive_node)
-                self.current_graph.add_edge(node2, deceptive_node)
+                self.__add_node(deceptive_node, self.current_graph)
+                self.__add_edge(node2, deceptive_node, self.current_graph)
             else:
                 # both nodes are isolated: add the node to the graph
-                self.current_graph.add_node(deceptive_node)
+                self.__add_node(deceptive_node, self.current_graph)
 
             # increase the pointer to point to the next element in the list (the next deceptive node to use)
             self.deceptive_node_pointer += 1
@@ -642,17 +823,15 @@ class NetworkInterface:
                 self.current_deceptive_nodes += 1
             if (
                 self.deceptive_node_pointer
-                == self.game_mode.blue.action_set.deceptive_nodes.max_number.value
+                == self.rules.blue_action_set_deceptive_nodes_max_number
             ):
                 self.deceptive_node_pointer = 0
             if (
                 self.current_deceptive_nodes
-                == self.game_mode.blue.action_set.deceptive_nodes.max_number.value
+                == self.rules.blue_action_set_deceptive_nodes_max_number
             ):
                 self.reached_max_deceptive_nodes = True
-            if (
-                self.game_mode.blue.action_set.deceptive_nodes.new_node_on_relocate.value
-            ):
+            if self.rules.blue_action_set_deceptive_nodes_new_node_on_relocate:
                 # TODO: check if the following can be replaced by a node reset method
                 deceptive_node.vulnerability = (
                     self.current_graph._generate_random_vulnerability()
@@ -666,8 +845,6 @@ class NetworkInterface:
 
             # updates the position of the node based on its new location
             deceptive_node.node_position = self.get_midpoint(node1, node2)
-            # updates the current adjacency matrix
-            self.adj_matrix = nx.to_numpy_array(self.current_graph)
             return deceptive_node
         else:
             # If no edge return false as the deceptive node cannot be put here
@@ -704,9 +881,10 @@ class NetworkInterface:
             # generates the new connections
             new_links = list(itertools.combinations(connections, 2))
             # adds the new edges
-            graph.add_edges_from(new_links)
+            for u, v in new_links:
+                self.__add_edge(u, v, graph)
         # removes the old node
-        graph.remove_node(node)
+        self.__remove_node(node, graph)
 
     def __insert_node_between(
         self, new_node: Node, node1: Node, node2: Node, graph: Network
@@ -723,11 +901,97 @@ class NetworkInterface:
         """
         # removes the old edge between the nodes
         if graph.has_edge(node1, node2):
-            graph.remove_edge(node1, node2)
-        graph.add_node(new_node)
+            self.__remove_edge(node1, node2, graph)
+        self.__add_node(new_node, graph)
         # adds the new node in and updates the edges
-        graph.add_edge(node1, new_node)
-        graph.add_edge(new_node, node2)
+        self.__add_edge(node1, new_node, graph)
+        self.__add_edge(new_node, node2, graph)
+
+    def __add_node(self, node: Node, graph: Network) -> None:
+        """Add a node to a graph, giving it the next row and column of the adjacency matrix if the graph is the current graph."""
+        graph.add_node(node)
+        if self.sparse_topology is not None:
+            self.sparse_topology.node_added(node, graph is self.current_graph)
+        if graph is self.current_graph and node not in self._adjacency_position:
+            self._adjacency_position[node] = len(self._adjacency_nodes)
+            self._adjacency_nodes.append(node)
+            self.observation_buffer.mark_dirty(
+                ENTRY_NODES, HIGH_VALUE_NODES, TARGET_NODE
+            )
+            self.attack_frontier.node_added(node)
+            self.topology_version += 1
+            self.topology_hash ^= _node_key(node)
+
+    def __remove_node(self, node: Node, graph: Network) -> None:
+        """
+        Remove a node from a graph.
+
+        If the graph is the current graph the nodes row and column are removed from the adjacency matrix and the
+        following rows and columns shifted up to match the node order of the graph.
+        """
+        slot = node.state_index
+        if graph is self.current_graph:
+            self.attack_frontier.node_removed(node)
+            # the edges of the node are removed with it
+            for connected in graph.neighbors(node):
+                self.topology_hash ^= _edge_key(node, connected)
+            self.topology_hash ^= _node_key(node)
+        if self.sparse_topology is not None:
+            self.sparse_topology.node_removed(node, graph is self.current_graph)
+        graph.remove_node(node)
+        if graph is self.current_graph:
+            # the slot may be reused, so attacks to or from the node no longer appear in the observation
+            if slot is not None:
+                self._attack_sources[self._attack_sources == slot] = -1
+                self._attack_targets[self._attack_targets == slot] = -1
+            n = len(self._adjacency_nodes)
+            i = self._adjacency_position.pop(node)
+            if self._adjacency is not None:
+                self._adjacency[i : n - 1, :n] = self._adjacency[i + 1 : n, :n]
+                self._adjacency[:n, i : n - 1] = self._adjacency[:n, i + 1 : n]
+                self._adjacency[n - 1, :n] = 0
+                self._adjacency[:n, n - 1] = 0
+            del self._adjacency_nodes[i]
+            for j in range(i, n - 1):
+                self._adjacency_position[self._adjacency_nodes[j]] = j
+            self.observation_buffer.mark_dirty(
+                NODE_CONNECTIONS, ENTRY_NODES, HIGH_VALUE_NODES, TARGET_NODE
+            )
+            self.topology_version += 1
+
+    def __add_edge(self, node1: Node, node2: Node, graph: Network) -> None:
+        """Add an edge to a graph, updating the adjacency matrix if the graph is the current graph."""
+        if graph is self.current_graph:
+            self.__add_node(node1, graph)
+            self.__add_node(node2, graph)
+            self.__set_adjacency(node1, node2, 1)
+            if not graph.has_edge(node1, node2):
+                self.topology_hash ^= _edge_key(node1, node2)
+        elif self.sparse_topology is not None and not graph.has_edge(node1, node2):
+            self.sparse_topology.edge_added(node1, node2)
+        graph.add_edge(node1, node2)
+        if graph is self.current_graph:
+            self.attack_frontier.edge_added(node1, node2)
+
+    def __remove_edge(self, node1: Node, node2: Node, graph: Network) -> None:
+        """Remove an edge from a graph, updating the adjacency matrix if the graph is the current graph."""
+        graph.remove_edge(node1, node2)
+        if graph is self.current_graph:
+            self.__set_adjacency(node1, node2, 0)
+            self.attack_frontier.edge_removed(node1, node2)
+            self.topology_hash ^= _edge_key(node1, node2)
+        elif self.sparse_topology is not None:
+            self.sparse_topology.edge_removed(node1, node2)
+
+    def __set_adjacency(self, node1: Node, node2: Node, value: int) -> None:
+        """Set the symmetric adjacency matrix entries for a pair of nodes."""
+        if self._adjacency is not None:
+            i = self._adjacency_position[node1]
+            j = self._adjacency_position[node2]
+            self._adjacency[i, j] = value
+            self._adjacency[j, i] = value
+        self.observation_buffer.mark_dirty(NODE_CONNECTIONS)
+        self.topology_version += 1
 
     def isolate_node(self, node: Node):
         """
@@ -738,11 +1002,20 @@ class NetworkInterface:
 
         """
         node.isolated = True
-        current_connections = self.get_current_connected_nodes(node)
+        # read from the current graph itself, as the sparse topology already sees the node as isolated
+        current_connections = list(self.current_graph.neighbors(node))
         for cn in current_connections:
             self.current_graph.remove_edge(node, cn)
+            self.attack_frontier.edge_removed(node, cn)
+            self.topology_hash ^= _edge_key(node, cn)
 
-        self.adj_matrix = nx.to_numpy_array(self.current_graph)
+        # an isolated node has no connections so its row and column are cleared
+        if self._adjacency is not None:
+            i = self._adjacency_position[node]
+            self._adjacency[i, :] = 0
+            self._adjacency[:, i] = 0
+        self.observation_buffer.mark_dirty(NODE_CONNECTIONS)
+        self.topology_version += 1
 
     def reconnect_node(self, node: Node):
         """
@@ -759,9 +1032,7 @@ class NetworkInterface:
                 if (
                     not cn.isolated
                 ):  # ensure a different isolated node cannot be reconnected
-                    self.current_graph.add_edge(node, cn)
-
-            self.adj_matrix = nx.to_numpy_array(self.current_graph)
+                    self.__add_edge(node, cn, self.current_graph)
 
     def attack_node(
         self,
@@ -789,23 +1060,112 @@ class NetworkInterface:
         Returns:
             A boolean value that represents if the attack succeeded or not
         """
+        return self.attack_nodes(
+            [node],
+            skill=skill,
+            use_skill=use_skill,
+            use_vulnerability=use_vulnerability,
+            guarantee=guarantee,
+        )["Successes"][0]
+
+    def attack_nodes(
+        self,
+        nodes: List[Node],
+        skill: float = 0.5,
+        use_skill: bool = False,
+        use_vulnerability: bool = False,
+        guarantee: bool = False,
+        attacking_nodes: Optional[List[Optional[Node]]] = None,
+    ) -> Dict[str, list]:
+        """
+        Attack a batch of target nodes.
+
+        Each attack has the same chance to succeed as an individual call to `attack_node`, but all of the random rolls
+        are drawn at once from `random_generator` and the resulting state changes are applied with array masks.
+
+        A node may appear more than once in `nodes`, as happens when it is connected to several attacking nodes. The
+        attempts are then resolved in order and stop at the first one that succeeds; any later attempts on that node
+        are not made and are left out of the returned lists.
+
+        Args:
+            nodes: The nodes to target
+            skill: The skill of the attacker
+            use_skill: A boolean value that is used to determine if skill is used in the calculation to check if the
+                       attacks succeed
+            use_vulnerability: A boolean value that is used to determine if vulnerability is used in the calculation to
+                               check if the attacks succeed
+            guarantee: If True then the attacks automatically succeed
+            attacking_nodes: The node each attack is made from (None for attacks from outside the network). Defaults
+                             to None for every attack
+
+        Returns:
+            A dictionary containing the attacking nodes, the target nodes and the success status of each attack that
+            was made
+        """
+        if attacking_nodes is None:
+            attacking_nodes = [None] * len(nodes)
+        if len(nodes) == 0:
+            return {"Attacking_Nodes": [], "Target_Nodes": [], "Successes": []}
+
+        store = self.current_graph.state_store
+        slots = self.__get_state_slots(nodes)
+        if store is None or None in slots:
+            # the nodes are not all backed by the current graphs state store so fall back to reading them directly
+            store = None
+            keys = np.array([id(node) for node in nodes])
+        else:
+            slots = np.array(slots, dtype=np.intp)
+            keys = slots
+
         # check if vulnerability and score are being used. If they are not then select a value
         if use_vulnerability:
-            defence = 1 - node.vulnerability_score
+            if store is None:
+                vulnerability = np.array([node.vulnerability_score for node in nodes])
+            else:
+                vulnerability = store.vulnerability_score[slots]
+            defence = 1 - vulnerability
         else:
-            defence = 0
+            defence = np.zeros(len(nodes))
         if not use_skill:
             skill = 1
 
-        # calculate the attack score, the higher the score the more likely the attack is to succeed
-        attack_score = ((skill * skill) / (skill + defence)) * 100
-        # check if the attack hits based on the attack score
-        if guarantee or (attack_score > random.randint(0, 100)):
-            node.true_compromised_status = 1
-            self.__immediate_attempt_view_update(node)
-            return True
+        # calculate the attack scores, the higher the score the more likely the attack is to succeed
+        if guarantee:
+            success = np.ones(len(nodes), dtype=bool)
         else:
-            return False
+            attack_score = ((skill * skill) / (skill + defence)) * 100
+            success = attack_score > self.random_generator.integers(
+                0, 101, size=len(nodes)
+            )
+
+        # a node that is attacked more than once is only attacked until the first attack on it succeeds
+        _, first_seen, key_ids = np.unique(keys, return_index=True, return_inverse=True)
+        if len(first_seen) < len(nodes):
+            positions = np.arange(len(nodes))
+            first_success = np.full(len(first_seen), len(nodes))
+            np.minimum.at(first_success, key_ids[success], positions[success])
+            made = positions <= first_success[key_ids]
+        else:
+            made = np.ones(len(nodes), dtype=bool)
+
+        compromised = np.flatnonzero(success & made)
+        self.__immediate_attempt_view_update(
+            [nodes[i] for i in compromised],
+            None if store is None else slots[compromised],
+        )
+
+        made_list = made.tolist()
+        if all(made_list):
+            return {
+                "Attacking_Nodes": list(attacking_nodes),
+                "Target_Nodes": list(nodes),
+                "Successes": success.tolist(),
+            }
+        return {
+            "Attacking_Nodes": list(itertools.compress(attacking_nodes, made_list)),
+            "Target_Nodes": list(itertools.compress(nodes, made_list)),
+            "Successes": success[made].tolist(),
+        }
 
     def make_node_safe(self, node: Node):
         """
@@ -821,32 +1181,41 @@ class NetworkInterface:
             self.__push_red()
         node.blue_knows_intrusion = False
 
-    def __immediate_attempt_view_update(self, node: Node, chance: float = None):
+    def __immediate_attempt_view_update(
+        self, nodes: List[Node], slots: Optional[np.ndarray] = None
+    ):
         """
-        Attempt to update the view of a specific node for the blue agent.
+        Compromise a set of nodes and attempt to update the blue agents view of them.
 
-        There is a chance that intrusions will not be detected.
+        There is a chance that intrusions will not be detected, intrusions into deceptive nodes are always detected.
 
-        :param node: the node to try and update the view for
+        :param nodes: the nodes that have just been compromised
+        :param slots: the state store slots of the nodes in the current graph, if they are backed by its store.
         """
-        if node.blue_knows_intrusion is True:
-            # if we have seen the intrusion before we don't want to forget about it
-            node.blue_view_compromised_status = node.true_compromised_status
-        if node.true_compromised_status == 1:
-            if chance is None and (
-                random.randint(0, 99)
-                < self.game_mode.blue.intrusion_discovery_chance.immediate.standard_node.value
-                * 100
-                or node.deceptive_node
-            ):
-                node.blue_view_compromised_status = node.true_compromised_status
-                # remember this intrusion so we don't forget about it
-                node.blue_knows_intrusion = True
-            elif chance is not None and (random.randint(0, 99) < chance * 100):
-                node.blue_view_compromised_status = node.true_compromised_status
-
-        else:
-            node.blue_view_compromised_status = node.true_compromised_status
+        if len(nodes) == 0:
+            return
+        rolls = self.random_generator.integers(0, 100, size=len(nodes))
+        chance = self.rules.blue_intrusion_discovery_chance_immediate_standard_node
+        if slots is None:
+            for node, roll in zip(nodes, rolls.tolist()):
+                node.true_compromised_status = 1
+                if (
+                    node.blue_knows_intrusion
+                    or roll < chance * 100
+                    or node.deceptive_node
+                ):
+                    # if we have seen the intrusion before we don't want to forget about it
+                    node.blue_view_compromised_status = 1
+                if roll < chance * 100 or node.deceptive_node:
+                    # remember this intrusion so we don't forget about it
+                    node.blue_knows_intrusion = True
+            return
+        store = self.current_graph.state_store
+        store.true_compromised_status[slots] = 1
+        detected = (rolls < chance * 100) | store.deceptive_node[slots]
+        seen = detected | store.blue_knows_intrusion[slots]
+        store.blue_view_compromised_status[slots[seen]] = 1
+        store.blue_knows_intrusion[slots[detected]] = True
 
     def scan_node(self, node: Node) -> None:
         """
@@ -860,57 +1229,8 @@ class NetworkInterface:
         elif node.true_compromised_status == 1:
             if (
                 random.randint(0, 99)
-                < self.game_mode.blue.intrusion_discovery_chance.on_scan.standard_node.value
-                * 100
+                < self.rules.blue_intrusion_discovery_chance_on_scan_standard_node * 100
                 or node.deceptive_node
             ):
                 node.blue_knows_intrusion = True
                 node.blue_view_compromised_status = 1
-
-    def save_json(self, data_dict: dict, ts: int) -> None:
-        """
-        Save a given dictionary to a json file.
-
-        Args:
-            data_dict: Data to save to the json file
-            ts: The current timestamp of the data
-        """
-        now = datetime.now()
-        time_stamp = str(datetime.timestamp(now)).replace(".", "")
-        name = (
-            "yawning_titan/envs/helpers/json_timesteps/output_"
-            + str(ts)
-            + "_"
-            + str(time_stamp)
-            + ".json"
-        )
-        with open(name, "w+") as json_file:
-            json.dump(data_dict, json_file)
-
-    def create_json_time_step(self) -> dict:
-        """
-        Create a dictionary that contains the current state of the environment and returns it.
-
-        Returns:
-            A dictionary containing the node connections, states and vulnerability scores
-        """
-        convert_str = lambda x: str(x) if x is not None else None  # noqa
-
-        # Gets the edges from the networkx object
-        connections = [
-            list(map(convert_str, list(e))) for e in self.current_graph.edges
-        ]
-        # Gets the vulnerability and compromised status
-        node_states = self.get_all_node_compromised_states()
-        node_vulnerabilities = self.get_all_vulnerabilities()
-
-        # Combines the features into a defaultdict and then returns a dictionary
-        combined_features = defaultdict(list)
-
-        for feature in (node_states, node_vulnerabilities):
-            for key, value in feature.items():
-                combined_features[key].append(value)
-
-        current_state_dict = {"edges": connections, "features": combined_features}
-
-        return current_state_dict
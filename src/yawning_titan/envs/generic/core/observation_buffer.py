@@ -0,0 +1,318 @@
+"""
+A preallocated buffer that the blue agent's observation is written into in place.
+
+The observation is made up of segments (the adjacency matrix, the compromised
+status of each node, the entry nodes and so on), each turned on or off by the
+observation space of the game mode. :class:`ObservationBuffer` lays the
+enabled segments out once in a single float32 array and records the slice of
+each, so building an observation is a handful of writes into that array rather
+than allocating, padding and concatenating a new array for every segment.
+
+Segments that cannot change within an episode are only written when they are
+marked dirty, which the :class:`~yawning_titan.envs.generic.core.network_interface.NetworkInterface`
+does on reset and whenever it adds or removes a node. The adjacency matrix,
+the largest segment by far, is likewise only copied in when the interface marks
+it dirty after changing an edge. The edge list and the neighbourhood structure
+behind the neighbourhood summary are rebuilt whenever the topology version of
+the interface changes. The remaining segments are per-node state that changes
+most steps and are rewritten on every update.
+
+The edge list and neighbourhood summary segments hold counts and node indices,
+which are scaled into [0, 1] like the rest of the observation:
+
+- ``edge_list`` is a ``(2, max edges)`` edge index flattened row by row, each
+  end of an edge given as ``(node index + 1) / max nodes``, with 0 for the
+  unused edges. The node index is the position of the node in the current
+  graph, as in the other per-node segments.
+- ``neighbourhood_summary`` is a ``(max nodes, 3)`` matrix flattened row by
+  row. For each node it holds the number of its connections, and the number of
+  the nodes within ``neighbourhood_hops`` connections of it in the base graph
+  that blue believes are compromised and that are isolated, each divided by
+  ``max nodes - 1``. The base graph is used so that isolated nodes still count
+  towards the neighbourhoods they were cut off from.
+"""
+from __future__ import annotations
+
+from logging import getLogger
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+if TYPE_CHECKING:
+    from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+    from yawning_titan.game_modes.compiled_rules import CompiledRules
+
+_LOGGER = getLogger(__name__)
+
+NODE_CONNECTIONS = "node_connections"
+ISOLATED = "isolated"
+EDGE_LIST = "edge_list"
+NEIGHBOURHOOD_SUMMARY = "neighbourhood_summary"
+COMPROMISED_STATUS = "compromised_status"
+VULNERABILITIES = "vulnerabilities"
+AVERAGE_VULNERABILITY = "average_vulnerability"
+GRAPH_CONNECTIVITY = "graph_connectivity"
+ATTACKING_NODES = "attacking_nodes"
+ATTACKED_NODES = "attacked_nodes"
+ENTRY_NODES = "entry_nodes"
+HIGH_VALUE_NODES = "high_value_nodes"
+TARGET_NODE = "target_node"
+RED_AGENT_SKILL = "red_agent_skill"
+
+STATIC_SEGMENTS = frozenset(
+    [GRAPH_CONNECTIVITY, ENTRY_NODES, HIGH_VALUE_NODES, TARGET_NODE, RED_AGENT_SKILL]
+)
+"""The segments that only change on reset or when a node is added or removed."""
+
+NEIGHBOURHOOD_FEATURES = 3
+"""The number of values per node in the neighbourhood summary segment."""
+
+
+class ObservationBuffer:
+    """A single float32 array holding the current observation of a network interface, updated in place."""
+
+    def __init__(self, network_interface: NetworkInterface):
+        """
+        The ObservationBuffer constructor.
+
+        The layout is built on the first update, and rebuilt whenever the rules
+        of the interface or its total number of nodes change.
+
+        :param network_interface: The network interface to observe.
+        """
+        self.network_interface = network_interface
+        self.buffer: np.ndarray = np.zeros(0, dtype=np.float32)
+        """The observation. Updated in place, so copy it to keep an observation past the next update."""
+        self.segments: Dict[str, slice] = {}
+        """The slice of the buffer that each enabled segment occupies, in observation order."""
+        self._rules: Optional[CompiledRules] = None
+        self._max_nodes = 0
+        self._dirty = set()
+        # the topology version the edge list and neighbourhoods were last built at
+        self._topology_version: Optional[int] = None
+        self._degrees: np.ndarray = np.zeros(0)
+        self._neighbourhoods: Optional[sparse.csr_matrix] = None
+
+    def mark_dirty(self, *segments: str):
+        """
+        Mark segments as needing to be rewritten on the next update.
+
+        :param segments: The names of the segments. Segments not in the layout are ignored.
+        """
+        self._dirty.update(s for s in segments if s in self.segments)
+
+    def mark_all_dirty(self):
+        """Mark every segment as needing to be rewritten on the next update."""
+        self._dirty.update(self.segments)
+
+    def _build_layout(self):
+        """Lay out the segments enabled by the rules of the network interface and reallocate the buffer."""
+        network_interface = self.network_interface
+        rules = network_interface.rules
+        max_nodes = network_interface.get_total_num_nodes()
+
+        layout: List[Tuple[str, int]] = []
+        if rules.observation_space_node_connections:
+            layout.append((NODE_CONNECTIONS, network_interface._adjacency.size))
+            layout.append((ISOLATED, max_nodes))
+        if rules.observation_space_edge_list:
+            layout.append((EDGE_LIST, 2 * network_interface.get_max_num_edges()))
+        if rules.observation_space_neighbourhood_summary:
+            layout.append((NEIGHBOURHOOD_SUMMARY, NEIGHBOURHOOD_FEATURES * max_nodes))
+        if rules.observation_space_compromised_status:
+            layout.append((COMPROMISED_STATUS, max_nodes))
+        if rules.observation_space_vulnerabilities:
+            layout.append((VULNERABILITIES, max_nodes))
+        if rules.observation_space_average_vulnerability:
+            layout.append((AVERAGE_VULNERABILITY, 1))
+        if rules.observation_space_graph_connectivity:
+            layout.append((GRAPH_CONNECTIVITY, 1))
+        if rules.observation_space_attacking_nodes:
+            layout.append((ATTACKING_NODES, max_nodes))
+        if rules.observation_space_attacked_nodes:
+            layout.append((ATTACKED_NODES, max_nodes))
+        if rules.observation_space_special_nodes:
+            layout.append((ENTRY_NODES, max_nodes))
+            if rules.game_rules_blue_loss_condition_high_value_node_lost:
+                layout.append((HIGH_VALUE_NODES, max_nodes))
+            if rules.game_rules_blue_loss_condition_target_node_lost:
+                layout.append((TARGET_NODE, max_nodes))
+        if rules.observation_space_red_agent_skill:
+            layout.append((RED_AGENT_SKILL, 1))
+
+        self.segments = {}
+        offset = 0
+        for name, size in layout:
+            self.segments[name] = slice(offset, offset + size)
+            offset += size
+        self.buffer = np.zeros(offset, dtype=np.float32)
+        self._rules = rules
+        self._max_nodes = max_nodes
+        self._dirty = set(self.segments)
+        self._topology_version = None
+        _LOGGER.debug(
+            f"Observation buffer laid out with {len(self.segments)} segments and {offset} values."
+        )
+
+    def _write_nodes(self, name: str, values: np.ndarray):
+        """Write a per-node segment, zeroing the padding for any deceptive nodes not yet placed."""
+        segment = self.buffer[self.segments[name]]
+        segment[: len(values)] = values
+        segment[len(values) :] = 0
+
+    def _write_static(self):
+        """Rewrite the dirty segments that only change on reset or when a node is added or removed."""
+        network_interface = self.network_interface
+        dirty = self._dirty & STATIC_SEGMENTS
+        if not dirty:
+            return
+        if GRAPH_CONNECTIVITY in dirty:
+            self.buffer[
+                self.segments[GRAPH_CONNECTIVITY]
+            ] = network_interface.connectivity
+        if RED_AGENT_SKILL in dirty:
+            self.buffer[
+                self.segments[RED_AGENT_SKILL]
+            ] = network_interface.rules.red_agent_attack_skill_value
+        if dirty & {ENTRY_NODES, HIGH_VALUE_NODES, TARGET_NODE}:
+            nodes = list(network_interface.current_graph.get_nodes())
+            if ENTRY_NODES in dirty:
+                self._write_nodes(ENTRY_NODES, [n.entry_node for n in nodes])
+            if HIGH_VALUE_NODES in dirty:
+                self._write_nodes(HIGH_VALUE_NODES, [n.high_value_node for n in nodes])
+            if TARGET_NODE in dirty:
+                target = network_interface.get_target_node()
+                self._write_nodes(TARGET_NODE, [n is target for n in nodes])
+        self._dirty -= dirty
+
+    def _write_topology(self):
+        """Rebuild the edge list and the neighbourhoods of the nodes from the current and base graphs."""
+        network_interface = self.network_interface
+        position = network_interface._adjacency_position
+        n = len(network_interface._adjacency_nodes)
+        edges = np.array(
+            [
+                (position[u], position[v])
+                for u, v in network_interface.current_graph.edges
+            ],
+            dtype=np.intp,
+        ).reshape(-1, 2)
+
+        if EDGE_LIST in self.segments:
+            segment = self.buffer[self.segments[EDGE_LIST]].reshape(2, -1)
+            max_edges = segment.shape[1]
+            if len(edges) > max_edges:
+                _LOGGER.warning(
+                    f"The current graph has {len(edges)} edges, only the first {max_edges} are observed."
+                )
+                edges = edges[:max_edges]
+            segment[:, : len(edges)] = (edges.T + 1) / self._max_nodes
+            segment[:, len(edges) :] = 0
+
+        if NEIGHBOURHOOD_SUMMARY in self.segments:
+            self._degrees = np.bincount(edges.ravel(), minlength=n)
+            # the base graph holds copies of the nodes, which are equal to the nodes of the current graph
+            base_edges = np.array(
+                [
+                    (position[u], position[v])
+                    for u, v in network_interface.base_graph.edges
+                    if u in position and v in position
+                ],
+                dtype=np.intp,
+            ).reshape(-1, 2)
+            adjacency = sparse.csr_matrix(
+                (
+                    np.ones(2 * len(base_edges)),
+                    (
+                        np.concatenate((base_edges[:, 0], base_edges[:, 1])),
+                        np.concatenate((base_edges[:, 1], base_edges[:, 0])),
+                    ),
+                ),
+                shape=(n, n),
+            )
+            # widen the neighbourhood one connection at a time
+            neighbourhoods = sparse.identity(n, format="csr")
+            for _ in range(
+                network_interface.rules.observation_space_neighbourhood_hops
+            ):
+                neighbourhoods = neighbourhoods + neighbourhoods @ adjacency
+                neighbourhoods.data[:] = 1
+            neighbourhoods.setdiag(0)
+            neighbourhoods.eliminate_zeros()
+            self._neighbourhoods = neighbourhoods
+
+        self._topology_version = network_interface.topology_version
+
+    def update(self) -> np.ndarray:
+        """
+        Bring the buffer up to date with the current state of the network interface.
+
+        :return: The buffer itself, not a copy.
+        """
+        network_interface = self.network_interface
+        if (
+            network_interface.rules is not self._rules
+            or network_interface.get_total_num_nodes() != self._max_nodes
+        ):
+            self._build_layout()
+        segments = self.segments
+        graph = network_interface.current_graph
+
+        self._write_static()
+
+        if NODE_CONNECTIONS in segments:
+            if NODE_CONNECTIONS in self._dirty:
+                # the adjacency buffer already has zeroed rows and columns for any deceptive nodes not yet placed
+                self.buffer[
+                    segments[NODE_CONNECTIONS]
+                ] = network_interface._adjacency.ravel()
+                self._dirty.discard(NODE_CONNECTIONS)
+            self._write_nodes(ISOLATED, graph.get_state_array("isolated"))
+        if (
+            EDGE_LIST in segments or NEIGHBOURHOOD_SUMMARY in segments
+        ) and self._topology_version != network_interface.topology_version:
+            self._write_topology()
+        if NEIGHBOURHOOD_SUMMARY in segments:
+            summary = self.buffer[segments[NEIGHBOURHOOD_SUMMARY]].reshape(
+                -1, NEIGHBOURHOOD_FEATURES
+            )
+            n = len(self._degrees)
+            scale = 1 / max(self._max_nodes - 1, 1)
+            summary[:n, 0] = self._degrees * scale
+            summary[:n, 1] = (
+                self._neighbourhoods
+                @ graph.get_state_array("blue_view_compromised_status")
+            ) * scale
+            summary[:n, 2] = (
+                self._neighbourhoods @ graph.get_state_array("isolated")
+            ) * scale
+            summary[n:] = 0
+        if COMPROMISED_STATUS in segments:
+            self._write_nodes(
+                COMPROMISED_STATUS,
+                graph.get_state_array("blue_view_compromised_status"),
+            )
+        if VULNERABILITIES in segments or AVERAGE_VULNERABILITY in segments:
+            vulnerabilities = graph.get_state_array("vulnerability_score")
+            if VULNERABILITIES in segments:
+                self._write_nodes(VULNERABILITIES, vulnerabilities)
+            if AVERAGE_VULNERABILITY in segments:
+                self.buffer[segments[AVERAGE_VULNERABILITY]] = vulnerabilities.mean()
+
+        if ATTACKING_NODES in segments or ATTACKED_NODES in segments:
+            # scatter the detected attacks onto the state store slots then read them back in graph order
+            order, _ = graph._get_state_order()
+            minlength = graph.state_store.capacity
+            detected = network_interface._attack_detected
+            if ATTACKING_NODES in segments:
+                # attacking nodes (as long as the attacking node is not None)
+                sources = network_interface._attack_sources[detected]
+                attacking = np.bincount(sources[sources >= 0], minlength=minlength)
+                self._write_nodes(ATTACKING_NODES, attacking[order] > 0)
+            if ATTACKED_NODES in segments:
+                targets = network_interface._attack_targets[detected]
+                attacked = np.bincount(targets[targets >= 0], minlength=minlength)
+                self._write_nodes(ATTACKED_NODES, attacked[order] > 0)
+
+        return self.buffer
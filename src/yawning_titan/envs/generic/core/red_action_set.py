@@ -6,8 +6,11 @@ agent that would interfaces with the generic Gym environment uses all of or a su
 All of the methods interact with the network interface to affect the environment.
 """
 import copy
+import itertools
 import random
-from typing import Dict, List, Set, Tuple, Union
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
 
 from yawning_titan.envs.generic.core.network_interface import NetworkInterface
 from yawning_titan.networks.node import Node
@@ -35,12 +38,12 @@ class RedActionSet:
             action_probabilities: The likelihood of those actions being chosen (list)
         """
         self.network_interface = network_interface
-        self.skill = self.network_interface.game_mode.red.agent_attack.skill.value.value
+        self.skill = self.network_interface.rules.red_agent_attack_skill_value
         self.zero_day_amount = (
-            self.network_interface.game_mode.red.action_set.zero_day.start_amount.value
+            self.network_interface.rules.red_action_set_zero_day_start_amount
         )
         self.zero_day_required = (
-            self.network_interface.game_mode.red.action_set.zero_day.days_required.value
+            self.network_interface.rules.red_action_set_zero_day_days_required
         )
 
         self.action_set = action_set
@@ -51,7 +54,7 @@ class RedActionSet:
     def reset(self):
         """Reset red agent episode dependent variables to initial value."""
         self.zero_day_amount = (
-            self.network_interface.game_mode.red.action_set.zero_day.start_amount.value
+            self.network_interface.rules.red_action_set_zero_day_start_amount
         )
         self.zero_day_current_day = 0
 
@@ -63,53 +66,45 @@ class RedActionSet:
             The target node (False if no possible nodes to attack)
             The node attacking the target node (False if no possible nodes to attack)
         """
-        # creates a set of nodes that the red agent could attack
-        possible_to_attack: Set[Node] = set()
-        original_node = {}
-        if (
-            self.network_interface.game_mode.red.agent_attack.attack_from.any_red_node.value
-        ):
-            nodes = self.network_interface.current_graph.get_nodes(
-                filter_true_compromised=True
-            )
-            # runs through the connected nodes and adds the safe nodes to a set of possible nodes to attack
-            for node in nodes:
-                # If red can attack from any compromised node
-                connected = self.network_interface.get_current_connected_nodes(node)
-                for connected_node in connected:
-                    if connected_node.true_compromised_status == 0:
-                        original_node[connected_node] = node
-                        possible_to_attack.add(connected_node)
+        # the nodes that the red agent could attack, kept in a deterministic order
+        frontier = self.network_interface.attack_frontier
+        red_location = self.network_interface.red_current_location
+        if self.network_interface.rules.red_agent_attack_attack_from_any_red_node:
+            # If red can attack from any compromised node then it can attack any safe node connected to one. This
+            # also adds the safe entry nodes, the red agents entrance into the network
+            possible_to_attack = frontier.get_targets()
         elif (
-            self.network_interface.game_mode.red.agent_attack.attack_from.only_main_red_node.value
+            self.network_interface.rules.red_agent_attack_attack_from_only_main_red_node
+            and red_location is not None
         ):
             # If red can only attack from the central red node
-            if self.network_interface.red_current_location is not None:
-                connected = self.network_interface.get_current_connected_nodes(
-                    self.network_interface.red_current_location
-                )
-                for node in connected:
-                    if node.true_compromised_status == 0:
-                        original_node[
-                            node
-                        ] = self.network_interface.red_current_location
-                        possible_to_attack.add(node)
-        # also adds entry nodes into the set of possible nodes. This is the red agents entrance into the network
-
-        for node in self.network_interface.current_graph.entry_nodes:
-            if node.true_compromised_status == 0:
-                possible_to_attack.add(node)
-                original_node[node] = None
-
-        possible_to_attack = sorted(list(possible_to_attack))
+            possible_to_attack = frontier.sort_nodes(
+                {
+                    node: None
+                    for node in itertools.chain(
+                        self.network_interface.get_current_connected_nodes(
+                            red_location
+                        ),
+                        frontier.entry_nodes,
+                    )
+                    if node.true_compromised_status == 0
+                }
+            )
+        else:
+            # also adds entry nodes into the set of possible nodes. This is the red agents entrance into the network
+            possible_to_attack = [
+                node
+                for node in frontier.entry_nodes
+                if node.true_compromised_status == 0
+            ]
 
         weights = []
         # red can prioritise nodes based on some different parameters chosen in the settings menu
-        if self.network_interface.game_mode.red.target_mechanism.random.value:
+        if self.network_interface.rules.red_target_mechanism_random:
             # equal weighting for all nodes
             weights = [1] * len(possible_to_attack)
         elif (
-            self.network_interface.game_mode.red.target_mechanism.prioritise_connected_nodes.value
+            self.network_interface.rules.red_target_mechanism_prioritise_connected_nodes
         ):
             for node in possible_to_attack:
                 # more connections means a higher weight
@@ -117,7 +112,7 @@ class RedActionSet:
                     len(self.network_interface.get_current_connected_nodes(node))
                 )
         elif (
-            self.network_interface.game_mode.red.target_mechanism.prioritise_unconnected_nodes.value
+            self.network_interface.rules.red_target_mechanism_prioritise_unconnected_nodes
         ):
             for node in possible_to_attack:
                 # higher connections means a lower weight
@@ -128,33 +123,42 @@ class RedActionSet:
                     current_connected = 0.1
                 weights.append(1 / current_connected)
         elif (
-            self.network_interface.game_mode.red.target_mechanism.prioritise_vulnerable_nodes.value
+            self.network_interface.rules.red_target_mechanism_prioritise_vulnerable_nodes
         ):
             for node in possible_to_attack:
                 # higher vulnerability means a higher weight
                 weights.append(1 / node.vulnerability_score)
         elif (
-            self.network_interface.game_mode.red.target_mechanism.prioritise_resilient_nodes.value
+            self.network_interface.rules.red_target_mechanism_prioritise_resilient_nodes
         ):
             for node in possible_to_attack:
                 # higher vulnerability means a lower weight
                 weights.append(1 / node.vulnerability_score)
         elif (
-            self.network_interface.game_mode.red.target_mechanism.target_specific_node.use.value
-            or self.network_interface.game_mode.red.target_mechanism.target_specific_node.target.value
+            self.network_interface.rules.red_target_mechanism_target_specific_node_use
+            or self.network_interface.rules.red_target_mechanism_target_specific_node_target
             is not None
         ):
-            distances = self.network_interface.get_shortest_distances_to_target(
-                possible_to_attack
+            # the distances come from a cached breadth first search from the target
+            distances = np.array(
+                self.network_interface.get_shortest_distances_to_target(
+                    possible_to_attack
+                ),
+                dtype=np.int64,
             )
-            for dist in distances:
-                if (
-                    self.network_interface.game_mode.red.target_mechanism.target_specific_node.always_choose_shortest_distance.value
-                ):
-                    weight = 1 if dist == min(distances) else 0
-                else:
-                    weight = 1 if dist == 0 else dist / sum(distances)
-                weights.append(weight)
+            if len(distances) == 0:
+                weights = []
+            elif (
+                self.network_interface.rules.red_target_mechanism_target_specific_node_always_choose_shortest_distance
+            ):
+                weights = distances == distances.min()
+            else:
+                weights = np.divide(
+                    distances,
+                    distances.sum(),
+                    out=np.ones(len(distances)),
+                    where=distances != 0,
+                )
         else:
             # if using the configuration checker then this should never happen
             raise Exception(
@@ -165,17 +169,22 @@ class RedActionSet:
         if len(possible_to_attack) == 0:
             # If the red agent cannot attack anything then return False showing that the attack has failed
             return False, False
-        if sum(weights) == 0:
-            for counter, _ in enumerate(weights):
-                weights[counter] = 1
-        weights_normal = [float(i) / sum(weights) for i in weights]
-        # Chooses a target with some being more likely than others
-        target = random.choices(
-            population=possible_to_attack, weights=weights_normal, k=1
-        )[0]
-
-        # get the node that red attacked from
-        attacking_node = original_node[target]
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.sum() == 0:
+            weights = np.ones(len(weights))
+        # Chooses a target with some being more likely than others. The normalised weights are accumulated once and
+        # bisected with a single random draw, exactly as random.choices would
+        cum_weights = np.cumsum(weights / np.cumsum(weights)[-1])
+        i = np.searchsorted(cum_weights, random.random() * cum_weights[-1], "right")
+        target = possible_to_attack[min(int(i), len(cum_weights) - 1)]
+
+        # get the node that red attacked from, entry nodes are attacked from outside the network
+        if target.entry_node:
+            attacking_node = None
+        elif self.network_interface.rules.red_agent_attack_attack_from_any_red_node:
+            attacking_node = frontier.get_attacker(target)
+        else:
+            attacking_node = red_location
         return target, attacking_node
 
     def choose_action(self) -> int:
@@ -221,31 +230,22 @@ class RedActionSet:
                 The new red location
                 The old red location
         """
+        frontier = self.network_interface.attack_frontier
         if self.network_interface.red_current_location is None:
             # If the central red agent is not in the environment then it will enter through the entry points
-            connected = list(
-                set(self.network_interface.current_graph.entry_nodes).intersection(
-                    set(
-                        self.network_interface.current_graph.get_nodes(
-                            filter_true_compromised=True
-                        )
-                    )
-                )
-            )
+            connected = [
+                node
+                for node in frontier.entry_nodes
+                if node.true_compromised_status == 1
+            ]
         else:
             # Otherwise the red agent will move to a connected node
-            connected = list(
-                set(
-                    self.network_interface.get_current_connected_nodes(
-                        self.network_interface.red_current_location
-                    )
-                ).intersection(
-                    set(
-                        self.network_interface.current_graph.get_nodes(
-                            filter_true_compromised=True
-                        )
-                    )
+            connected = frontier.sort_nodes(
+                node
+                for node in self.network_interface.get_current_connected_nodes(
+                    self.network_interface.red_current_location
                 )
+                if node.true_compromised_status == 1
             )
         # gets the current location and copies it. This is for logging purposes to ensure that the red agent moves
         # correctly
@@ -352,11 +352,11 @@ class RedActionSet:
         attack_status = self.network_interface.attack_node(
             target,
             skill=self.skill,
-            use_skill=self.network_interface.game_mode.red.agent_attack.skill.use.value,
+            use_skill=self.network_interface.rules.red_agent_attack_skill_use,
             use_vulnerability=(
-                not self.network_interface.game_mode.red.agent_attack.ignores_defences.value
+                not self.network_interface.rules.red_agent_attack_ignores_defences
             ),
-            guarantee=self.network_interface.game_mode.red.agent_attack.always_succeeds.value,
+            guarantee=self.network_interface.rules.red_agent_attack_always_succeeds,
         )
         if attack_status:
             # update the location of the red agent if applicable
@@ -393,100 +393,66 @@ class RedActionSet:
             The target nodes
             The attacking nodes
         """
-        # Lists to contain what nodes were attacked and if the attacks succeeded
-        success = []
-        targets = []
-        attacking_nodes = []
-
-        # gets a list of all the compromised nodes
-        compromised_nodes = self.network_interface.current_graph.get_nodes(
-            filter_true_compromised=True
-        )
-
-        # creates a set that is used to store all of the nodes that the red agent naturally spreads to (used to work out
-        # what nodes are not easily spread to)
-        set_of_spreading_nodes = set()
-        attacking_node_map = {}
-
-        for compromised_node in compromised_nodes:
-            for node in self.network_interface.get_current_connected_nodes(
-                compromised_node
-            ):
-                if node.true_compromised_status == 0:
-                    # add the current node to the set of nodes connected to a compromised node
-                    set_of_spreading_nodes.add(node)
-                    attacking_node_map[node] = compromised_node
-
+        # the safe nodes connected to a compromised node, each mapped onto the compromised node they are connected to
+        # (used to work out what nodes are not easily spread to), in a deterministic order
+        frontier = self.network_interface.attack_frontier
+        connected_to_red = frontier.get_candidates()
+        in_frontier = set(connected_to_red)
+
+        # the nodes red tries to naturally spread to and the chance of trying to spread to each of them
+        spreading_to = []
+        spread_chances = []
         if (
-            self.network_interface.game_mode.red.natural_spreading.chance.to_connected_node.value
+            self.network_interface.rules.red_natural_spreading_chance_to_connected_node
             > 0
         ):
-            for node in set_of_spreading_nodes:
-                if (
-                    random.randint(0, 100)
-                    < self.network_interface.game_mode.red.natural_spreading.chance.to_unconnected_node.value
-                    * 100
-                ):
-                    # try to naturally spread to the node based on a percentage change listed in the config file
-                    attack_status = self.network_interface.attack_node(
-                        node,
-                        skill=self.skill,
-                        use_skill=self.network_interface.game_mode.red.agent_attack.skill.use.value,
-                        use_vulnerability=(
-                            not self.network_interface.game_mode.red.agent_attack.ignores_defences.value
-                        ),
-                        guarantee=self.network_interface.game_mode.red.agent_attack.always_succeeds.value,
-                    )
-                    if attack_status:
-                        # If the attack succeeds
-                        success.append(True)
-                    else:
-                        success.append(False)
-
-                    attacking_nodes.append(attacking_node_map[node])
-                    targets.append(node)
+            spreading_to.extend(connected_to_red)
+            spread_chances.extend(
+                [
+                    self.network_interface.rules.red_natural_spreading_chance_to_unconnected_node
+                ]
+                * len(connected_to_red)
+            )
         if (
-            self.network_interface.game_mode.red.natural_spreading.chance.to_connected_node
+            self.network_interface.rules.red_natural_spreading_chance_to_connected_node
+            > 0
         ):
             # Calculate the list of nodes that are not connected to a compromised node
-            nodes_not_connected_to_red = (
-                set(self.network_interface.current_graph.get_nodes())
-                .difference(set(compromised_nodes))
-                .difference(set_of_spreading_nodes)
+            nodes_not_connected_to_red = [
+                node
+                for node in self.network_interface.current_graph.get_nodes(
+                    filter_true_safe=True
+                )
+                if node not in in_frontier
+            ]
+            # all the nodes that are not connected to red (has a different chance to naturally spread to)
+            spreading_to.extend(nodes_not_connected_to_red)
+            spread_chances.extend(
+                [
+                    self.network_interface.rules.red_natural_spreading_chance_to_connected_node
+                ]
+                * len(nodes_not_connected_to_red)
             )
 
-            # all the nodes that are not connected to red (has a different chance to naturally spread to)
-            for node in nodes_not_connected_to_red:
-                if (
-                    random.randint(0, 100)
-                    < self.network_interface.game_mode.red.natural_spreading.chance.to_connected_node.value
-                    * 100
-                ):
-                    # Try to naturally randomly infect nodes based on a percentage chance in the config file
-                    attack_status = self.network_interface.attack_node(
-                        node,
-                        skill=self.skill,
-                        use_skill=self.network_interface.game_mode.red.agent_attack.skill.use.value,
-                        use_vulnerability=(
-                            not self.network_interface.game_mode.red.agent_attack.ignores_defences.value
-                        ),
-                        guarantee=self.network_interface.game_mode.red.agent_attack.always_succeeds.value,
-                    )
-                    targets.append(node)
-                    if attack_status:
-                        # store the success status of the attack
-                        success.append(True)
-                    else:
-                        success.append(False)
-                    attacking_nodes.append(None)
+        # try to naturally spread to each node based on a percentage chance listed in the config file
+        rolls = self.network_interface.random_generator.integers(
+            0, 101, size=len(spreading_to)
+        )
+        spread = (rolls < np.array(spread_chances) * 100).tolist()
+        targets = list(itertools.compress(spreading_to, spread))
+        attacks = self.network_interface.attack_nodes(
+            targets,
+            skill=self.skill,
+            use_skill=self.network_interface.rules.red_agent_attack_skill_use,
+            use_vulnerability=(
+                not self.network_interface.rules.red_agent_attack_ignores_defences
+            ),
+            guarantee=self.network_interface.rules.red_agent_attack_always_succeeds,
+            attacking_nodes=[frontier.get_attacker(node) for node in targets],
+        )
 
         # return the information about the attacks made during this turn
-        return {
-            "Action": "natural_spread",
-            "Attacking_Nodes": attacking_nodes,
-            "Target_Nodes": targets,
-            "Successes": success,
-        }
+        return {"Action": "natural_spread", **attacks}
 
     def spread(self) -> Dict[str, List[Union[bool, str, None]]]:
         """
@@ -503,64 +469,50 @@ class RedActionSet:
         """
         compromised_nodes = []
         # check the nodes red can attack based on the current configuration
-        if (
-            self.network_interface.game_mode.red.agent_attack.attack_from.any_red_node.value
-        ):
+        if self.network_interface.rules.red_agent_attack_attack_from_any_red_node:
             compromised_nodes = self.network_interface.current_graph.get_nodes(
                 filter_true_compromised=True
             )
-        if (
-            self.network_interface.game_mode.red.agent_attack.attack_from.only_main_red_node.value
-        ):
+        if self.network_interface.rules.red_agent_attack_attack_from_only_main_red_node:
             compromised_nodes = [self.network_interface.red_current_location]
         nodes = []
         # store the location the attack originated from
         attacking_nodes = []
-        success = []
         for node in compromised_nodes:
             if node is None:
                 # If red does not control any nodes then the entry nodes are used
                 connected_nodes = self.network_interface.current_graph.entry_nodes
-                connected_nodes = [
-                    n for n in connected_nodes if n.true_compromised_status == 0
-                ]
-                attacking_nodes.extend([None] * len(connected_nodes))
             else:
                 connected_nodes = self.network_interface.get_current_connected_nodes(
                     node
                 )
-                connected_nodes = [
-                    n for n in connected_nodes if n.true_compromised_status == 0
-                ]
-
-                attacking_nodes.extend([node] * len(connected_nodes))
-            for connected_node in connected_nodes:
-                nodes.append(connected_node)
-                attack_status = self.network_interface.attack_node(
-                    connected_node,
-                    skill=self.network_interface.game_mode.red.action_set.spread.chance.value,
-                    use_skill=True,
-                    use_vulnerability=(
-                        not self.network_interface.game_mode.red.agent_attack.ignores_defences.value
-                    ),
-                    guarantee=self.network_interface.game_mode.red.agent_attack.always_succeeds.value,
-                )
-                if attack_status:
-                    # If the attack succeeds
-                    if node == self.network_interface.red_current_location:
-                        self.network_interface.red_current_location = connected_node
-                    # Since spread can attack multiple nodes in one go the agent remembers the success of each of the
-                    # attacks in a list
-                    success.append(True)
-                else:
-                    success.append(False)
+            connected_nodes = [
+                n for n in connected_nodes if n.true_compromised_status == 0
+            ]
+            attacking_nodes.extend([node] * len(connected_nodes))
+            nodes.extend(connected_nodes)
+
+        # a node connected to more than one attacking node is attacked from each of them in turn until one succeeds
+        attacks = self.network_interface.attack_nodes(
+            nodes,
+            skill=self.network_interface.rules.red_action_set_spread_chance,
+            use_skill=True,
+            use_vulnerability=(
+                not self.network_interface.rules.red_agent_attack_ignores_defences
+            ),
+            guarantee=self.network_interface.rules.red_agent_attack_always_succeeds,
+            attacking_nodes=attacking_nodes,
+        )
+        # If an attack from the red agents location succeeds the red agent moves to the first node it compromised
+        red_location = self.network_interface.red_current_location
+        for attacking_node, target, attack_status in zip(
+            attacks["Attacking_Nodes"], attacks["Target_Nodes"], attacks["Successes"]
+        ):
+            if attack_status and attacking_node == red_location:
+                self.network_interface.red_current_location = target
+                break
 
-        return {
-            "Action": "spread",
-            "Attacking_Nodes": attacking_nodes,
-            "Target_Nodes": nodes,
-            "Successes": success,
-        }
+        return {"Action": "spread", **attacks}
 
     def intrude(self) -> Dict[str, List[Union[bool, str, None]]]:
         """
@@ -579,31 +531,14 @@ class RedActionSet:
         safe_nodes = self.network_interface.current_graph.get_nodes(
             filter_true_safe=True
         )
-        success = []
-        nodes = []
-        attacking_nodes = []
         # tries to attack the safe nodes
-        for node in safe_nodes:
-            attack_status = self.network_interface.attack_node(
-                node,
-                skill=self.network_interface.game_mode.red.action_set.random_infect.chance.value,
-                use_skill=True,
-                use_vulnerability=(
-                    not self.network_interface.game_mode.red.agent_attack.ignores_defences.value
-                ),
-                guarantee=self.network_interface.game_mode.red.agent_attack.always_succeeds.value,
-            )
-            nodes.append(node)
-            if attack_status:
-                # Agent remembers each of the successes or failures for each node it
-                # attempts to intrude
-                success.append(True)
-            else:
-                success.append(False)
-            attacking_nodes.append(None)
-        return {
-            "Action": "intrude",
-            "Attacking_Nodes": attacking_nodes,
-            "Target_Nodes": nodes,
-            "Successes": success,
-        }
+        attacks = self.network_interface.attack_nodes(
+            safe_nodes,
+            skill=self.network_interface.rules.red_action_set_random_infect_chance,
+            use_skill=True,
+            use_vulnerability=(
+                not self.network_interface.rules.red_agent_attack_ignores_defences
+            ),
+            guarantee=self.network_interface.rules.red_agent_attack_always_succeeds,
+        )
+        return {"Action": "intrude", **attacks}
@@ -17,15 +17,59 @@ following information:
     -end_blue: The env as the blue agent can see it after the blue agents turn
 
 The reward function returns a single number (integer or float) that is the blue agents reward for that turn.
+
+A reward function can declare which of the start/end inputs it reads with the ``reward_inputs`` decorator. When the
+environment is stepped in lean mode only the declared inputs are passed, as read-only ``{uuid: value}`` mappings backed
+by arrays rather than dicts; a reward function without a declaration is passed all of them.
 """
 
 # Functions:
 from __future__ import annotations
 
 import math
+from logging import getLogger
+from typing import Callable, Dict, Final
 
 from yawning_titan.envs.generic.core.network_interface import NetworkInterface
 
+_LOGGER = getLogger(__name__)
+
+REWARD_INPUT_FIELDS: Final[Dict[str, str]] = {
+    "start_state": "true_compromised_status",
+    "end_state": "true_compromised_status",
+    "start_vulnerabilities": "vulnerability_score",
+    "end_vulnerabilities": "vulnerability_score",
+    "start_isolation": "isolated",
+    "end_isolation": "isolated",
+    "start_blue": "blue_view_compromised_status",
+    "end_blue": "blue_view_compromised_status",
+}
+"""The start/end reward inputs mapped to the node state field each is read from."""
+
+
+def reward_inputs(*inputs: str) -> Callable[[Callable], Callable]:
+    """
+    Declare the start/end inputs that a reward function reads.
+
+    Args:
+        inputs: The names of the inputs, each a key of ``REWARD_INPUT_FIELDS``
+
+    Returns:
+        A decorator that sets the ``reward_inputs`` attribute of the reward function
+    """
+    unknown = set(inputs) - REWARD_INPUT_FIELDS.keys()
+    if unknown:
+        msg = f"Unknown reward inputs {sorted(unknown)}, must be in {list(REWARD_INPUT_FIELDS)}"
+        _LOGGER.error(msg, exc_info=True)
+        raise ValueError(msg)
+
+    def decorator(func: Callable) -> Callable:
+        func.reward_inputs = frozenset(inputs)
+        return func
+
+    return decorator
+
+
 REMOVE_RED_POINTS = []
 for i in range(0, 101):
     REMOVE_RED_POINTS.append(round(math.exp(-0.004 * i), 4))
@@ -39,6 +83,7 @@ for i in range(0, 100):
     SCANNING_USAGE_POINTS.append(-math.exp(-i) + 1)
 
 
+@reward_inputs(*REWARD_INPUT_FIELDS)
 def standard_rewards(args: dict) -> float:
     """
     Calculate the reward for the current state of the environment.
@@ -149,7 +194,7 @@ def standard_rewards(args: dict) -> float:
 
     # rewards for reducing node vulnerabilities
     if (
-        network_interface.game_mode.red.agent_attack.ignores_defences.value is False
+        network_interface.rules.red_agent_attack_ignores_defences is False
         and blue_action == "reduce_vulnerability"
     ):
         initial_cumulative_vuln = sum(start_vulnerabilities.values())
@@ -163,6 +208,7 @@ def standard_rewards(args: dict) -> float:
     return reward
 
 
+@reward_inputs("start_state", "end_state", "start_blue", "end_blue")
 def experimental_rewards(args: dict) -> float:
     """
     Calculate the reward for the current state of the environment.
@@ -244,6 +290,7 @@ def experimental_rewards(args: dict) -> float:
 
 
 # A very simple example reward function
+@reward_inputs()
 def one_per_timestep(args: dict) -> float:
     """
     Give a reward for 0.1 for every timestep that the blue agent is alive.
@@ -268,6 +315,7 @@ def one_per_timestep(args: dict) -> float:
     return 0.1
 
 
+@reward_inputs()
 def zero_reward(args: dict) -> float:
     """
     Return zero reward per timestep.
@@ -292,6 +340,7 @@ def zero_reward(args: dict) -> float:
     return 0
 
 
+@reward_inputs("end_state")
 def safe_nodes_give_rewards(args: dict) -> float:
     """
     Give 1 reward for every safe node at that timestep.
@@ -324,6 +373,9 @@ def safe_nodes_give_rewards(args: dict) -> float:
     return reward
 
 
+@reward_inputs(
+    "start_state", "end_state", "start_vulnerabilities", "end_vulnerabilities"
+)
 def punish_bad_actions(args: dict) -> float:
     """
     Just punishes bad actions bad moves.
@@ -382,6 +434,7 @@ def punish_bad_actions(args: dict) -> float:
     return reward
 
 
+@reward_inputs("end_state")
 def num_nodes_safe(args: dict) -> float:
     """
     Provide reward based on the proportion of nodes safe within the environment.
@@ -400,6 +453,7 @@ def num_nodes_safe(args: dict) -> float:
     return n_safe / total_n_nodes
 
 
+@reward_inputs("end_state")
 def dcbo_cost_func(args: dict) -> float:
     """
     Calculate the cost function for DCBO using a set of fixed action cost values.
@@ -0,0 +1,277 @@
+"""
+A compressed sparse row (CSR) index of the topology of a network interface, used by its ``"sparse"`` topology backend.
+
+The current and base graphs of a
+:class:`~yawning_titan.envs.generic.core.network_interface.NetworkInterface`
+are networkx graphs, so every neighbour query walks a dict of dicts and every
+rebuild of red's attack frontier visits the neighbours of each compromised node
+in Python. :class:`SparseTopology` holds the base graph as a single CSR
+adjacency matrix over a fixed row per node and derives the current graph from
+it with the isolation state of the nodes: the current graph is the base graph
+with every edge of an isolated node removed, which is exactly what isolating
+and reconnecting nodes and placing deceptive nodes maintain. This means:
+
+- Neighbour queries are a slice of the CSR index arrays.
+- The frontier of the compromised nodes is a single sparse matrix-vector
+  product of the adjacency matrix with the compromised status of every node.
+- Isolating and reconnecting nodes, the most common changes to the current
+  graph, cost nothing as the isolation state is read straight from the node
+  state store.
+
+Only the base graph changes the matrix, when deceptive nodes are placed. Those
+edits are batched and applied on the next query. The networkx graphs are still
+kept up to date and remain the source of truth for rendering, serialisation and
+the edits themselves.
+"""
+from __future__ import annotations
+
+from logging import getLogger
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from yawning_titan.networks.node import Node
+
+if TYPE_CHECKING:
+    from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+_LOGGER = getLogger(__name__)
+
+
+class SparseTopology:
+    """The base graph of a network interface as a CSR adjacency matrix, with the current graph derived by isolation."""
+
+    def __init__(
+        self,
+        network_interface: NetworkInterface,
+        edge_index: Optional[np.ndarray] = None,
+    ):
+        """
+        The SparseTopology constructor.
+
+        Every node of the network and every deceptive node is given a row of the matrix, in graph order.
+
+        :param network_interface: The network interface whose graphs the topology is of.
+        :param edge_index: An optional (2, n) array of the node indices at either end of every edge in the base graph.
+            If not given the edges are read from the base graph.
+        """
+        self.network_interface = network_interface
+        base_graph = network_interface.base_graph
+        if edge_index is None:
+            position = {node: i for i, node in enumerate(base_graph.nodes)}
+            edges = np.array(
+                [(position[u], position[v]) for u, v in base_graph.edges],
+                dtype=np.intp,
+            ).reshape(-1, 2)
+            edge_index = np.concatenate((edges, edges[:, ::-1])).T
+        n = base_graph.number_of_nodes()
+        # the matrix of the initial network, which every reset starts from
+        self._initial: sparse.csr_matrix = sparse.csr_matrix(
+            (
+                np.ones(edge_index.shape[1], dtype=np.int32),
+                (edge_index[0], edge_index[1]),
+            ),
+            shape=(n, n),
+        )
+        self._matrix: sparse.csr_matrix = self._initial
+        # the current and base graph node of each row
+        self._nodes: List[Node] = []
+        self._base_nodes: List[Node] = []
+        self._index: Dict[Node, int] = {}
+        # the state store slot of each row, -1 for nodes not in the current graph
+        self._slots: np.ndarray = np.zeros(0, dtype=np.intp)
+        # edits to the base graph not yet applied to the matrix, as (row, column, +1 or -1)
+        self._pending: List[Tuple[int, int, int]] = []
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the topology to the initial network.
+
+        Called when the network interface is reset, after which the topology is kept up to date through the hooks.
+        """
+        network_interface = self.network_interface
+        deceptive_nodes = network_interface.available_deceptive_nodes
+        self._nodes = list(network_interface.current_graph.nodes) + deceptive_nodes
+        self._base_nodes = list(network_interface.base_graph.nodes) + deceptive_nodes
+        self._index = {node: i for i, node in enumerate(self._nodes)}
+        n = len(self._nodes)
+        if self._initial.shape[0] != n:
+            # the number of deceptive nodes has changed
+            self._initial = self._initial.copy()
+            self._initial.resize(n, n)
+        self._matrix = self._initial
+        self._pending = []
+        self._slots = np.array(
+            [
+                -1 if node.state_index is None else node.state_index
+                for node in self._nodes
+            ],
+            dtype=np.intp,
+        )
+
+    def get_current_neighbours(self, node: Node) -> List[Node]:
+        """
+        Get the nodes connected to a node in the current graph.
+
+        :param node: A node of the current graph.
+        :return: The connected nodes of the current graph, in row order.
+        """
+        if node.isolated:
+            return []
+        nodes = self._nodes
+        connected = [nodes[i] for i in self._get_neighbour_rows(node)]
+        return [n for n in connected if not n.isolated]
+
+    def get_base_neighbours(self, node: Node) -> List[Node]:
+        """
+        Get the nodes connected to a node in the base graph.
+
+        :param node: A node of either graph.
+        :return: The connected nodes of the base graph, in row order.
+        """
+        base_nodes = self._base_nodes
+        return [base_nodes[i] for i in self._get_neighbour_rows(node)]
+
+    def get_frontier(self) -> Tuple[List[Node], List[Node]]:
+        """
+        Find the safe nodes of the current graph connected to a compromised node and which node each is attacked from.
+
+        The frontier is found with a single sparse matrix-vector product. When a frontier node is connected to several
+        compromised nodes it is attacked from the one that comes last in the adjacency order of the network interface.
+
+        :return: The frontier nodes in row order and the attacking node of each.
+        """
+        self._apply_pending()
+        store = self.network_interface.current_graph.state_store
+        n = len(self._nodes)
+        placed = np.flatnonzero(self._slots >= 0)
+        slots = self._slots[placed]
+        present = np.zeros(n, dtype=bool)
+        present[placed] = store.isolated[slots] == 0
+        compromised = np.zeros(n, dtype=bool)
+        compromised[placed] = store.true_compromised_status[slots] != 0
+        attacking = compromised & present
+
+        # the matrix is symmetric so this counts the attacking nodes connected to each node
+        counts = self._matrix @ attacking.astype(np.int32)
+        frontier = np.flatnonzero((counts > 0) & present & ~compromised)
+        if len(frontier) == 0:
+            return [], []
+
+        # pick the attacking node that comes last in the adjacency order for each frontier node
+        in_frontier = np.zeros(n, dtype=bool)
+        in_frontier[frontier] = True
+        edges = self._matrix.tocoo()
+        keep = in_frontier[edges.row] & attacking[edges.col]
+        rows, cols = edges.row[keep], edges.col[keep]
+        adjacency_position = self.network_interface._adjacency_position
+        positions = np.full(n, -1, dtype=np.intp)
+        attacking_rows = np.flatnonzero(attacking)
+        positions[attacking_rows] = [
+            adjacency_position[self._nodes[i]] for i in attacking_rows.tolist()
+        ]
+        best = np.full(n, -1, dtype=np.intp)
+        np.maximum.at(best, rows, positions[cols])
+
+        adjacency_nodes = self.network_interface._adjacency_nodes
+        nodes = [self._nodes[i] for i in frontier.tolist()]
+        attackers = [adjacency_nodes[p] for p in best[frontier].tolist()]
+        return nodes, attackers
+
+    def to_current_matrix(self, nodes: List[Node]) -> np.ndarray:
+        """
+        Build the dense adjacency matrix of the current graph.
+
+        :param nodes: The nodes of the current graph in the order of the rows and columns of the matrix.
+        :return: A (len(nodes), len(nodes)) array of 0s and 1s.
+        """
+        self._apply_pending()
+        rows = np.array([self._index[node] for node in nodes], dtype=np.intp)
+        present = np.array([not node.isolated for node in nodes], dtype=bool)
+        matrix = self._matrix[rows][:, rows].toarray().astype(float)
+        matrix *= np.outer(present, present)
+        return matrix
+
+    def node_added(self, node: Node, to_current_graph: bool):
+        """
+        Give a node that has just been added to a graph a row, and record its state store slot.
+
+        :param node: The new node.
+        :param to_current_graph: Whether the node was added to the current graph, otherwise the base graph.
+        """
+        i = self._get_row(node)
+        if to_current_graph:
+            self._nodes[i] = node
+            self._slots[i] = -1 if node.state_index is None else node.state_index
+        else:
+            self._base_nodes[i] = node
+
+    def node_removed(self, node: Node, from_current_graph: bool):
+        """
+        Remove a node that is about to be removed from a graph.
+
+        :param node: The node being removed.
+        :param from_current_graph: Whether the node is being removed from the current graph, otherwise the base graph.
+        """
+        if from_current_graph:
+            self._slots[self._get_row(node)] = -1
+        else:
+            for connected in list(self.network_interface.base_graph.neighbors(node)):
+                self.edge_removed(node, connected)
+
+    def edge_added(self, node1: Node, node2: Node):
+        """
+        Record an edge that has been added to the base graph.
+
+        :param node1: The node at one end of the edge.
+        :param node2: The node at the other end of the edge.
+        """
+        i, j = self._get_row(node1), self._get_row(node2)
+        self._pending.extend(((i, j, 1), (j, i, 1)))
+
+    def edge_removed(self, node1: Node, node2: Node):
+        """
+        Record an edge that has been removed from the base graph.
+
+        :param node1: The node at one end of the edge.
+        :param node2: The node at the other end of the edge.
+        """
+        i, j = self._get_row(node1), self._get_row(node2)
+        self._pending.extend(((i, j, -1), (j, i, -1)))
+
+    def _get_row(self, node: Node) -> int:
+        i = self._index.get(node)
+        if i is None:
+            # a node that was not in the network or among the deceptive nodes when the topology was reset
+            _LOGGER.debug(f"Adding a row to the sparse topology for node {node}.")
+            i = len(self._nodes)
+            self._index[node] = i
+            self._nodes.append(node)
+            self._base_nodes.append(node)
+            self._slots = np.append(self._slots, -1)
+            self._apply_pending()
+            self._matrix = self._matrix.copy()
+            self._matrix.resize(i + 1, i + 1)
+        return i
+
+    def _get_neighbour_rows(self, node: Node) -> List[int]:
+        self._apply_pending()
+        i = self._index[node]
+        matrix = self._matrix
+        return matrix.indices[matrix.indptr[i] : matrix.indptr[i + 1]].tolist()
+
+    def _apply_pending(self):
+        """Apply any edits to the base graph made since the last query to the matrix."""
+        if not self._pending:
+            return
+        rows, cols, values = zip(*self._pending)
+        self._pending = []
+        delta = sparse.csr_matrix(
+            (np.array(values, dtype=np.int32), (rows, cols)), shape=self._matrix.shape
+        )
+        matrix = (self._matrix + delta).tocsr()
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+        self._matrix = matrix
@@ -0,0 +1,197 @@
+"""
+Build vectorised sets of independently seeded YAWNING TITAN environments for training.
+
+:class:`GenericNetworkEnvFactory` is a picklable callable that builds a single
+:class:`~yawning_titan.envs.generic.generic_env.GenericNetworkEnv`, so it can
+be handed to a stable-baselines3 ``SubprocVecEnv`` started with any start
+method. :func:`make_vec_env` wraps ``n_envs`` factories in the vec env class
+selected by a ``vec_env_mode``:
+
+- ``"dummy"``: a ``DummyVecEnv`` stepping each env in turn in this process.
+- ``"subproc"``: a ``SubprocVecEnv`` with one process per env, started with
+  ``fork`` where the platform supports it so that the already parsed
+  ``Network`` and ``GameMode`` are shared with the workers rather than sent to
+  them.
+- ``"forkserver"``: a ``SubprocVecEnv`` started with ``forkserver``. The
+  factories are pickled and sent to the workers.
+- ``"native"``: a :class:`~yawning_titan.envs.generic.generic_vec_env.GenericNetworkVecEnv`
+  stepping every env in this process with stacked node state.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+from logging import getLogger
+from typing import Final, Optional, Tuple, Type, Union
+
+import numpy as np
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.utils import set_random_seed
+from stable_baselines3.common.vec_env import (
+    DummyVecEnv,
+    SubprocVecEnv,
+    VecEnv,
+    VecMonitor,
+)
+
+from yawning_titan.envs.generic.core.blue_interface import BlueInterface
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+from yawning_titan.envs.generic.core.red_interface import RedInterface
+from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
+from yawning_titan.envs.generic.generic_vec_env import GenericNetworkVecEnv
+from yawning_titan.game_modes.game_mode import GameMode
+from yawning_titan.networks.network import Network
+
+_LOGGER = getLogger(__name__)
+
+VEC_ENV_MODES: Final[Tuple[str, ...]] = ("dummy", "subproc", "forkserver", "native")
+"""The supported ways of running a set of environments."""
+
+
+class GenericNetworkEnvFactory:
+    """
+    A picklable callable that builds a seeded ``GenericNetworkEnv``.
+
+    The env built by the factory of rank ``rank`` is seeded with ``seed + rank``
+    when it is built. Unlike a ``GenericNetworkEnv`` with a game mode random
+    seed, the env is not re-seeded on every reset, so each env in a vec env
+    plays out a different sequence of episodes.
+    """
+
+    def __init__(
+        self,
+        game_mode: GameMode,
+        network: Network,
+        red_agent_class: Type[RedInterface] = RedInterface,
+        blue_agent_class: Type[BlueInterface] = BlueInterface,
+        rank: int = 0,
+        seed: Optional[int] = None,
+        monitor_dir: Optional[str] = None,
+        **env_kwargs,
+    ):
+        """
+        The GenericNetworkEnvFactory constructor.
+
+        :param game_mode: The game mode of the env.
+        :param network: The network of the env.
+        :param red_agent_class: The agent/action set class used for the red agent.
+        :param blue_agent_class: The agent/action set class used for the blue agent.
+        :param rank: The index of the env in its vec env.
+        :param seed: The seed shared by every env in the vec env. If None the env is not seeded.
+        :param monitor_dir: An optional directory to write a ``<rank>.monitor.csv`` file of episode stats to.
+        :param env_kwargs: Any other keyword arguments to pass to ``GenericNetworkEnv``.
+        """
+        self.game_mode = game_mode
+        self.network = network
+        self.red_agent_class = red_agent_class
+        self.blue_agent_class = blue_agent_class
+        self.rank = rank
+        self.seed = seed
+        self.monitor_dir = monitor_dir
+        self.env_kwargs = env_kwargs
+
+    def __call__(self) -> Union[GenericNetworkEnv, Monitor]:
+        """Build the env."""
+        network_interface = NetworkInterface(
+            game_mode=self.game_mode, network=self.network
+        )
+        env = GenericNetworkEnv(
+            red_agent=self.red_agent_class(network_interface),
+            blue_agent=self.blue_agent_class(network_interface),
+            network_interface=network_interface,
+            **self.env_kwargs,
+        )
+        if self.seed is not None:
+            env.random_seed = None
+            network_interface.random_seed = None
+            set_random_seed(self.seed + self.rank)
+            network_interface.seed_random_generator()
+        if self.monitor_dir is not None:
+            env = Monitor(env, os.path.join(self.monitor_dir, str(self.rank)))
+        return env
+
+
+def make_vec_env(
+    game_mode: GameMode,
+    network: Network,
+    n_envs: int,
+    vec_env_mode: str = "dummy",
+    seed: Optional[int] = None,
+    red_agent_class: Type[RedInterface] = RedInterface,
+    blue_agent_class: Type[BlueInterface] = BlueInterface,
+    monitor_dir: Optional[str] = None,
+    start_rank: int = 0,
+    **env_kwargs,
+) -> VecEnv:
+    """
+    Build a vec env of ``n_envs`` independently seeded ``GenericNetworkEnv``'s.
+
+    :param game_mode: The game mode of the envs.
+    :param network: The network of the envs.
+    :param n_envs: The number of envs.
+    :param vec_env_mode: How to run the envs, one of :data:`VEC_ENV_MODES`.
+    :param seed: The seed of the vec env, env ``i`` is seeded with ``seed + start_rank + i``. If None a seed is drawn
+        from the global random state, so the envs never share a random state (as forked workers otherwise would).
+    :param red_agent_class: The agent/action set class used for the red agent.
+    :param blue_agent_class: The agent/action set class used for the blue agent.
+    :param monitor_dir: An optional directory to write monitor files of episode stats to.
+    :param start_rank: The rank of the first env, used to keep the seeds and monitor files of separate vec envs
+        (e.g. for training and evaluation) apart.
+    :param env_kwargs: Any other keyword arguments to pass to ``GenericNetworkEnv``.
+    :return: The vec env.
+
+    :raise ValueError: When ``n_envs`` is less than 1 or ``vec_env_mode`` isn't supported.
+    """
+    if vec_env_mode not in VEC_ENV_MODES:
+        msg = f"vec_env_mode must be one of {VEC_ENV_MODES}, got '{vec_env_mode}'."
+        _LOGGER.error(msg, exc_info=True)
+        raise ValueError(msg)
+    if n_envs < 1:
+        msg = f"n_envs must be at least 1, got {n_envs}."
+        _LOGGER.error(msg, exc_info=True)
+        raise ValueError(msg)
+    if seed is None:
+        seed = int(np.random.randint(0, 2**31 - 1 - start_rank - n_envs))
+
+    if vec_env_mode == "native":
+        vec_env = GenericNetworkVecEnv(
+            game_mode,
+            network,
+            n_envs,
+            seed=seed + start_rank,
+            red_agent_class=red_agent_class,
+            blue_agent_class=blue_agent_class,
+            collect_additional_per_ts_data=env_kwargs.get(
+                "collect_additional_per_ts_data", False
+            ),
+            lean=env_kwargs.get("lean", False),
+            profile=env_kwargs.get("profile", False),
+        )
+        if monitor_dir is not None:
+            vec_env = VecMonitor(vec_env, os.path.join(monitor_dir, str(start_rank)))
+        return vec_env
+
+    env_fns = [
+        GenericNetworkEnvFactory(
+            game_mode,
+            network,
+            red_agent_class,
+            blue_agent_class,
+            rank=start_rank + i,
+            seed=seed,
+            monitor_dir=monitor_dir,
+            **env_kwargs,
+        )
+        for i in range(n_envs)
+    ]
+    if vec_env_mode == "dummy":
+        return DummyVecEnv(env_fns)
+    if vec_env_mode == "subproc":
+        if "fork" in multiprocessing.get_all_start_methods():
+            start_method = "fork"
+        else:
+            start_method = "spawn"
+    else:
+        start_method = "forkserver"
+    _LOGGER.debug(f"Starting {n_envs} env worker processes with {start_method}.")
+    return SubprocVecEnv(env_fns, start_method=start_method)
@@ -9,7 +9,8 @@ and topology of the network being defended and what data should be collected dur
 import copy
 import json
 from collections import Counter
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
 
 import gym
 import numpy as np
@@ -22,6 +23,20 @@ from yawning_titan.envs.generic.core.network_interface import NetworkInterface
 from yawning_titan.envs.generic.core.red_interface import RedInterface
 from yawning_titan.envs.generic.helpers.eval_printout import EvalPrintout
 from yawning_titan.envs.generic.helpers.graph2plot import CustomEnvGraph
+from yawning_titan.envs.generic.helpers.step_profiler import (
+    BLUE_ACTION,
+    JSON_OUTPUT,
+    LOSS_CONDITIONS,
+    METRICS,
+    NOTES,
+    OBSERVATION,
+    RED_TURN,
+    REWARD,
+    StepProfiler,
+    skip_phase,
+)
+from yawning_titan.envs.generic.helpers.trajectory import TrajectoryWriter
+from yawning_titan.networks.node_state import NodeStateView
 
 
 class GenericNetworkEnv(gym.Env):
@@ -36,6 +51,10 @@ class GenericNetworkEnv(gym.Env):
         show_metrics_every: int = 1,
         collect_additional_per_ts_data: bool = True,
         print_per_ts_data: bool = False,
+        lean: bool = False,
+        copy_observation: bool = True,
+        profile: bool = False,
+        trajectory_dir: Optional[Union[str, Path]] = None,
     ):
         """
         Initialise the generic network environment.
@@ -48,11 +67,20 @@ class GenericNetworkEnv(gym.Env):
             show_metrics_every: Number of timesteps to show summary metrics (int)
             collect_additional_per_ts_data: Whether or not to collect additional per timestep data (boolean)
             print_per_ts_data: Whether or not to print collected per timestep data (boolean)
+            lean: Whether or not to skip building the base level of per timestep data (boolean)
+            copy_observation: Whether or not to return a copy of the observation rather than the
+                observation buffer of the network interface, which is overwritten on the next step (boolean)
+            profile: Whether or not to time the phases of each step and count the calls to the network interface,
+                see ``enable_profiling`` (boolean)
+            trajectory_dir: The directory to write the per timestep data to when the game mode outputs it, see
+                ``get_trajectory_writer``. Defaults to a new directory in the users trajectories directory
 
         Note: The ``notes`` variable returned at the end of each timestep contains the per
         timestep data. By default it contains a base level of info required for some of the
         reward functions. When ``collect_additional_per_ts_data`` is toggled on, a lot more
-        data is collected.
+        data is collected. When ``lean`` is toggled on (and ``collect_additional_per_ts_data``
+        is off) ``notes`` is empty and the reward function is passed array-backed snapshots
+        of only the inputs it declares (see ``reward_functions.reward_inputs``).
         """
         super(GenericNetworkEnv, self).__init__()
 
@@ -93,8 +121,80 @@ class GenericNetworkEnv(gym.Env):
         # The gym environment can only properly deal with a 1d array so the observation is flattened
 
         self.collect_data = collect_additional_per_ts_data
+        self.lean = lean and not collect_additional_per_ts_data
+        self.copy_observation = copy_observation
         self.env_observation = self.network_interface.get_current_observation()
 
+        self.profiler: Optional[StepProfiler] = None
+        # called at the end of each phase of a step, timing it while profiling
+        self._end_phase = skip_phase
+        if profile:
+            self.enable_profiling()
+
+        self.episode_count = 0
+        """The number of times the env has been reset."""
+        self.trajectory_dir = trajectory_dir
+        self.trajectory_writer: Optional[TrajectoryWriter] = None
+
+    def enable_profiling(
+        self, window: int = 1000, count_calls: bool = True
+    ) -> StepProfiler:
+        """
+        Start timing the phases of each step.
+
+        Args:
+            window: The number of most recent steps to keep the times of
+            count_calls: Whether or not to also count the calls made to the hot methods of the network interface
+
+        Returns:
+            The profiler, also available as ``profiler``
+        """
+        self.disable_profiling()
+        self.profiler = StepProfiler(window)
+        if count_calls:
+            self.profiler.attach(self.network_interface)
+        self._end_phase = self.profiler.lap
+        # the step is wrapped on the instance, so an unprofiled step does no timing
+        self.step = self._profiled_step
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stop timing the steps, removing the profiler."""
+        if self.profiler is not None:
+            self.profiler.detach()
+            self.profiler = None
+            self._end_phase = skip_phase
+            self.__dict__.pop("step", None)
+
+    def _profiled_step(
+        self, action: int
+    ) -> Tuple[np.array, float, bool, Dict[str, dict]]:
+        """Take a time step, timing it with the profiler."""
+        self.profiler.begin()
+        result = type(self).step(self, action)
+        self.profiler.lap(METRICS)
+        self.profiler.end()
+        return result
+
+    def get_trajectory_writer(self) -> TrajectoryWriter:
+        """
+        Get the writer of the per timestep data, starting it if this is the first timestep written.
+
+        Returns:
+            The trajectory writer, also available as ``trajectory_writer``
+        """
+        if self.trajectory_writer is None:
+            self.trajectory_writer = TrajectoryWriter(self.trajectory_dir)
+            self.trajectory_dir = self.trajectory_writer.directory
+        return self.trajectory_writer
+
+    def close(self):
+        """Write any per timestep data still queued and stop the trajectory writer."""
+        if self.trajectory_writer is not None:
+            self.trajectory_writer.close()
+            self.trajectory_writer = None
+        super().close()
+
     def reset(self) -> np.array:
         """
         Reset the environment to the default state.
@@ -107,8 +207,11 @@ class GenericNetworkEnv(gym.Env):
             set_random_seed(self.random_seed, True)
         self.network_interface.reset()
         self.RED.reset()
+        self.episode_count += 1
         self.current_duration = 0
-        self.env_observation = self.network_interface.get_current_observation()
+        self.env_observation = self.network_interface.get_current_observation(
+            copy=self.copy_observation
+        )
         self.current_game_blue = {}
 
         return self.env_observation
@@ -125,6 +228,9 @@ class GenericNetworkEnv(gym.Env):
              the reward for that timesteps, a boolean for whether complete and
              additional notes containing timestep information from the environment.
         """
+        # picks up any edits made to the game mode since the last step
+        self.network_interface.refresh_rules()
+
         # sets the nodes that have been made safe this turn to an empty list
         self.made_safe_nodes = []
 
@@ -145,13 +251,14 @@ class GenericNetworkEnv(gym.Env):
             # If not logging everything, the program still needs to collect some information (required by other parts
             # of the program)
             notes = {}
+        self._end_phase(NOTES)
 
         # resets the attack list for the red agent (so that only the current turns attacks are held)
         self.network_interface.reset_stored_attacks()
 
         # The red agent performs their turn
         if (
-            self.network_interface.game_mode.game_rules.grace_period_length.value
+            self.network_interface.rules.game_rules_grace_period_length
             <= self.current_duration
         ):
             red_info = self.RED.perform_action()
@@ -164,29 +271,43 @@ class GenericNetworkEnv(gym.Env):
                     "Successes": [True],
                 }
             }
+        self._end_phase(RED_TURN)
         # Gets the number of nodes that are safe
         number_uncompromised = len(
             self.network_interface.current_graph.get_nodes(filter_true_safe=True)
         )
+        self._end_phase(LOSS_CONDITIONS)
 
         # Collects data on the natural spreading
         if self.collect_data:
             notes["red_info"] = red_info
 
-        # The states of the nodes after red has had their turn (Used by the reward functions)
-        notes[
-            "post_red_state"
-        ] = self.network_interface.get_all_node_compromised_states()
-        # Blues view of the environment after red has had their turn
-        notes[
-            "post_red_blue_view"
-        ] = self.network_interface.get_all_node_blue_view_compromised_states()
-        # A dictionary of vulnerabilities after red has had their turn
-        notes[
-            "post_red_vulnerabilities"
-        ] = self.network_interface.get_all_vulnerabilities()
-        # The isolation status of all the nodes
-        notes["post_red_isolation"] = self.network_interface.get_all_isolation()
+        reward_function = getattr(
+            reward_functions, self.network_interface.rules.rewards_function
+        )
+        if self.lean:
+            # only snapshot the states after red's turn that the reward function reads
+            reward_inputs = getattr(
+                reward_function,
+                "reward_inputs",
+                reward_functions.REWARD_INPUT_FIELDS.keys(),
+            )
+            start_views = self._get_reward_input_views(reward_inputs, "start_")
+        else:
+            # The states of the nodes after red has had their turn (Used by the reward functions)
+            notes[
+                "post_red_state"
+            ] = self.network_interface.get_all_node_compromised_states()
+            # Blues view of the environment after red has had their turn
+            notes[
+                "post_red_blue_view"
+            ] = self.network_interface.get_all_node_blue_view_compromised_states()
+            # A dictionary of vulnerabilities after red has had their turn
+            notes[
+                "post_red_vulnerabilities"
+            ] = self.network_interface.get_all_vulnerabilities()
+            # The isolation status of all the nodes
+            notes["post_red_isolation"] = self.network_interface.get_all_isolation()
 
         # collects extra data if turned on
         if self.collect_data:
@@ -194,6 +315,7 @@ class GenericNetworkEnv(gym.Env):
             notes["post_red_red_location"] = copy.deepcopy(
                 self.network_interface.red_current_location
             )
+        self._end_phase(NOTES)
 
         # set up initial variables that are reassigned based on the action that blue takes
         done = False
@@ -202,15 +324,13 @@ class GenericNetworkEnv(gym.Env):
         blue_node = None
 
         # Check if the game is over and red has won
-        if (
-            self.network_interface.game_mode.game_rules.blue_loss_condition.all_nodes_lost.value
-        ):
+        if self.network_interface.rules.game_rules_blue_loss_condition_all_nodes_lost:
             if number_uncompromised == 0:
                 done = True
-                reward = self.network_interface.game_mode.rewards.for_loss.value
+                reward = self.network_interface.rules.rewards_for_loss
                 blue_action = "failed"
         if (
-            self.network_interface.game_mode.game_rules.blue_loss_condition.n_percent_nodes_lost.use.value
+            self.network_interface.rules.game_rules_blue_loss_condition_n_percent_nodes_lost_use
         ):
             # calculate the number of safe nodes
             percent_comp = (
@@ -223,14 +343,14 @@ class GenericNetworkEnv(gym.Env):
             )
             if (
                 percent_comp
-                >= self.network_interface.game_mode.game_rules.blue_loss_condition.n_percent_nodes_lost.value.value
+                >= self.network_interface.rules.game_rules_blue_loss_condition_n_percent_nodes_lost_value
             ):
                 done = True
-                reward = self.network_interface.game_mode.rewards.for_loss.value
+                reward = self.network_interface.rules.rewards_for_loss
                 # If the game ends before blue has had their turn the the blue action is set to failed
                 blue_action = "failed"
         if (
-            self.network_interface.game_mode.game_rules.blue_loss_condition.high_value_node_lost.value
+            self.network_interface.rules.game_rules_blue_loss_condition_high_value_node_lost
         ):
             # check if a high value node was compromised
             compromised_hvn = False
@@ -242,32 +362,33 @@ class GenericNetworkEnv(gym.Env):
             if compromised_hvn:
                 # If this mode is selected then the game ends if the high value node has been compromised
                 done = True
-                reward = self.network_interface.game_mode.rewards.for_loss.value
+                reward = self.network_interface.rules.rewards_for_loss
                 blue_action = "failed"
 
         # if self.network_interface.gr_loss_tn:
         tn = self.network_interface.get_target_node()
         if (
             tn is not None
-            and self.network_interface.game_mode.game_rules.blue_loss_condition.target_node_lost.value
+            and self.network_interface.rules.game_rules_blue_loss_condition_target_node_lost
         ):
             if tn.true_compromised_status == 1:
                 # If this mode is selected then the game ends if the target node has been compromised
                 done = True
-                reward = self.network_interface.game_mode.rewards.for_loss.value
+                reward = self.network_interface.rules.rewards_for_loss
                 blue_action = "failed"
 
         if done:
             if (
-                self.network_interface.game_mode.rewards.reduce_negative_rewards_for_closer_fails.value
+                self.network_interface.rules.rewards_reduce_negative_rewards_for_closer_fails
             ):
                 reward = reward * (
                     1
                     - (
                         self.current_duration
-                        / self.network_interface.game_mode.game_rules.max_steps.value
+                        / self.network_interface.rules.game_rules_max_steps
                     )
                 )
+        self._end_phase(LOSS_CONDITIONS)
         if not done:
             blue_action, blue_node = self.BLUE.perform_action(action)
 
@@ -278,43 +399,52 @@ class GenericNetworkEnv(gym.Env):
                 self.current_game_blue[blue_action] += 1
             else:
                 self.current_game_blue[blue_action] = 1
+            self._end_phase(BLUE_ACTION)
 
             # calculates the reward from the current state of the network
-            reward_args = {
-                "network_interface": self.network_interface,
-                "blue_action": blue_action,
-                "blue_node": blue_node,
-                "start_state": notes["post_red_state"],
-                "end_state": self.network_interface.get_all_node_compromised_states(),
-                "start_vulnerabilities": notes["post_red_vulnerabilities"],
-                "end_vulnerabilities": self.network_interface.get_all_vulnerabilities(),
-                "start_isolation": notes["post_red_isolation"],
-                "end_isolation": self.network_interface.get_all_isolation(),
-                "start_blue": notes["post_red_blue_view"],
-                "end_blue": self.network_interface.get_all_node_blue_view_compromised_states(),
-            }
+            if self.lean:
+                reward_args = {
+                    "network_interface": self.network_interface,
+                    "blue_action": blue_action,
+                    "blue_node": blue_node,
+                    **start_views,
+                    **self._get_reward_input_views(reward_inputs, "end_"),
+                }
+            else:
+                reward_args = {
+                    "network_interface": self.network_interface,
+                    "blue_action": blue_action,
+                    "blue_node": blue_node,
+                    "start_state": notes["post_red_state"],
+                    "end_state": self.network_interface.get_all_node_compromised_states(),
+                    "start_vulnerabilities": notes["post_red_vulnerabilities"],
+                    "end_vulnerabilities": self.network_interface.get_all_vulnerabilities(),
+                    "start_isolation": notes["post_red_isolation"],
+                    "end_isolation": self.network_interface.get_all_isolation(),
+                    "start_blue": notes["post_red_blue_view"],
+                    "end_blue": self.network_interface.get_all_node_blue_view_compromised_states(),
+                }
 
-            reward = getattr(
-                reward_functions,
-                self.network_interface.game_mode.rewards.function.value,
-            )(reward_args)
+            reward = reward_function(reward_args)
+            self._end_phase(REWARD)
 
             # gets the current observation from the environment
-            self.env_observation = (
-                self.network_interface.get_current_observation().flatten()
+            self.env_observation = self.network_interface.get_current_observation(
+                copy=self.copy_observation
             )
+            self._end_phase(OBSERVATION)
             self.current_duration += 1
 
             # if the total number of steps reaches the set end then the blue agent wins and is rewarded accordingly
             if (
                 self.current_duration
-                == self.network_interface.game_mode.game_rules.max_steps.value
+                == self.network_interface.rules.game_rules_max_steps
             ):
                 if (
-                    self.network_interface.game_mode.rewards.end_rewards_are_multiplied_by_end_state.value
+                    self.network_interface.rules.rewards_end_rewards_are_multiplied_by_end_state
                 ):
                     reward = (
-                        self.network_interface.game_mode.rewards.for_reaching_max_steps.value
+                        self.network_interface.rules.rewards_for_reaching_max_steps
                         * (
                             len(
                                 self.network_interface.current_graph.get_nodes(
@@ -325,10 +455,9 @@ class GenericNetworkEnv(gym.Env):
                         )
                     )
                 else:
-                    reward = (
-                        self.network_interface.game_mode.rewards.for_reaching_max_steps.value
-                    )
+                    reward = self.network_interface.rules.rewards_for_reaching_max_steps
                 done = True
+            self._end_phase(REWARD)
 
         # Gets the state of the environment at the end of the current time step
         if self.collect_data:
@@ -348,12 +477,13 @@ class GenericNetworkEnv(gym.Env):
             notes["final_red_location"] = copy.deepcopy(
                 self.network_interface.red_current_location
             )
+        self._end_phase(NOTES)
 
-        if (
-            self.network_interface.game_mode.miscellaneous.output_timestep_data_to_json.value
-        ):
-            current_state = self.network_interface.create_json_time_step()
-            self.network_interface.save_json(current_state, self.current_duration)
+        if self.network_interface.rules.miscellaneous_output_timestep_data_to_json:
+            self.get_trajectory_writer().write_step(
+                self.network_interface, self.episode_count, self.current_duration
+            )
+        self._end_phase(JSON_OUTPUT)
 
         if self.print_metrics and done:
             # prints end of game metrics such as who won and how long the game lasted
@@ -363,7 +493,7 @@ class GenericNetworkEnv(gym.Env):
             # Populate the current game's dictionary of stats with the episode winner and the number of timesteps
             if (
                 self.current_duration
-                == self.network_interface.game_mode.game_rules.max_steps.value
+                == self.network_interface.rules.game_rules_max_steps
             ):
                 self.current_game_stats = {
                     "Winner": "blue",
@@ -405,6 +535,26 @@ class GenericNetworkEnv(gym.Env):
         # Returns the environment information that AI gym uses and all of the information collected in a dictionary
         return self.env_observation, reward, done, notes
 
+    def _get_reward_input_views(
+        self, reward_inputs: Iterable[str], prefix: str
+    ) -> Dict[str, NodeStateView]:
+        """
+        Snapshot the current value of the reward inputs with the given prefix.
+
+        Args:
+            reward_inputs: The names of the reward inputs the reward function reads
+            prefix: Either "start_" or "end_"
+
+        Returns:
+            A dictionary of each input name mapped to an array-backed view of its node state field
+        """
+        graph = self.network_interface.current_graph
+        return {
+            name: graph.get_state_view(reward_functions.REWARD_INPUT_FIELDS[name])
+            for name in reward_inputs
+            if name.startswith(prefix)
+        }
+
     def render(
         self,
         mode: str = "human",
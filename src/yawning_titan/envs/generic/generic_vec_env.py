@@ -0,0 +1,216 @@
+"""
+A vectorised YAWNING TITAN environment that steps several copies of a network in one process.
+
+:class:`GenericNetworkVecEnv` implements the stable-baselines3
+:class:`~stable_baselines3.common.vec_env.VecEnv` interface directly, so it
+can be passed to an algorithm such as PPO in place of a ``DummyVecEnv`` or
+``SubprocVecEnv`` of :class:`~yawning_titan.envs.generic.generic_env.GenericNetworkEnv`.
+
+The node state of every copy is held in a single
+:class:`~yawning_titan.networks.node_state.NodeStateStack`, so it can be read
+as ``(n_envs, n_nodes)`` arrays, and the observations, rewards and dones of
+all of the copies are written into preallocated arrays. All of the copies share
+the one interpreter, which avoids the per-worker memory and inter-process
+communication cost of running each copy in its own process.
+"""
+from __future__ import annotations
+
+from logging import getLogger
+from typing import Any, List, Optional, Sequence, Type, Union
+
+import gym
+import numpy as np
+from stable_baselines3.common.utils import set_random_seed
+from stable_baselines3.common.vec_env.base_vec_env import (
+    VecEnv,
+    VecEnvIndices,
+    VecEnvObs,
+    VecEnvStepReturn,
+)
+
+from yawning_titan.envs.generic.core.blue_interface import BlueInterface
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+from yawning_titan.envs.generic.core.red_interface import RedInterface
+from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
+from yawning_titan.game_modes.game_mode import GameMode
+from yawning_titan.networks.network import Network
+from yawning_titan.networks.node_state import NodeStateStack
+
+_LOGGER = getLogger(__name__)
+
+
+class GenericNetworkVecEnv(VecEnv):
+    """
+    Step ``n_envs`` independent copies of the same network and game mode with one call.
+
+    Each copy is a full :class:`~yawning_titan.envs.generic.generic_env.GenericNetworkEnv`,
+    so the copies follow exactly the same rules as a single environment. A copy
+    that finishes an episode is reset automatically, with the final
+    observation of the episode returned in its info dict under
+    ``"terminal_observation"`` as stable-baselines3 expects.
+    """
+
+    def __init__(
+        self,
+        game_mode: GameMode,
+        network: Network,
+        n_envs: int,
+        seed: Optional[int] = None,
+        red_agent_class: Type[RedInterface] = RedInterface,
+        blue_agent_class: Type[BlueInterface] = BlueInterface,
+        collect_additional_per_ts_data: bool = False,
+        lean: bool = False,
+        profile: bool = False,
+    ):
+        """
+        The GenericNetworkVecEnv constructor.
+
+        :param game_mode: The game mode shared by every copy.
+        :param network: The network to copy. Each copy works on its own deep copy of the network.
+        :param n_envs: The number of copies to step.
+        :param seed: The seed for all of the copies. Defaults to the random seed of the game mode. If neither is set
+            the copies are seeded from the current global random state.
+        :param red_agent_class: The red agent class to use in each copy.
+        :param blue_agent_class: The blue agent interface class to use in each copy.
+        :param collect_additional_per_ts_data: Whether each copy collects the additional per timestep data in its
+            notes. Off by default as training does not use it.
+        :param lean: Whether each copy skips building its notes, returning an empty info dict each step.
+        :param profile: Whether each copy times the phases of its steps, see ``GenericNetworkEnv.enable_profiling``.
+        """
+        if n_envs < 1:
+            msg = f"n_envs must be at least 1, got {n_envs}."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+
+        capacity = (
+            network.number_of_nodes()
+            + game_mode.compiled_rules.blue_action_set_deceptive_nodes_max_number
+        )
+        self.node_states = NodeStateStack(n_envs, capacity)
+        """The stacked node state of every copy, each field is an ``(n_envs, capacity)`` array indexed by state slot."""
+
+        self.envs: List[GenericNetworkEnv] = []
+        for store in self.node_states.stores:
+            network_interface = NetworkInterface(
+                game_mode=game_mode, network=network, state_store=store
+            )
+            env = GenericNetworkEnv(
+                red_agent=red_agent_class(network_interface),
+                blue_agent=blue_agent_class(network_interface),
+                network_interface=network_interface,
+                collect_additional_per_ts_data=collect_additional_per_ts_data,
+                lean=lean,
+                copy_observation=False,
+                profile=profile,
+            )
+            # the copies are seeded together by the vec env, not individually on every reset
+            env.random_seed = None
+            network_interface.random_seed = None
+            self.envs.append(env)
+
+        env = self.envs[0]
+        super().__init__(n_envs, env.observation_space, env.action_space)
+        self.metadata = env.metadata
+
+        self._obs = np.zeros(
+            (n_envs,) + env.observation_space.shape, dtype=env.observation_space.dtype
+        )
+        self._rewards = np.zeros(n_envs, dtype=np.float32)
+        self._dones = np.zeros(n_envs, dtype=bool)
+        self._actions: Optional[np.ndarray] = None
+
+        if seed is None:
+            seed = game_mode.compiled_rules.miscellaneous_random_seed
+        if seed is not None:
+            self.seed(seed)
+
+    def reset(self) -> VecEnvObs:
+        """
+        Reset every copy.
+
+        :return: The ``(n_envs, observation_size)`` array of starting observations.
+        """
+        for i, env in enumerate(self.envs):
+            self._obs[i] = env.reset()
+        return self._obs.copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        """
+        Set the blue action to take in each copy on the next call to :meth:`step_wait`.
+
+        :param actions: An array of one action per copy.
+        """
+        self._actions = actions
+
+    def step_wait(self) -> VecEnvStepReturn:
+        """
+        Step every copy with the actions given to :meth:`step_async`, resetting any copy that finishes its episode.
+
+        :return: The ``(n_envs, observation_size)`` observations, the rewards and the dones as arrays and a list of
+            the info dict of each copy.
+        """
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, self._actions)):
+            obs, self._rewards[i], self._dones[i], info = env.step(action)
+            if self._dones[i]:
+                # save the final observation of the episode then start a new one, which overwrites it
+                info["terminal_observation"] = obs.copy()
+                obs = env.reset()
+            self._obs[i] = obs
+            infos.append(info)
+        return self._obs.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def seed(self, seed: Optional[int] = None) -> List[Union[None, int]]:
+        """
+        Seed every copy.
+
+        The copies share the global random state, which is seeded here and then drawn from by each copy in turn, so
+        the copies play out independently of each other while the vec env as a whole is repeatable.
+
+        :param seed: The seed. If None a random seed is chosen.
+        :return: The seed used for each copy.
+        """
+        if seed is None:
+            seed = np.random.randint(0, 2**31 - 1)
+        set_random_seed(seed)
+        for env in self.envs:
+            env.network_interface.seed_random_generator()
+        return [seed] * self.num_envs
+
+    def close(self) -> None:
+        """Close every copy."""
+        for env in self.envs:
+            env.close()
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        """Return an attribute from each of the copies (see base class)."""
+        return [getattr(env, attr_name) for env in self._get_target_envs(indices)]
+
+    def set_attr(
+        self, attr_name: str, value: Any, indices: VecEnvIndices = None
+    ) -> None:
+        """Set an attribute on each of the copies (see base class)."""
+        for env in self._get_target_envs(indices):
+            setattr(env, attr_name, value)
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args,
+        indices: VecEnvIndices = None,
+        **method_kwargs,
+    ) -> List[Any]:
+        """Call a method of each of the copies (see base class)."""
+        return [
+            getattr(env, method_name)(*method_args, **method_kwargs)
+            for env in self._get_target_envs(indices)
+        ]
+
+    def env_is_wrapped(
+        self, wrapper_class: Type[gym.Wrapper], indices: VecEnvIndices = None
+    ) -> List[bool]:
+        """Check whether each of the copies is wrapped with a given wrapper, which they never are."""
+        return [False for _ in self._get_target_envs(indices)]
+
+    def _get_target_envs(self, indices: VecEnvIndices) -> Sequence[GenericNetworkEnv]:
+        return [self.envs[i] for i in self._get_indices(indices)]
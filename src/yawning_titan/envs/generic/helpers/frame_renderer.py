@@ -0,0 +1,582 @@
+"""
+Render the frames of an episode off the simulation thread and stream them to GIF and WebM files.
+
+Rather than drawing every step into the live matplotlib window and saving it to
+disk, the simulation captures a lightweight :class:`FrameDescriptor` per step: the
+state of each node, the attacks and the edges, as arrays indexed the same as the
+nodes of a :class:`FrameLayout`. The layout holds what is fixed for an episode
+(the positions, names, entry, high value and target nodes) and is only captured
+once, or again if a node is added or removed part way through an episode.
+
+A :class:`FrameRecorder` hands the frames, in chunks, to a process pool whose
+workers rasterise them with the Agg canvas into in-memory RGB images, which are
+appended in order to the GIF and WebM writers as they come back. No image files
+are written and the simulation only waits for the pool when it falls behind by
+more than ``max_pending`` chunks.
+
+:func:`draw_frame` is also what ``CustomEnvGraph`` uses to draw the live render,
+so the saved frames look the same as the window.
+"""
+from __future__ import annotations
+
+import math
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import imageio
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+from yawning_titan.networks.network import Network
+from yawning_titan.networks.node import Node
+
+_LOGGER = getLogger(__name__)
+
+FIGURE_SIZE: Tuple[float, float] = (12, 6)
+"""The size of a frame in inches."""
+
+FRAME_DPI: int = 100
+"""The dots per inch of a frame, making each frame 1200x600 pixels."""
+
+FRAME_RATE: int = 5
+"""The frames per second of a saved GIF or WebM."""
+
+HOLD_LAST_FRAME: int = 10
+"""The number of extra times the last frame is added to a GIF, so the end of the episode can be seen for longer."""
+
+HIGH_VALUE_NODE_COLOUR = "#da2fed"
+GREEN_SHADES = ["#00FF13", "#00DF11", "#00BF0E", "#009F0C", "#00800A", "#006007"]
+"""The shades of green of a safe node, from the most to the least vulnerable."""
+
+
+@dataclass(frozen=True)
+class FrameLayout:
+    """The parts of a frame that stay the same for an episode."""
+
+    positions: np.ndarray
+    """The x and y position of each node as an array of shape ``(nodes, 2)``."""
+    names: Tuple[str, ...]
+    """The name of each node."""
+    entry_nodes: np.ndarray
+    """The index of each entry node."""
+    high_value_nodes: np.ndarray
+    """Whether each node is a high value node."""
+    target_node: int = -1
+    """The index of the node targeted by red, or -1 if there is none."""
+    show_only_blue_view: bool = False
+    """Whether to only show the compromised nodes blue knows about."""
+    show_node_names: bool = False
+    """Whether to write the name of each node next to it."""
+
+
+@dataclass(frozen=True)
+class FrameDescriptor:
+    """The state of the network at a step, with each node referred to by its index in the ``FrameLayout``."""
+
+    step: int
+    reward: float
+    edges: np.ndarray
+    """The index of the node at either end of each edge as an array of shape ``(edges, 2)``."""
+    attacks: np.ndarray
+    """The index of the attacking and attacked node of each attack, the attacker being -1 if there is none."""
+    made_safe: np.ndarray
+    """Whether blue made each node safe this step."""
+    compromised_status: np.ndarray
+    blue_knows_intrusion: np.ndarray
+    vulnerability_score: np.ndarray
+
+
+class FrameCapture:
+    """Captures the frame descriptors of a network, capturing its layout once."""
+
+    def __init__(
+        self,
+        g: Network,
+        target_node: Optional[Node] = None,
+        show_only_blue_view: bool = False,
+        show_node_names: bool = False,
+    ):
+        """
+        Capture the layout of the network.
+
+        Args:
+            g: The network to capture
+            target_node: The node targeted by red, if any
+            show_only_blue_view: If true only show what the blue agent can see
+            show_node_names: Show the names of the nodes
+        """
+        self.g = g
+        self._target_node = target_node
+        self._show_only_blue_view = show_only_blue_view
+        self._show_node_names = show_node_names
+        self._edges: Optional[np.ndarray] = None
+        self._topology_version: Optional[int] = None
+        self._capture_layout()
+
+    def _capture_layout(self):
+        self._nodes: List[Node] = list(self.g.nodes)
+        self._index: Dict[Node, int] = {node: i for i, node in enumerate(self._nodes)}
+        self.layout = FrameLayout(
+            positions=np.array(
+                [(n.x_pos, n.y_pos) for n in self._nodes], dtype=np.float64
+            ).reshape(-1, 2),
+            names=tuple(str(n) for n in self._nodes),
+            entry_nodes=np.array(
+                [self._index[n] for n in self.g.entry_nodes], dtype=np.int32
+            ),
+            high_value_nodes=np.array(
+                [n.high_value_node for n in self._nodes], dtype=bool
+            ),
+            target_node=self._index.get(self._target_node, -1),
+            show_only_blue_view=self._show_only_blue_view,
+            show_node_names=self._show_node_names,
+        )
+        self._edges = None
+
+    def capture(
+        self,
+        step: int,
+        reward: float,
+        attacked_nodes: Iterable[Sequence[Optional[Node]]],
+        made_safe_nodes: Iterable[Node],
+        topology_version: Optional[int] = None,
+    ) -> FrameDescriptor:
+        """
+        Capture the current state of the network.
+
+        The layout is captured again if a node has been added or removed since it was last captured.
+
+        Args:
+            step: The current step
+            reward: The reward for the current step
+            attacked_nodes: The pairs of attacking node (or None) and attacked node of the attacks this step
+            made_safe_nodes: The nodes that blue has made safe this step
+            topology_version: The ``topology_version`` of the network interface, so the edges are only read when
+                it changes. Defaults to reading the edges every time
+
+        Returns:
+            The frame descriptor
+        """
+        if len(self._nodes) != self.g.number_of_nodes():
+            self._capture_layout()
+        index = self._index
+        if (
+            self._edges is None
+            or topology_version is None
+            or topology_version != self._topology_version
+        ):
+            self._edges = np.array(
+                [(index[u], index[v]) for u, v in self.g.edges], dtype=np.int32
+            ).reshape(-1, 2)
+            self._topology_version = topology_version
+        made_safe = np.zeros(len(self._nodes), dtype=bool)
+        made_safe[[index[n] for n in made_safe_nodes]] = True
+        return FrameDescriptor(
+            step=step,
+            reward=reward,
+            edges=self._edges,
+            attacks=np.array(
+                [
+                    (-1 if attacker is None else index[attacker], index[attacked])
+                    for attacker, attacked in attacked_nodes
+                ],
+                dtype=np.int32,
+            ).reshape(-1, 2),
+            made_safe=made_safe,
+            compromised_status=self.g.get_state_array("true_compromised_status"),
+            blue_knows_intrusion=self.g.get_state_array("blue_knows_intrusion"),
+            vulnerability_score=self.g.get_state_array("vulnerability_score"),
+        )
+
+
+def _legend_marker(colour: str, label: str, marker: str = "o", markersize=15):
+    return Line2D(
+        [0],
+        [0],
+        color="white",
+        marker=marker,
+        markerfacecolor=colour,
+        label=label,
+        markersize=markersize,
+    )
+
+
+def _get_legend(layout: FrameLayout) -> List[Line2D]:
+    legend_objects = [
+        _legend_marker("orange", "Compromised Node"),
+        _legend_marker("#00FF13", "Safe Node: Weak"),
+        _legend_marker("#006007", "Safe Node: Strong"),
+        _legend_marker(HIGH_VALUE_NODE_COLOUR, "high value node"),
+        _legend_marker("red", "Attacked Node"),
+        _legend_marker("#4ef2e7", "Blue Patch"),
+    ]
+    if layout.target_node >= 0:
+        legend_objects.append(_legend_marker("#2c195e", "Target Node"))
+    legend_objects.extend(
+        [
+            Line2D(
+                [0],
+                [0],
+                color="red",
+                marker="_",
+                markerfacecolor="red",
+                label="Attack Path",
+                markersize=15,
+            ),
+            Line2D(
+                [0],
+                [0],
+                color="gray",
+                marker="_",
+                markerfacecolor="gray",
+                label="Connection",
+                markersize=15,
+            ),
+        ]
+    )
+    if not layout.show_only_blue_view:
+        legend_objects.append(
+            _legend_marker("red", "Unknown Compromise", "$\\bf{O}$", 12)
+        )
+        legend_objects.append(
+            _legend_marker("blue", "Known Compromise", "$\\bf{O}$", 12)
+        )
+    if len(layout.entry_nodes):
+        legend_objects.append(_legend_marker("black", "Entry Node", "$\\bf{E}$", 12))
+    return legend_objects
+
+
+def _safe_colours(vulnerability_score: np.ndarray) -> List[str]:
+    return [
+        GREEN_SHADES[5 - math.floor(v * (len(GREEN_SHADES) - 1))]
+        for v in vulnerability_score
+    ]
+
+
+def draw_frame(ax: Axes, layout: FrameLayout, frame: FrameDescriptor):
+    """
+    Draw a frame into an axis, clearing it first.
+
+    Args:
+        ax: The axis to draw into
+        layout: The layout of the network
+        frame: The state of the network to draw
+    """
+    ax.clear()
+    positions = layout.positions
+    x, y = positions[:, 0], positions[:, 1]
+
+    if layout.target_node >= 0:
+        ax.scatter(
+            x[[layout.target_node]],
+            y[[layout.target_node]],
+            color="#2c195e",
+            s=324,
+            zorder=8,
+        )
+
+    # plots all of the edges in the graph, and the paths of the current turns attacks
+    ax.add_collection(LineCollection(positions[frame.edges], colors="grey", zorder=1))
+    attack_paths = frame.attacks[frame.attacks[:, 0] >= 0]
+    ax.add_collection(LineCollection(positions[attack_paths], colors="red", zorder=2))
+
+    # splits the nodes the same way as ``CustomEnvGraph`` always has, with each node drawn in its first category
+    made_safe = frame.made_safe
+    high_value = layout.high_value_nodes & ~made_safe
+    other = ~(made_safe | layout.high_value_nodes)
+    compromised = other & (frame.compromised_status == 1)
+    known = compromised & frame.blue_knows_intrusion
+    unknown = compromised & ~frame.blue_knows_intrusion
+    safe = other & (frame.compromised_status == 0)
+    void = other & ~(compromised | safe)
+    if layout.show_only_blue_view:
+        # only render the compromised nodes that blue can see, the others look safe
+        safe = safe | unknown
+        shown_compromised = known
+        known = unknown = np.zeros_like(known)
+    else:
+        shown_compromised = compromised
+
+    ax.scatter(x[void], y[void], color="grey", s=300, zorder=1)
+    ax.scatter(
+        x[shown_compromised], y[shown_compromised], color="orange", s=324, zorder=8
+    )
+    ax.scatter(x[unknown], y[unknown], color="red", s=484, zorder=7)
+    ax.scatter(x[known], y[known], color="blue", s=484, zorder=7)
+    ax.scatter(
+        x[safe],
+        y[safe],
+        color=_safe_colours(frame.vulnerability_score[safe]),
+        s=324,
+        zorder=5,
+    )
+    attacked = frame.attacks[:, 1]
+    ax.scatter(x[attacked], y[attacked], color="red", s=324, zorder=9)
+    ax.scatter(x[made_safe], y[made_safe], color="#4ef2e7", s=324, zorder=10)
+    ax.scatter(
+        x[high_value], y[high_value], color=HIGH_VALUE_NODE_COLOUR, s=324, zorder=6
+    )
+    ax.scatter(
+        x[layout.entry_nodes],
+        y[layout.entry_nodes],
+        color="black",
+        zorder=11,
+        s=121,
+        marker="$E$",
+    )
+    if layout.show_node_names:
+        for name, (node_x, node_y) in zip(layout.names, positions):
+            ax.text(
+                node_x + 0.1, node_y + 0.1, name, color="red", fontsize=12, zorder=11
+            )
+
+    mean_vulnerability = (
+        np.mean(frame.vulnerability_score) if len(frame.vulnerability_score) else 0
+    )
+    info = (
+        "Current Step: "
+        + str(frame.step)
+        + "\nReward for current time step: "
+        + str(frame.reward)
+        + "\nCurrent Avg vulnerability: "
+        + str(round(float(mean_vulnerability), 2))
+    )
+    ax.legend(
+        handles=_get_legend(layout),
+        loc="center left",
+        bbox_to_anchor=(1, 0.5),
+        borderpad=1,
+        labelspacing=1,
+        fontsize=10,
+        edgecolor="black",
+    )
+    ax.xaxis.set_ticks([])
+    ax.yaxis.set_ticks([])
+    max_x, max_y = positions.max(axis=0, initial=0)
+    min_x, min_y = positions.min(axis=0, initial=100000)
+    ax.set_xlim(min_x - 0.1 * max_x, max_x * 1.1)
+    ax.set_ylim(min_y - 0.1 * max_y, max_y * 1.1)
+    ax.set_xlabel(info)
+    for pos in ["left", "right", "top", "bottom"]:
+        ax.spines[pos].set_visible(False)
+
+    # invert y axis - computer coords to cartesian conversion
+    ax.invert_yaxis()
+
+
+_CANVAS: Optional[Tuple[FigureCanvasAgg, Axes]] = None
+"""The canvas of the process, created the first time a frame is rendered and reused for every frame after."""
+
+
+def _get_canvas() -> Tuple[FigureCanvasAgg, Axes]:
+    global _CANVAS
+    if _CANVAS is None:
+        # the figure is created without pyplot, so it has no window and is not shared with the live render
+        fig = Figure(figsize=FIGURE_SIZE, dpi=FRAME_DPI)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        # leaves room for the legend on the right and the information below the network
+        fig.subplots_adjust(left=0.02, bottom=0.17, right=0.8, top=0.98)
+        _CANVAS = canvas, ax
+    return _CANVAS
+
+
+def render_frame(layout: FrameLayout, frame: FrameDescriptor) -> np.ndarray:
+    """
+    Rasterise a frame in memory with the Agg canvas.
+
+    Args:
+        layout: The layout of the network
+        frame: The state of the network to draw
+
+    Returns:
+        The frame as an RGB image of shape ``(height, width, 3)``
+    """
+    canvas, ax = _get_canvas()
+    draw_frame(ax, layout, frame)
+    canvas.draw()
+    return np.ascontiguousarray(np.asarray(canvas.buffer_rgba())[..., :3])
+
+
+def render_frames(
+    layout: FrameLayout, frames: Sequence[FrameDescriptor]
+) -> List[np.ndarray]:
+    """
+    Rasterise a chunk of frames, in order. This is what the workers of a ``FrameRecorder`` run.
+
+    Args:
+        layout: The layout of the network
+        frames: The frames to draw
+
+    Returns:
+        A list of RGB images
+    """
+    return [render_frame(layout, frame) for frame in frames]
+
+
+def create_frame_executor(workers: Optional[int] = None) -> Optional[Executor]:
+    """
+    Create a process pool to render frames in.
+
+    Args:
+        workers: The number of processes. Defaults to the number of CPUs. With 0 no pool is created and the
+            frames are rendered in the calling process
+
+    Returns:
+        The process pool, or None if ``workers`` is 0
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 0:
+        msg = f"The number of frame render workers must be 0 or more, not {workers}."
+        _LOGGER.error(msg, exc_info=True)
+        raise ValueError(msg)
+    if workers == 0:
+        return None
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def get_webm_writer(webm_path: Union[str, os.PathLike], fps: int = FRAME_RATE):
+    """
+    Open an imageio writer encoding RGB images to a VP8 WebM file with ffmpeg, from the ``imageio-ffmpeg`` package.
+
+    Args:
+        webm_path: The path to write the WebM to
+        fps: The frames per second of the WebM
+
+    Returns:
+        The writer, which images are added to with ``append_data``
+    """
+    # 8 pixel blocks fit the 1200x600 frames without resizing them
+    return imageio.get_writer(
+        webm_path,
+        format="FFMPEG",
+        fps=fps,
+        codec="libvpx",
+        macro_block_size=8,
+        ffmpeg_log_level="error",
+    )
+
+
+class FrameRecorder:
+    """
+    Rasterises frames in a process pool and appends them, in order, to a GIF and/or WebM file.
+
+    Frames are sent to the pool in chunks of ``chunk_size``. Rendered chunks are written as soon as every chunk
+    before them has been, and ``add_frame`` only blocks once more than ``max_pending`` chunks are waiting, which
+    bounds the number of images held in memory.
+    """
+
+    def __init__(
+        self,
+        gif_path: Optional[Union[str, os.PathLike]] = None,
+        webm_path: Optional[Union[str, os.PathLike]] = None,
+        executor: Optional[Executor] = None,
+        chunk_size: int = 8,
+        max_pending: int = 16,
+        fps: int = FRAME_RATE,
+        hold_last_frame: int = HOLD_LAST_FRAME,
+    ):
+        """
+        Open the writers.
+
+        Args:
+            gif_path: The path to write the GIF to, if any
+            webm_path: The path to write the WebM to, if any
+            executor: The pool to render the frames in, see ``create_frame_executor``. Defaults to rendering
+                each chunk in the calling process as soon as it is full
+            chunk_size: The number of frames sent to the pool at once
+            max_pending: The number of chunks that can be waiting to be written before ``add_frame`` blocks
+            fps: The frames per second of the WebM
+            hold_last_frame: The number of extra times the last frame is added to the GIF
+        """
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self.hold_last_frame = hold_last_frame
+        self.frames_written = 0
+        self._chunk: List[FrameDescriptor] = []
+        self._chunk_layout: Optional[FrameLayout] = None
+        self._pending: Deque[Future] = deque()
+        self._last_image: Optional[np.ndarray] = None
+        self._gif_writer = None
+        self._webm_writer = None
+        if gif_path is not None:
+            self._gif_writer = imageio.get_writer(gif_path, mode="I")
+        if webm_path is not None:
+            self._webm_writer = get_webm_writer(webm_path, fps)
+
+    def __enter__(self) -> FrameRecorder:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_frame(self, layout: FrameLayout, frame: FrameDescriptor):
+        """
+        Add the next frame.
+
+        Args:
+            layout: The layout of the network the frame was captured from
+            frame: The frame
+        """
+        if self._chunk and layout is not self._chunk_layout:
+            self._submit()
+        self._chunk_layout = layout
+        self._chunk.append(frame)
+        if len(self._chunk) >= self.chunk_size:
+            self._submit()
+
+    def _submit(self):
+        if self.executor is None:
+            future = Future()
+            future.set_result(render_frames(self._chunk_layout, self._chunk))
+        else:
+            future = self.executor.submit(
+                render_frames, self._chunk_layout, self._chunk
+            )
+        self._pending.append(future)
+        self._chunk = []
+        self._write_ready()
+
+    def _write_ready(self, wait: bool = False):
+        """Write the rendered chunks at the front of the queue, waiting for them if there are too many or asked."""
+        while self._pending and (
+            wait or self._pending[0].done() or len(self._pending) > self.max_pending
+        ):
+            for image in self._pending.popleft().result():
+                self._write(image)
+
+    def _write(self, image: np.ndarray):
+        if self._gif_writer is not None:
+            self._gif_writer.append_data(image)
+        if self._webm_writer is not None:
+            self._webm_writer.append_data(image)
+        self._last_image = image
+        self.frames_written += 1
+
+    def close(self):
+        """Render and write the remaining frames, hold the last frame of the GIF and close the writers."""
+        try:
+            if self._chunk:
+                self._submit()
+            self._write_ready(wait=True)
+            if self._gif_writer is not None and self._last_image is not None:
+                for _ in range(self.hold_last_frame):
+                    self._gif_writer.append_data(self._last_image)
+        finally:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            for writer in (self._gif_writer, self._webm_writer):
+                if writer is not None:
+                    writer.close()
+            self._gif_writer = self._webm_writer = None
@@ -0,0 +1,576 @@
+"""
+Reference traces of the ``GenericNetworkEnv``, for checking that a faster engine plays the same game.
+
+A :class:`ReferenceTrace` is recorded by :func:`record_trace`, which resets an env
+with a fixed seed each episode and steps it with a seeded sequence of random blue
+actions. After each reset and each step the trace records:
+
+- the action, the reward and whether the episode is done;
+- the ``red_info`` of the step, with each node replaced by its name;
+- the compromised status, blue view, isolation and vulnerability of every node;
+- a 64 bit hash of the observation.
+
+The network and game mode are stored in the trace alongside the seeds, so a trace
+is all that is needed to play the same episodes again. :func:`check_trace` replays
+the actions of a trace against an env built by any factory and returns the first
+:class:`Divergence`, which includes a diff of the node states at that point.
+
+Traces are saved as compressed ``.npz`` files, with the per node values of every
+row packed end to end rather than padded, so that deceptive nodes can be added
+part way through an episode.
+
+Golden traces of the default game mode on the default 18 node network and of the
+DCBO game mode on the DCBO network are shipped in the ``_package_data`` directory,
+see :func:`load_golden_trace`. They are recorded by the current ``GenericNetworkEnv``,
+so any engine checked against them must match it step for step::
+
+    trace = load_golden_trace("default")
+    divergence = check_trace(trace, env_factory=make_my_fast_env)
+    assert divergence is None, str(divergence)
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+from dataclasses import dataclass, field
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, Final, List, Optional, Tuple, Union
+
+import numpy as np
+from stable_baselines3.common.utils import set_random_seed
+from tabulate import tabulate
+
+import yawning_titan
+from yawning_titan.envs.generic.core.blue_interface import BlueInterface
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+from yawning_titan.envs.generic.core.red_interface import RedInterface
+from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
+from yawning_titan.game_modes.game_mode import GameMode
+from yawning_titan.networks.network import Network
+from yawning_titan.networks.node import Node
+
+_LOGGER = getLogger(__name__)
+
+TRACE_FORMAT_VERSION: Final[int] = 1
+"""The version of the layout of the saved traces."""
+
+GOLDEN_TRACE_DIR: Final[Path] = (
+    Path(__file__).parent.parent / "_package_data" / "reference_traces"
+)
+"""The directory of the golden traces shipped with the package."""
+
+GOLDEN_TRACES: Final[Tuple[str, ...]] = ("default", "dcbo")
+"""The names of the golden traces."""
+
+NODE_STATE_FIELDS: Final[Tuple[str, ...]] = (
+    "true_compromised_status",
+    "blue_view_compromised_status",
+    "isolated",
+    "vulnerability_score",
+)
+"""The node attributes recorded after each reset and step."""
+
+EnvFactory = Callable[[Network, GameMode], Any]
+"""A function that builds an env, with the same interface as a ``GenericNetworkEnv``, of a network and game mode."""
+
+
+def make_env(network: Network, game_mode: GameMode) -> GenericNetworkEnv:
+    """
+    Build the ``GenericNetworkEnv`` of a network and game mode, the engine the golden traces are recorded by.
+
+    :param network: The network.
+    :param game_mode: The game mode.
+    :return: The env.
+    """
+    network_interface = NetworkInterface(game_mode=game_mode, network=network)
+    return GenericNetworkEnv(
+        RedInterface(network_interface),
+        BlueInterface(network_interface),
+        network_interface,
+    )
+
+
+def read_node_states(env) -> Tuple[List[str], np.ndarray]:
+    """
+    Read the state of every node in the current graph of an env.
+
+    :param env: The env, which must have a ``network_interface``.
+    :return: The name of each node and a ``(nodes, fields)`` array of their :data:`NODE_STATE_FIELDS`.
+    """
+    nodes = env.network_interface.current_graph.get_nodes()
+    states = np.array(
+        [[getattr(node, name) for name in NODE_STATE_FIELDS] for node in nodes],
+        dtype=np.float64,
+    ).reshape(len(nodes), len(NODE_STATE_FIELDS))
+    return [node.name for node in nodes], states
+
+
+def hash_observation(observation: Union[np.ndarray, Dict[str, np.ndarray]]) -> int:
+    """
+    Hash an observation, or each array of a dict observation, as float32.
+
+    :param observation: The observation.
+    :return: A 64 bit hash.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    if isinstance(observation, dict):
+        arrays = [observation[key] for key in sorted(observation)]
+    else:
+        arrays = [observation]
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array, dtype=np.float32).tobytes())
+    return int.from_bytes(digest.digest(), "little")
+
+
+def _to_serializable(value: Any) -> Any:
+    """Replace the nodes in a ``red_info`` with their names and numpy scalars with python values."""
+    if isinstance(value, Node):
+        return value.name
+    if isinstance(value, dict):
+        return {str(k): _to_serializable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_to_serializable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def encode_red_info(red_info: Optional[Dict]) -> bytes:
+    """
+    Encode the ``red_info`` of a step as canonical JSON.
+
+    :param red_info: The ``red_info`` of the step, None if the env does not report it.
+    :return: The encoded ``red_info``.
+    """
+    return json.dumps(_to_serializable(red_info), sort_keys=True).encode()
+
+
+@dataclass
+class Divergence:
+    """The first point at which an engine stops matching a reference trace."""
+
+    episode: int
+    """The episode the divergence is in."""
+    step: int
+    """The step of the episode the divergence is at, 0 for the reset."""
+    fields: List[str]
+    """The names of the values that differ."""
+    expected: Dict[str, Any]
+    """The values from the trace, of the fields that differ."""
+    actual: Dict[str, Any]
+    """The values from the engine, of the fields that differ."""
+    node_diff: List[Tuple[str, str, Any, Any]] = field(default_factory=list)
+    """The node, attribute, expected value and actual value of each node state that differs."""
+
+    def __str__(self) -> str:
+        lines = [
+            f"Diverged at episode {self.episode}, step {self.step} on {', '.join(self.fields)}."
+        ]
+        for name in self.fields:
+            if name != "node_states":
+                lines.append(
+                    f"  {name}: expected {self.expected[name]!r}, got {self.actual[name]!r}"
+                )
+        if self.node_diff:
+            lines.append(
+                tabulate(
+                    self.node_diff, headers=["node", "attribute", "expected", "actual"]
+                )
+            )
+        return "\n".join(lines)
+
+
+@dataclass
+class ReferenceTrace:
+    """A record of the states of an env after each reset and step of a number of seeded episodes."""
+
+    metadata: Dict[str, Any]
+    """The seeds, network, game mode and versions the trace was recorded with, and the name of every node seen."""
+    episodes: np.ndarray
+    """The episode of each row."""
+    steps: np.ndarray
+    """The step of the episode of each row, 0 for the reset."""
+    actions: np.ndarray
+    """The blue action of each row, -1 for the resets."""
+    rewards: np.ndarray
+    """The reward of each row."""
+    dones: np.ndarray
+    """Whether the episode is done after each row."""
+    observation_hashes: np.ndarray
+    """The :func:`hash_observation` of the observation of each row."""
+    red_info: List[bytes]
+    """The :func:`encode_red_info` of each row."""
+    node_offsets: np.ndarray
+    """The start of the nodes of each row in ``node_ids`` and ``node_states``, with the end of the last row."""
+    node_ids: np.ndarray
+    """The index of each node in the ``node_names`` of the metadata."""
+    node_states: np.ndarray
+    """The :data:`NODE_STATE_FIELDS` of each node of each row."""
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @property
+    def network(self) -> Network:
+        """The network the trace was recorded on."""
+        return Network.create(json.loads(json.dumps(self.metadata["network"])))
+
+    @property
+    def game_mode(self) -> GameMode:
+        """The game mode the trace was recorded with."""
+        return GameMode.create(json.loads(json.dumps(self.metadata["game_mode"])))
+
+    def get_node_states(self, row: int) -> Dict[str, np.ndarray]:
+        """
+        Get the state of every node after a row.
+
+        :param row: The row.
+        :return: The :data:`NODE_STATE_FIELDS` of each node by name.
+        """
+        start, end = self.node_offsets[row], self.node_offsets[row + 1]
+        names = self.metadata["node_names"]
+        return {
+            names[i]: states
+            for i, states in zip(self.node_ids[start:end], self.node_states[start:end])
+        }
+
+    def save(self, path: Union[str, Path]):
+        """
+        Save the trace to a compressed ``.npz`` file.
+
+        :param path: The path of the file.
+        """
+        red_info_offsets = np.cumsum([0] + [len(info) for info in self.red_info])
+        with open(path, "wb") as file:
+            np.savez_compressed(
+                file,
+                metadata=np.frombuffer(json.dumps(self.metadata).encode(), np.uint8),
+                episodes=self.episodes,
+                steps=self.steps,
+                actions=self.actions,
+                rewards=self.rewards,
+                dones=self.dones,
+                observation_hashes=self.observation_hashes,
+                red_info=np.frombuffer(b"".join(self.red_info), np.uint8),
+                red_info_offsets=red_info_offsets.astype(np.int64),
+                node_offsets=self.node_offsets,
+                node_ids=self.node_ids,
+                node_states=self.node_states,
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> ReferenceTrace:
+        """
+        Load a trace saved by :meth:`save`.
+
+        :param path: The path of the file.
+        :return: The trace.
+        """
+        with open(path, "rb") as file:
+            arrays = dict(np.load(io.BytesIO(file.read())))
+        metadata = json.loads(arrays.pop("metadata").tobytes())
+        if metadata.get("format_version") != TRACE_FORMAT_VERSION:
+            msg = (
+                f"The trace at {path} has format version {metadata.get('format_version')}, "
+                f"only version {TRACE_FORMAT_VERSION} is supported."
+            )
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        blob = arrays.pop("red_info").tobytes()
+        offsets = arrays.pop("red_info_offsets")
+        red_info = [blob[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return cls(metadata=metadata, red_info=red_info, **arrays)
+
+
+class _TraceBuilder:
+    """Accumulates the rows of a trace."""
+
+    def __init__(self):
+        self.node_names: List[str] = []
+        self._node_index: Dict[str, int] = {}
+        self.columns: Dict[str, list] = {
+            "episodes": [],
+            "steps": [],
+            "actions": [],
+            "rewards": [],
+            "dones": [],
+            "observation_hashes": [],
+        }
+        self.red_info: List[bytes] = []
+        self.node_offsets = [0]
+        self.node_ids: List[np.ndarray] = []
+        self.node_states: List[np.ndarray] = []
+
+    def add(
+        self,
+        episode: int,
+        step: int,
+        action: int,
+        reward: float,
+        done: bool,
+        observation_hash: int,
+        red_info: bytes,
+        node_names: List[str],
+        node_states: np.ndarray,
+    ):
+        for key, value in zip(
+            self.columns,
+            [episode, step, action, reward, done, observation_hash],
+        ):
+            self.columns[key].append(value)
+        self.red_info.append(red_info)
+        for name in node_names:
+            if name not in self._node_index:
+                self._node_index[name] = len(self.node_names)
+                self.node_names.append(name)
+        self.node_ids.append(
+            np.array([self._node_index[name] for name in node_names], dtype=np.int32)
+        )
+        self.node_states.append(node_states)
+        self.node_offsets.append(self.node_offsets[-1] + len(node_names))
+
+    def build(self, metadata: Dict[str, Any]) -> ReferenceTrace:
+        metadata = dict(metadata, node_names=self.node_names)
+        columns = self.columns
+        return ReferenceTrace(
+            metadata=metadata,
+            episodes=np.array(columns["episodes"], dtype=np.int32),
+            steps=np.array(columns["steps"], dtype=np.int32),
+            actions=np.array(columns["actions"], dtype=np.int64),
+            rewards=np.array(columns["rewards"], dtype=np.float64),
+            dones=np.array(columns["dones"], dtype=bool),
+            observation_hashes=np.array(columns["observation_hashes"], dtype=np.uint64),
+            red_info=self.red_info,
+            node_offsets=np.array(self.node_offsets, dtype=np.int64),
+            node_ids=np.concatenate(self.node_ids),
+            node_states=np.concatenate(self.node_states),
+        )
+
+
+def _observe(
+    env,
+    observation,
+    reward: float,
+    done: bool,
+    info: Optional[Dict],
+    node_state_reader: Callable,
+) -> Dict[str, Any]:
+    """Read the values recorded for a row from an env."""
+    node_names, node_states = node_state_reader(env)
+    return {
+        "reward": float(reward),
+        "done": bool(done),
+        "observation_hash": hash_observation(observation),
+        "red_info": encode_red_info((info or {}).get("red_info")),
+        "node_names": node_names,
+        "node_states": node_states,
+    }
+
+
+def _build_env(metadata: Dict[str, Any], env_factory: EnvFactory):
+    """Build the env of the network and game mode saved in the metadata of a trace, seeded by the trace."""
+    # seeded first, as creating the network and building the env can draw random values such as the vulnerabilities
+    set_random_seed(metadata["seed"])
+    network = Network.create(json.loads(json.dumps(metadata["network"])))
+    game_mode = GameMode.create(json.loads(json.dumps(metadata["game_mode"])))
+    return env_factory(network, game_mode)
+
+
+def record_trace(
+    network: Network,
+    game_mode: GameMode,
+    seed: int = 0,
+    episodes: int = 10,
+    max_steps: Optional[int] = 200,
+    env_factory: EnvFactory = make_env,
+    node_state_reader: Callable = read_node_states,
+) -> ReferenceTrace:
+    """
+    Record a trace of seeded episodes of random blue actions.
+
+    The global random generators are seeded with ``seed`` before the env is built and with ``seed + episode``
+    before it is reset for each episode, and the blue actions are drawn from a generator of their own seeded with ``seed``, so the trace can be replayed exactly.
+
+    :param network: The network.
+    :param game_mode: The game mode.
+    :param seed: The seed of the first episode and of the actions.
+    :param episodes: The number of episodes to record.
+    :param max_steps: The most steps to record of each episode, None to record each until it is done.
+    :param env_factory: The function that builds the env to record.
+    :param node_state_reader: The function that reads the names and states of the nodes from the env.
+    :return: The trace.
+    """
+    metadata = {
+        "format_version": TRACE_FORMAT_VERSION,
+        "yawning_titan_version": yawning_titan.__version__,
+        "seed": seed,
+        "episode_seeds": [seed + episode for episode in range(episodes)],
+        "max_steps": max_steps,
+        "network": network.to_dict(json_serializable=True),
+        "game_mode": game_mode.to_dict(json_serializable=True),
+    }
+    env = _build_env(metadata, env_factory)
+    action_generator = np.random.default_rng(seed)
+    builder = _TraceBuilder()
+    for episode, episode_seed in enumerate(metadata["episode_seeds"]):
+        set_random_seed(episode_seed)
+        observation = env.reset()
+        values = _observe(env, observation, 0.0, False, None, node_state_reader)
+        builder.add(episode, 0, -1, **values)
+        step = 0
+        done = False
+        while not done and (max_steps is None or step < max_steps):
+            action = int(action_generator.integers(env.action_space.n))
+            observation, reward, done, info = env.step(action)
+            step += 1
+            values = _observe(env, observation, reward, done, info, node_state_reader)
+            builder.add(episode, step, action, **values)
+    return builder.build(metadata)
+
+
+def _diff_node_states(
+    expected: Dict[str, np.ndarray],
+    names: List[str],
+    states: np.ndarray,
+    atol: float,
+) -> List[Tuple[str, str, Any, Any]]:
+    """Get the node states that differ between a row of a trace and an env."""
+    actual = dict(zip(names, states))
+    diff = []
+    for name in list(expected) + [n for n in actual if n not in expected]:
+        if name not in actual:
+            diff.append((name, "node", "present", "missing"))
+        elif name not in expected:
+            diff.append((name, "node", "missing", "present"))
+        else:
+            for i, attribute in enumerate(NODE_STATE_FIELDS):
+                if abs(expected[name][i] - actual[name][i]) > atol:
+                    diff.append(
+                        (
+                            name,
+                            attribute,
+                            expected[name][i].item(),
+                            actual[name][i].item(),
+                        )
+                    )
+    return diff
+
+
+def check_trace(
+    trace: ReferenceTrace,
+    env_factory: EnvFactory = make_env,
+    node_state_reader: Callable = read_node_states,
+    atol: float = 1e-9,
+    check_red_info: bool = True,
+) -> Optional[Divergence]:
+    """
+    Replay a trace against an engine and find the first point at which it diverges.
+
+    The env is built from the network and game mode of the trace and each episode is seeded, reset and stepped
+    with the actions of the trace, with the same seeds as when it was recorded.
+
+    :param trace: The trace.
+    :param env_factory: The function that builds the env of the engine to check.
+    :param node_state_reader: The function that reads the names and states of the nodes from the env.
+    :param atol: The absolute tolerance of the rewards and node states.
+    :param check_red_info: Whether to compare the ``red_info`` of each step, which requires the env to report it in
+        its info.
+    :return: The first divergence, None if the engine matches the whole trace.
+    """
+    env = _build_env(trace.metadata, env_factory)
+    for row in range(len(trace)):
+        episode, step = int(trace.episodes[row]), int(trace.steps[row])
+        if step == 0:
+            set_random_seed(trace.metadata["episode_seeds"][episode])
+            observation = env.reset()
+            values = _observe(env, observation, 0.0, False, None, node_state_reader)
+        else:
+            observation, reward, done, info = env.step(int(trace.actions[row]))
+            values = _observe(env, observation, reward, done, info, node_state_reader)
+
+        expected = {
+            "reward": float(trace.rewards[row]),
+            "done": bool(trace.dones[row]),
+            "observation_hash": int(trace.observation_hashes[row]),
+        }
+        fields = [
+            name
+            for name in ["reward", "done", "observation_hash"]
+            if (
+                abs(values[name] - expected[name]) > atol
+                if name == "reward"
+                else values[name] != expected[name]
+            )
+        ]
+        if check_red_info and values["red_info"] != trace.red_info[row]:
+            fields.append("red_info")
+            expected["red_info"] = json.loads(trace.red_info[row])
+            values["red_info"] = json.loads(values["red_info"])
+        node_diff = _diff_node_states(
+            trace.get_node_states(row),
+            values["node_names"],
+            values["node_states"],
+            atol,
+        )
+        if node_diff:
+            fields.append("node_states")
+        if fields:
+            return Divergence(
+                episode=episode,
+                step=step,
+                fields=fields,
+                expected={name: expected.get(name) for name in fields},
+                actual={name: values.get(name) for name in fields},
+                node_diff=node_diff,
+            )
+    return None
+
+
+def get_golden_trace_path(name: str) -> Path:
+    """
+    Get the path of a golden trace shipped with the package.
+
+    :param name: The name of the trace, one of :data:`GOLDEN_TRACES`.
+    :return: The path.
+    """
+    if name not in GOLDEN_TRACES:
+        msg = f"name must be one of {list(GOLDEN_TRACES)}, got '{name}'."
+        _LOGGER.error(msg, exc_info=True)
+        raise ValueError(msg)
+    return GOLDEN_TRACE_DIR / f"{name}.npz"
+
+
+def load_golden_trace(name: str) -> ReferenceTrace:
+    """
+    Load a golden trace shipped with the package.
+
+    :param name: The name of the trace, one of :data:`GOLDEN_TRACES`.
+    :return: The trace.
+    """
+    return ReferenceTrace.load(get_golden_trace_path(name))
+
+
+def record_golden_traces(directory: Path = GOLDEN_TRACE_DIR):
+    """
+    Record the golden traces again, such as after a deliberate change to the rules of the game.
+
+    :param directory: The directory to save the traces to.
+    """
+    from yawning_titan.game_modes.game_mode_db import dcbo_game_mode, default_game_mode
+    from yawning_titan.networks.network_db import (
+        dcbo_base_network,
+        default_18_node_network,
+    )
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, network, game_mode in [
+        ("default", default_18_node_network(), default_game_mode()),
+        ("dcbo", dcbo_base_network(), dcbo_game_mode()),
+    ]:
+        record_trace(network, game_mode).save(directory / f"{name}.npz")
+
+
+if __name__ == "__main__":
+    record_golden_traces()
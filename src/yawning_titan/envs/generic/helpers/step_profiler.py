@@ -0,0 +1,244 @@
+"""
+An opt-in profiler of where the time goes in each step of a ``GenericNetworkEnv``.
+
+A :class:`StepProfiler` is attached to an env by ``GenericNetworkEnv.enable_profiling``
+(or the ``profile`` argument of the env), which wraps the step of the env to begin
+and end the timing. The step then reads a monotonic clock at the end of each of its
+phases and adds the time since the previous reading to the phase, and the times of
+the last ``window`` steps are kept to give rolling stats.
+The profiler can also count the calls made to the hot methods of the
+``NetworkInterface`` of the env, by shadowing them with counting wrappers on the
+instance for as long as it is attached.
+
+With no profiler attached the end of each phase calls :func:`skip_phase`, which
+does nothing, and the network interface is untouched.
+
+:class:`StepProfilerCallback` records the stats of the profilers of the training
+envs to the stable-baselines3 logger, and so to TensorBoard, at the end of each
+rollout.
+"""
+from __future__ import annotations
+
+import time
+from collections import Counter
+from logging import getLogger
+from typing import TYPE_CHECKING, Dict, Final, List, Optional, Tuple
+
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+if TYPE_CHECKING:
+    from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+_LOGGER = getLogger(__name__)
+
+PHASES: Final[Tuple[str, ...]] = (
+    "notes",
+    "red_turn",
+    "loss_conditions",
+    "blue_action",
+    "reward",
+    "observation",
+    "json_output",
+    "metrics",
+)
+"""The phases of a step that are timed."""
+
+(
+    NOTES,
+    RED_TURN,
+    LOSS_CONDITIONS,
+    BLUE_ACTION,
+    REWARD,
+    OBSERVATION,
+    JSON_OUTPUT,
+    METRICS,
+) = range(len(PHASES))
+
+HOT_METHODS: Final[Tuple[str, ...]] = (
+    "get_current_connected_nodes",
+    "get_base_connected_nodes",
+    "get_current_observation",
+    "get_shortest_distances_to_target",
+    "get_target_node",
+    "attack_node",
+    "attack_nodes",
+    "update_stored_attacks",
+    "make_node_safe",
+    "isolate_node",
+    "reconnect_node",
+    "scan_node",
+    "add_deceptive_node",
+)
+"""The methods of the network interface whose calls are counted."""
+
+
+def skip_phase(phase: int):
+    """
+    Do nothing at the end of a phase of a step that is not being timed.
+
+    :param phase: The index of the phase in :data:`PHASES`.
+    """
+
+
+class StepProfiler:
+    """The time spent in each phase of the last ``window`` steps of an env, and the calls to its network interface."""
+
+    def __init__(self, window: int = 1000):
+        """
+        The StepProfiler constructor.
+
+        :param window: The number of most recent steps the stats are worked out over.
+        """
+        if window < 1:
+            msg = f"window must be at least 1, got {window}."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        self.window = window
+        # the nanoseconds spent in each phase of each of the last `window` steps, a ring buffer of rows
+        self._durations = np.zeros((window, len(PHASES)), dtype=np.int64)
+        self._row = 0
+        self.steps = 0
+        """The number of steps profiled."""
+        self.call_counts: Counter = Counter()
+        """The number of calls made to each of the counted network interface methods."""
+        self._step = [0] * len(PHASES)
+        self._last = 0
+        self._network_interface: Optional[NetworkInterface] = None
+
+    def begin(self):
+        """Start timing a step."""
+        self._step = [0] * len(PHASES)
+        self._last = time.perf_counter_ns()
+
+    def lap(self, phase: int):
+        """
+        Add the time since the start of the step or the previous lap to a phase.
+
+        :param phase: The index of the phase in :data:`PHASES`.
+        """
+        now = time.perf_counter_ns()
+        self._step[phase] += now - self._last
+        self._last = now
+
+    def end(self):
+        """Finish timing a step, adding it to the window."""
+        self._durations[self._row] = self._step
+        self._row = (self._row + 1) % self.window
+        self.steps += 1
+
+    def attach(self, network_interface: NetworkInterface):
+        """
+        Start counting the calls made to the hot methods of a network interface.
+
+        :param network_interface: The network interface.
+        """
+        self.detach()
+        for name in HOT_METHODS:
+            setattr(
+                network_interface,
+                name,
+                self._count_calls(name, getattr(network_interface, name)),
+            )
+        self._network_interface = network_interface
+
+    def detach(self):
+        """Stop counting calls, restoring the methods of the network interface."""
+        if self._network_interface is None:
+            return
+        for name in HOT_METHODS:
+            self._network_interface.__dict__.pop(name, None)
+        self._network_interface = None
+
+    def _count_calls(self, name: str, method):
+        call_counts = self.call_counts
+
+        def counted(*args, **kwargs):
+            call_counts[name] += 1
+            return method(*args, **kwargs)
+
+        return counted
+
+    def reset(self):
+        """Forget every step and call profiled so far."""
+        self._durations.fill(0)
+        self._row = 0
+        self.steps = 0
+        self.call_counts.clear()
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the rolling stats of the steps in the window.
+
+        For each phase this is the mean and 95th percentile time in milliseconds and its share of the total step
+        time, along with the same times for whole steps, the steps per second they add up to and the calls made to
+        each counted method per step since the profiler was last reset.
+
+        :return: The stats by name, empty if no steps have been profiled.
+        """
+        n = min(self.steps, self.window)
+        if n == 0:
+            return {}
+        durations = self._durations[:n] / 1e6
+        totals = durations.sum(axis=1)
+        total = totals.sum()
+        stats: Dict[str, float] = {}
+        for i, phase in enumerate(PHASES):
+            stats[f"{phase}_ms_mean"] = float(durations[:, i].mean())
+            stats[f"{phase}_ms_p95"] = float(np.percentile(durations[:, i], 95))
+            stats[f"{phase}_share"] = (
+                float(durations[:, i].sum() / total) if total else 0.0
+            )
+        stats["step_ms_mean"] = float(totals.mean())
+        stats["step_ms_p95"] = float(np.percentile(totals, 95))
+        stats["steps_per_second"] = float(1000 * n / total) if total else 0.0
+        for name, count in sorted(self.call_counts.items()):
+            stats[f"calls_per_step/{name}"] = count / self.steps
+        return stats
+
+    def __getstate__(self):
+        # the counting wrappers are not picklable, so only the stats are sent between processes
+        state = self.__dict__.copy()
+        state["_network_interface"] = None
+        return state
+
+
+class StepProfilerCallback(BaseCallback):
+    """Record the stats of the step profilers of the training envs to the stable-baselines3 logger after each rollout."""
+
+    def __init__(self, prefix: str = "profiler", verbose: int = 0):
+        """
+        The StepProfilerCallback constructor.
+
+        :param prefix: The prefix of the keys the stats are recorded under.
+        :param verbose: The verbosity level.
+        """
+        super().__init__(verbose)
+        self.prefix = prefix
+
+    def get_summary(self) -> Dict[str, float]:
+        """
+        Get the stats of the step profilers of the training envs, averaged over the envs.
+
+        :return: The stats by name, empty if none of the envs are profiled.
+        """
+        summaries: List[Dict[str, float]] = [
+            profiler.summary()
+            for profiler in self.training_env.get_attr("profiler")
+            if profiler is not None
+        ]
+        summaries = [summary for summary in summaries if summary]
+        if not summaries:
+            return {}
+        keys = sorted(set().union(*summaries))
+        return {
+            key: float(np.mean([summary.get(key, 0.0) for summary in summaries]))
+            for key in keys
+        }
+
+    def _on_step(self) -> bool:
+        return True
+
+    def _on_rollout_end(self) -> None:
+        for key, value in self.get_summary().items():
+            self.logger.record(f"{self.prefix}/{key}", value)
@@ -0,0 +1,467 @@
+"""
+A buffered, columnar record of the state of a ``GenericNetworkEnv`` at every step, for audits.
+
+A :class:`TrajectoryWriter` is used by ``GenericNetworkEnv`` when the
+``output_timestep_data_to_json`` option of the game mode is on. After each step it
+copies the state of every node (compromised status, blue view, isolation and
+vulnerability) out of the network and puts it on a bounded queue, so that the step
+is only held up if the writer falls behind by more than the size of the queue. A
+background thread takes the steps off the queue and appends them to the columns of
+the current chunk, which is written to its own shard once it holds ``chunk_size``
+steps.
+
+The topology (the nodes and the edges between them) is only read when the
+``topology_version`` of the network interface changes, and each distinct topology
+is only recorded once, with each step pointing at the topology it was taken on.
+
+A trajectory is a directory of::
+
+    manifest.json       # the node table, the shards and the topologies
+    shard_00000/        # the columns of a chunk of steps, each a .npy file
+    shard_00001/
+    ...
+
+Shards are plain ``.npy`` files so that :class:`TrajectoryReader` can memory-map
+them, only reading the pages of the episodes asked for. With ``compress=True``
+each shard is written as a single compressed ``.npz`` file instead, which is
+smaller but read into memory as a whole.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import threading
+import weakref
+from datetime import datetime
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Final, List, Optional, Tuple, Union
+from uuid import uuid4
+
+import numpy as np
+
+from yawning_titan import TRAJECTORIES_DIR
+from yawning_titan.networks.node_state import STATE_FIELDS
+
+if TYPE_CHECKING:
+    from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+_LOGGER = getLogger(__name__)
+
+TRAJECTORY_FORMAT_VERSION: Final[int] = 1
+"""The version of the layout of the trajectory directory."""
+
+TRAJECTORY_FIELDS: Final[Tuple[str, ...]] = (
+    "true_compromised_status",
+    "blue_view_compromised_status",
+    "isolated",
+    "vulnerability_score",
+)
+"""The node attributes recorded at each step."""
+
+MANIFEST_NAME: Final[str] = "manifest.json"
+
+
+def get_default_trajectory_dir() -> Path:
+    """
+    Get a new directory under :data:`~yawning_titan.TRAJECTORIES_DIR` to write a trajectory to.
+
+    :return: The path of the directory, named after the current time.
+    """
+    return TRAJECTORIES_DIR / f"{datetime.now():%Y%m%d_%H%M%S}_{uuid4().hex[:8]}"
+
+
+def _close_at_exit(writer_ref: weakref.ref):
+    writer = writer_ref()
+    if writer is not None:
+        writer.close()
+
+
+class _Chunk:
+    """The columns of the steps and the topologies not yet written to a shard."""
+
+    def __init__(self):
+        self.episodes: List[int] = []
+        self.steps: List[int] = []
+        self.topologies: List[int] = []
+        self.state_offsets: List[int] = [0]
+        self.states: Dict[str, List[np.ndarray]] = {f: [] for f in TRAJECTORY_FIELDS}
+        self.topology_ids: List[int] = []
+        self.topology_nodes: List[np.ndarray] = []
+        self.topology_edges: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        def concatenate(arrays: List[np.ndarray], dtype, shape=(0,)) -> np.ndarray:
+            return np.concatenate(arrays) if arrays else np.empty(shape, dtype)
+
+        return {
+            "episode": np.array(self.episodes, dtype=np.int32),
+            "step": np.array(self.steps, dtype=np.int32),
+            "topology": np.array(self.topologies, dtype=np.int32),
+            "state_offsets": np.array(self.state_offsets, dtype=np.int64),
+            **{
+                field: concatenate(arrays, STATE_FIELDS[field])
+                for field, arrays in self.states.items()
+            },
+            "topology_ids": np.array(self.topology_ids, dtype=np.int32),
+            "topology_node_offsets": np.cumsum(
+                [0] + [len(nodes) for nodes in self.topology_nodes]
+            ).astype(np.int64),
+            "topology_nodes": concatenate(self.topology_nodes, np.int32),
+            "topology_edge_offsets": np.cumsum(
+                [0] + [len(edges) for edges in self.topology_edges]
+            ).astype(np.int64),
+            "topology_edges": concatenate(self.topology_edges, np.int32, (0, 2)),
+        }
+
+
+class TrajectoryWriter:
+    """Appends the node states of each step to a chunked columnar trajectory from a background thread."""
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        chunk_size: int = 10000,
+        queue_size: int = 256,
+        compress: bool = False,
+    ):
+        """
+        The TrajectoryWriter constructor.
+
+        :param directory: The directory to write the trajectory to. Defaults to a new directory from
+            :func:`get_default_trajectory_dir`.
+        :param chunk_size: The number of steps written to each shard.
+        :param queue_size: The number of steps that can be waiting to be written before a step is held up.
+        :param compress: Whether to write each shard as a compressed ``.npz`` file rather than a directory of
+            ``.npy`` files that can be memory-mapped.
+        """
+        if chunk_size < 1 or queue_size < 1:
+            msg = f"chunk_size and queue_size must be at least 1, got {chunk_size} and {queue_size}."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        self.directory = Path(
+            get_default_trajectory_dir() if directory is None else directory
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.compress = compress
+
+        # state read by the stepping thread only
+        self._network_interface: Optional[NetworkInterface] = None
+        self._topology_version: Optional[int] = None
+        self._topology_id = -1
+        self._topology_ids: Dict[Tuple, int] = {}
+
+        # state owned by the background thread
+        self._node_index: Dict[str, int] = {}
+        self._node_uuids: List[str] = []
+        self._node_names: List[str] = []
+        self._shards: List[Dict[str, Any]] = []
+        self._topology_shards: Dict[int, int] = {}
+        self._chunk = _Chunk()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="TrajectoryWriter", daemon=True
+        )
+        self._thread.start()
+        atexit.register(_close_at_exit, weakref.ref(self))
+
+    def write_step(self, network_interface: NetworkInterface, episode: int, step: int):
+        """
+        Queue the current state of a network to be written as a step.
+
+        The topology is only read when the ``topology_version`` of the network interface has changed since the
+        last step written.
+
+        :param network_interface: The network interface of the env.
+        :param episode: The episode the step is in.
+        :param step: The step of the episode.
+        """
+        self._raise_error()
+        if self._closed:
+            msg = "Cannot write a step to a closed trajectory."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        graph = network_interface.current_graph
+        if (
+            network_interface is not self._network_interface
+            or network_interface.topology_version != self._topology_version
+        ):
+            self._queue_topology(network_interface)
+        states = tuple(graph.get_state_array(field) for field in TRAJECTORY_FIELDS)
+        self._queue.put(("step", episode, step, self._topology_id, states))
+
+    def _queue_topology(self, network_interface: NetworkInterface):
+        """Point the steps at the topology of a network, queueing it if it has not been seen before."""
+        graph = network_interface.current_graph
+        nodes = list(graph.nodes)
+        position = {node: i for i, node in enumerate(nodes)}
+        edges = np.array(
+            [(position[u], position[v]) for u, v in graph.edges], dtype=np.int32
+        ).reshape(-1, 2)
+        node_keys = tuple((node.uuid, node.name) for node in nodes)
+        key = (node_keys, edges.tobytes())
+        self._network_interface = network_interface
+        self._topology_version = network_interface.topology_version
+        if key in self._topology_ids:
+            self._topology_id = self._topology_ids[key]
+            return
+        self._topology_id = len(self._topology_ids)
+        self._topology_ids[key] = self._topology_id
+        self._queue.put(("topology", self._topology_id, node_keys, edges))
+
+    def flush(self):
+        """Wait for every queued step to be written, writing the current chunk to a shard even if it is not full."""
+        self._raise_error()
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait()
+        self._raise_error()
+
+    def close(self):
+        """Write every queued step and stop the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            msg = f"Failed to write the trajectory to {self.directory}."
+            _LOGGER.error(msg, exc_info=error)
+            raise RuntimeError(msg) from error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if self._error is not None:
+                    # keep draining the queue so the stepping thread is never blocked
+                    if isinstance(item, tuple) and item[0] == "flush":
+                        item[1].set()
+                elif item is None:
+                    self._write_chunk()
+                elif item[0] == "step":
+                    self._add_step(*item[1:])
+                elif item[0] == "topology":
+                    self._add_topology(*item[1:])
+                else:
+                    self._write_chunk()
+                    item[1].set()
+            except Exception as error:
+                # the error is raised on the stepping thread
+                self._error = error
+                if isinstance(item, tuple) and item[0] == "flush":
+                    item[1].set()
+            if item is None:
+                return
+
+    def _add_step(self, episode: int, step: int, topology: int, states: Tuple):
+        chunk = self._chunk
+        chunk.episodes.append(episode)
+        chunk.steps.append(step)
+        chunk.topologies.append(topology)
+        for field, values in zip(TRAJECTORY_FIELDS, states):
+            chunk.states[field].append(values)
+        chunk.state_offsets.append(chunk.state_offsets[-1] + len(states[0]))
+        if len(chunk) >= self.chunk_size:
+            self._write_chunk()
+
+    def _add_topology(self, topology_id: int, node_keys: Tuple, edges: np.ndarray):
+        node_ids = []
+        for uuid, name in node_keys:
+            if uuid not in self._node_index:
+                self._node_index[uuid] = len(self._node_uuids)
+                self._node_uuids.append(uuid)
+                self._node_names.append(name)
+            node_ids.append(self._node_index[uuid])
+        self._chunk.topology_ids.append(topology_id)
+        self._chunk.topology_nodes.append(np.array(node_ids, dtype=np.int32))
+        self._chunk.topology_edges.append(edges)
+        self._topology_shards[topology_id] = len(self._shards)
+
+    def _write_chunk(self):
+        """Write the current chunk to a new shard and update the manifest."""
+        chunk = self._chunk
+        if not len(chunk) and not chunk.topology_ids:
+            return
+        name = f"shard_{len(self._shards):05d}"
+        arrays = chunk.to_arrays()
+        if self.compress:
+            name += ".npz"
+            with open(self.directory / name, "wb") as file:
+                np.savez_compressed(file, **arrays)
+        else:
+            shard_dir = self.directory / name
+            shard_dir.mkdir(exist_ok=True)
+            for key, array in arrays.items():
+                np.save(shard_dir / f"{key}.npy", array)
+        self._shards.append(
+            {
+                "name": name,
+                "steps": len(chunk),
+                "episodes": sorted(set(chunk.episodes)),
+            }
+        )
+        self._chunk = _Chunk()
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            "format_version": TRAJECTORY_FORMAT_VERSION,
+            "fields": list(TRAJECTORY_FIELDS),
+            "node_uuids": self._node_uuids,
+            "node_names": self._node_names,
+            "shards": self._shards,
+            "topology_shards": {str(k): v for k, v in self._topology_shards.items()},
+        }
+        path = self.directory / MANIFEST_NAME
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file)
+        os.replace(tmp_path, path)
+
+
+class TrajectoryReader:
+    """Reads a trajectory written by a :class:`TrajectoryWriter`, memory-mapping the shards where it can."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        The TrajectoryReader constructor.
+
+        :param directory: The directory of the trajectory.
+        """
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_NAME) as file:
+            self.manifest: Dict[str, Any] = json.load(file)
+        if self.manifest.get("format_version") != TRAJECTORY_FORMAT_VERSION:
+            msg = (
+                f"The trajectory at {directory} has format version {self.manifest.get('format_version')}, "
+                f"only version {TRAJECTORY_FORMAT_VERSION} is supported."
+            )
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        self.node_uuids: List[str] = self.manifest["node_uuids"]
+        """The uuid of every node seen in the trajectory."""
+        self.node_names: List[str] = self.manifest["node_names"]
+        """The name of every node seen in the trajectory."""
+        self._shards: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def _get_shard(self, index: int) -> Dict[str, np.ndarray]:
+        if index not in self._shards:
+            path = self.directory / self.manifest["shards"][index]["name"]
+            if path.suffix == ".npz":
+                with np.load(path) as arrays:
+                    self._shards[index] = dict(arrays)
+            else:
+                self._shards[index] = {
+                    file.stem: np.load(file, mmap_mode="r")
+                    for file in path.glob("*.npy")
+                }
+        return self._shards[index]
+
+    @property
+    def num_steps(self) -> int:
+        """The number of steps in the trajectory."""
+        return sum(shard["steps"] for shard in self.manifest["shards"])
+
+    @property
+    def episodes(self) -> List[int]:
+        """The episodes in the trajectory."""
+        return sorted(
+            {e for shard in self.manifest["shards"] for e in shard["episodes"]}
+        )
+
+    def get_topology(self, topology: int) -> Tuple[List[str], np.ndarray]:
+        """
+        Get a topology of the trajectory.
+
+        :param topology: The id of the topology, as given by the ``topology`` of each step.
+        :return: The uuid of each node, in the order of the node states of the steps taken on the topology, and a
+            ``(edges, 2)`` array of the index of the node at either end of each edge.
+        """
+        shard = self._get_shard(self.manifest["topology_shards"][str(topology)])
+        i = int(np.flatnonzero(shard["topology_ids"] == topology)[0])
+        node_offsets = shard["topology_node_offsets"]
+        edge_offsets = shard["topology_edge_offsets"]
+        nodes = shard["topology_nodes"][node_offsets[i] : node_offsets[i + 1]]
+        edges = shard["topology_edges"][edge_offsets[i] : edge_offsets[i + 1]]
+        return [self.node_uuids[n] for n in nodes], np.asarray(edges)
+
+    def read_episode(self, episode: int) -> Dict[str, np.ndarray]:
+        """
+        Read the steps of an episode.
+
+        The node states of every step are packed end to end, with the states of step ``i`` at
+        ``state_offsets[i]:state_offsets[i + 1]`` in the order of the nodes of its topology. When the episode is
+        held in a single uncompressed shard the arrays are views of the memory-mapped shard.
+
+        :param episode: The episode.
+        :return: The ``step``, ``topology`` and ``state_offsets`` of the steps and the :data:`TRAJECTORY_FIELDS` of
+            their nodes.
+        """
+        parts = []
+        for index, shard_info in enumerate(self.manifest["shards"]):
+            if episode not in shard_info["episodes"]:
+                continue
+            shard = self._get_shard(index)
+            rows = np.flatnonzero(shard["episode"] == episode)
+            start, stop = int(rows[0]), int(rows[-1]) + 1
+            offsets = shard["state_offsets"]
+            part = {
+                "step": shard["step"][start:stop],
+                "topology": shard["topology"][start:stop],
+                "state_offsets": offsets[start : stop + 1] - offsets[start],
+            }
+            for field in TRAJECTORY_FIELDS:
+                part[field] = shard[field][offsets[start] : offsets[stop]]
+            parts.append(part)
+        if not parts:
+            msg = f"Episode {episode} is not in the trajectory at {self.directory}."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        if len(parts) == 1:
+            return parts[0]
+        episode_arrays = {
+            key: np.concatenate([part[key] for part in parts])
+            for key in ["step", "topology", *TRAJECTORY_FIELDS]
+        }
+        state_offsets = [parts[0]["state_offsets"]]
+        for part in parts[1:]:
+            state_offsets.append(part["state_offsets"][1:] + state_offsets[-1][-1])
+        episode_arrays["state_offsets"] = np.concatenate(state_offsets)
+        return episode_arrays
+
+    def get_time_step(self, episode: int, index: int) -> Dict[str, Any]:
+        """
+        Get a step of an episode as its edges and the features of each node.
+
+        :param episode: The episode.
+        :param index: The index of the step in the episode.
+        :return: The ``edges`` as pairs of node uuids and the ``features`` of each node by uuid, its compromised
+            status and vulnerability.
+        """
+        arrays = self.read_episode(episode)
+        uuids, edges = self.get_topology(int(arrays["topology"][index]))
+        start, stop = arrays["state_offsets"][index : index + 2]
+        compromised = arrays["true_compromised_status"][start:stop].tolist()
+        vulnerabilities = arrays["vulnerability_score"][start:stop].tolist()
+        return {
+            "edges": [[uuids[u], uuids[v]] for u, v in edges.tolist()],
+            "features": {
+                uuid: [c, v] for uuid, c, v in zip(uuids, compromised, vulnerabilities)
+            },
+        }
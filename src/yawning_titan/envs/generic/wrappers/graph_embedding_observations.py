@@ -1,12 +1,66 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
 import gym
 import networkx as nx
 import numpy as np
 from gym import ObservationWrapper
 from gym.spaces import Box
-from karateclub.graph_embedding.feathergraph import FeatherGraph
+from scipy import sparse
 
+from yawning_titan.envs.generic.core.network_interface import get_topology_hash
 from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
 
+EMBEDDING_CACHE_SIZE = 64
+"""The default number of embeddings of recently seen topologies to keep."""
+
+
+def embed_graph(
+    graph: nx.Graph, order: int = 5, eval_points: int = 25, theta_max: float = 2.5
+) -> np.ndarray:
+    """
+    Embed a graph with the Feather-G algorithm.
+
+    This computes the same characteristic function features, with the same defaults, as the ``FeatherGraph`` model
+    of Karateclub. Fitting that model reseeds the global ``random`` and ``numpy.random`` state, which would change
+    the course of the environment when embedding in a background thread. Feather-G itself uses no randomness, so
+    the embedding is computed here without touching the global state.
+
+    Args:
+        graph: the graph to embed
+        order: the number of powers of the normalised adjacency matrix to describe the neighbourhoods with
+        eval_points: the number of points to evaluate the characteristic functions at
+        theta_max: the largest point to evaluate the characteristic functions at
+
+    Returns:
+        A 1D numpy array containing the Feather embedding
+    """
+    nodes = list(graph.nodes)
+    # every node is given a self loop, so isolated nodes have a degree
+    adjacency = nx.adjacency_matrix(graph, nodelist=nodes, weight=None).astype(float)
+    adjacency = adjacency.tolil()
+    adjacency.setdiag(1.0)
+    adjacency = adjacency.tocsr()
+    # a self loop adds two to the degree of a node
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel() + 1.0
+    normalised_adjacency = sparse.diags(1.0 / degrees) @ adjacency
+
+    clustering = nx.clustering(graph)
+    features = np.column_stack(
+        (np.log(degrees + 1.0), [clustering[node] for node in nodes])
+    )
+    theta = np.linspace(0.01, theta_max, eval_points)
+    features = np.outer(features, theta).reshape(len(nodes), -1)
+    features = np.concatenate((np.cos(features), np.sin(features)), axis=1)
+
+    feature_blocks = []
+    for _ in range(order):
+        features = normalised_adjacency @ features
+        feature_blocks.append(features)
+    return np.concatenate(feature_blocks, axis=1).mean(axis=0)
+
 
 class FeatherGraphEmbedObservation(ObservationWrapper):
     """
@@ -15,9 +69,18 @@ class FeatherGraphEmbedObservation(ObservationWrapper):
     This wrapper uses the Feather-G Whole Graph embedding algorithm to embed the underlying environment
     graph and then re-creates the observation space to include the embedding and all other
     observation space settings from the configuration file.
+
+    Embeddings are kept in a least recently used cache keyed by the topology hash of the network
+    interface, so returning to a topology seen recently (such as by isolating then reconnecting a node)
+    does not embed the graph again.
     """
 
-    def __init__(self, env: GenericNetworkEnv, max_num_nodes: int = 100):
+    def __init__(
+        self,
+        env: GenericNetworkEnv,
+        max_num_nodes: int = 100,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+    ):
         """
         Initialise a Feather-G observation space wrapper.
 
@@ -34,6 +97,8 @@ class FeatherGraphEmbedObservation(ObservationWrapper):
 
             For example, if set to 100 (like the default), the agent could be trained in
             an environment with 10 nodes, 50 nodes or 100 nodes.
+
+            cache_size: the number of embeddings of recently seen topologies to keep
         """
         super(FeatherGraphEmbedObservation, self).__init__(env)
         self.env: GenericNetworkEnv = env
@@ -43,19 +108,24 @@ class FeatherGraphEmbedObservation(ObservationWrapper):
         self.observation_space: gym.spaces.Box = Box(
             -np.inf, np.inf, shape=(self.new_ob_space_dim,)
         )
-        self.latest_adj_matrix = None
+        self.latest_topology_hash: Optional[int] = None
         self.latest_graph_embedding = None
+        self.cache_size = cache_size
+        self._embeddings: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        # guards the cache, which the background precomputing threads also add to
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
 
     def observation(self, observation: np.ndarray) -> np.ndarray:
         """
         Observation Transformation Function.
 
-        1. Generates a networkx graph object from the current adjacency matrix
-        2. Collects the current vulnerability scores and node status's
-        3. Pads the returned arrays to ensure length is 100 (currently arbitrarily set)
-        4. Embeds the networkx graph using the Feather Graph algorithm from Karateclub
-        5. Concatenates the graph embedding, padded vulnerability scores and padded node status's together
-        6. Returns new observation
+        1. Looks up the embedding of the current topology, embedding the current graph using the Feather
+           Graph algorithm from Karateclub if it is not cached
+        2. Collects the rest of the standard observation
+        3. Concatenates the graph embedding and the rest of the observation together
+        4. Returns new observation
 
         Args:
             observation: The base, unwrapped observation generated by the environment
@@ -63,18 +133,17 @@ class FeatherGraphEmbedObservation(ObservationWrapper):
         Returns:
             A newly formatted environment observation
         """
-        if self.latest_adj_matrix is None:
-            self.latest_adj_matrix = self.env.network_interface.adj_matrix
-            self.latest_graph_embedding = self.make_embedding()
-
-        elif (
-            self.env.network_interface.adj_matrix.all() != self.latest_adj_matrix.all()
-        ):
-            self.latest_adj_matrix = self.env.network_interface.adj_matrix
-            self.latest_graph_embedding = self.make_embedding()
-
-        standard_obs = self.env.network_interface.get_current_observation()
-        if self.network_interface.game_mode.observation_space.node_connections.value:
+        topology_hash = self.network_interface.topology_hash
+        if topology_hash != self.latest_topology_hash:
+            self.latest_topology_hash = topology_hash
+            self.latest_graph_embedding = self._get_cached_embedding(topology_hash)
+            if self.latest_graph_embedding is None:
+                self.latest_graph_embedding = self.make_embedding()
+                self._cache_embedding(topology_hash, self.latest_graph_embedding)
+
+        if self.network_interface.rules.observation_space_node_connections:
+            # the concatenation is a new array, so the observation buffer need not be copied first
+            standard_obs = self.network_interface.get_current_observation(copy=False)
             size_standard_adj = self.network_interface.get_total_num_nodes() ** 2
 
             extra_obs = standard_obs[size_standard_adj:]
@@ -82,20 +151,80 @@ class FeatherGraphEmbedObservation(ObservationWrapper):
                 (self.latest_graph_embedding, extra_obs), axis=None, dtype=np.float32
             )
         else:
-            observation = standard_obs
+            observation = self.network_interface.get_current_observation()
 
         return observation
 
     def make_embedding(self) -> np.ndarray:
         """
-        Create a FeaterGraph embedding from the inputted NetworkX graph.
+        Create a FeaterGraph embedding of the current graph.
 
         Returns:
             A numpy array containing the Feather embedding
         """
-        current_graph = nx.from_numpy_array(self.latest_adj_matrix)
-        embedder = FeatherGraph()
-        embedder.fit([current_graph])
-        embedding = embedder.get_embedding()
+        return embed_graph(self.network_interface.current_graph)
 
+    def precompute_embeddings(
+        self, graphs: Iterable[nx.Graph], max_workers: Optional[int] = None
+    ) -> List[Future]:
+        """
+        Embed a pool of graphs in background threads and add the embeddings to the cache.
+
+        Each graph is copied when it is submitted, so it may go on changing while its embedding is computed.
+        This suits a pool of networks that the environment will be reset to, so their starting embeddings are
+        ready by the time they are needed. The pool should be no larger than the cache, or the first embeddings
+        will be evicted by the last.
+
+        Args:
+            graphs: the graphs to embed, such as the current graphs of the network interfaces of other environments
+            max_workers: the maximum number of threads to embed with, shared by every call. Defaults to the
+                ``ThreadPoolExecutor`` default
+
+        Returns:
+            A future for each graph, resolving to its embedding
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="feather-embedding"
+            )
+        futures = []
+        for graph in graphs:
+            # the graph may change while the job waits, so a copy of it is embedded under the hash of the copy
+            graph = nx.Graph(graph)
+            topology_hash = get_topology_hash(graph)
+            futures.append(
+                self._executor.submit(self._precompute_embedding, graph, topology_hash)
+            )
+        self._futures = [f for f in self._futures if not f.done()] + futures
+        return futures
+
+    def close(self):
+        """Shut down the background embedding threads, if any, and close the environment."""
+        if self._executor is not None:
+            for future in self._futures:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._futures = []
+        super(FeatherGraphEmbedObservation, self).close()
+
+    def _precompute_embedding(self, graph: nx.Graph, topology_hash: int) -> np.ndarray:
+        embedding = self._get_cached_embedding(topology_hash)
+        if embedding is None:
+            embedding = embed_graph(graph)
+            self._cache_embedding(topology_hash, embedding)
         return embedding
+
+    def _get_cached_embedding(self, topology_hash: int) -> Optional[np.ndarray]:
+        with self._lock:
+            embedding = self._embeddings.get(topology_hash)
+            if embedding is not None:
+                self._embeddings.move_to_end(topology_hash)
+            return embedding
+
+    def _cache_embedding(self, topology_hash: int, embedding: np.ndarray):
+        with self._lock:
+            self._embeddings[topology_hash] = embedding
+            self._embeddings.move_to_end(topology_hash)
+            while len(self._embeddings) > self.cache_size:
+                self._embeddings.popitem(last=False)
@@ -0,0 +1,279 @@
+"""
+A graph structured observation of a YAWNING TITAN environment, for policies built on graph neural networks.
+
+:class:`GraphDictObservation` replaces the flat observation of a
+:class:`~yawning_titan.envs.generic.generic_env.GenericNetworkEnv` with a
+``gym.spaces.Dict`` of:
+
+- ``node_features``: a ``(max nodes, features)`` matrix with a row per node,
+  holding the per-node values of the observation space of the game mode
+  (compromised status, vulnerabilities and so on) and a copy of each of the
+  whole-network values (such as the average vulnerability) in every row.
+- ``edge_index``: a ``(2, max edges)`` array of the row of the node at either
+  end of each edge, in the layout used by graph neural network libraries such
+  as PyTorch Geometric. Each connection appears once in each direction.
+- ``node_mask`` and ``edge_mask``: 1 for the rows and edges in use, 0 for the
+  padding.
+
+The sizes are fixed when the wrapper is built, so environments of networks of
+different sizes can share one observation space (and so one policy) by giving
+them the same maximum numbers of nodes and edges. The arrays of the observation
+are allocated once and updated in place from the observation buffer of the
+network interface, with the edges only rewritten when the topology changes.
+Passing views into larger arrays as ``out`` lets a set of environments write
+their observations straight into one batch, see :func:`allocate_graph_observations`.
+
+The observation works with the stable-baselines3 ``MultiInputPolicy``.
+"""
+from __future__ import annotations
+
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from gym import ObservationWrapper
+from gym.spaces import Box
+from gym.spaces import Dict as DictSpace
+
+from yawning_titan.envs.generic.core import observation_buffer
+from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
+
+_LOGGER = getLogger(__name__)
+
+NODE_FEATURES = "node_features"
+EDGE_INDEX = "edge_index"
+NODE_MASK = "node_mask"
+EDGE_MASK = "edge_mask"
+
+STRUCTURAL_SEGMENTS = frozenset(
+    [observation_buffer.NODE_CONNECTIONS, observation_buffer.EDGE_LIST]
+)
+"""The observation buffer segments that describe the connections, which are given by the edge index instead."""
+
+GRAPH_SEGMENTS = frozenset(
+    [
+        observation_buffer.AVERAGE_VULNERABILITY,
+        observation_buffer.GRAPH_CONNECTIVITY,
+        observation_buffer.RED_AGENT_SKILL,
+    ]
+)
+"""The observation buffer segments holding a single value for the whole network."""
+
+
+def get_graph_observation_space(
+    num_node_features: int, max_num_nodes: int, max_num_edges: int
+) -> DictSpace:
+    """
+    Get the observation space of a graph structured observation.
+
+    :param num_node_features: The number of features of each node.
+    :param max_num_nodes: The maximum number of nodes.
+    :param max_num_edges: The maximum number of edges, counting each direction of a connection separately.
+    :return: The ``gym.spaces.Dict`` observation space.
+    """
+    return DictSpace(
+        {
+            NODE_FEATURES: Box(
+                low=0,
+                high=1,
+                shape=(max_num_nodes, num_node_features),
+                dtype=np.float32,
+            ),
+            EDGE_INDEX: Box(
+                low=0,
+                high=max(max_num_nodes - 1, 0),
+                shape=(2, max_num_edges),
+                dtype=np.int64,
+            ),
+            NODE_MASK: Box(low=0, high=1, shape=(max_num_nodes,), dtype=np.float32),
+            EDGE_MASK: Box(low=0, high=1, shape=(max_num_edges,), dtype=np.float32),
+        }
+    )
+
+
+def allocate_graph_observations(
+    observation_space: DictSpace, n_envs: int
+) -> Tuple[Dict[str, np.ndarray], List[Dict[str, np.ndarray]]]:
+    """
+    Allocate a batch of graph structured observations and the view of each environment into it.
+
+    Passing the views as the ``out`` of a :class:`GraphDictObservation` per environment means the batch is always up
+    to date with the latest observation of every environment, with no copying.
+
+    :param observation_space: The observation space of the environments.
+    :param n_envs: The number of environments.
+    :return: The batch, with each array of shape ``(n_envs, ...)``, and the view of each environment into it.
+    """
+    batch = {
+        key: np.zeros((n_envs,) + space.shape, dtype=space.dtype)
+        for key, space in observation_space.spaces.items()
+    }
+    views = [{key: array[i] for key, array in batch.items()} for i in range(n_envs)]
+    return batch, views
+
+
+class GraphDictObservation(ObservationWrapper):
+    """Gym observation wrapper exposing the network as padded node features, an edge index and masks."""
+
+    def __init__(
+        self,
+        env: GenericNetworkEnv,
+        max_num_nodes: Optional[int] = None,
+        max_num_edges: Optional[int] = None,
+        out: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """
+        Initialise a graph structured observation wrapper.
+
+        Args:
+            env: the environment to be wrapped
+            max_num_nodes: the maximum number of nodes the observation space supports. Defaults to the
+                number of nodes of the network plus the maximum number of deceptive nodes
+            max_num_edges: the maximum number of edges the observation space supports, counting each
+                direction of a connection. Defaults to twice the number of connections of the network plus
+                the maximum number of deceptive nodes
+            out: optional arrays to write the observation into, one per key of the observation space and of
+                the same shape and dtype. Defaults to newly allocated arrays
+
+        Note:
+            The observation returned by each step is the same set of arrays, overwritten on the next step, so
+            it should be copied if it needs to be kept.
+        """
+        super(GraphDictObservation, self).__init__(env)
+        self.network_interface = env.network_interface
+        # the flat observation of the environment is replaced, so there is no need to copy it every step
+        env.unwrapped.copy_observation = False
+        network_interface = self.network_interface
+        if max_num_nodes is None:
+            max_num_nodes = network_interface.get_total_num_nodes()
+        if max_num_edges is None:
+            max_num_edges = 2 * network_interface.get_max_num_edges()
+        if network_interface.get_total_num_nodes() > max_num_nodes:
+            msg = (
+                f"The network can have up to {network_interface.get_total_num_nodes()} nodes "
+                f"but the observation only supports {max_num_nodes}."
+            )
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        self.max_num_nodes = max_num_nodes
+        self.max_num_edges = max_num_edges
+
+        self._segments: Optional[Dict[str, slice]] = None
+        self._columns: List[Tuple[str, int, int]] = []
+        self.node_feature_names: List[str] = []
+        """The name of each column of the node features."""
+        self._lay_out_columns()
+        self.observation_space = get_graph_observation_space(
+            len(self.node_feature_names), max_num_nodes, max_num_edges
+        )
+
+        if out is None:
+            out, _ = allocate_graph_observations(self.observation_space, 1)
+            out = {key: array[0] for key, array in out.items()}
+        for key, space in self.observation_space.spaces.items():
+            if out[key].shape != space.shape or out[key].dtype != space.dtype:
+                msg = f"The '{key}' array must have shape {space.shape} and dtype {space.dtype}."
+                _LOGGER.error(msg, exc_info=True)
+                raise ValueError(msg)
+        self.graph_observation: Dict[str, np.ndarray] = out
+        """The arrays of the observation, updated in place."""
+        self._topology_version: Optional[int] = None
+
+    def _lay_out_columns(self):
+        """Work out which observation buffer segment fills which node feature column."""
+        network_interface = self.network_interface
+        network_interface.get_current_observation(copy=False)
+        segments = network_interface.observation_buffer.segments
+        max_nodes = network_interface.get_total_num_nodes()
+        columns = []
+        names = []
+        for name, segment in segments.items():
+            if name in STRUCTURAL_SEGMENTS:
+                continue
+            width = (
+                1
+                if name in GRAPH_SEGMENTS
+                else (segment.stop - segment.start) // max_nodes
+            )
+            columns.append((name, len(names), width))
+            names.extend(
+                [name] if width == 1 else [f"{name}_{i}" for i in range(width)]
+            )
+        if self.node_feature_names and names != self.node_feature_names:
+            msg = f"The node features have changed from {self.node_feature_names} to {names}."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        self._segments = segments
+        self._columns = columns
+        self.node_feature_names = names
+
+    def _write_edges(self):
+        """Rewrite the edge index and edge mask from the current graph."""
+        network_interface = self.network_interface
+        position = network_interface._adjacency_position
+        edges = np.array(
+            [
+                (position[u], position[v])
+                for u, v in network_interface.current_graph.edges
+            ],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        edge_index = self.graph_observation[EDGE_INDEX]
+        edge_mask = self.graph_observation[EDGE_MASK]
+        max_connections = self.max_num_edges // 2
+        if len(edges) > max_connections:
+            _LOGGER.warning(
+                f"The current graph has {len(edges)} edges, only the first {max_connections} are observed."
+            )
+            edges = edges[:max_connections]
+        m = len(edges)
+        edge_index[:, :m] = edges.T
+        edge_index[:, m : 2 * m] = edges.T[::-1]
+        edge_index[:, 2 * m :] = 0
+        edge_mask[: 2 * m] = 1
+        edge_mask[2 * m :] = 0
+        self._topology_version = network_interface.topology_version
+
+    def observation(self, observation: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Observation Transformation Function.
+
+        1. Brings the observation buffer of the network interface up to date
+        2. Copies each per-node segment of the buffer into its node feature columns and each whole-network
+           value into every row of its column
+        3. Rewrites the edge index if the topology has changed since the last observation
+        4. Marks the nodes currently in the network in the node mask
+
+        Args:
+            observation: The base, unwrapped observation generated by the environment, which is not used
+
+        Returns:
+            The graph structured observation, as the arrays updated in place
+        """
+        network_interface = self.network_interface
+        buffer = network_interface.get_current_observation(copy=False)
+        if network_interface.observation_buffer.segments is not self._segments:
+            # the buffer has been laid out again
+            self._lay_out_columns()
+            self._topology_version = None
+        segments = self._segments
+        max_nodes = network_interface.get_total_num_nodes()
+        features = self.graph_observation[NODE_FEATURES]
+        for name, column, width in self._columns:
+            values = buffer[segments[name]]
+            if name in GRAPH_SEGMENTS:
+                features[:max_nodes, column] = values[0]
+            else:
+                features[:max_nodes, column : column + width] = values.reshape(
+                    max_nodes, width
+                )
+        features[max_nodes:] = 0
+
+        if self._topology_version != network_interface.topology_version:
+            self._write_edges()
+
+        node_mask = self.graph_observation[NODE_MASK]
+        num_nodes = network_interface.current_graph.number_of_nodes()
+        node_mask[:num_nodes] = 1
+        node_mask[num_nodes:] = 0
+        return self.graph_observation
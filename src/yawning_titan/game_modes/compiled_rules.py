@@ -0,0 +1,174 @@
+"""
+A flat, immutable snapshot of the values of a :class:`~yawning_titan.game_modes.game_mode.GameMode`.
+
+The environment reads the game mode many times every step. Reaching a value
+through the nested :class:`~yawning_titan.config.core.ConfigGroup` and
+:class:`~yawning_titan.config.core.ConfigItem` objects costs an attribute lookup
+per level, so the values are compiled into a single :class:`CompiledRules`
+tuple which the step hot path reads from instead.
+
+Each field is named after the path to its item in the game mode, joined with
+underscores, e.g. ``game_mode.red.agent_attack.skill.use.value`` is compiled to
+``CompiledRules.red_agent_attack_skill_use``.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional
+
+from yawning_titan.config.core import ConfigGroup, ConfigItem
+
+if TYPE_CHECKING:
+    from yawning_titan.game_modes.game_mode import GameMode
+
+
+class CompiledRules(NamedTuple):
+    """
+    The value of every :class:`~yawning_titan.config.core.ConfigItem` in a game mode as a flat named tuple.
+
+    Instances are created by :func:`compile_rules` and should be obtained
+    through :attr:`GameMode.compiled_rules <yawning_titan.game_modes.game_mode.GameMode.compiled_rules>`,
+    which recompiles them whenever the game mode has been edited.
+    """
+
+    # red
+    red_agent_attack_ignores_defences: bool
+    red_agent_attack_always_succeeds: bool
+    red_agent_attack_skill_use: bool
+    red_agent_attack_skill_value: Optional[float]
+    red_agent_attack_attack_from_only_main_red_node: bool
+    red_agent_attack_attack_from_any_red_node: bool
+    red_action_set_spread_use: bool
+    red_action_set_spread_likelihood: Optional[float]
+    red_action_set_spread_chance: Optional[float]
+    red_action_set_random_infect_use: bool
+    red_action_set_random_infect_likelihood: Optional[float]
+    red_action_set_random_infect_chance: Optional[float]
+    red_action_set_move_use: bool
+    red_action_set_move_likelihood: Optional[float]
+    red_action_set_basic_attack_use: bool
+    red_action_set_basic_attack_likelihood: Optional[float]
+    red_action_set_do_nothing_use: bool
+    red_action_set_do_nothing_likelihood: Optional[float]
+    red_action_set_zero_day_use: bool
+    red_action_set_zero_day_start_amount: Optional[int]
+    red_action_set_zero_day_days_required: Optional[int]
+    red_natural_spreading_capable: bool
+    red_natural_spreading_chance_to_connected_node: Optional[float]
+    red_natural_spreading_chance_to_unconnected_node: Optional[float]
+    red_target_mechanism_random: Optional[bool]
+    red_target_mechanism_prioritise_connected_nodes: Optional[bool]
+    red_target_mechanism_prioritise_unconnected_nodes: Optional[bool]
+    red_target_mechanism_prioritise_vulnerable_nodes: Optional[bool]
+    red_target_mechanism_prioritise_resilient_nodes: Optional[bool]
+    red_target_mechanism_target_specific_node_use: bool
+    red_target_mechanism_target_specific_node_target: Optional[str]
+    red_target_mechanism_target_specific_node_always_choose_shortest_distance: Optional[
+        bool
+    ]
+
+    # blue
+    blue_action_set_reduce_vulnerability: Optional[bool]
+    blue_action_set_restore_node: Optional[bool]
+    blue_action_set_scan: Optional[bool]
+    blue_action_set_isolate_node: Optional[bool]
+    blue_action_set_reconnect_node: Optional[bool]
+    blue_action_set_do_nothing: Optional[bool]
+    blue_action_set_make_node_safe_use: bool
+    blue_action_set_make_node_safe_increases_vulnerability: bool
+    blue_action_set_make_node_safe_gives_random_vulnerability: bool
+    blue_action_set_make_node_safe_vulnerability_change: Optional[float]
+    blue_action_set_deceptive_nodes_use: bool
+    blue_action_set_deceptive_nodes_max_number: Optional[int]
+    blue_action_set_deceptive_nodes_new_node_on_relocate: Optional[bool]
+    blue_intrusion_discovery_chance_immediate_standard_node: Optional[float]
+    blue_intrusion_discovery_chance_immediate_deceptive_node: Optional[float]
+    blue_intrusion_discovery_chance_on_scan_standard_node: Optional[float]
+    blue_intrusion_discovery_chance_on_scan_deceptive_node: Optional[float]
+    blue_attack_discovery_failed_attacks_use: Optional[bool]
+    blue_attack_discovery_failed_attacks_chance_standard_node: Optional[float]
+    blue_attack_discovery_failed_attacks_chance_deceptive_node: Optional[float]
+    blue_attack_discovery_succeeded_attacks_known_compromise_use: Optional[bool]
+    blue_attack_discovery_succeeded_attacks_known_compromise_chance_standard_node: Optional[
+        float
+    ]
+    blue_attack_discovery_succeeded_attacks_known_compromise_chance_deceptive_node: Optional[
+        float
+    ]
+    blue_attack_discovery_succeeded_attacks_unknown_compromise_use: Optional[bool]
+    blue_attack_discovery_succeeded_attacks_unknown_compromise_chance_standard_node: Optional[
+        float
+    ]
+    blue_attack_discovery_succeeded_attacks_unknown_compromise_chance_deceptive_node: Optional[
+        float
+    ]
+
+    # game_rules
+    game_rules_grace_period_length: int
+    game_rules_max_steps: int
+    game_rules_blue_loss_condition_all_nodes_lost: Optional[bool]
+    game_rules_blue_loss_condition_high_value_node_lost: Optional[bool]
+    game_rules_blue_loss_condition_target_node_lost: Optional[bool]
+    game_rules_blue_loss_condition_n_percent_nodes_lost_use: bool
+    game_rules_blue_loss_condition_n_percent_nodes_lost_value: Optional[float]
+    game_rules_network_compatibility_node_count_restrict: Optional[bool]
+    game_rules_network_compatibility_node_count_min: Optional[int]
+    game_rules_network_compatibility_node_count_max: Optional[int]
+    game_rules_network_compatibility_entry_node_count_restrict: Optional[bool]
+    game_rules_network_compatibility_entry_node_count_min: Optional[int]
+    game_rules_network_compatibility_entry_node_count_max: Optional[int]
+    game_rules_network_compatibility_high_value_node_count_restrict: Optional[bool]
+    game_rules_network_compatibility_high_value_node_count_min: Optional[int]
+    game_rules_network_compatibility_high_value_node_count_max: Optional[int]
+
+    # observation_space
+    observation_space_compromised_status: Optional[bool]
+    observation_space_vulnerabilities: Optional[bool]
+    observation_space_node_connections: Optional[bool]
+    observation_space_average_vulnerability: Optional[bool]
+    observation_space_graph_connectivity: Optional[bool]
+    observation_space_attacking_nodes: Optional[bool]
+    observation_space_attacked_nodes: Optional[bool]
+    observation_space_special_nodes: Optional[bool]
+    observation_space_red_agent_skill: Optional[bool]
+    observation_space_edge_list: Optional[bool]
+    observation_space_neighbourhood_summary: Optional[bool]
+    observation_space_neighbourhood_hops: Optional[int]
+
+    # on_reset
+    on_reset_randomise_vulnerabilities: Optional[bool]
+    on_reset_choose_new_high_value_nodes: Optional[bool]
+    on_reset_choose_new_entry_nodes: Optional[bool]
+
+    # rewards
+    rewards_for_loss: Optional[int]
+    rewards_for_reaching_max_steps: Optional[int]
+    rewards_end_rewards_are_multiplied_by_end_state: bool
+    rewards_reduce_negative_rewards_for_closer_fails: bool
+    rewards_function: Optional[str]
+
+    # miscellaneous
+    miscellaneous_random_seed: Optional[int]
+    miscellaneous_output_timestep_data_to_json: Optional[bool]
+
+
+def _collect_values(group: ConfigGroup, prefix: str, values: Dict[str, Any]):
+    """Add the value of every item in the group and its sub-groups to the dict, keyed by their path."""
+    for name, element in group.get_config_elements().items():
+        path = f"{prefix}_{name}" if prefix else name
+        if isinstance(element, ConfigItem):
+            value = element.value
+            values[path] = tuple(value) if isinstance(value, list) else value
+        else:
+            _collect_values(element, path, values)
+
+
+def compile_rules(game_mode: GameMode) -> CompiledRules:
+    """
+    Compile the values of a game mode into a :class:`CompiledRules`.
+
+    :param game_mode: The game mode to compile.
+    :return: An instance of :class:`CompiledRules`.
+    """
+    values = {}
+    _collect_values(game_mode, "", values)
+    return CompiledRules(**values)
@@ -26,7 +26,7 @@ class Miscellaneous(ConfigGroup):
         )
         self.output_timestep_data_to_json = BoolItem(
             value=output_timestep_data_to_json,
-            doc="Toggle to output a json file for each step that contains the connections between nodes, the states of the nodes and the attacks that blue saw in that turn",
+            doc="Toggle to record the connections between nodes and the states of the nodes at each step to a trajectory in the users trajectories directory",
             properties=BoolProperties(allow_null=True, default=False),
             alias="output_timestep_data_to_json",
         )
@@ -4,6 +4,7 @@ from typing import Optional
 
 from yawning_titan.config.groups.validation import AnyTrueGroup
 from yawning_titan.config.item_types.bool_item import BoolItem, BoolProperties
+from yawning_titan.config.item_types.int_item import IntItem, IntProperties
 
 # --- Tier 0 groups
 
@@ -22,6 +23,9 @@ class ObservationSpace(AnyTrueGroup):
         attacked_nodes: Optional[bool] = False,
         special_nodes: Optional[bool] = False,
         red_agent_skill: Optional[bool] = False,
+        edge_list: Optional[bool] = False,
+        neighbourhood_summary: Optional[bool] = False,
+        neighbourhood_hops: Optional[int] = 1,
     ):
         doc = "The characteristics of the network and the red agent that the blue agent can observe"
         self.compromised_status = BoolItem(
@@ -78,4 +82,30 @@ class ObservationSpace(AnyTrueGroup):
             properties=BoolProperties(allow_null=True, default=False),
             alias="red_agent_skill",
         )
+        self.edge_list = BoolItem(
+            value=edge_list,
+            doc=(
+                "The blue agent can see what nodes are connected to what other nodes as a padded list of edges, "
+                "which grows with the number of edges rather than the square of the number of nodes"
+            ),
+            properties=BoolProperties(allow_null=True, default=False),
+            alias="edge_list",
+        )
+        self.neighbourhood_summary = BoolItem(
+            value=neighbourhood_summary,
+            doc=(
+                "The blue agent can see the number of connections of each node and how many of the nodes in its "
+                "neighbourhood it believes are compromised and are isolated"
+            ),
+            properties=BoolProperties(allow_null=True, default=False),
+            alias="neighbourhood_summary",
+        )
+        self.neighbourhood_hops = IntItem(
+            value=neighbourhood_hops,
+            doc="How many connections away from a node the neighbourhood in the neighbourhood summary reaches",
+            properties=IntProperties(
+                allow_null=True, default=1, min_val=1, inclusive_min=True
+            ),
+            alias="neighbourhood_hops",
+        )
         super().__init__(doc)
@@ -4,6 +4,7 @@ from typing import Optional
 
 from yawning_titan.config.core import ConfigGroup
 from yawning_titan.db.doc_metadata import DocMetadata, DocMetaDataObject
+from yawning_titan.game_modes.compiled_rules import CompiledRules, compile_rules
 from yawning_titan.game_modes.components.blue_agent import Blue
 from yawning_titan.game_modes.components.game_rules import GameRules
 from yawning_titan.game_modes.components.miscellaneous import Miscellaneous
@@ -42,8 +43,23 @@ class GameMode(ConfigGroup, DocMetaDataObject):
             miscellaneous if miscellaneous else Miscellaneous()
         )
         self._doc_metadata = _doc_metadata if _doc_metadata else DocMetadata()
+        self._compiled_rules: Optional[CompiledRules] = None
+        self._compiled_rules_version: Optional[int] = None
         super().__init__(doc)
 
+    @property
+    def compiled_rules(self) -> CompiledRules:
+        """
+        The values of the game mode as a flat, immutable :class:`~yawning_titan.game_modes.compiled_rules.CompiledRules`.
+
+        The rules are compiled on first access and reused until the game mode
+        is edited, after which they are recompiled.
+        """
+        if self._compiled_rules is None or self._compiled_rules_version != self.version:
+            self._compiled_rules = compile_rules(self)
+            self._compiled_rules_version = self.version
+        return self._compiled_rules
+
     @classmethod
     def create_from_yaml(
         cls,
@@ -384,4 +384,4 @@ def dcbo_game_mode() -> GameMode:
     :return: An instance of :class:`~yawning_titan.game_modes.game_mode.GameMode`.
     """
     with GameModeDB() as db:
-        return db.get("bac2cb9d-b24b-426c-88a5-5edd0c2de4131")
+        return db.get("bac2cb9d-b24b-426c-88a5-5edd0c2de413")
@@ -1,6 +1,8 @@
 """Provides a CLI using Typer as an entry point."""
 import os
 import sys
+from pathlib import Path
+from typing import List, Optional
 
 import typer
 
@@ -159,6 +161,50 @@ def setup():
     _LOGGER.info("Yawning-Titan setup complete!")
 
 
+@app.command()
+def bench(
+    output: Optional[Path] = None,
+    game_mode: Optional[List[str]] = None,
+    size: Optional[List[int]] = None,
+    topology: Optional[List[str]] = None,
+    steps: int = 500,
+    resets: int = 20,
+    baseline: Optional[Path] = None,
+    tolerance: float = 0.1,
+):
+    """
+    Benchmark the Yawning-Titan envs, agents and DBs.
+
+    :param output: A JSON file to save the results to.
+    :param game_mode: A game mode to benchmark, either default or dcbo. Can be
+        given more than once. Defaults to both.
+    :param size: A network size to benchmark. Can be given more than once.
+        Defaults to 50, 200 and 1000.
+    :param topology: A network topology to benchmark, one of mesh, star, p2p,
+        ring or gnp. Can be given more than once. Defaults to all of them.
+    :param steps: The number of steps to time per env. Default value is 500.
+    :param resets: The number of resets to time per env. Default value is 20.
+    :param baseline: A JSON file saved by an earlier run to compare against.
+        Exits with code 1 if any metric has regressed.
+    :param tolerance: The fraction a metric can get worse by before it is
+        flagged as a regression. Default value is 0.1.
+    """
+    from yawning_titan.utils import benchmark
+
+    passed = benchmark.run(
+        output=output,
+        game_mode_names=game_mode or None,
+        sizes=size or None,
+        topologies=topology or None,
+        steps=steps,
+        resets=resets,
+        baseline=baseline,
+        tolerance=tolerance,
+    )
+    if not passed:
+        raise typer.Exit(code=1)
+
+
 @app.command()
 def keyboard_agent():
     """Play Yawning-Titan using the Keyboard Agent."""
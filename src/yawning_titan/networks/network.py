@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import hashlib
 import math
 import random
 import warnings
-from collections import Counter
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from enum import Enum
 from logging import getLogger
 from random import sample
@@ -26,9 +28,20 @@ from tabulate import tabulate
 from yawning_titan.db.doc_metadata import DocMetadata
 from yawning_titan.exceptions import NetworkError
 from yawning_titan.networks.node import Node
+from yawning_titan.networks.node_state import (
+    STATE_FIELDS,
+    NodeStateStore,
+    NodeStateView,
+)
 
 _LOGGER = getLogger(__name__)
 
+_TOPOLOGY_TABLES_MAX_SIZE = 16
+"""The number of network structures to keep :class:`TopologyTables` for."""
+
+_TOPOLOGY_TABLES: "OrderedDict[str, TopologyTables]" = OrderedDict()
+"""The most recently used :class:`TopologyTables` by network structure hash."""
+
 
 class NetworkLayout(Enum):
     """
@@ -79,6 +92,61 @@ class RandomEntryNodePreference(Enum):
     """No preference."""
 
 
+@dataclass
+class NetworkSnapshot:
+    """
+    A compact record of the structure and node state of a :class:`Network` at a point in time.
+
+    Created by :meth:`Network.snapshot` and used by :meth:`Network.restore` to
+    put the same Network back into that state without copying any objects.
+    """
+
+    nodes: List[Node]
+    """The nodes in graph order."""
+    neighbours: List[List[Node]]
+    """For each node, its neighbours in adjacency order."""
+    neighbour_edges: List[List[int]]
+    """For each node, the index into `edge_data` of the edge to each of its neighbours."""
+    edge_data: List[dict]
+    """Copies of the attribute dict of each edge."""
+    edge_index: numpy.ndarray
+    """A (2, 2 * number of edges) array of the node indices at either end of each edge, in both directions."""
+    state: Dict[str, numpy.ndarray]
+    """The dynamic node state, one array per :data:`~yawning_titan.networks.node_state.STATE_FIELDS` entry."""
+    entry_node: List[bool]
+    """Whether each node is an entry node."""
+    high_value_node: List[bool]
+    """Whether each node is a high value node."""
+    vulnerability: List[float]
+    """The initial vulnerability of each node."""
+    node_position: List[List[float]]
+    """The [x, y] position of each node."""
+    structure_hash: Optional[str] = None
+    """The :attr:`Network.structure_hash` of the network."""
+
+
+@dataclass
+class TopologyTables:
+    """
+    Values that depend only on the structure of a network, used to choose random entry and high value nodes.
+
+    The tables are shared by every :class:`Network` with the same :attr:`Network.structure_hash`, so they are worked
+    out once rather than on every reset, and are filled in as they are first needed.
+    """
+
+    uuids: List[str]
+    """The uuids of the nodes, in the order of the node axis of the tables."""
+    index: Dict[str, int]
+    """The position of each node uuid in `uuids`."""
+    centrality: Optional[numpy.ndarray] = None
+    """The eigenvector centrality of each node, None if not yet worked out."""
+    path_lengths: Dict[str, Tuple[numpy.ndarray, numpy.ndarray]] = field(
+        default_factory=dict
+    )
+    """For each source node uuid worked out so far, the indices of the nodes reachable from it in breadth first order
+    and their shortest path lengths from it."""
+
+
 class Network(nx.Graph):
     """
     A Network that the NetworkInterface interacts with.
@@ -151,6 +219,13 @@ class Network(nx.Graph):
         self.node_vulnerability_upper_bound = node_vulnerability_upper_bound
         """A higher vulnerability means that a node is more vulnerable. Default value is 1."""
         self._doc_metadata = doc_metadata
+        self._state_store: Optional[NodeStateStore] = None
+        self._state_order: Optional[numpy.ndarray] = None
+        self._state_order_nodes: List[Node] = []
+        self._nodes_by_uuid: Dict[str, Node] = {}
+        self._nodes_by_name: Dict[str, Node] = {}
+        self._structure_hash: Optional[str] = None
+        self._structure_hash_nodes = 0
 
         self.nodes: List[Node]
         """Access the `nodes` property from the superclass which has `list` properties but is a `NodeView` instance"""
@@ -173,6 +248,36 @@ class Network(nx.Graph):
         """A list of the deceptive nodes in the network."""
         return [n for n in self.nodes if n.deceptive_node]
 
+    @property
+    def state_store(self) -> Optional[NodeStateStore]:
+        """The :class:`~yawning_titan.networks.node_state.NodeStateStore` backing the nodes dynamic state, if attached."""
+        return self._state_store
+
+    @property
+    def structure_hash(self) -> str:
+        """
+        A hash of the uuids of the nodes and of the pairs of nodes joined by edges in the network.
+
+        Networks with the same nodes and edges share a hash however they were built and whatever the state of their
+        nodes. The hash is saved with the network in the DB and is otherwise worked out when first needed and again
+        after the network is changed.
+        """
+        if (
+            self._structure_hash is None
+            or self._structure_hash_nodes != self.number_of_nodes()
+        ):
+            digest = hashlib.sha256()
+            for uuid in sorted(n.uuid for n in self._node):
+                digest.update(f"{uuid};".encode())
+            digest.update(b"|")
+            for u, v in sorted(
+                tuple(sorted((u.uuid, v.uuid))) for u, v in self.edges()
+            ):
+                digest.update(f"{u},{v};".encode())
+            self._structure_hash = digest.hexdigest()
+            self._structure_hash_nodes = self.number_of_nodes()
+        return self._structure_hash
+
     @property
     def node_vulnerability_lower_bound(self) -> float:
         """The minimum value that a node within the networks vulnerability can take."""
@@ -218,6 +323,10 @@ class Network(nx.Graph):
         """
         if node_for_adding not in self.nodes:
             super().add_node(node_for_adding, **kwargs)
+            self._index_node(node_for_adding)
+            self._structure_hash = None
+            if self._state_store is not None:
+                self._bind_node_state(node_for_adding)
             if node_for_adding.entry_node or node_for_adding.high_value_node:
                 self._check_intersect(node_for_adding)
 
@@ -226,16 +335,32 @@ class Network(nx.Graph):
         Remove a node from the network.
 
         Extend the `remove_node` method of the superclass.
+
+        If a state store is attached, the nodes state is moved back onto the
+        node and its slot released.
         """
         super().remove_node(n)
+        self._unindex_node(n)
+        self._structure_hash = None
+        if self._state_store is not None and n._state_store is self._state_store:
+            index = n.state_index
+            n.unbind_state_store()
+            self._state_store.release(index)
+            self._state_order = None
 
     def add_edge(self, u_of_edge: Node, v_of_edge: Node, **kwargs):
         """
         Add an edge between 2 nodes in the network.
 
         Extend the `add_edge` method of the superclass.
+
+        Nodes not yet in the network are added through `add_node`.
         """
+        for node in (u_of_edge, v_of_edge):
+            if node not in self._node:
+                self.add_node(node)
         super().add_edge(u_of_edge, v_of_edge, **kwargs)
+        self._structure_hash = None
 
     def remove_edge(self, u: Node, v: Node):
         """
@@ -244,6 +369,258 @@ class Network(nx.Graph):
         Extend the `remove_edge` method of the superclass.
         """
         super().remove_edge(u, v)
+        self._structure_hash = None
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        """
+        Add several nodes to the network.
+
+        Extend the `add_nodes_from` method of the superclass, which does not go through `add_node`.
+        """
+        super().add_nodes_from(nodes_for_adding, **attr)
+        self._structure_hash = None
+
+    def remove_nodes_from(self, nodes):
+        """
+        Remove several nodes from the network.
+
+        Extend the `remove_nodes_from` method of the superclass, which does not go through `remove_node`.
+        """
+        super().remove_nodes_from(nodes)
+        self._structure_hash = None
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        """
+        Add several edges to the network.
+
+        Extend the `add_edges_from` method of the superclass, which does not go through `add_edge`.
+        """
+        super().add_edges_from(ebunch_to_add, **attr)
+        self._structure_hash = None
+
+    def remove_edges_from(self, ebunch):
+        """
+        Remove several edges from the network.
+
+        Extend the `remove_edges_from` method of the superclass, which does not go through `remove_edge`.
+        """
+        super().remove_edges_from(ebunch)
+        self._structure_hash = None
+
+    def clear(self):
+        """
+        Remove every node and edge from the network.
+
+        Extend the `clear` method of the superclass.
+        """
+        super().clear()
+        self._structure_hash = None
+
+    def clear_edges(self):
+        """
+        Remove every edge from the network.
+
+        Extend the `clear_edges` method of the superclass.
+        """
+        super().clear_edges()
+        self._structure_hash = None
+
+    def attach_state_store(
+        self, capacity: Optional[int] = None, store: Optional[NodeStateStore] = None
+    ) -> NodeStateStore:
+        """
+        Back the dynamic state of every node in the network with a :class:`~yawning_titan.networks.node_state.NodeStateStore`.
+
+        Once attached, nodes added to the network are bound to the store and
+        nodes removed from it are unbound. A node can only be bound to one
+        store at a time. If a store is already attached it is returned as is.
+
+        :param capacity: The number of slots to preallocate. Defaults to the
+            current number of nodes.
+        :param store: An optional existing store to attach instead of creating
+            one, it is cleared before the nodes are bound to it.
+        :return: The attached store.
+        """
+        if self._state_store is None:
+            if store is None:
+                if capacity is None:
+                    capacity = self.number_of_nodes()
+                store = NodeStateStore(capacity)
+            else:
+                store.clear()
+            self._state_store = store
+            for node in self.nodes:
+                self._bind_node_state(node)
+        return self._state_store
+
+    def detach_state_store(self):
+        """Move the state of every node back onto the nodes and remove the state store."""
+        if self._state_store is not None:
+            for node in self.nodes:
+                if node._state_store is self._state_store:
+                    node.unbind_state_store()
+            self._state_store = None
+            self._state_order = None
+            self._state_order_nodes = []
+
+    def _bind_node_state(self, node: Node):
+        """Allocate a slot in the attached state store and bind a node to it."""
+        if node._state_store is not self._state_store:
+            node.unbind_state_store()
+            node.bind_state_store(self._state_store, self._state_store.allocate())
+        self._state_order = None
+
+    def _get_state_order(self) -> Tuple[numpy.ndarray, List[Node]]:
+        """
+        Get the state store slots of the nodes in the order they are iterated by the graph.
+
+        The order is cached and invalidated whenever a node is added or removed.
+
+        :return: A tuple of the slot indices and the list of nodes in graph order.
+        """
+        if self._state_order is None or len(self._state_order_nodes) != len(self._node):
+            nodes = list(self._node)
+            for node in nodes:
+                if node._state_store is not self._state_store:
+                    self._bind_node_state(node)
+            self._state_order = numpy.fromiter(
+                (n.state_index for n in nodes), dtype=numpy.intp, count=len(nodes)
+            )
+            self._state_order_nodes = nodes
+        return self._state_order, self._state_order_nodes
+
+    def get_state_array(self, key: str) -> numpy.ndarray:
+        """
+        Get the value of a dynamic node attribute for every node as an array.
+
+        The array is ordered the same as the nodes in the graph and is a copy,
+        so modifying it does not affect the nodes.
+
+        :param key: The name of the attribute. Must be one of
+            :data:`~yawning_titan.networks.node_state.STATE_FIELDS`.
+        :return: A 1D numpy array of the attribute values.
+        """
+        if key not in STATE_FIELDS:
+            msg = f"'{key}' is not a node state attribute, must be one of {list(STATE_FIELDS)}."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+        if self._state_store is None:
+            return numpy.array(
+                [getattr(n, key) for n in self.nodes], dtype=STATE_FIELDS[key]
+            )
+        order, _ = self._get_state_order()
+        return getattr(self._state_store, key)[order]
+
+    def get_state_view(self, key: str) -> NodeStateView:
+        """
+        Get a snapshot of a dynamic node attribute for every node as a ``{uuid: value}`` mapping.
+
+        Unlike building a dict of the values, taking the snapshot is a single
+        array copy; the mapping is only materialised when it is read.
+
+        :param key: The name of the attribute. Must be one of
+            :data:`~yawning_titan.networks.node_state.STATE_FIELDS`.
+        :return: An instance of :class:`~yawning_titan.networks.node_state.NodeStateView`.
+        """
+        array = self.get_state_array(key)
+        if self._state_store is None:
+            return NodeStateView(list(self.nodes), array)
+        return NodeStateView(self._get_state_order()[1], array)
+
+    def snapshot(self) -> NetworkSnapshot:
+        """
+        Take a snapshot of the networks structure and node state.
+
+        :return: An instance of :class:`NetworkSnapshot`.
+        """
+        nodes = list(self._node)
+        position = {node: i for i, node in enumerate(nodes)}
+        edge_ids = {}
+        edge_data = []
+        neighbour_edges = []
+        for u in nodes:
+            u_edges = []
+            for v, data in self._adj[u].items():
+                key = frozenset((position[u], position[v]))
+                if key not in edge_ids:
+                    edge_ids[key] = len(edge_data)
+                    edge_data.append(dict(data))
+                u_edges.append(edge_ids[key])
+            neighbour_edges.append(u_edges)
+        edge_index = numpy.array(
+            [(position[u], position[v]) for u in nodes for v in self._adj[u]],
+            dtype=numpy.intp,
+        ).reshape(-1, 2)
+        return NetworkSnapshot(
+            nodes=nodes,
+            neighbours=[list(self._adj[u]) for u in nodes],
+            neighbour_edges=neighbour_edges,
+            edge_data=edge_data,
+            edge_index=edge_index.T,
+            state={key: self.get_state_array(key) for key in STATE_FIELDS},
+            entry_node=[n.entry_node for n in nodes],
+            high_value_node=[n.high_value_node for n in nodes],
+            vulnerability=[n.vulnerability for n in nodes],
+            node_position=[n.node_position for n in nodes],
+            structure_hash=self.structure_hash,
+        )
+
+    def restore(self, snapshot: NetworkSnapshot):
+        """
+        Restore the network in place to the state recorded in a snapshot.
+
+        Nodes added since the snapshot are removed, the edges are rebuilt
+        in their original order and every nodes attributes are reset. The
+        node objects themselves are reused rather than copied.
+
+        :param snapshot: A :class:`NetworkSnapshot` taken from this network.
+        """
+        if len(self._node) != len(snapshot.nodes) or any(
+            a is not b for a, b in zip(self._node, snapshot.nodes)
+        ):
+            position = {node: i for i, node in enumerate(snapshot.nodes)}
+            for node in [n for n in self._node if n not in position]:
+                self.remove_node(node)
+            for node in snapshot.nodes:
+                if node not in self._node:
+                    self.add_node(node)
+            # restore the graph order of the nodes without replacing the dicts networkx views refer to
+            for graph_dict in (self._node, self._adj):
+                items = [(node, graph_dict[node]) for node in snapshot.nodes]
+                graph_dict.clear()
+                graph_dict.update(items)
+            self._state_order = None
+
+        # rebuild the edges, preserving the neighbour order so iteration over the graph is unchanged.
+        # the edge data dict is shared between both directions of an edge, as in networkx.
+        edge_data = []
+        for data in snapshot.edge_data:
+            new_data = self.edge_attr_dict_factory()
+            new_data.update(data)
+            edge_data.append(new_data)
+        for u_adj, neighbours, edges in zip(
+            self._adj.values(), snapshot.neighbours, snapshot.neighbour_edges
+        ):
+            u_adj.clear()
+            u_adj.update(zip(neighbours, [edge_data[e] for e in edges]))
+
+        for i, node in enumerate(snapshot.nodes):
+            node.entry_node = snapshot.entry_node[i]
+            node.high_value_node = snapshot.high_value_node[i]
+            node.vulnerability = snapshot.vulnerability[i]
+            node.node_position = snapshot.node_position[i]
+
+        if self._state_store is not None:
+            order, _ = self._get_state_order()
+            for key, values in snapshot.state.items():
+                getattr(self._state_store, key)[order] = values
+        else:
+            for key, values in snapshot.state.items():
+                for node, value in zip(snapshot.nodes, values.tolist()):
+                    setattr(node, key, value)
+
+        self._structure_hash = snapshot.structure_hash
+        self._structure_hash_nodes = self.number_of_nodes()
 
     def reset(self):
         """
@@ -328,6 +705,75 @@ class Network(nx.Graph):
             A list of nodes
         """
         nodes = self.nodes
+        filters = (
+            filter_true_compromised,
+            filter_blue_view_compromised,
+            filter_true_safe,
+            filter_blue_view_safe,
+            filter_isolated,
+            filter_non_isolated,
+            filter_deceptive,
+            filter_non_deceptive,
+        )
+        if self._state_store is not None and any(filters):
+            nodes = self._get_filtered_nodes_from_store(*filters)
+        else:
+            nodes = self._get_filtered_nodes(nodes, *filters)
+
+        if key_by_name:
+            return {n.name: n for n in nodes}
+
+        if as_list:
+            return list(nodes)
+
+        return nodes
+
+    def _get_filtered_nodes_from_store(
+        self,
+        filter_true_compromised: bool,
+        filter_blue_view_compromised: bool,
+        filter_true_safe: bool,
+        filter_blue_view_safe: bool,
+        filter_isolated: bool,
+        filter_non_isolated: bool,
+        filter_deceptive: bool,
+        filter_non_deceptive: bool,
+    ) -> List[Node]:
+        """Apply the `get_nodes` filters as masks over the attached state store."""
+        order, ordered_nodes = self._get_state_order()
+        store = self._state_store
+        mask = numpy.ones(len(order), dtype=bool)
+        if filter_true_compromised:
+            mask &= store.true_compromised_status[order] == 1
+        if filter_blue_view_compromised:
+            mask &= store.blue_view_compromised_status[order] == 1
+        if filter_true_safe:
+            mask &= store.true_compromised_status[order] == 0
+        if filter_blue_view_safe:
+            mask &= store.blue_view_compromised_status[order] == 0
+        if filter_isolated:
+            mask &= store.isolated[order]
+        if filter_non_isolated:
+            mask &= ~store.isolated[order]
+        if filter_deceptive:
+            mask &= store.deceptive_node[order]
+        if filter_non_deceptive:
+            mask &= ~store.deceptive_node[order]
+        return [ordered_nodes[i] for i in numpy.flatnonzero(mask)]
+
+    @staticmethod
+    def _get_filtered_nodes(
+        nodes: List[Node],
+        filter_true_compromised: bool,
+        filter_blue_view_compromised: bool,
+        filter_true_safe: bool,
+        filter_blue_view_safe: bool,
+        filter_isolated: bool,
+        filter_non_isolated: bool,
+        filter_deceptive: bool,
+        filter_non_deceptive: bool,
+    ) -> List[Node]:
+        """Apply the `get_nodes` filters by checking the attributes of each node."""
         if filter_true_compromised:
             # Return true if compromised status is 1
             nodes = [n for n in nodes if n.true_compromised_status == 1]
@@ -352,29 +798,57 @@ class Network(nx.Graph):
         if filter_non_deceptive:
             # Return True if deceptive node is False
             nodes = [n for n in nodes if not n.deceptive_node]
-
-        if key_by_name:
-            return {n.name: n for n in nodes}
-
-        if as_list:
-            return list(nodes)
-
         return nodes
 
     def get_node_from_uuid(self, uuid: str) -> Union[Node, None]:
         """Return the first node that has a given uuid."""
-        for node in self.nodes:
-            if node.uuid == uuid:
-                return node
-        return None
+        self._check_node_index()
+        return self._nodes_by_uuid.get(uuid)
 
     def get_node_from_name(self, name: str) -> Union[Node, None]:
         """Return the first node that has a given name."""
+        self._check_node_index()
+        node = self._nodes_by_name.get(name)
+        if node is not None and node.name == name:
+            return node
+        # nodes can be renamed after being added, so fall back to a search
         for node in self.nodes:
             if node.name == name:
+                self._nodes_by_name[name] = node
                 return node
         return None
 
+    def _index_node(self, node: Node):
+        """Add a node to the uuid and name lookups."""
+        self._nodes_by_uuid[node.uuid] = node
+        if node.name is not None:
+            # keep the first node added with a given name
+            self._nodes_by_name.setdefault(node.name, node)
+
+    def _unindex_node(self, node: Node):
+        """Remove a node from the uuid and name lookups."""
+        self._nodes_by_uuid.pop(node.uuid, None)
+        if self._nodes_by_name.get(node.name) is node:
+            self._nodes_by_name.pop(node.name)
+
+    def _index_node_names(self):
+        """Rebuild the name lookup from the nodes in the network."""
+        self._nodes_by_name = {}
+        for node in self.nodes:
+            if node.name is not None:
+                self._nodes_by_name.setdefault(node.name, node)
+
+    def _check_node_index(self):
+        """
+        Rebuild the uuid and name lookups if they are out of step with the network.
+
+        Nodes added or removed via networkx methods that bypass `add_node` and
+        `remove_node` (e.g. `add_nodes_from`) are picked up here.
+        """
+        if len(self._nodes_by_uuid) != len(self._node):
+            self._nodes_by_uuid = {node.uuid: node for node in self.nodes}
+            self._index_node_names()
+
     def _generate_random_vulnerability(self) -> float:
         """
         Generate a single random vulnerability value from the lower and upper bounds.
@@ -387,20 +861,16 @@ class Network(nx.Graph):
 
     def _check_intersect(self, node: Node):
         """Check that high value nodes and entry nodes do not overlap."""
-        if self.entry_nodes and self.high_value_nodes:
-            uuids_intersect = [
-                n.uuid for n in set(self.entry_nodes) & set(self.high_value_nodes)
-            ]
-            if uuids_intersect:
-                if node.uuid in uuids_intersect:
-                    node_str = str(node)
-                    warnings.warn(
-                        UserWarning(
-                            f"Entry nodes and high value nodes intersect at node "
-                            f"'{node_str}', and may cause the training to end "
-                            f"prematurely."
-                        )
-                    )
+        # only the node itself needs checking, so the lists of special nodes are not built for every node
+        if node.entry_node and node.high_value_node:
+            node_str = str(node)
+            warnings.warn(
+                UserWarning(
+                    f"Entry nodes and high value nodes intersect at node "
+                    f"'{node_str}', and may cause the training to end "
+                    f"prematurely."
+                )
+            )
 
     def set_from_dict(
         self,
@@ -418,6 +888,11 @@ class Network(nx.Graph):
         if clear_special_nodes:
             self.clear_special_nodes()
 
+        # the saved hash describes the saved nodes and edges, so only holds if they are all the network has
+        structure_hash = config_dict.pop("structure_hash", None)
+        if self.number_of_nodes() > 0:
+            structure_hash = None
+
         if "_doc_metadata" in config_dict:
             config_dict["_doc_metadata"] = DocMetadata(
                 **config_dict.pop("_doc_metadata")
@@ -447,6 +922,10 @@ class Network(nx.Graph):
             if hasattr(self, k):
                 setattr(self, k, v)
 
+        if structure_hash is not None:
+            self._structure_hash = structure_hash
+            self._structure_hash_nodes = self.number_of_nodes()
+
         if self.set_random_entry_nodes:
             self.reset_random_entry_nodes()
 
@@ -516,15 +995,23 @@ class Network(nx.Graph):
 
         If no entry nodes supplied then the first node in the network is chosen as the initial node.
         """
-        try:
-            node_dict = nx.algorithms.centrality.eigenvector_centrality(
-                self, max_iter=500
+        # the centrality of each node only depends on the structure of the network, so is worked out once
+        tables = self._get_topology_tables()
+        if tables.centrality is None:
+            try:
+                node_dict = nx.algorithms.centrality.eigenvector_centrality(
+                    self, max_iter=500
+                )
+            except nx.PowerIterationFailedConvergence as e:
+                _LOGGER.debug(e)
+                node_dict = {node: 0.5 for node in self.nodes()}
+            tables.centrality = numpy.array(
+                [node_dict[self._nodes_by_uuid[uuid]] for uuid in tables.uuids]
             )
-        except nx.PowerIterationFailedConvergence as e:
-            _LOGGER.debug(e)
-            node_dict = {node: 0.5 for node in self.nodes()}
-        weights = list(node_dict.values())
-        all_nodes = list(node_dict.keys())
+        all_nodes = list(self.nodes)
+        weights = tables.centrality[
+            [tables.index[node.uuid] for node in all_nodes]
+        ].tolist()
 
         if self.random_entry_node_preference == RandomEntryNodePreference.EDGE:
             weights = list(map(lambda x: (1 / x) ** 4, weights))
@@ -533,7 +1020,8 @@ class Network(nx.Graph):
         elif self.random_entry_node_preference == RandomEntryNodePreference.NONE:
             weights = [1] * len(all_nodes)
 
-        weights_normal = [float(i) / sum(weights) for i in weights]
+        total = sum(weights)
+        weights_normal = [float(i) / total for i in weights]
 
         entry_nodes = choice(
             all_nodes,
@@ -541,6 +1029,7 @@ class Network(nx.Graph):
             replace=False,
             p=weights_normal,
         )
+        entry_nodes = set(entry_nodes)
 
         for node in self.nodes:
             if node in entry_nodes:
@@ -589,35 +1078,48 @@ class Network(nx.Graph):
         possible_high_value_nodes = []
         # chooses a random node to be the high value node
         if self.random_high_value_node_preference == RandomHighValueNodePreference.NONE:
-            possible_high_value_nodes = list(
-                set(self.nodes).difference(set(self.entry_nodes))
-            )
+            # kept in node order rather than as a set, whose order varies between processes, so that seeded
+            # choices are repeatable
+            entry_nodes = set(self.entry_nodes)
+            possible_high_value_nodes = [
+                node for node in self.nodes if node not in entry_nodes
+            ]
         # Choose the node that is the furthest away from the entry points as the high value node
         elif (
             self.random_high_value_node_preference.FURTHEST_AWAY_FROM_ENTRY
             == RandomHighValueNodePreference.FURTHEST_AWAY_FROM_ENTRY
         ):
-            # gets all the paths between nodes
-            paths = []
+            # gets the distances to the entry points from the cached shortest path lengths
+            tables = self._get_topology_tables()
+            sums = numpy.zeros(len(tables.uuids))
+            counters = numpy.zeros(len(tables.uuids), dtype=int)
+            # the order each node is first reached in, which breaks ties between equally distant nodes
+            first_reached = numpy.full(len(tables.uuids), len(tables.uuids))
+            seen = 0
             for n in self.entry_nodes:
-                paths.append(dict(nx.all_pairs_shortest_path_length(self))[n])
-            sums = Counter()
-            counters = Counter()
-            # gets the distances to the entry points
-            for itemset in paths:
-                sums.update(itemset)
-                counters.update(itemset.keys())
+                reachable, lengths = self._get_path_lengths(n, tables)
+                sums[reachable] += lengths
+                counters[reachable] += 1
+                new = reachable[first_reached[reachable] == len(tables.uuids)]
+                first_reached[new] = numpy.arange(seen, seen + len(new))
+                seen += len(new)
             # averages the distances to find the node that is, on average, the furthest away
-            result = {x: float(sums[x]) / counters[x] for x in sums.keys()}
-            for _ in range(self.num_possible_high_value_nodes):
-                current = max(result, key=result.get)
-                possible_high_value_nodes.append(current)
-                result.pop(current)
+            reached = numpy.flatnonzero(counters)
+            result = sums[reached] / counters[reached]
+            furthest = reached[
+                numpy.lexsort((first_reached[reached], -result))[
+                    : self.num_possible_high_value_nodes
+                ]
+            ]
+            possible_high_value_nodes = [
+                self._nodes_by_uuid[tables.uuids[i]] for i in furthest.tolist()
+            ]
 
             # prevent high value nodes from becoming entry nodes
-            possible_high_value_nodes = list(
-                set(possible_high_value_nodes).difference(self.entry_nodes)
-            )
+            entry_nodes = set(self.entry_nodes)
+            possible_high_value_nodes = [
+                node for node in possible_high_value_nodes if node not in entry_nodes
+            ]
         # randomly pick unique nodes from a list of possible high value nodes
 
         if (
@@ -633,9 +1135,11 @@ class Network(nx.Graph):
             )
             warnings.warn(UserWarning(msg))
 
-        high_value_nodes = sample(
-            set(possible_high_value_nodes),
-            number_of_high_value_nodes,
+        high_value_nodes = set(
+            sample(
+                possible_high_value_nodes,
+                number_of_high_value_nodes,
+            )
         )
         for node in self.nodes:
             if node in high_value_nodes:
@@ -644,6 +1148,45 @@ class Network(nx.Graph):
                 node.high_value_node = False
             self._check_intersect(node)
 
+    def _get_topology_tables(self) -> TopologyTables:
+        """Get the tables shared by every network with the same structure as this one, creating them if needed."""
+        self._check_node_index()
+        key = self.structure_hash
+        tables = _TOPOLOGY_TABLES.get(key)
+        if tables is None:
+            uuids = [node.uuid for node in self.nodes]
+            tables = TopologyTables(
+                uuids=uuids, index={uuid: i for i, uuid in enumerate(uuids)}
+            )
+            _TOPOLOGY_TABLES[key] = tables
+            if len(_TOPOLOGY_TABLES) > _TOPOLOGY_TABLES_MAX_SIZE:
+                _TOPOLOGY_TABLES.popitem(last=False)
+        else:
+            _TOPOLOGY_TABLES.move_to_end(key)
+        return tables
+
+    def _get_path_lengths(
+        self, source: Node, tables: TopologyTables
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Get the shortest path lengths from a node to every node reachable from it.
+
+        :param source: The node to measure from.
+        :param tables: The topology tables of this network, which the path lengths are cached in.
+        :return: The positions in the tables of the reachable nodes in breadth first order and their path lengths.
+        """
+        path_lengths = tables.path_lengths.get(source.uuid)
+        if path_lengths is None:
+            lengths = nx.single_source_shortest_path_length(self, source)
+            path_lengths = (
+                numpy.array(
+                    [tables.index[node.uuid] for node in lengths], dtype=numpy.intp
+                ),
+                numpy.array(list(lengths.values()), dtype=numpy.int32),
+            )
+            tables.path_lengths[source.uuid] = path_lengths
+        return path_lengths
+
     def reset_random_vulnerabilities(self):
         """Regenerate random vulnerabilities for every node in the network."""
         if self.set_random_vulnerabilities:
@@ -673,6 +1216,7 @@ class Network(nx.Graph):
             "node_vulnerability_upper_bound": self.node_vulnerability_upper_bound,
             "nodes": self.__dict__["_node"],
             "edges": self.__dict__["_adj"],
+            "structure_hash": self.structure_hash,
             "_doc_metadata": self.doc_metadata,
         }
         if json_serializable:
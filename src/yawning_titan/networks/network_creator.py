@@ -11,11 +11,20 @@ Networks that can be created are:
 - A P2P network.
 - A randomly generated binominal network.
 - A custom network using user-input options.
+
+The mesh, star, P2P, ring and random connected networks also have ``_sparse``
+variants for networks of tens of thousands of nodes. They sample the edges
+with numpy by skipping geometrically distributed gaps between the pairs of
+nodes that are connected, rather than visiting every pair, place the nodes with
+a grid of buckets so that each new position is only checked against its
+neighbours, and build the network from an edge list rather than an adjacency
+matrix. They draw from their own random generator, seeded from the global numpy
+random state if no seed is given.
 """
 import math
 import random
 from itertools import combinations, groupby
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import networkx as nx
 import numpy as np
@@ -49,6 +58,9 @@ def generate_node_positions(matrix: np.array) -> dict:
     :return: A dictionary of node positions.
     """
     positions = {}
+    # the positions bucketed by a grid as wide as the largest separation, so each point only needs checking against
+    # the points in the 9 buckets around it
+    buckets: Dict[Tuple[int, int], List[List[int]]] = {}
     for i in range(0, len(matrix)):
         # generates a random x,y position for a node
         rand_pos = [
@@ -57,7 +69,7 @@ def generate_node_positions(matrix: np.array) -> dict:
         ]
         fails = 0
         value = 5
-        while check_if_nearby(rand_pos, positions, value):
+        while _is_nearby_bucketed(rand_pos, buckets, value, 5):
             # if that position has already been used then generate a new point
             rand_pos = [
                 random.randint(0, len(matrix) * 4),
@@ -69,9 +81,36 @@ def generate_node_positions(matrix: np.array) -> dict:
                 if value == -1:
                     value = 0
         positions[str(i)] = rand_pos
+        buckets.setdefault((rand_pos[0] // 5, rand_pos[1] // 5), []).append(rand_pos)
     return positions
 
 
+def _is_nearby_bucketed(
+    pos: List[int],
+    buckets: Dict[Tuple[int, int], List[List[int]]],
+    value: int,
+    bucket_width: int,
+) -> bool:
+    """
+    Check if a point is within a separation of any point in a grid of buckets, as :func:`check_if_nearby` does.
+
+    :param pos: The x,y position as a list.
+    :param buckets: The points so far, bucketed by their position divided by `bucket_width`.
+    :param value: The separation value, no more than `bucket_width`.
+    :param bucket_width: The width of the buckets.
+    :return: True if nearby, otherwise False.
+    """
+    bucket_x = pos[0] // bucket_width
+    bucket_y = pos[1] // bucket_width
+    for x in range(bucket_x - 1, bucket_x + 2):
+        for y in range(bucket_y - 1, bucket_y + 2):
+            for i in buckets.get((x, y), ()):
+                if i[0] - value <= pos[0] <= i[0] + value:
+                    if i[1] - value <= pos[1] <= i[1] + value:
+                        return True
+    return False
+
+
 def get_network_from_matrix_and_positions(
     matrix: np.ndarray,
     positions: Dict[str, List[int]],
@@ -84,21 +123,48 @@ def get_network_from_matrix_and_positions(
     :return: An instance of :class:`~yawning_titan.networks.network.Network`.
     """
     network = Network()
-    edges = []
     # Create all Nodes
     nodes: Dict[Any, Node] = {i: Node(name=str(i)) for i in range(len(matrix))}
-    for y_i, y_node in enumerate(matrix):
+    # the connections of every node, found without walking the matrix in Python
+    rows, columns = np.nonzero(np.asarray(matrix) == 1)
+    row_starts = np.searchsorted(rows, np.arange(len(matrix) + 1)).tolist()
+    columns = columns.tolist()
+    for y_i in range(len(matrix)):
         # Retrieve the Node and add to the Network
         network.add_node(nodes[y_i])  # Retrieve the positions and set on the Node
         if str(y_i) in positions.keys():
             x, y = positions[str(y_i)]
             nodes[y_i].x_pos = x
-            nodes[y_i].y_pos = y  # If the edge hasn't already been added, add it
-        for x_i, x_node in enumerate(y_node):
-            if x_node == 1:
-                edge = tuple(sorted([y_i, x_i]))
-                if edge not in edges:
-                    network.add_edge(nodes[edge[0]], nodes[edge[1]])
+            nodes[y_i].y_pos = y
+        # adding an edge that has already been added has no effect
+        for x_i in columns[row_starts[y_i] : row_starts[y_i + 1]]:
+            edge = tuple(sorted([y_i, x_i]))
+            network.add_edge(nodes[edge[0]], nodes[edge[1]])
+    return network
+
+
+def get_network_from_edges_and_positions(
+    edges: np.ndarray, positions: np.ndarray
+) -> Network:
+    """
+    Get a network from an array of edges and an array of node positions.
+
+    The nodes are named after their index and added in index order, followed by the edges.
+
+    :param edges: An (n, 2) array of the indices of the nodes at either end of each edge.
+    :param positions: An (n_nodes, 2) array of the x,y position of each node.
+    :return: An instance of :class:`~yawning_titan.networks.network.Network`.
+    """
+    network = Network()
+    nodes = []
+    for i, (x, y) in enumerate(np.asarray(positions).tolist()):
+        node = Node(name=str(i))
+        node.x_pos = x
+        node.y_pos = y
+        network.add_node(node)
+        nodes.append(node)
+    for u, v in np.asarray(edges).reshape(-1, 2).tolist():
+        network.add_edge(nodes[u], nodes[v])
     return network
 
 
@@ -409,3 +475,259 @@ def gnp_random_connected_graph(
     positions = generate_node_positions(matrix)
 
     return get_network_from_matrix_and_positions(matrix, positions)
+
+
+def _get_generator(seed: Optional[int]) -> np.random.Generator:
+    """Get a random generator for a sparse generator, seeded from the global numpy random state if no seed is given."""
+    if seed is None:
+        seed = np.random.randint(0, 2**31 - 1)
+    return np.random.default_rng(seed)
+
+
+def _sample_pair_indices(
+    n_pairs: int, probability: float, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Choose each of `n_pairs` pairs independently with a probability, without visiting every pair.
+
+    The gaps between chosen pairs are geometrically distributed, so they are drawn directly in batches sized to the
+    expected number of pairs.
+
+    :param n_pairs: The number of pairs to choose from.
+    :param probability: The probability of choosing each pair.
+    :param rng: The random generator to draw from.
+    :return: The ascending indices of the chosen pairs.
+    """
+    if n_pairs <= 0 or probability <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if probability >= 1:
+        return np.arange(n_pairs, dtype=np.int64)
+    chosen = []
+    position = -1
+    while position < n_pairs:
+        batch_size = int((n_pairs - position) * probability * 1.1) + 16
+        batch = position + np.cumsum(rng.geometric(probability, size=batch_size))
+        position = int(batch[-1])
+        chosen.append(batch[batch < n_pairs])
+    return np.concatenate(chosen)
+
+
+def _triangle_pairs(indices: np.ndarray, n: int) -> np.ndarray:
+    """
+    Map indices into the pairs of `n` nodes, ordered (0, 1), (0, 2), ..., (1, 2), ..., to the pairs themselves.
+
+    :param indices: Indices below ``n * (n - 1) / 2``.
+    :param n: The number of nodes.
+    :return: An (len(indices), 2) array of the node indices of each pair, the first below the second.
+    """
+    rows = np.arange(max(n - 1, 0), dtype=np.int64)
+    row_starts = rows * (2 * n - rows - 1) // 2
+    i = np.searchsorted(row_starts, indices, side="right") - 1
+    j = indices - row_starts[i] + i + 1
+    return np.stack((i, j), axis=1)
+
+
+def _sample_triangle_edges(
+    n: int, probability: float, rng: np.random.Generator, offset: int = 0
+) -> np.ndarray:
+    """Connect each pair of `n` nodes, numbered from `offset`, with a probability."""
+    indices = _sample_pair_indices(n * (n - 1) // 2, probability, rng)
+    return _triangle_pairs(indices, n) + offset
+
+
+def generate_node_positions_sparse(
+    n_nodes: int, rng: np.random.Generator, separation: int = 5
+) -> np.ndarray:
+    """
+    Generate a random position for each node, keeping the nodes apart where possible.
+
+    Like :func:`generate_node_positions` the positions are integers from 0 to ``4 * n_nodes`` and the separation is
+    relaxed after repeated failures, but each new position is only checked against the positions in the surrounding
+    cells of a grid.
+
+    :param n_nodes: The number of nodes.
+    :param rng: The random generator to draw from.
+    :param separation: The distance to keep between the nodes in both x and y.
+    :return: An (n_nodes, 2) array of node positions.
+    """
+    high = n_nodes * 4 + 1
+    bucket_width = max(separation, 1)
+    buckets: Dict[Tuple[int, int], List[List[int]]] = {}
+    positions = []
+    candidates: List[List[int]] = []
+    while len(positions) < n_nodes:
+        fails = 0
+        value = separation
+        while True:
+            if not candidates:
+                candidates = rng.integers(0, high, size=(n_nodes + 16, 2)).tolist()
+            rand_pos = candidates.pop()
+            if not _is_nearby_bucketed(rand_pos, buckets, value, bucket_width):
+                break
+            fails += 1
+            if fails % 10 == 0:
+                value = max(value - 1, 0)
+        positions.append(rand_pos)
+        buckets.setdefault(
+            (rand_pos[0] // bucket_width, rand_pos[1] // bucket_width), []
+        ).append(rand_pos)
+    return np.array(positions, dtype=np.int64).reshape(-1, 2)
+
+
+def create_mesh_sparse(
+    size: int = 100, connectivity: float = 0.7, seed: Optional[int] = None
+) -> Network:
+    """
+    Create a mesh node environment, as :func:`create_mesh` does, for large networks.
+
+    :param size: The number of nodes in the environment.
+    :param connectivity: The chance for any node to be connected to any other.
+    :param seed: An optional seed for the random generator.
+
+    :return: An instance of :class:`~yawning_titan.networks.network.Network`.
+    """
+    rng = _get_generator(seed)
+    edges = _sample_triangle_edges(size, connectivity, rng)
+    return get_network_from_edges_and_positions(
+        edges, generate_node_positions_sparse(size, rng)
+    )
+
+
+def create_star_sparse(
+    first_layer_size: int = 8,
+    group_size: int = 5,
+    group_connectivity: float = 0.5,
+    seed: Optional[int] = None,
+) -> Network:
+    """
+    Create a star node environment, as :func:`create_star` does, for large networks.
+
+    :param first_layer_size: The number of collections of nodes in first "outer ring".
+    :param group_size: How many nodes are in each collection.
+    :param group_connectivity: How connected the nodes in the connections are.
+    :param seed: An optional seed for the random generator.
+
+    :return: An instance of :class:`~yawning_titan.networks.network.Network`.
+    """
+    rng = _get_generator(seed)
+    number_of_nodes = 1 + first_layer_size * group_size
+
+    # the pairs within every group are numbered group by group and sampled at once
+    pairs_per_group = group_size * (group_size - 1) // 2
+    indices = _sample_pair_indices(
+        first_layer_size * pairs_per_group, group_connectivity, rng
+    )
+    groups = indices // max(pairs_per_group, 1)
+    group_edges = _triangle_pairs(indices % max(pairs_per_group, 1), group_size)
+    group_edges += (1 + groups * group_size)[:, None]
+
+    # connects the groups to the center node
+    connectors = (
+        1
+        + np.arange(first_layer_size) * group_size
+        + rng.integers(0, group_size, size=first_layer_size)
+    )
+    center_edges = np.stack((np.zeros_like(connectors), connectors), axis=1)
+
+    return get_network_from_edges_and_positions(
+        np.concatenate((group_edges, center_edges)),
+        generate_node_positions_sparse(number_of_nodes, rng),
+    )
+
+
+def create_p2p_sparse(
+    group_size: int = 5,
+    inter_group_connectivity: float = 0.1,
+    group_connectivity: float = 1,
+    seed: Optional[int] = None,
+) -> Network:
+    """
+    Create a two group network, as :func:`create_p2p` does, for large networks.
+
+    :param group_size: The amount of nodes in each group (before random variance).
+    :param inter_group_connectivity: The connectivity between the two groups.
+    :param group_connectivity: The connectivity within the group.
+    :param seed: An optional seed for the random generator.
+
+    :return: An instance of :class:`~yawning_titan.networks.network.Network`.
+    """
+    rng = _get_generator(seed)
+    # creates the sizes of the groups
+    group1_size, group2_size = (
+        group_size
+        + rng.integers(0, int(group_size / 2) + 1, size=2)
+        - int(group_size / 4)
+    ).tolist()
+    total_size = group1_size + group2_size
+
+    group1_edges = _sample_triangle_edges(group1_size, group_connectivity, rng)
+    group2_edges = _sample_triangle_edges(
+        group2_size, group_connectivity, rng, offset=group1_size
+    )
+
+    # connections between the two groups
+    connections = math.ceil(inter_group_connectivity * total_size)
+    inter_group_edges = np.stack(
+        (
+            rng.integers(0, group1_size, size=connections),
+            rng.integers(group1_size, total_size, size=connections),
+        ),
+        axis=1,
+    )
+
+    return get_network_from_edges_and_positions(
+        np.concatenate((group1_edges, group2_edges, inter_group_edges)),
+        generate_node_positions_sparse(total_size, rng),
+    )
+
+
+def create_ring_sparse(
+    break_probability: float = 0.3, ring_size: int = 60, seed: Optional[int] = None
+) -> Network:
+    """
+    Create a ring network, as :func:`create_ring` does, for large networks.
+
+    :param break_probability: The probability that two nodes will not be connected.
+    :param ring_size: The number of nodes in the network.
+    :param seed: An optional seed for the random generator.
+
+    :return: An instance of :class:`~yawning_titan.networks.network.Network`.
+    """
+    rng = _get_generator(seed)
+    nodes = np.arange(ring_size)
+    edges = np.stack((nodes, (nodes + 1) % ring_size), axis=1)
+    edges = edges[rng.random(ring_size) >= break_probability]
+    return get_network_from_edges_and_positions(
+        edges, generate_node_positions_sparse(ring_size, rng)
+    )
+
+
+def gnp_random_connected_graph_sparse(
+    n_nodes: int, probability_of_edge: float, seed: Optional[int] = None
+) -> Union[Network, None]:
+    """
+    Create a randomly connected graph, as :func:`gnp_random_connected_graph` does, for large networks.
+
+    Every node but the last is connected to at least one of the nodes after it.
+
+    :param n_nodes: the number of nodes in the graph.
+    :param probability_of_edge: the probability for a node to have an edge.
+    :param seed: An optional seed for the random generator.
+
+    :return: An instance of :class:`~yawning_titan.networks.network.Network`.
+    """
+    if probability_of_edge <= 0:
+        return None
+    rng = _get_generator(seed)
+    random_edges = _sample_triangle_edges(n_nodes, probability_of_edge, rng)
+
+    # one guaranteed edge from each node to a random later node
+    nodes = np.arange(max(n_nodes - 1, 0))
+    guaranteed_edges = np.stack(
+        (nodes, rng.integers(nodes + 1, n_nodes, size=len(nodes))), axis=1
+    )
+
+    return get_network_from_edges_and_positions(
+        np.concatenate((guaranteed_edges, random_edges)),
+        generate_node_positions_sparse(n_nodes, rng),
+    )
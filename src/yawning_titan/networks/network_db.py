@@ -190,6 +190,7 @@ class NetworkSchema(YawningTitanDBSchema):
     NODE_VULNERABILITY_UPPER_BOUND: Final[
         YawningTitanQuery
     ] = YawningTitanQuery().node_vulnerability_upper_bound
+    STRUCTURE_HASH: Final[YawningTitanQuery] = YawningTitanQuery().structure_hash
 
 
 class NetworkDB:
@@ -1,8 +1,39 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Callable, List, Optional
 from uuid import uuid4
 
+from yawning_titan.networks.node_state import STATE_FIELDS, NodeStateStore
+
+
+def _state_property(field: str, cast: Callable, doc: str) -> property:
+    """
+    Build a property for a dynamic Node attribute that may be held in a :class:`NodeStateStore`.
+
+    When the Node is bound to a store the value is read from and written to
+    the store's array for ``field`` at the Node's slot, otherwise a private
+    instance attribute is used.
+
+    :param field: The name of the attribute.
+    :param cast: Converts the stored value back to a native Python type.
+    :param doc: The property docstring.
+    :return: The property.
+    """
+    private = f"_{field}"
+
+    def fget(self):
+        if self._state_store is not None:
+            return cast(getattr(self._state_store, field)[self._state_index])
+        return getattr(self, private)
+
+    def fset(self, value):
+        if self._state_store is not None:
+            getattr(self._state_store, field)[self._state_index] = value
+        else:
+            setattr(self, private, value)
+
+    return property(fget, fset, doc=doc)
+
 
 class Node:
     """A Node for building networks with yawning_titan.networks.network.Network."""
@@ -25,6 +56,8 @@ class Node:
         :param vulnerability: The vulnerability score of the Node. Has a
             default value of 0.1.
         """
+        self._state_store: Optional[NodeStateStore] = None
+        self._state_index: Optional[int] = None
         self._uuid: str = str(uuid4())
         self.name: str = name
         self._high_value_node: bool = high_value_node
@@ -77,6 +110,57 @@ class Node:
         node.y_pos = y_pos
         return node
 
+    true_compromised_status = _state_property(
+        "true_compromised_status", int, "1 if the Node is compromised, otherwise 0."
+    )
+    blue_view_compromised_status = _state_property(
+        "blue_view_compromised_status",
+        int,
+        "1 if the blue agent believes the Node is compromised, otherwise 0.",
+    )
+    vulnerability_score = _state_property(
+        "vulnerability_score", float, "The nodes current vulnerability."
+    )
+    isolated = _state_property(
+        "isolated", bool, "True if the Node is isolated, otherwise False."
+    )
+    deceptive_node = _state_property(
+        "deceptive_node", bool, "True if the Node is a deceptive node, otherwise False."
+    )
+    blue_knows_intrusion = _state_property(
+        "blue_knows_intrusion",
+        bool,
+        "True if the blue agent has discovered an intrusion on the Node, otherwise False.",
+    )
+
+    @property
+    def state_index(self) -> Optional[int]:
+        """The Nodes slot in the :class:`NodeStateStore` it is bound to, or None if unbound."""
+        return self._state_index
+
+    def bind_state_store(self, store: NodeStateStore, index: int):
+        """
+        Move the Nodes dynamic state into a slot of a :class:`NodeStateStore`.
+
+        :param store: The store to bind to.
+        :param index: The slot allocated to this Node in the store.
+        """
+        values = {field: getattr(self, field) for field in STATE_FIELDS}
+        self._state_store = store
+        self._state_index = index
+        for field, value in values.items():
+            getattr(store, field)[index] = value
+
+    def unbind_state_store(self):
+        """Move the Nodes dynamic state out of its :class:`NodeStateStore` back onto the Node."""
+        if self._state_store is None:
+            return
+        values = {field: getattr(self, field) for field in STATE_FIELDS}
+        self._state_store = None
+        self._state_index = None
+        for field, value in values.items():
+            setattr(self, field, value)
+
     def reset_vulnerability(self):
         """Resets the nodes current `vulnerability_score` to the original `vulnerability`."""
         self.vulnerability_score = self.vulnerability
@@ -0,0 +1,226 @@
+"""
+A structure-of-arrays store for the dynamic state of :class:`~yawning_titan.networks.node.Node` objects.
+
+When a :class:`~yawning_titan.networks.network.Network` has a store attached,
+each of its nodes is bound to a stable integer slot and the node's dynamic
+attributes become views onto contiguous NumPy arrays. This allows whole-network
+queries (filters, observation segments, reward inputs) to be answered with
+vectorised mask operations rather than Python loops over every node.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from logging import getLogger
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+_LOGGER = getLogger(__name__)
+
+STATE_FIELDS: Dict[str, np.dtype] = {
+    "true_compromised_status": np.dtype(np.int8),
+    "blue_view_compromised_status": np.dtype(np.int8),
+    "vulnerability_score": np.dtype(np.float64),
+    "isolated": np.dtype(np.bool_),
+    "deceptive_node": np.dtype(np.bool_),
+    "blue_knows_intrusion": np.dtype(np.bool_),
+}
+"""The dynamic :class:`~yawning_titan.networks.node.Node` attributes held by the store mapped to their dtype."""
+
+
+class NodeStateStore:
+    """
+    Contiguous per-field NumPy arrays holding the dynamic state of a set of nodes.
+
+    The store holds no references to the nodes themselves, only their state,
+    so copying a store is a handful of array copies regardless of network size.
+    Slots are handed out by :meth:`allocate` and returned by :meth:`release`;
+    the arrays grow (doubling) if more slots are needed than the initial
+    capacity.
+    """
+
+    def __init__(
+        self, capacity: int = 0, arrays: Optional[Dict[str, np.ndarray]] = None
+    ):
+        """
+        The NodeStateStore constructor.
+
+        :param capacity: The number of slots to preallocate. Passing the
+            maximum number of nodes the network will ever hold (including
+            deceptive nodes) avoids any re-allocation.
+        :param arrays: Optional existing 1D arrays of length `capacity` to
+            hold each field in, e.g. rows of a :class:`NodeStateStack`. The
+            store writes into them in place until it has to grow.
+        """
+        self._capacity = max(int(capacity), 1)
+        self._free: List[int] = []
+        self._next_index = 0
+        for field, dtype in STATE_FIELDS.items():
+            if arrays is None:
+                setattr(self, field, np.zeros(self._capacity, dtype=dtype))
+            else:
+                setattr(self, field, arrays[field])
+
+    @property
+    def capacity(self) -> int:
+        """The number of slots currently allocated in each array."""
+        return self._capacity
+
+    @property
+    def num_allocated(self) -> int:
+        """The number of slots currently in use."""
+        return self._next_index - len(self._free)
+
+    def allocate(self) -> int:
+        """
+        Allocate a slot in the store.
+
+        Freed slots are reused lowest index first so that slot indices stay
+        compact and deterministic.
+
+        :return: The index of the allocated slot.
+        """
+        if self._free:
+            self._free.sort()
+            return self._free.pop(0)
+        if self._next_index == self._capacity:
+            self._grow(self._capacity * 2)
+        index = self._next_index
+        self._next_index += 1
+        return index
+
+    def release(self, index: int):
+        """
+        Return a slot to the store so that it can be reused.
+
+        :param index: The index of the slot to release.
+        """
+        for field in STATE_FIELDS:
+            getattr(self, field)[index] = 0
+        self._free.append(index)
+
+    def clear(self):
+        """Release every slot in the store and zero its arrays in place."""
+        for field in STATE_FIELDS:
+            getattr(self, field).fill(0)
+        self._free = []
+        self._next_index = 0
+
+    def _grow(self, capacity: int):
+        """Grow every array in the store to the given capacity."""
+        if self.true_compromised_status.base is not None:
+            _LOGGER.warning(
+                "Growing a node state store that is a view onto other arrays, "
+                "it will no longer write into them."
+            )
+        _LOGGER.debug(
+            f"Growing node state store from {self._capacity} to {capacity} slots."
+        )
+        for field in STATE_FIELDS:
+            old = getattr(self, field)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self._capacity] = old
+            setattr(self, field, new)
+        self._capacity = capacity
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"capacity={self._capacity}, "
+            f"allocated={self.num_allocated})"
+        )
+
+
+class NodeStateStack:
+    """
+    The node state of several copies of a network stacked into 2D arrays.
+
+    Each field is held as a single ``(n_stores, capacity)`` array and every
+    store in :attr:`stores` reads and writes one row of them, so the state of
+    all of the copies can be read or reduced with one array operation.
+    """
+
+    def __init__(self, n_stores: int, capacity: int):
+        """
+        The NodeStateStack constructor.
+
+        :param n_stores: The number of stores (network copies) to stack.
+        :param capacity: The number of slots in each store. As the stores
+            write into the stack in place only until they have to grow, this
+            should be the maximum number of nodes a copy will ever hold.
+        """
+        capacity = max(int(capacity), 1)
+        self.arrays: Dict[str, np.ndarray] = {
+            field: np.zeros((n_stores, capacity), dtype=dtype)
+            for field, dtype in STATE_FIELDS.items()
+        }
+        self.stores: List[NodeStateStore] = [
+            NodeStateStore(
+                capacity, {field: array[i] for field, array in self.arrays.items()}
+            )
+            for i in range(n_stores)
+        ]
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """Get the stacked ``(n_stores, capacity)`` array of a field."""
+        return self.arrays[field]
+
+    def __repr__(self) -> str:
+        n_stores, capacity = self.arrays["true_compromised_status"].shape
+        return f"{self.__class__.__name__}(n_stores={n_stores}, capacity={capacity})"
+
+
+class NodeStateView(Mapping):
+    """
+    A read-only, array-backed mapping of node uuid to the value of one node state field.
+
+    The view holds a snapshot of the field for every node in graph order and
+    behaves like the ``{uuid: value}`` dicts returned by
+    :meth:`~yawning_titan.envs.generic.core.network_interface.NetworkInterface.get_attributes_from_key`,
+    but only builds the uuid index or the Python values when they are first
+    read. The snapshot itself is available as :attr:`array`.
+    """
+
+    def __init__(self, nodes: List[Any], array: np.ndarray):
+        """
+        The NodeStateView constructor.
+
+        :param nodes: The nodes in graph order. The list must not be modified after the view is created.
+        :param array: The value of the field for each node in ``nodes``.
+        """
+        self.nodes = nodes
+        self.array = array
+        self._values: Optional[List[Any]] = None
+        self._index: Optional[Dict[str, int]] = None
+
+    def values(self) -> List[Any]:
+        """Get the values of the field, in graph order, as Python values."""
+        if self._values is None:
+            self._values = self.array.tolist()
+        return self._values
+
+    def keys(self) -> List[str]:
+        """Get the uuids of the nodes in graph order."""
+        return [n.uuid for n in self.nodes]
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over the uuid and value of each node in graph order."""
+        return zip(self.keys(), self.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the view as a ``{uuid: value}`` dict."""
+        return dict(self.items())
+
+    def __getitem__(self, uuid: str) -> Any:
+        if self._index is None:
+            self._index = {n.uuid: i for i, n in enumerate(self.nodes)}
+        return self.values()[self._index[uuid]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
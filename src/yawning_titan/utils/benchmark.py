@@ -0,0 +1,570 @@
+"""
+A benchmark suite measuring the performance of YAWNING TITAN, run by the ``yawning-titan bench`` command.
+
+The suite is made up of:
+
+- Environment benchmarks: the steps per second, reset latency and peak resident
+  set size (RSS) of a ``GenericNetworkEnv`` for each combination of network
+  topology, network size and game mode. The networks are generated by the
+  seeded ``network_creator`` generators, so every run times the same networks.
+- Component microbenchmarks: the time taken by a red agent turn, a blue action
+  and building the observation, each on its own, on a mesh network of each size.
+- DB benchmarks: the time taken to save a network and a game mode to a DB and to
+  load them back, for a mesh network of each size.
+
+:func:`run_benchmarks` returns the results as a JSON serialisable dict along
+with metadata about the machine they were measured on, and
+:func:`compare_results` checks them against a baseline saved by an earlier run,
+flagging any metric that has regressed by more than a tolerance. The individual
+benchmarks can also be imported and called directly, such as from pytest.
+
+Each environment benchmark is run in a child process where the platform supports
+forking, so that its peak RSS is its own and not that of the benchmarks before it.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, Final, List, Optional
+
+import numpy as np
+from tabulate import tabulate
+
+from yawning_titan.db.yawning_titan_db import YawningTitanDB
+from yawning_titan.envs.generic.core.blue_interface import BlueInterface
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+from yawning_titan.envs.generic.core.red_interface import RedInterface
+from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
+from yawning_titan.game_modes.game_mode import GameMode
+from yawning_titan.game_modes.game_mode_db import (
+    GameModeDB,
+    dcbo_game_mode,
+    default_game_mode,
+)
+from yawning_titan.networks import network_creator
+from yawning_titan.networks.network import Network
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+_LOGGER = getLogger(__name__)
+
+TOPOLOGIES: Final[Dict[str, Callable[[int, float, int], Network]]] = {
+    "mesh": lambda size, degree, seed: network_creator.create_mesh_sparse(
+        size, min(1.0, degree / size), seed=seed
+    ),
+    "star": lambda size, degree, seed: network_creator.create_star_sparse(
+        max(1, size // 10), 10, min(1.0, degree / 10), seed=seed
+    ),
+    "p2p": lambda size, degree, seed: network_creator.create_p2p_sparse(
+        max(1, size // 2), 0.1, min(1.0, 2 * degree / size), seed=seed
+    ),
+    "ring": lambda size, degree, seed: network_creator.create_ring_sparse(
+        0.3, size, seed=seed
+    ),
+    "gnp": lambda size, degree, seed: network_creator.gnp_random_connected_graph_sparse(
+        size, min(1.0, degree / size), seed=seed
+    ),
+}
+"""The generator of each network topology, taking the number of nodes, the average degree and the seed."""
+
+GAME_MODES: Final[Dict[str, Callable[[], GameMode]]] = {
+    "default": default_game_mode,
+    "dcbo": dcbo_game_mode,
+}
+"""The game modes from the game mode DB that can be benchmarked by name."""
+
+DEFAULT_SIZES: Final[List[int]] = [50, 200, 1000]
+"""The network sizes benchmarked by default."""
+
+HIGHER_IS_BETTER_SUFFIXES: Final = ("per_second",)
+"""The suffixes of the metrics where a higher value is better, for every other metric lower is better."""
+
+DESCRIPTIVE_KEYS: Final = frozenset(["nodes", "edges"])
+"""The keys of the results that describe a benchmark rather than measure it, which are not compared."""
+
+
+def get_machine_metadata() -> Dict[str, Any]:
+    """
+    Get metadata about the machine and software the benchmarks are run with.
+
+    :return: The metadata.
+    """
+    import yawning_titan
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "yawning_titan_version": yawning_titan.__version__,
+        "python_version": platform.python_version(),
+        "numpy_version": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": multiprocessing.cpu_count(),
+    }
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """
+    Get the peak resident set size of this process.
+
+    :return: The peak RSS in megabytes, or None if it cannot be measured on this platform.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def create_network(
+    topology: str, size: int, average_degree: float = 4, seed: int = 0
+) -> Network:
+    """
+    Generate a network to benchmark with, with random entry and high value nodes.
+
+    :param topology: The topology of the network, one of :data:`TOPOLOGIES`.
+    :param size: The number of nodes, approximately for the star and p2p topologies.
+    :param average_degree: The average number of edges per node.
+    :param seed: The seed of the network and its special nodes.
+    :return: The network.
+    """
+    if topology not in TOPOLOGIES:
+        msg = f"topology must be one of {list(TOPOLOGIES)}, got '{topology}'."
+        _LOGGER.error(msg, exc_info=True)
+        raise ValueError(msg)
+    random.seed(seed)
+    np.random.seed(seed)
+    network = TOPOLOGIES[topology](size, average_degree, seed)
+    network.set_random_entry_nodes = True
+    network.num_of_random_entry_nodes = 3
+    network.set_random_high_value_nodes = True
+    network.num_of_random_high_value_nodes = 1
+    network.reset_random_entry_nodes()
+    network.reset_random_high_value_nodes()
+    return network
+
+
+def _create_env(network: Network, game_mode: GameMode) -> GenericNetworkEnv:
+    network_interface = NetworkInterface(game_mode=game_mode, network=network)
+    return GenericNetworkEnv(
+        RedInterface(network_interface),
+        BlueInterface(network_interface),
+        network_interface,
+    )
+
+
+def _mean_and_p95_ms(times: List[float]) -> Dict[str, float]:
+    return {
+        "mean": 1000 * float(np.mean(times)),
+        "p95": 1000 * float(np.percentile(times, 95)),
+    }
+
+
+def benchmark_env(
+    topology: str,
+    size: int,
+    game_mode_dict: Dict,
+    steps: int = 500,
+    resets: int = 20,
+    seed: int = 0,
+) -> Dict[str, Optional[float]]:
+    """
+    Time the steps and resets of a ``GenericNetworkEnv``.
+
+    The blue agent takes random actions, with the env reset whenever an episode ends. Only the steps are timed
+    when measuring the steps per second.
+
+    :param topology: The topology of the network, one of :data:`TOPOLOGIES`.
+    :param size: The number of nodes in the network.
+    :param game_mode_dict: The game mode, as a dict from ``GameMode.to_dict``.
+    :param steps: The number of steps to time.
+    :param resets: The number of resets to time.
+    :param seed: The seed of the network and the actions.
+    :return: The metrics by name.
+    """
+    network = create_network(topology, size, seed=seed)
+    game_mode = GameMode.create(game_mode_dict)
+    start = time.perf_counter()
+    env = _create_env(network, game_mode)
+    setup_time = time.perf_counter() - start
+
+    reset_times = []
+    for _ in range(resets):
+        start = time.perf_counter()
+        env.reset()
+        reset_times.append(time.perf_counter() - start)
+
+    rng = random.Random(seed)
+    step_time = 0.0
+    for _ in range(steps):
+        action = rng.randrange(env.blue_actions)
+        start = time.perf_counter()
+        _, _, done, _ = env.step(action)
+        step_time += time.perf_counter() - start
+        if done:
+            env.reset()
+
+    reset = _mean_and_p95_ms(reset_times)
+    return {
+        "nodes": network.number_of_nodes(),
+        "edges": network.number_of_edges(),
+        "setup_ms": 1000 * setup_time,
+        "steps_per_second": steps / step_time if step_time else None,
+        "reset_ms_mean": reset["mean"],
+        "reset_ms_p95": reset["p95"],
+        "peak_rss_mb": get_peak_rss_mb(),
+    }
+
+
+def benchmark_components(
+    size: int,
+    game_mode_dict: Dict,
+    turns: int = 200,
+    reset_every: int = 20,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Time a red agent turn, a blue action and building the observation, each on its own, on a mesh network.
+
+    :param size: The number of nodes in the network.
+    :param game_mode_dict: The game mode, as a dict from ``GameMode.to_dict``.
+    :param turns: The number of turns to time each component for.
+    :param reset_every: Reset the env after this many turns, so red keeps finding new targets.
+    :param seed: The seed of the network and the actions.
+    :return: The mean and 95th percentile time of each component in milliseconds.
+    """
+    network = create_network("mesh", size, seed=seed)
+    env = _create_env(network, GameMode.create(game_mode_dict))
+    network_interface = env.network_interface
+    rng = random.Random(seed)
+    red_times, blue_times, observation_times = [], [], []
+    for turn in range(turns):
+        if turn % reset_every == 0:
+            env.reset()
+        start = time.perf_counter()
+        network_interface.reset_stored_attacks()
+        env.RED.perform_action()
+        red_times.append(time.perf_counter() - start)
+
+        action = rng.randrange(env.blue_actions)
+        start = time.perf_counter()
+        env.BLUE.perform_action(action)
+        blue_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        network_interface.get_current_observation()
+        observation_times.append(time.perf_counter() - start)
+
+    metrics = {}
+    for name, times in [
+        ("red_turn", red_times),
+        ("blue_action", blue_times),
+        ("observation", observation_times),
+    ]:
+        stats = _mean_and_p95_ms(times)
+        metrics[f"{name}_ms_mean"] = stats["mean"]
+        metrics[f"{name}_ms_p95"] = stats["p95"]
+    return metrics
+
+
+def benchmark_db(
+    network: Network, game_mode: GameMode, repeats: int = 5
+) -> Dict[str, float]:
+    """
+    Time saving a network and a game mode to a DB and loading them back.
+
+    The DBs are created in a temporary directory, so the users DBs are untouched.
+
+    :param network: The network.
+    :param game_mode: The game mode.
+    :param repeats: The number of times to save and load each.
+    :return: The mean time of each operation in milliseconds.
+    """
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, item, load in [
+            ("network", network, Network.create),
+            ("game_mode", game_mode, GameModeDB._doc_to_game_mode),
+        ]:
+            db = YawningTitanDB(f"benchmark_{name}s", root=Path(tmp_dir))
+            save_times, load_times = [], []
+            for _ in range(repeats):
+                db.db.truncate()
+                start = time.perf_counter()
+                db.db.insert(item.to_dict(json_serializable=True))
+                save_times.append(time.perf_counter() - start)
+
+                # a new DB instance reads the file again rather than using the cached table
+                db.close()
+                start = time.perf_counter()
+                db = YawningTitanDB(f"benchmark_{name}s", root=Path(tmp_dir))
+                [load(doc) for doc in db.db.all()]
+                load_times.append(time.perf_counter() - start)
+            db.close()
+            metrics[f"{name}_save_ms_mean"] = 1000 * float(np.mean(save_times))
+            metrics[f"{name}_load_ms_mean"] = 1000 * float(np.mean(load_times))
+    return metrics
+
+
+def _run_isolated(function: Callable, *args) -> Any:
+    """Run a function in a forked child process where the platform supports it, otherwise in this process."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return function(*args)
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        return executor.submit(function, *args).result()
+
+
+def run_benchmarks(
+    game_modes: Dict[str, GameMode],
+    sizes: Optional[List[int]] = None,
+    topologies: Optional[List[str]] = None,
+    steps: int = 500,
+    resets: int = 20,
+    turns: int = 200,
+    db_repeats: int = 5,
+    isolate: bool = True,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run the benchmark suite.
+
+    :param game_modes: The game modes to benchmark the envs with, by name. The component and DB benchmarks use the
+        first.
+    :param sizes: The network sizes. Defaults to :data:`DEFAULT_SIZES`.
+    :param topologies: The network topologies, each one of :data:`TOPOLOGIES`. Defaults to all of them.
+    :param steps: The number of steps to time per env.
+    :param resets: The number of resets to time per env.
+    :param turns: The number of turns to time per component.
+    :param db_repeats: The number of times to save and load each network and game mode.
+    :param isolate: Whether to run each env benchmark in a child process, so that its peak RSS is its own.
+    :param seed: The seed of the networks and actions.
+    :return: The results, with the machine metadata, the settings and the metrics of each benchmark by name.
+    """
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    topologies = list(TOPOLOGIES) if topologies is None else topologies
+    game_mode_dicts = {
+        name: game_mode.to_dict(json_serializable=True)
+        for name, game_mode in game_modes.items()
+    }
+    benchmarks: Dict[str, Dict[str, Any]] = {}
+
+    for topology in topologies:
+        for size in sizes:
+            for name, game_mode_dict in game_mode_dicts.items():
+                key = f"env/{topology}/{size}/{name}"
+                _LOGGER.info(f"Running benchmark {key}")
+                args = (topology, size, game_mode_dict, steps, resets, seed)
+                if isolate:
+                    benchmarks[key] = _run_isolated(benchmark_env, *args)
+                else:
+                    benchmarks[key] = benchmark_env(*args)
+
+    first_name, first_game_mode = next(iter(game_modes.items()))
+    for size in sizes:
+        key = f"components/mesh/{size}/{first_name}"
+        _LOGGER.info(f"Running benchmark {key}")
+        benchmarks[key] = benchmark_components(
+            size, game_mode_dicts[first_name], turns, seed=seed
+        )
+
+        key = f"db/mesh/{size}"
+        _LOGGER.info(f"Running benchmark {key}")
+        benchmarks[key] = benchmark_db(
+            create_network("mesh", size, seed=seed), first_game_mode, db_repeats
+        )
+
+    return {
+        "metadata": get_machine_metadata(),
+        "settings": {
+            "game_modes": list(game_modes),
+            "sizes": sizes,
+            "topologies": topologies,
+            "steps": steps,
+            "resets": resets,
+            "turns": turns,
+            "db_repeats": db_repeats,
+            "isolate": isolate,
+            "seed": seed,
+        },
+        "benchmarks": benchmarks,
+    }
+
+
+def compare_results(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Compare benchmark results against a baseline.
+
+    Only the benchmarks and metrics found in both are compared. Metrics ending in one of
+    :data:`HIGHER_IS_BETTER_SUFFIXES` regress when they fall, every other metric regresses when it rises.
+
+    :param results: The results from :func:`run_benchmarks`.
+    :param baseline: The baseline results, from an earlier run of :func:`run_benchmarks`.
+    :param tolerance: The fraction a metric can get worse by before it is flagged.
+    :return: The comparison of every metric, each with the benchmark, metric, baseline and current value, the
+        relative change and whether it is a regression.
+    """
+    comparisons = []
+    for key, metrics in results["benchmarks"].items():
+        baseline_metrics = baseline["benchmarks"].get(key)
+        if baseline_metrics is None:
+            continue
+        for metric, value in metrics.items():
+            baseline_value = baseline_metrics.get(metric)
+            if metric in DESCRIPTIVE_KEYS or value is None or not baseline_value:
+                continue
+            change = (value - baseline_value) / baseline_value
+            if metric.endswith(HIGHER_IS_BETTER_SUFFIXES):
+                regression = change < -tolerance
+            else:
+                regression = change > tolerance
+            comparisons.append(
+                {
+                    "benchmark": key,
+                    "metric": metric,
+                    "baseline": baseline_value,
+                    "current": value,
+                    "change": change,
+                    "regression": regression,
+                }
+            )
+    return comparisons
+
+
+def save_results(results: Dict[str, Any], path: Path):
+    """
+    Save benchmark results to a JSON file.
+
+    :param results: The results from :func:`run_benchmarks`.
+    :param path: The path of the file.
+    """
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    """
+    Load benchmark results from a JSON file.
+
+    :param path: The path of the file.
+    :return: The results.
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+def print_results(results: Dict[str, Any]):
+    """
+    Print benchmark results as a table per kind of benchmark.
+
+    :param results: The results from :func:`run_benchmarks`.
+    """
+    by_kind: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for key, metrics in results["benchmarks"].items():
+        by_kind.setdefault(key.split("/")[0], {})[key] = metrics
+    for kind, benchmarks in by_kind.items():
+        headers = ["benchmark"] + list(next(iter(benchmarks.values())))
+        rows = [
+            [key] + [metrics.get(header) for header in headers[1:]]
+            for key, metrics in benchmarks.items()
+        ]
+        print(tabulate(rows, headers=headers, floatfmt=".3f"))
+        print()
+
+
+def print_comparisons(comparisons: List[Dict[str, Any]]):
+    """
+    Print the regressions found by :func:`compare_results`.
+
+    :param comparisons: The comparisons.
+    """
+    regressions = [c for c in comparisons if c["regression"]]
+    if not regressions:
+        print(f"No regressions found in {len(comparisons)} metrics.")
+        return
+    rows = [
+        [
+            c["benchmark"],
+            c["metric"],
+            c["baseline"],
+            c["current"],
+            f"{c['change']:+.1%}",
+        ]
+        for c in regressions
+    ]
+    print(f"{len(regressions)} of {len(comparisons)} metrics regressed:")
+    print(
+        tabulate(
+            rows,
+            headers=["benchmark", "metric", "baseline", "current", "change"],
+            floatfmt=".3f",
+        )
+    )
+
+
+def run(
+    output: Optional[Path] = None,
+    game_mode_names: Optional[List[str]] = None,
+    sizes: Optional[List[int]] = None,
+    topologies: Optional[List[str]] = None,
+    steps: int = 500,
+    resets: int = 20,
+    baseline: Optional[Path] = None,
+    tolerance: float = 0.1,
+) -> bool:
+    """
+    Run the benchmark suite, print the results and compare them against a baseline.
+
+    :param output: The path of the JSON file to save the results to. Defaults to not saving them.
+    :param game_mode_names: The game modes to benchmark, each one of :data:`GAME_MODES`. Defaults to all of them.
+    :param sizes: The network sizes. Defaults to :data:`DEFAULT_SIZES`.
+    :param topologies: The network topologies, each one of :data:`TOPOLOGIES`. Defaults to all of them.
+    :param steps: The number of steps to time per env.
+    :param resets: The number of resets to time per env.
+    :param baseline: The path of the JSON file of an earlier run to compare against. Defaults to no comparison.
+    :param tolerance: The fraction a metric can get worse by before it is flagged as a regression.
+    :return: True if no metric has regressed, otherwise False.
+    """
+    game_mode_names = list(GAME_MODES) if game_mode_names is None else game_mode_names
+    for name in game_mode_names:
+        if name not in GAME_MODES:
+            msg = f"game mode must be one of {list(GAME_MODES)}, got '{name}'."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+    for topology in topologies or []:
+        if topology not in TOPOLOGIES:
+            msg = f"topology must be one of {list(TOPOLOGIES)}, got '{topology}'."
+            _LOGGER.error(msg, exc_info=True)
+            raise ValueError(msg)
+
+    results = run_benchmarks(
+        {name: GAME_MODES[name]() for name in game_mode_names},
+        sizes=sizes,
+        topologies=topologies,
+        steps=steps,
+        resets=resets,
+    )
+    print_results(results)
+    if output is not None:
+        save_results(results, output)
+        print(f"Results saved to {output}")
+    if baseline is None:
+        return True
+    comparisons = compare_results(results, load_results(baseline), tolerance)
+    print_comparisons(comparisons)
+    return not any(c["regression"] for c in comparisons)
@@ -11,6 +11,7 @@ from yawning_titan import (
     LOG_DIR,
     NOTEBOOKS_DIR,
     PPO_TENSORBOARD_LOGS_DIR,
+    TRAJECTORIES_DIR,
     VIDEOS_DIR,
 )
 
@@ -31,6 +32,7 @@ def run():
         AGENTS_LOGS_DIR,
         VIDEOS_DIR,
         IMAGES_DIR,
+        TRAJECTORIES_DIR,
         GAME_MODES_DIR,
         NOTEBOOKS_DIR,
         DB_DIR,
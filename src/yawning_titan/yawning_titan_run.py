@@ -15,6 +15,7 @@ from stable_baselines3.common.callbacks import EvalCallback
 from stable_baselines3.common.env_checker import check_env
 from stable_baselines3.common.evaluation import evaluate_policy
 from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import VecEnv
 from stable_baselines3.ppo import MlpPolicy as PPOMlp
 
 from yawning_titan import AGENTS_DIR, PPO_TENSORBOARD_LOGS_DIR
@@ -25,7 +26,9 @@ from yawning_titan.agents.sinewave_red import SineWaveRedAgent
 from yawning_titan.envs.generic.core.blue_interface import BlueInterface
 from yawning_titan.envs.generic.core.network_interface import NetworkInterface
 from yawning_titan.envs.generic.core.red_interface import RedInterface
+from yawning_titan.envs.generic.env_factory import VEC_ENV_MODES, make_vec_env
 from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
+from yawning_titan.envs.generic.helpers.step_profiler import StepProfilerCallback
 from yawning_titan.exceptions import YawningTitanRunError
 from yawning_titan.game_modes.game_mode import GameMode
 from yawning_titan.game_modes.game_mode_db import default_game_mode
@@ -81,11 +84,14 @@ class YawningTitanRun:
         eval_freq: int = 10000,
         total_timesteps: int = 200000,
         training_runs: int = 1,
+        n_envs: int = 1,
+        vec_env_mode: str = "dummy",
         n_eval_episodes: int = 1,
         deterministic: bool = False,
         warn: bool = True,
         render: bool = False,
         verbose: int = 1,
+        profile: bool = False,
         logger: Optional[Logger] = None,
         output_dir: Optional[str] = None,
         auto: bool = True,
@@ -106,6 +112,10 @@ class YawningTitanRun:
         :param eval_freq: Evaluate the agent every ``eval_freq`` call of the callback. Default value = 10,000.
         :param total_timesteps: The number of samples (env steps) to train on. Default value = 200000.
         :param training_runs: The number of times the agent is trained.
+        :param n_envs: The number of independently seeded envs to train on at once. Default value = 1.
+        :param vec_env_mode: How the training envs are run, one of ``"dummy"`` (in turn in this process),
+            ``"subproc"`` (one process each, forked where supported), ``"forkserver"`` (one process each, started by a
+            fork server) or ``"native"`` (in this process with stacked node state). Default value = "dummy".
         :param n_eval_episodes: The number of episodes to evaluate the agent. Default value = 1.
         :param deterministic: Whether the evaluation should use stochastic or deterministic actions. Default value =
             False.
@@ -114,6 +124,9 @@ class YawningTitanRun:
         :param render: Renders the environment during evaluation if True. Default value = False.
         :param verbose: Verbosity level: 0 for no output, 1 for info messages (such as device or wrappers used),
             2 for debug messages. Default value = 1.
+        :param profile: Times the phases of each step of the training envs if True, recording the stats to the
+            TensorBoard log at the end of each rollout and to the logger at the end of each training run. Default
+            value = False.
         :param logger: An optional custom logger to override the use of the default module logger.
         :param output_dir: An optional output path for eval output and saved agent zip file. If none is provided,
             a path is generated using the ``yawning_titan.AGENTS_DIR``, today's date, and the uuid of the instance
@@ -128,8 +141,11 @@ class YawningTitanRun:
         self.red: Optional[RedInterface] = None
         self.blue: Optional[BlueInterface] = None
         self.env: Optional[GenericNetworkEnv] = None
+        self.vec_env: Optional[VecEnv] = None
+        self.eval_env: Optional[VecEnv] = None
         self.agent: Optional[PPO] = None
         self.eval_callback: Optional[EvalCallback] = None
+        self.profiler_callback: Optional[StepProfilerCallback] = None
 
         # Set the network using the network arg if one was passed,
         # otherwise use the default 18 node network.
@@ -154,13 +170,25 @@ class YawningTitanRun:
         self.eval_freq = eval_freq
         self.total_timesteps = total_timesteps
         self.training_runs = training_runs
+        self.n_envs = n_envs
+        self.vec_env_mode = vec_env_mode
         self.n_eval_episodes = n_eval_episodes
         self.deterministic = deterministic
         self.warn = warn
         self.render = render
         self.verbose = verbose
+        self.profile = profile
         self.auto = auto
 
+        if self.vec_env_mode not in VEC_ENV_MODES:
+            msg = f"vec_env_mode must be one of {VEC_ENV_MODES}, got '{self.vec_env_mode}'."
+            _LOGGER.error(msg)
+            raise ValueError(msg)
+        if self.n_envs < 1:
+            msg = f"n_envs must be at least 1, got {self.n_envs}."
+            _LOGGER.error(msg)
+            raise ValueError(msg)
+
         self.logger = _LOGGER if logger is None else logger
         self.logger.debug(f"YT run  {self.uuid}: Run initialised")
 
@@ -186,19 +214,31 @@ class YawningTitanRun:
             "eval_freq": self.eval_freq,
             "total_timesteps": self.total_timesteps,
             "training_runs": self.training_runs,
+            "n_envs": self.n_envs,
+            "vec_env_mode": self.vec_env_mode,
             "n_eval_episodes": self.n_eval_episodes,
             "deterministic": self.deterministic,
             "warn": self.warn,
             "render": self.render,
             "verbose": self.verbose,
+            "profile": self.profile,
             "auto": self.auto,
         }
 
+    @property
+    def _uses_vec_env(self) -> bool:
+        """Whether the agent is trained on a vec env of several envs rather than directly on ``env``."""
+        return self.n_envs > 1 or self.vec_env_mode != "dummy"
+
+    def _get_training_env(self) -> Union[GenericNetworkEnv, VecEnv]:
+        """Get the env the agent is trained on."""
+        return self.vec_env if self.vec_env is not None else self.env
+
     def _get_new_ppo(self) -> PPO:
         """Get a new instance of ``stable_baselines.ppo.ppo.PPO``."""
         return PPO(
             PPOMlp,
-            self.env,
+            self._get_training_env(),
             verbose=self.verbose,
             tensorboard_log=str(PPO_TENSORBOARD_LOGS_DIR),
             seed=self.env.network_interface.random_seed,
@@ -208,7 +248,7 @@ class YawningTitanRun:
         """Load an existing ppo.zip file into ``stable_baselines.ppo.ppo.PPO``."""
         return PPO.load(
             ppo_zip_path,
-            self.env,
+            self._get_training_env(),
             verbose=self.verbose,
             tensorboard_log=str(PPO_TENSORBOARD_LOGS_DIR),
             seed=self.env.network_interface.random_seed,
@@ -262,6 +302,7 @@ class YawningTitanRun:
             print_metrics=self.print_metrics,
             show_metrics_every=self.show_metrics_every,
             collect_additional_per_ts_data=self.collect_additional_per_ts_data,
+            profile=self.profile,
         )
         self.logger.debug(f"YT run  {self.uuid}: GenericNetworkEnv created")
 
@@ -272,6 +313,36 @@ class YawningTitanRun:
         self.env.reset()
         self.logger.debug(f"YT run  {self.uuid}: GenericNetworkEnv reset")
 
+        if self._uses_vec_env:
+            # the envs share the seed of the game mode, each offset by its rank
+            env_kwargs = {
+                "game_mode": self.game_mode,
+                "network": self.network,
+                "vec_env_mode": self.vec_env_mode,
+                "seed": self.network_interface.random_seed,
+                "red_agent_class": self._red_agent_class,
+                "blue_agent_class": self._blue_agent_class,
+                "print_metrics": self.print_metrics,
+                "show_metrics_every": self.show_metrics_every,
+                "collect_additional_per_ts_data": self.collect_additional_per_ts_data,
+                # the infos of the training and eval envs are never read
+                "lean": True,
+            }
+            self.vec_env = make_vec_env(
+                n_envs=self.n_envs, profile=self.profile, **env_kwargs
+            )
+            self.logger.debug(
+                f"YT run  {self.uuid}: {self.n_envs} {self.vec_env_mode} training envs created"
+            )
+            # the eval episodes are shared between up to n_envs eval envs
+            self.eval_env = make_vec_env(
+                n_envs=min(self.n_envs, self.n_eval_episodes),
+                monitor_dir=str(self.output_dir),
+                start_rank=self.n_envs,
+                **env_kwargs,
+            )
+            self.logger.debug(f"YT run  {self.uuid}: Eval envs created")
+
         self.logger.debug(f"YT run  {self.uuid}: Instantiating agent")
         if new:
             self.agent = self._get_new_ppo()
@@ -279,15 +350,26 @@ class YawningTitanRun:
             self.agent = self._load_existing_ppo(ppo_zip_path)
         self.logger.debug(f"YT run  {self.uuid}: Agent instantiated")
 
+        if self._uses_vec_env:
+            # the callback is called once per step of all the training envs
+            eval_env = self.eval_env
+            eval_freq = max(self.eval_freq // self.n_envs, 1)
+        else:
+            eval_env = Monitor(self.env, str(self.output_dir))
+            eval_freq = self.eval_freq
         self.eval_callback = EvalCallback(
-            Monitor(self.env, str(self.output_dir)),
-            eval_freq=self.eval_freq,
+            eval_env,
+            eval_freq=eval_freq,
             deterministic=self.deterministic,
             render=self.render,
             verbose=self.verbose,
         )
         self.logger.debug(f"YT run  {self.uuid}: Eval callback set")
 
+        if self.profile:
+            self.profiler_callback = StepProfilerCallback()
+            self.logger.debug(f"YT run  {self.uuid}: Step profiler callback set")
+
     def train(self) -> Union[PPO, None]:
         """
         Trains the agent.
@@ -297,12 +379,19 @@ class YawningTitanRun:
         if self.env and self.agent and self.eval_callback:
             self.logger.debug(f"YT run  {self.uuid}: Performing agent training")
             for i in range(self.training_runs):
+                callback = self.eval_callback
+                if self.profiler_callback is not None:
+                    callback = [self.eval_callback, self.profiler_callback]
                 self.agent.learn(
                     total_timesteps=self.total_timesteps,
                     n_eval_episodes=self.n_eval_episodes,
-                    callback=self.eval_callback,
+                    callback=callback,
                 )
                 self.logger.debug(f"YT run  {self.uuid}: Training run {i + 1} complete")
+                if self.profiler_callback is not None:
+                    self.logger.info(
+                        f"YT run  {self.uuid}: Step profile {self.profiler_callback.get_summary()}"
+                    )
 
                 self.env.reset()
                 self.logger.debug(f"YT run  {self.uuid}: GenericNetworkEnv reset")
@@ -331,6 +420,13 @@ class YawningTitanRun:
                 f"Call .train() on the instance of {self.__class__.__name__} to train the agent."
             )
 
+    def close(self):
+        """Close the env and the training and eval vec envs, stopping any env worker processes and trajectory writer."""
+        for env in [self.vec_env, self.eval_env, self.env]:
+            if env is not None:
+                env.close()
+        self.logger.debug(f"YT run  {self.uuid}: Envs closed")
+
     def save(self) -> Union[str, None]:
         """
         Saves the trained agent using the stable_baselines3 save as zip functionality.
@@ -452,6 +548,11 @@ class YawningTitanRun:
             with open(args_path, "r") as file:
                 args = yaml.safe_load(file)
 
+            # args files saved before multiple envs were supported trained on a single env
+            args.setdefault("n_envs", 1)
+            args.setdefault("vec_env_mode", "dummy")
+            # args files saved before the step profiler was added were not profiled
+            args.setdefault("profile", False)
             if args.keys() == YawningTitanRun(auto=False)._args_dict().keys():
                 args["network"] = Network.create(args["network"])
                 args["game_mode"] = GameMode.create(args["game_mode"])
@@ -597,6 +698,8 @@ class YawningTitanRun:
             f"eval_freq={self.eval_freq}, "
             f"total_timesteps={self.total_timesteps}, "
             f"training_runs={self.training_runs}, "
+            f"n_envs={self.n_envs}, "
+            f"vec_env_mode='{self.vec_env_mode}', "
             f"n_eval_episodes={self.n_eval_episodes}, "
             f"deterministic={self.deterministic}, "
             f"warn={self.warn}, "
@@ -1,7 +1,9 @@
+import random
 from contextlib import contextmanager
-from typing import Dict, Final, List, Optional, Type
+from typing import Dict, Final, Iterator, List, Optional, Tuple, Type
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 import yaml
 
@@ -17,6 +19,10 @@ from yawning_titan.config.item_types.str_item import StrItem
 from yawning_titan.db.doc_metadata import DocMetadata, DocMetadataSchema
 from yawning_titan.db.yawning_titan_db import YawningTitanDB
 from yawning_titan.envs.generic.core.action_loops import ActionLoop
+from yawning_titan.envs.generic.core.blue_interface import BlueInterface
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+from yawning_titan.envs.generic.core.red_interface import RedInterface
+from yawning_titan.envs.generic.generic_env import GenericNetworkEnv
 from yawning_titan.exceptions import ConfigGroupValidationError
 from yawning_titan.game_modes.game_mode import GameMode
 from yawning_titan.game_modes.game_mode_db import GameModeDB
@@ -229,6 +235,74 @@ def create_yawning_titan_run(network_db: NetworkDB, game_mode_db: GameModeDB):
     return _create_yawning_titan_run
 
 
+@pytest.fixture
+def create_generic_env():
+    """Create a ``GenericNetworkEnv`` of a game mode and network, passing any other arguments to the env."""
+
+    def _create_generic_env(
+        game_mode: GameMode, network: Network, **kwargs
+    ) -> GenericNetworkEnv:
+        network_interface = NetworkInterface(game_mode=game_mode, network=network)
+        return GenericNetworkEnv(
+            RedInterface(network_interface),
+            BlueInterface(network_interface),
+            network_interface,
+            **kwargs,
+        )
+
+    return _create_generic_env
+
+
+@pytest.fixture
+def play_random_episodes():
+    """
+    Play seeded episodes of a ``GenericNetworkEnv`` taking random blue actions, yielding after every step.
+
+    Each item is the env and the observation, reward, done and notes of the step. With ``include_resets`` the
+    observation after each reset is also yielded, with no reward or notes.
+    """
+
+    def _play_random_episodes(
+        game_mode: GameMode,
+        network: Network,
+        episodes: int = 3,
+        seed: int = 1,
+        include_resets: bool = False,
+        reset_from_snapshot: bool = True,
+        topology_backend: str = "networkx",
+        **kwargs,
+    ) -> Iterator[
+        Tuple[GenericNetworkEnv, np.ndarray, Optional[float], bool, Optional[Dict]]
+    ]:
+        network_interface = NetworkInterface(
+            game_mode=game_mode,
+            network=network,
+            reset_from_snapshot=reset_from_snapshot,
+            topology_backend=topology_backend,
+        )
+        env = GenericNetworkEnv(
+            RedInterface(network_interface),
+            BlueInterface(network_interface),
+            network_interface,
+            **kwargs,
+        )
+        random.seed(seed)
+        np.random.seed(seed)
+        action_rng = random.Random(seed)
+        for _ in range(episodes):
+            obs = env.reset()
+            if include_resets:
+                yield env, obs, None, False, None
+            done = False
+            while not done:
+                obs, reward, done, notes = env.step(
+                    action_rng.randrange(env.blue_actions)
+                )
+                yield env, obs, reward, done, notes
+
+    return _play_random_episodes
+
+
 @pytest.fixture
 def basic_2_agent_loop(create_yawning_titan_run):
     """Return a basic 2-agent `ActionLoop`."""
@@ -1,8 +1,11 @@
+import csv
 import glob
+import json
 import tempfile
 from pathlib import Path
 
 import pytest
+from stable_baselines3.common.logger import configure
 
 from tests.conftest import N_TIME_STEPS
 from yawning_titan.envs.generic.core.action_loops import ActionLoop
@@ -70,3 +73,95 @@ def test_rendering_an_action_loop(default_game_mode, default_network):
     assert len(gif_dir) == 1
     assert len(webm_dir) == 1
     tmp_dir.cleanup()
+
+
+@pytest.mark.e2e_integration_test
+@pytest.mark.parametrize("vec_env_mode", ["dummy", "subproc", "native"])
+def test_yawning_titan_run_with_multiple_envs(
+    vec_env_mode, default_game_mode, default_network
+):
+    """Tests training YawningTitanRun on several envs and that the env settings survive a save and load."""
+    tmp_dir = tempfile.TemporaryDirectory()
+    yt_run = YawningTitanRun(
+        game_mode=default_game_mode,
+        network=default_network,
+        total_timesteps=N_TIME_STEPS,
+        eval_freq=N_TIME_STEPS,
+        n_envs=2,
+        vec_env_mode=vec_env_mode,
+        n_eval_episodes=2,
+        warn=False,
+        verbose=0,
+        output_dir=tmp_dir.name,
+    )
+    assert yt_run.agent.n_envs == 2
+    assert yt_run.agent.num_timesteps >= N_TIME_STEPS
+    assert yt_run.eval_env.num_envs == 2
+
+    loaded_run = YawningTitanRun.load(tmp_dir.name)
+    assert loaded_run.n_envs == 2
+    assert loaded_run.vec_env_mode == vec_env_mode
+    assert loaded_run.agent.n_envs == 2
+
+    yt_run.close()
+    loaded_run.close()
+    tmp_dir.cleanup()
+
+
+@pytest.mark.e2e_integration_test
+def test_yawning_titan_run_with_profiling(default_game_mode, default_network):
+    """Test the step profiler stats of a profiled run are recorded to the training log."""
+    tmp_dir = tempfile.TemporaryDirectory()
+    yt_run = YawningTitanRun(
+        game_mode=default_game_mode,
+        network=default_network,
+        total_timesteps=N_TIME_STEPS,
+        eval_freq=N_TIME_STEPS,
+        warn=False,
+        verbose=0,
+        profile=True,
+        output_dir=tmp_dir.name,
+        auto=False,
+    )
+    yt_run.setup()
+    yt_run.agent.set_logger(configure(tmp_dir.name, ["csv"]))
+    yt_run.train()
+
+    with open(Path(tmp_dir.name) / "progress.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert float(rows[-1]["profiler/steps_per_second"]) > 0
+    assert float(rows[-1]["profiler/red_turn_ms_mean"]) > 0
+    tmp_dir.cleanup()
+
+
+@pytest.mark.e2e_integration_test
+def test_load_yawning_titan_run_saved_before_vec_envs_and_profiling(
+    default_game_mode, default_network
+):
+    """Test a run saved before multiple envs and profiling were supported loads with their defaults."""
+    tmp_dir = tempfile.TemporaryDirectory()
+    yt_run = YawningTitanRun(
+        game_mode=default_game_mode,
+        network=default_network,
+        total_timesteps=N_TIME_STEPS,
+        eval_freq=N_TIME_STEPS,
+        warn=False,
+        verbose=0,
+        output_dir=tmp_dir.name,
+    )
+    args_path = Path(tmp_dir.name) / "args.json"
+    with open(args_path) as file:
+        args = json.load(file)
+    for key in ["n_envs", "vec_env_mode", "profile"]:
+        args.pop(key)
+    with open(args_path, "w") as file:
+        json.dump(args, file, indent=4)
+
+    loaded_run = YawningTitanRun.load(tmp_dir.name)
+    assert loaded_run.n_envs == 1
+    assert loaded_run.vec_env_mode == "dummy"
+    assert not loaded_run.profile
+
+    yt_run.close()
+    loaded_run.close()
+    tmp_dir.cleanup()
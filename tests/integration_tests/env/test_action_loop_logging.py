@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from yawning_titan.envs.generic.core.action_loops import ActionLoop
+
+
+@pytest.mark.integration_test
+def test_action_loop_logs_info_fields_to_disk(create_yawning_titan_run, tmp_path):
+    """Test the action loop can log selected info fields and write each episode to disk instead of keeping it."""
+    yt_run = create_yawning_titan_run(
+        game_mode_name="Default Game Mode",
+        network_name="Default 18-node network",
+    )
+    loop = ActionLoop(
+        yt_run.env,
+        yt_run.agent,
+        filename="eval",
+        episode_count=2,
+        info_fields=["safe_nodes"],
+        output_directory=tmp_path,
+        keep_results=False,
+    )
+    assert loop.standard_action_loop() == []
+
+    for episode in range(2):
+        results = pd.read_csv(tmp_path / f"eval_episode_{episode}.csv")
+        assert list(results.columns) == ["action", "rewards", "done", "safe_nodes"]
+        assert results["done"].tolist() == [False] * (len(results) - 1) + [True]
+        assert (results["safe_nodes"] >= 0).all()
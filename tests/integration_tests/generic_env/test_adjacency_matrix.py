@@ -0,0 +1,30 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+
+@pytest.mark.integration_test
+def test_adjacency_matrix_matches_current_graph(create_yawning_titan_run):
+    """Checks the incrementally maintained adjacency matrix matches the current graph after every step."""
+    yt_run = create_yawning_titan_run(
+        game_mode_name="red_config_test_1", network_name="mesh_18"
+    )
+    env = yt_run.env
+    network_interface = env.network_interface
+    random.seed(1)
+
+    env.reset()
+    for _ in range(500):
+        obs, rew, done, notes = env.step(
+            random.randint(0, env.BLUE.get_number_of_actions() - 1)
+        )
+        expected = nx.to_numpy_array(network_interface.current_graph)
+        assert np.array_equal(network_interface.adj_matrix, expected)
+
+        open_spaces = network_interface.get_number_unused_deceptive_nodes()
+        expected = np.pad(expected, (0, open_spaces), "constant").flatten()
+        assert np.array_equal(obs[: len(expected)], expected)
+        if done:
+            env.reset()
@@ -0,0 +1,111 @@
+import networkx as nx
+import pytest
+
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+from yawning_titan.envs.generic.core.red_interface import RedInterface
+
+
+def _rebuilt_frontier(network_interface):
+    """Find the frontier and the attacking nodes from scratch, as red used to before every attack."""
+    attackers = {}
+    for node in network_interface.current_graph.get_nodes(filter_true_compromised=True):
+        for connected in network_interface.get_current_connected_nodes(node):
+            if connected.true_compromised_status == 0:
+                attackers[connected] = node
+    return sorted(attackers), attackers
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("reset_from_snapshot", [True, False])
+def test_attack_frontier_matches_rebuilt_frontier(
+    play_random_episodes, default_game_mode, default_network, reset_from_snapshot
+):
+    """Test the frontier is kept up to date as red attacks and blue isolates, reconnects, restores and adds deceptive nodes."""
+    default_game_mode.blue.action_set.deceptive_nodes.use.value = True
+    steps = 0
+    for env, *_ in play_random_episodes(
+        default_game_mode, default_network, reset_from_snapshot=reset_from_snapshot
+    ):
+        network_interface = env.network_interface
+        frontier = network_interface.attack_frontier
+        candidates, attackers = _rebuilt_frontier(network_interface)
+        assert frontier.get_candidates() == candidates
+        assert all(frontier.get_attacker(n) is attackers[n] for n in candidates)
+        steps += 1
+    assert steps > 10
+
+
+@pytest.mark.integration_test
+def test_choose_target_node_from_frontier(default_game_mode, default_network):
+    """Test red chooses its targets from the frontier and the safe entry nodes in uuid order."""
+    default_game_mode.red.agent_attack.attack_from.any_red_node.value = True
+    default_game_mode.red.agent_attack.attack_from.only_main_red_node.value = False
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode, network=default_network
+    )
+    network_interface.reset()
+    red = RedInterface(network_interface)
+    frontier = network_interface.attack_frontier
+
+    entry_nodes = frontier.entry_nodes
+    assert frontier.get_candidates() == []
+    assert frontier.get_targets() == sorted(entry_nodes)
+
+    # compromising a node outside the frontier is picked up on the next query
+    entry_node = entry_nodes[0]
+    entry_node.true_compromised_status = 1
+    connected = network_interface.get_current_connected_nodes(entry_node)
+    assert frontier.get_candidates() == sorted(
+        n for n in connected if n.true_compromised_status == 0
+    )
+    assert all(frontier.get_attacker(n) is entry_node for n in connected)
+
+    target, attacking_node = red.choose_target_node()
+    assert target in frontier.get_targets()
+    assert attacking_node is (None if target.entry_node else entry_node)
+
+    # isolating the compromised node takes its connected nodes out of the frontier
+    network_interface.isolate_node(entry_node)
+    assert frontier.get_candidates() == []
+    network_interface.reconnect_node(entry_node)
+    network_interface.make_node_safe(entry_node)
+    assert frontier.get_candidates() == []
+
+
+@pytest.mark.integration_test
+def test_target_distances_cached_until_topology_changes(
+    default_game_mode, default_network
+):
+    """Test the distances to the target node are reused until the current graph changes."""
+    default_game_mode.red.target_mechanism.target_specific_node.use.value = True
+    default_game_mode.red.target_mechanism.target_specific_node.target.value = "5"
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode, network=default_network
+    )
+    network_interface.reset()
+    target = network_interface.get_target_node()
+    nodes = list(network_interface.current_graph.get_nodes())
+    expected = nx.single_source_shortest_path_length(
+        network_interface.current_graph, target
+    )
+    assert network_interface.get_shortest_distances_to_target(nodes) == [
+        expected[n] for n in nodes
+    ]
+    cached = network_interface._target_distances
+    network_interface.make_node_safe(nodes[0])
+    network_interface.get_shortest_distances_to_target(nodes)
+    assert network_interface._target_distances is cached
+
+    # isolating a node connected to the target changes the distances
+    connected = network_interface.get_current_connected_nodes(target)[0]
+    version = network_interface.topology_version
+    network_interface.isolate_node(connected)
+    assert network_interface.topology_version > version
+    expected = nx.single_source_shortest_path_length(
+        network_interface.current_graph, target
+    )
+    reachable = [n for n in nodes if n in expected]
+    assert network_interface.get_shortest_distances_to_target(reachable) == [
+        expected[n] for n in reachable
+    ]
+    assert network_interface._target_distances is not cached
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+
+@pytest.mark.integration_test
+def test_attack_nodes_stops_at_first_success(default_game_mode, default_network):
+    """Test that a node attacked more than once in a batch is only attacked until the first attack succeeds."""
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode, network=default_network
+    )
+    node_1, node_2, node_3 = list(network_interface.current_graph.get_nodes())[:3]
+
+    attacks = network_interface.attack_nodes(
+        [node_1, node_2, node_1, node_3],
+        guarantee=True,
+        attacking_nodes=[None, node_1, node_3, node_2],
+    )
+
+    assert attacks == {
+        "Attacking_Nodes": [None, node_1, node_2],
+        "Target_Nodes": [node_1, node_2, node_3],
+        "Successes": [True, True, True],
+    }
+    assert network_interface.current_graph.get_nodes(filter_true_compromised=True) == [
+        node_1,
+        node_2,
+        node_3,
+    ]
+
+
+@pytest.mark.integration_test
+def test_attack_nodes_matches_with_and_without_state_store(
+    default_game_mode, default_network
+):
+    """Test that resolving attacks through the state store has the same outcome as updating the nodes directly."""
+    outcomes = []
+    for use_store in [True, False]:
+        network_interface = NetworkInterface(
+            game_mode=default_game_mode, network=default_network
+        )
+        if not use_store:
+            network_interface.current_graph.detach_state_store()
+        network_interface.random_generator = np.random.default_rng(7)
+        nodes = list(network_interface.current_graph.get_nodes())
+
+        attacks = network_interface.attack_nodes(
+            nodes + nodes,
+            skill=0.5,
+            use_skill=True,
+            use_vulnerability=True,
+            attacking_nodes=[None] * len(nodes) + nodes,
+        )
+        outcomes.append(
+            (
+                [n.uuid for n in attacks["Target_Nodes"]],
+                attacks["Successes"],
+                network_interface.get_all_node_compromised_states(),
+                network_interface.get_all_node_blue_view_compromised_states(),
+                network_interface.get_attributes_from_key("blue_knows_intrusion"),
+            )
+        )
+
+    assert any(outcomes[0][1]) and not all(outcomes[0][1])
+    assert outcomes[0] == outcomes[1]
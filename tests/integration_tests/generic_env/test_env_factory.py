@@ -0,0 +1,62 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from yawning_titan.envs.generic.env_factory import (
+    GenericNetworkEnvFactory,
+    make_vec_env,
+)
+
+
+def _rollout(vec_env, steps: int) -> np.ndarray:
+    """Step the vec env with a fixed action and return the observations."""
+    observations = [vec_env.reset()]
+    for _ in range(steps):
+        obs, _, _, _ = vec_env.step(np.zeros(vec_env.num_envs, dtype=int))
+        observations.append(obs)
+    vec_env.close()
+    return np.stack(observations)
+
+
+@pytest.mark.integration_test
+def test_env_factory_is_picklable(default_game_mode, default_network):
+    """Test that the env factory can be sent to a worker process and still builds an env."""
+    factory = pickle.loads(
+        pickle.dumps(
+            GenericNetworkEnvFactory(default_game_mode, default_network, seed=1)
+        )
+    )
+    env = factory()
+    assert env.observation_space.shape == env.reset().shape
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("vec_env_mode", ["dummy", "subproc"])
+def test_vec_env_envs_are_seeded_independently(
+    vec_env_mode, default_game_mode, default_network
+):
+    """Test that a seeded vec env is repeatable and that its envs do not play out the same episodes."""
+    rollouts = [
+        _rollout(
+            make_vec_env(
+                default_game_mode,
+                default_network,
+                n_envs=3,
+                vec_env_mode=vec_env_mode,
+                seed=5,
+            ),
+            40,
+        )
+        for _ in range(2)
+    ]
+    assert np.array_equal(rollouts[0], rollouts[1])
+    assert not np.array_equal(rollouts[0][:, 0], rollouts[0][:, 1])
+    assert not np.array_equal(rollouts[0][:, 1], rollouts[0][:, 2])
+
+
+@pytest.mark.integration_test
+def test_make_vec_env_rejects_unknown_mode(default_game_mode, default_network):
+    """Test that an unknown vec env mode raises a ValueError."""
+    with pytest.raises(ValueError):
+        make_vec_env(default_game_mode, default_network, 2, vec_env_mode="threads")
@@ -0,0 +1,135 @@
+import os
+import random
+
+import imageio
+import numpy as np
+import pytest
+
+from yawning_titan.envs.generic.core.action_loops import ActionLoop
+from yawning_titan.envs.generic.helpers.frame_renderer import (
+    FIGURE_SIZE,
+    FRAME_DPI,
+    HOLD_LAST_FRAME,
+    FrameCapture,
+    FrameRecorder,
+    create_frame_executor,
+    render_frame,
+)
+
+
+def _capture_episode(env, max_steps: int = 12):
+    """Play random steps of an episode, capturing a frame after each."""
+    env.reset()
+    network_interface = env.network_interface
+    capture = FrameCapture(
+        network_interface.current_graph, network_interface.get_target_node()
+    )
+    rng = random.Random(1)
+    frames = []
+    done = False
+    while not done and len(frames) < max_steps:
+        _, _, done, _ = env.step(rng.randrange(env.blue_actions))
+        frames.append(
+            capture.capture(
+                env.current_duration,
+                round(env.current_reward, 2),
+                network_interface.true_attacks,
+                env.made_safe_nodes,
+                network_interface.topology_version,
+            )
+        )
+    return env, capture, frames
+
+
+@pytest.mark.integration_test
+def test_capture_frame(create_generic_env, default_game_mode, default_network):
+    """Test a frame holds the state of every node in the order of the layout."""
+    env, capture, frames = _capture_episode(
+        create_generic_env(default_game_mode, default_network)
+    )
+    graph = env.network_interface.current_graph
+    nodes = list(graph.nodes)
+    frame = frames[-1]
+    assert capture.layout.positions.tolist() == [[n.x_pos, n.y_pos] for n in nodes]
+    assert len(frame.edges) == graph.number_of_edges()
+    assert frame.compromised_status.tolist() == [
+        n.true_compromised_status for n in nodes
+    ]
+    assert frame.made_safe.tolist() == [n in env.made_safe_nodes for n in nodes]
+    assert [
+        [nodes[i] if i >= 0 else None for i in attack] for attack in frame.attacks
+    ] == env.network_interface.true_attacks
+
+
+@pytest.mark.integration_test
+def test_frames_rendered_in_pool_match(
+    create_generic_env, default_game_mode, default_network
+):
+    """Test the frames rendered by the process pool are the same as those rendered in process."""
+    _, capture, frames = _capture_episode(
+        create_generic_env(default_game_mode, default_network), 3
+    )
+    images = [render_frame(capture.layout, frame) for frame in frames]
+    width, height = FIGURE_SIZE
+    assert images[0].shape == (height * FRAME_DPI, width * FRAME_DPI, 3)
+
+    written = []
+    recorder = FrameRecorder(executor=create_frame_executor(2), chunk_size=2)
+    recorder._write = written.append
+    with recorder:
+        for frame in frames:
+            recorder.add_frame(capture.layout, frame)
+    recorder.executor.shutdown()
+    assert len(written) == len(frames)
+    for image, pool_image in zip(images, written):
+        assert np.array_equal(image, pool_image)
+
+
+@pytest.mark.integration_test
+def test_recorder_writes_gif_and_webm(
+    create_generic_env, default_game_mode, default_network, tmp_path
+):
+    """Test the recorder writes every frame to a GIF, holding the last, and to a WebM."""
+    _, capture, frames = _capture_episode(
+        create_generic_env(default_game_mode, default_network), 5
+    )
+    gif_path = tmp_path / "episode.gif"
+    webm_path = tmp_path / "episode.webm"
+    with FrameRecorder(gif_path, webm_path, chunk_size=2) as recorder:
+        for frame in frames:
+            recorder.add_frame(capture.layout, frame)
+
+    assert recorder.frames_written == len(frames)
+    assert len(imageio.mimread(gif_path)) == len(frames) + HOLD_LAST_FRAME
+    assert webm_path.stat().st_size > 0
+
+
+@pytest.mark.integration_test
+def test_invalid_render_workers():
+    """Test a negative number of workers is rejected."""
+    with pytest.raises(ValueError):
+        create_frame_executor(-1)
+    assert create_frame_executor(0) is None
+
+
+@pytest.mark.integration_test
+def test_deprecated_action_loop_image_file_helpers(tmp_path):
+    """Test the deprecated ActionLoop helpers still build a GIF and WebM from image files and delete them."""
+    rng = np.random.default_rng(1)
+    frame_names = []
+    for i in range(3):
+        frame_name = str(tmp_path / f"frame_{i}.png")
+        imageio.imwrite(frame_name, rng.integers(0, 256, (64, 128, 3), dtype=np.uint8))
+        frame_names.append(frame_name)
+    loop = ActionLoop(None, None)
+
+    with pytest.deprecated_call():
+        loop.generate_gif(tmp_path / "frames.gif", frame_names)
+    with pytest.deprecated_call():
+        loop.generate_webm(tmp_path / "frames.webm", frame_names)
+    with pytest.deprecated_call():
+        loop.render_cleanup(frame_names)
+
+    assert len(imageio.mimread(tmp_path / "frames.gif")) == 2 + HOLD_LAST_FRAME
+    assert (tmp_path / "frames.webm").stat().st_size > 0
+    assert not any(os.path.exists(frame_name) for frame_name in frame_names)
@@ -1,10 +1,18 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
 import numpy as np
 import pytest
+from karateclub.graph_embedding.feathergraph import FeatherGraph
 from stable_baselines3.common.env_checker import check_env
 from stable_baselines3.common.env_util import is_wrapped
 
+from yawning_titan.envs.generic.core.network_interface import get_topology_hash
 from yawning_titan.envs.generic.wrappers.graph_embedding_observations import (
     FeatherGraphEmbedObservation,
+    embed_graph,
 )
 
 
@@ -107,3 +115,111 @@ def test_env_check(create_yawning_titan_run):
     yt_run = create_yawning_titan_run("Default Game Mode", "mesh_18")
 
     check_env(yt_run.env)
+
+
+@pytest.mark.integration_test
+def test_topology_hash_kept_up_to_date(
+    play_random_episodes, default_game_mode, default_network
+):
+    """Test the incremental topology hash matches a hash of the current graph as blue isolates, reconnects and adds deceptive nodes."""
+    default_game_mode.blue.action_set.deceptive_nodes.use.value = True
+    hashes = set()
+    for env, *_ in play_random_episodes(default_game_mode, default_network):
+        network_interface = env.network_interface
+        assert network_interface.topology_hash == get_topology_hash(
+            network_interface.current_graph
+        )
+        hashes.add(network_interface.topology_hash)
+    assert len(hashes) > 1
+
+
+@pytest.mark.integration_test
+def test_embeddings_cached_by_topology(create_yawning_titan_run):
+    """Test embeddings are reused for topologies seen before and match a freshly fitted Feather-G model."""
+    yt_run = create_yawning_titan_run("Default Game Mode", "mesh_18")
+    env = FeatherGraphEmbedObservation(yt_run.env, 18, cache_size=2)
+    network_interface = env.network_interface
+    env.reset()
+    first = env.latest_graph_embedding
+
+    embedder = FeatherGraph()
+    embedder.fit([nx.from_numpy_array(network_interface.adj_matrix)])
+    assert np.allclose(first, embedder.get_embedding()[0])
+
+    # isolating a node changes the embedding, reconnecting it finds the first embedding in the cache
+    node = network_interface.current_graph.get_node_from_name("5")
+    network_interface.isolate_node(node)
+    env.observation(None)
+    assert not np.allclose(env.latest_graph_embedding, first)
+    network_interface.reconnect_node(node)
+    env.observation(None)
+    assert env.latest_graph_embedding is first
+
+    # the least recently used embedding is evicted
+    for name in ["6", "7"]:
+        network_interface.isolate_node(
+            network_interface.current_graph.get_node_from_name(name)
+        )
+        env.observation(None)
+    assert len(env._embeddings) == 2
+    assert network_interface.topology_hash in env._embeddings
+
+
+@pytest.mark.integration_test
+def test_precompute_embeddings(create_yawning_titan_run):
+    """Test embeddings of a pool of graphs are added to the cache from background threads."""
+    yt_run = create_yawning_titan_run("Default Game Mode", "mesh_18")
+    env = FeatherGraphEmbedObservation(yt_run.env, 18)
+    graph = env.network_interface.current_graph
+    futures = env.precompute_embeddings([graph], max_workers=2)
+    embedding = futures[0].result()
+    env.close()
+
+    env.reset()
+    assert env.latest_graph_embedding is embedding
+
+
+@pytest.mark.integration_test
+def test_embed_graph_keeps_random_state(default_network):
+    """Test embedding a graph matches a fitted Feather-G model and leaves the global random states as they were."""
+    default_network.remove_edges_from(
+        list(default_network.edges(list(default_network)[0]))
+    )
+    random.seed(5)
+    np.random.seed(5)
+    embedding = embed_graph(default_network)
+    random_draw, numpy_draw = random.random(), np.random.random()
+
+    random.seed(5)
+    np.random.seed(5)
+    assert (random.random(), np.random.random()) == (random_draw, numpy_draw)
+    assert embedding.shape == (500,)
+
+    embedder = FeatherGraph()
+    embedder.fit([nx.convert_node_labels_to_integers(default_network)])
+    assert np.allclose(embedding, embedder.get_embedding()[0])
+
+
+@pytest.mark.integration_test
+def test_precompute_embeddings_of_submitted_graphs(create_yawning_titan_run):
+    """Test a graph changed while its embedding job waits is embedded as it was when submitted."""
+    yt_run = create_yawning_titan_run("Default Game Mode", "mesh_18")
+    env = FeatherGraphEmbedObservation(yt_run.env, 18)
+    network_interface = env.network_interface
+    network_interface.reset()
+    graph = network_interface.current_graph
+    topology_hash = network_interface.topology_hash
+    expected = embed_graph(graph)
+
+    # hold the only worker so the job waits until the graph has changed
+    release = threading.Event()
+    env._executor = ThreadPoolExecutor(max_workers=1)
+    env._executor.submit(release.wait)
+    future = env.precompute_embeddings([graph])[0]
+    network_interface.isolate_node(graph.get_node_from_name("5"))
+    release.set()
+
+    assert np.array_equal(future.result(), expected)
+    assert env._embeddings[topology_hash] is future.result()
+    assert network_interface.topology_hash not in env._embeddings
+    env.close()
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+from stable_baselines3.common.env_checker import check_env
+
+from yawning_titan.envs.generic.wrappers.graph_observations import (
+    GraphDictObservation,
+    allocate_graph_observations,
+)
+
+
+@pytest.mark.integration_test
+def test_graph_observation_matches_network(
+    create_generic_env, default_game_mode, default_network
+):
+    """Test the node features, edge index and masks follow the network as blue acts, in the same arrays every step."""
+    default_game_mode.blue.action_set.deceptive_nodes.use.value = True
+    env = GraphDictObservation(
+        create_generic_env(default_game_mode, default_network), 30, 80
+    )
+    network_interface = env.network_interface
+    obs = env.reset()
+    arrays = {key: array for key, array in obs.items()}
+    assert "node_connections" not in env.node_feature_names
+    assert env.node_feature_names[0] == "isolated"
+
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        obs, _, done, _ = env.step(rng.integers(env.action_space.n))
+        assert all(obs[key] is array for key, array in arrays.items())
+        assert env.observation_space.contains(obs)
+
+        nodes = list(network_interface.current_graph.nodes)
+        assert obs["node_mask"].sum() == len(nodes)
+        edges = obs["edge_index"][:, obs["edge_mask"] == 1].T
+        assert {(nodes[u], nodes[v]) for u, v in edges} == {
+            edge
+            for u, v in network_interface.current_graph.edges
+            for edge in ((u, v), (v, u))
+        }
+        isolated = obs["node_features"][: len(nodes), 0]
+        assert isolated.tolist() == [node.isolated for node in nodes]
+        if done:
+            env.reset()
+
+
+@pytest.mark.integration_test
+def test_graph_observations_batched(
+    create_generic_env, default_game_mode, default_network
+):
+    """Test environments given views into one batch write their observations straight into it."""
+    env = GraphDictObservation(
+        create_generic_env(default_game_mode, default_network), 20
+    )
+    batch, views = allocate_graph_observations(env.observation_space, 2)
+    envs = [
+        GraphDictObservation(
+            create_generic_env(default_game_mode, default_network), 20, out=view
+        )
+        for view in views
+    ]
+    for i, e in enumerate(envs):
+        obs = e.reset()
+        for key, array in batch.items():
+            assert np.shares_memory(obs[key], array)
+            assert np.array_equal(array[i], obs[key])
+
+
+@pytest.mark.integration_test
+def test_graph_observation_rejects_small_spaces(
+    create_generic_env, default_game_mode, default_network
+):
+    """Test the observation space must fit every node of the network."""
+    with pytest.raises(ValueError):
+        GraphDictObservation(create_generic_env(default_game_mode, default_network), 10)
+
+
+@pytest.mark.integration_test
+def test_graph_observation_trains_with_multi_input_policy(
+    create_generic_env, default_game_mode, default_network
+):
+    """Test the wrapped environment passes the stable-baselines3 checks and trains with a MultiInputPolicy."""
+    env = GraphDictObservation(create_generic_env(default_game_mode, default_network))
+    check_env(env, warn=False)
+    agent = PPO("MultiInputPolicy", env, n_steps=32, batch_size=16, n_epochs=1)
+    agent.learn(total_timesteps=32)
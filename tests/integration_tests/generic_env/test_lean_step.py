@@ -0,0 +1,67 @@
+import pytest
+
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+
+def _run_episodes(play_random_episodes, game_mode, network, lean: bool, seed: int):
+    """Run seeded episodes with random blue actions and record the observations, rewards and dones."""
+    trace = []
+    for _, obs, reward, done, notes in play_random_episodes(
+        game_mode,
+        network,
+        seed=seed,
+        collect_additional_per_ts_data=False,
+        lean=lean,
+    ):
+        assert (notes == {}) == lean
+        trace.append((obs.tobytes(), reward, done))
+    return trace
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize(
+    "reward_function",
+    [
+        "standard_rewards",
+        "experimental_rewards",
+        "punish_bad_actions",
+        "dcbo_cost_func",
+    ],
+)
+def test_lean_step_matches_full_step(
+    reward_function, play_random_episodes, default_game_mode, default_network
+):
+    """Test that stepping in lean mode gives exactly the same observations and rewards as a full step."""
+    default_game_mode.rewards.function.value = reward_function
+
+    full_trace = _run_episodes(
+        play_random_episodes, default_game_mode, default_network, False, seed=3
+    )
+    lean_trace = _run_episodes(
+        play_random_episodes, default_game_mode, default_network, True, seed=3
+    )
+
+    assert lean_trace == full_trace
+
+
+@pytest.mark.integration_test
+def test_state_view_matches_dict(default_game_mode, default_network):
+    """Test that a node state view reads the same as the equivalent dict."""
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode, network=default_network
+    )
+    nodes = list(network_interface.current_graph.get_nodes())
+    nodes[2].vulnerability_score = 0.25
+    view = network_interface.current_graph.get_state_view("vulnerability_score")
+    expected = network_interface.get_all_vulnerabilities()
+
+    assert view.to_dict() == expected
+    assert dict(view) == expected
+    assert list(view.items()) == list(expected.items())
+    assert view[nodes[2].uuid] == 0.25
+    assert len(view) == len(nodes)
+    assert sum(view.values()) == sum(expected.values())
+
+    # the view is a snapshot
+    nodes[2].vulnerability_score = 0.5
+    assert view[nodes[2].uuid] == 0.25
@@ -0,0 +1,106 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+
+@pytest.mark.integration_test
+def test_observation_buffer_tracks_changes(default_game_mode, default_network):
+    """Test that the observation buffer is updated in place as the network changes."""
+    default_game_mode.observation_space.special_nodes.value = True
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode, network=default_network
+    )
+    network_interface.reset()
+    buffer = network_interface.get_current_observation(copy=False)
+    assert buffer.dtype == np.float32
+    assert len(buffer) == network_interface.get_observation_size()
+    segments = network_interface.observation_buffer.segments
+    n = network_interface.get_total_num_nodes()
+
+    # the copy is not updated but the buffer is
+    obs = network_interface.get_current_observation()
+    node = list(network_interface.current_graph.get_nodes())[3]
+    network_interface.isolate_node(node)
+    assert network_interface.get_current_observation(copy=False) is buffer
+    adjacency = buffer[segments["node_connections"]].reshape(n, n)
+    assert not adjacency[3].any() and not adjacency[:, 3].any()
+    assert buffer[segments["isolated"]][3] == 1
+    assert obs[segments["isolated"]][3] == 0
+    assert np.array_equal(
+        adjacency[:18, :18], network_interface.adj_matrix.astype(np.float32)
+    )
+
+    # the static segments are rewritten when new entry nodes are chosen
+    for entry_node in network_interface.current_graph.entry_nodes:
+        entry_node.entry_node = False
+    node.entry_node = True
+    network_interface.observation_buffer.mark_dirty("entry_nodes")
+    entry_nodes = network_interface.get_current_observation()[segments["entry_nodes"]]
+    assert np.flatnonzero(entry_nodes).tolist() == [3]
+
+
+@pytest.mark.integration_test
+def test_observation_buffer_follows_game_mode_edits(default_game_mode, default_network):
+    """Test that the buffer is laid out again when the observation space of the game mode is changed."""
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode, network=default_network
+    )
+    size = len(network_interface.get_current_observation())
+
+    default_game_mode.observation_space.attacked_nodes.value = False
+    network_interface.refresh_rules()
+
+    obs = network_interface.get_current_observation()
+    assert len(obs) == size - network_interface.get_total_num_nodes()
+    assert len(obs) == network_interface.get_observation_size()
+    assert "attacked_nodes" not in network_interface.observation_buffer.segments
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("hops", [1, 2])
+def test_edge_list_and_neighbourhood_summary(default_game_mode, default_network, hops):
+    """Test the edge list and neighbourhood summary describe the network without the adjacency matrix."""
+    observation_space = default_game_mode.observation_space
+    observation_space.node_connections.value = False
+    observation_space.edge_list.value = True
+    observation_space.neighbourhood_summary.value = True
+    observation_space.neighbourhood_hops.value = hops
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode, network=default_network
+    )
+    network_interface.reset()
+    n = network_interface.get_total_num_nodes()
+    nodes = list(network_interface.current_graph.get_nodes())
+    nodes[2].blue_view_compromised_status = 1
+    nodes[3].blue_view_compromised_status = 1
+    network_interface.isolate_node(nodes[3])
+
+    obs = network_interface.get_current_observation()
+    segments = network_interface.observation_buffer.segments
+    assert "node_connections" not in segments
+    assert len(obs) == network_interface.get_observation_size()
+    assert 0 <= obs.min() and obs.max() <= 1
+
+    edge_index = np.rint(obs[segments["edge_list"]].reshape(2, -1) * n).astype(int)
+    edges = {
+        frozenset((nodes[u - 1], nodes[v - 1])) for u, v in edge_index.T if u and v
+    }
+    assert edges == {frozenset(edge) for edge in network_interface.current_graph.edges}
+
+    summary = obs[segments["neighbourhood_summary"]].reshape(n, -1)
+    counts = np.rint(summary * (n - 1)).astype(int)
+    base_graph = network_interface.base_graph
+    for i, node in enumerate(nodes):
+        neighbourhood = set(
+            nx.single_source_shortest_path_length(base_graph, node, cutoff=hops)
+        ) - {node}
+        assert counts[i].tolist() == [
+            network_interface.current_graph.degree(node),
+            sum(
+                nodes[nodes.index(m)].blue_view_compromised_status
+                for m in neighbourhood
+            ),
+            sum(nodes[nodes.index(m)].isolated for m in neighbourhood),
+        ]
@@ -0,0 +1,68 @@
+import pytest
+
+from yawning_titan.envs.generic.helpers.reference_trace import (
+    GOLDEN_TRACES,
+    ReferenceTrace,
+    check_trace,
+    load_golden_trace,
+    make_env,
+    record_trace,
+)
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("name", GOLDEN_TRACES)
+def test_env_matches_golden_trace(name):
+    """Test the GenericNetworkEnv reproduces the golden traces shipped with the package."""
+    trace = load_golden_trace(name)
+    assert len(trace) > 0
+    divergence = check_trace(trace)
+    assert divergence is None, str(divergence)
+
+
+@pytest.mark.integration_test
+def test_trace_round_trip(default_game_mode, default_network, tmp_path):
+    """Test a recorded trace is saved and loaded unchanged and replays without diverging."""
+    trace = record_trace(default_network, default_game_mode, seed=3, episodes=2)
+    assert set(trace.episodes.tolist()) == {0, 1}
+    assert (trace.actions[trace.steps == 0] == -1).all()
+    assert trace.node_offsets[-1] == len(trace.node_states) == len(trace.node_ids)
+
+    path = tmp_path / "trace.npz"
+    trace.save(path)
+    loaded = ReferenceTrace.load(path)
+    assert loaded.metadata == trace.metadata
+    assert loaded.red_info == trace.red_info
+    assert (loaded.observation_hashes == trace.observation_hashes).all()
+    assert (loaded.node_states == trace.node_states).all()
+    assert check_trace(loaded) is None
+
+
+@pytest.mark.integration_test
+def test_check_trace_reports_first_divergence(default_game_mode, default_network):
+    """Test an engine that differs from the trace is reported at the first step it differs, with a node diff."""
+    trace = record_trace(default_network, default_game_mode, episodes=1)
+    first_step = 2
+
+    def make_diverging_env(network, game_mode):
+        env = make_env(network, game_mode)
+        step = env.step
+
+        def diverging_step(action):
+            result = step(action)
+            if env.current_duration == first_step:
+                node = next(iter(env.network_interface.current_graph.get_nodes()))
+                node.vulnerability_score = node.vulnerability_score / 2
+            return result
+
+        env.step = diverging_step
+        return env
+
+    divergence = check_trace(trace, env_factory=make_diverging_env)
+    assert divergence is not None
+    assert (divergence.episode, divergence.step) == (0, first_step)
+    assert "node_states" in divergence.fields
+    name, attribute, expected, actual = divergence.node_diff[0]
+    assert attribute == "vulnerability_score"
+    assert actual == pytest.approx(expected / 2)
+    assert "vulnerability_score" in str(divergence)
@@ -0,0 +1,68 @@
+from typing import List
+
+import pytest
+
+from yawning_titan.db.doc_metadata import DocMetadataSchema
+
+
+def _run_episodes(
+    play_random_episodes, game_mode, network, reset_from_snapshot: bool, seed: int
+) -> List[tuple]:
+    """Run seeded episodes with random blue actions and record everything observable at each step."""
+    trace = []
+    for env, obs, reward, done, _ in play_random_episodes(
+        game_mode,
+        network,
+        seed=seed,
+        include_resets=True,
+        reset_from_snapshot=reset_from_snapshot,
+    ):
+        if reward is None:
+            trace.append((obs.tobytes(),))
+            continue
+        network_interface = env.network_interface
+        red_location = network_interface.red_current_location
+        trace.append(
+            (
+                obs.tobytes(),
+                reward,
+                done,
+                network_interface.get_all_node_compromised_states(),
+                network_interface.get_all_node_blue_view_compromised_states(),
+                network_interface.get_all_vulnerabilities(),
+                network_interface.get_all_isolation(),
+                [n.uuid for n in network_interface.current_graph.entry_nodes],
+                [n.uuid for n in network_interface.current_graph.high_value_nodes],
+                red_location.uuid if red_location else None,
+            )
+        )
+    return trace
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize(
+    ("game_mode_name", "network_name"),
+    [
+        ("Default Game Mode", "mesh_18"),
+        ("new_entry_nodes", "mesh_18"),
+        ("red_config_test_5", "mesh_24"),
+        ("settable_target_game_continue", "mesh_18"),
+    ],
+)
+def test_snapshot_reset_matches_deepcopy_reset(
+    game_mode_name, network_name, play_random_episodes, game_mode_db, network_db
+):
+    """Checks that seeded episodes are bit-identical whether the network is reset from a snapshot or a deep copy."""
+    game_mode = game_mode_db.search(DocMetadataSchema.NAME == game_mode_name)[0]
+    network = network_db.search(DocMetadataSchema.NAME == network_name)[0]
+
+    deepcopy_trace = _run_episodes(
+        play_random_episodes, game_mode, network, False, seed=42
+    )
+    snapshot_trace = _run_episodes(
+        play_random_episodes, game_mode, network, True, seed=42
+    )
+
+    assert len(snapshot_trace) == len(deepcopy_trace)
+    for snapshot_step, deepcopy_step in zip(snapshot_trace, deepcopy_trace):
+        assert snapshot_step == deepcopy_step
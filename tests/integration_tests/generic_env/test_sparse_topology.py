@@ -0,0 +1,66 @@
+import networkx as nx
+import pytest
+
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("reset_from_snapshot", [True, False])
+def test_sparse_topology_matches_graphs(
+    play_random_episodes, default_game_mode, default_network, reset_from_snapshot
+):
+    """Test the sparse topology gives the same connections and frontier as the graphs as blue isolates, reconnects and adds deceptive nodes."""
+    default_game_mode.blue.action_set.deceptive_nodes.use.value = True
+    for env, *_ in play_random_episodes(
+        default_game_mode,
+        default_network,
+        reset_from_snapshot=reset_from_snapshot,
+        topology_backend="sparse",
+    ):
+        network_interface = env.network_interface
+        current_graph = network_interface.current_graph
+        for node in current_graph.nodes:
+            assert set(network_interface.get_current_connected_nodes(node)) == set(
+                current_graph.neighbors(node)
+            )
+            assert set(network_interface.get_base_connected_nodes(node)) == set(
+                network_interface.base_graph.neighbors(node)
+            )
+        frontier, attackers = network_interface.sparse_topology.get_frontier()
+        assert sorted(frontier) == network_interface.attack_frontier.get_candidates()
+        assert all(
+            network_interface.attack_frontier.get_attacker(n) is a
+            for n, a in zip(frontier, attackers)
+        )
+
+
+@pytest.mark.integration_test
+def test_sparse_topology_without_dense_adjacency(default_game_mode, default_network):
+    """Test the sparse backend only keeps a dense adjacency matrix when the node connections are observed."""
+    default_game_mode.observation_space.node_connections.value = False
+    network_interface = NetworkInterface(
+        game_mode=default_game_mode,
+        network=default_network,
+        topology_backend="sparse",
+    )
+    network_interface.reset()
+    assert network_interface._adjacency is None
+
+    node = network_interface.current_graph.get_node_from_name("5")
+    network_interface.isolate_node(node)
+    expected = nx.to_numpy_array(
+        network_interface.current_graph, nodelist=network_interface._adjacency_nodes
+    )
+    assert (network_interface.adj_matrix == expected).all()
+    assert network_interface.get_current_connected_nodes(node) == []
+
+
+@pytest.mark.integration_test
+def test_unsupported_topology_backend(default_game_mode, default_network):
+    """Test an unsupported topology backend is rejected."""
+    with pytest.raises(ValueError):
+        NetworkInterface(
+            game_mode=default_game_mode,
+            network=default_network,
+            topology_backend="dense",
+        )
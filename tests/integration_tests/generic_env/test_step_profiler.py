@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from yawning_titan.envs.generic.helpers.step_profiler import HOT_METHODS, PHASES
+
+
+@pytest.mark.integration_test
+def test_step_profiler_times_phases(
+    create_generic_env, default_game_mode, default_network
+):
+    """Test the profiler times every phase of each step in a rolling window and counts the network interface calls."""
+    env = create_generic_env(default_game_mode, default_network, profile=True)
+    profiler = env.profiler
+    rng = random.Random(1)
+    env.reset()
+    for _ in range(30):
+        _, _, done, _ = env.step(rng.randrange(env.blue_actions))
+        if done:
+            env.reset()
+
+    assert profiler.steps == 30
+    summary = profiler.summary()
+    assert sum(summary[f"{phase}_share"] for phase in PHASES) == pytest.approx(1)
+    assert summary["red_turn_ms_mean"] > 0
+    assert summary["steps_per_second"] == pytest.approx(1000 / summary["step_ms_mean"])
+    assert summary["calls_per_step/get_current_observation"] >= 1
+
+    # the window only keeps the most recent steps
+    profiler = env.enable_profiling(window=5)
+    for _ in range(8):
+        _, _, done, _ = env.step(0)
+        if done:
+            env.reset()
+    assert profiler.steps == 8
+    assert (profiler._durations.sum(axis=1) > 0).all()
+
+
+@pytest.mark.integration_test
+def test_step_profiler_disabled(create_generic_env, default_game_mode, default_network):
+    """Test the step and the network interface are left untouched when profiling is off or has been turned off."""
+    env = create_generic_env(default_game_mode, default_network)
+    assert env.profiler is None
+    assert "step" not in env.__dict__
+    env.reset()
+    env.step(0)
+
+    env.enable_profiling()
+    assert "step" in env.__dict__
+    assert all(name in env.network_interface.__dict__ for name in HOT_METHODS)
+    env.disable_profiling()
+    assert env.profiler is None
+    assert "step" not in env.__dict__
+    assert not any(name in env.network_interface.__dict__ for name in HOT_METHODS)
+    env.step(0)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from yawning_titan.envs.generic.core.network_interface import NetworkInterface
+
+
+@pytest.mark.integration_test
+def test_detected_attacks_in_observation(default_game_mode, default_network):
+    """Test that the stored attacks and the attacking/attacked observation segments match the attacks blue detects."""
+    game_mode = default_game_mode
+    for item in [
+        "node_connections",
+        "compromised_status",
+        "vulnerabilities",
+        "average_vulnerability",
+        "graph_connectivity",
+        "special_nodes",
+        "red_agent_skill",
+    ]:
+        getattr(game_mode.observation_space, item).value = False
+    game_mode.observation_space.attacking_nodes.value = True
+    game_mode.observation_space.attacked_nodes.value = True
+    # blue sees every failed attack but none of the successful ones
+    attack_discovery = game_mode.blue.attack_discovery
+    attack_discovery.failed_attacks.use.value = True
+    attack_discovery.failed_attacks.chance.standard_node.value = 1
+    attack_discovery.succeeded_attacks_known_compromise.use.value = False
+    attack_discovery.succeeded_attacks_unknown_compromise.use.value = False
+
+    network_interface = NetworkInterface(game_mode=game_mode, network=default_network)
+    network_interface.reset()
+    nodes = list(network_interface.current_graph.get_nodes())
+    attacking_nodes = [None, nodes[0], nodes[1], nodes[2]]
+    target_nodes = [nodes[3], nodes[4], nodes[5], nodes[6]]
+    network_interface.update_stored_attacks(
+        attacking_nodes, target_nodes, [False, True, False, True]
+    )
+
+    assert network_interface.true_attacks == [
+        list(attack) for attack in zip(attacking_nodes, target_nodes)
+    ]
+    assert network_interface.detected_attacks == [
+        [None, nodes[3]],
+        [nodes[1], nodes[5]],
+    ]
+
+    obs = network_interface.get_current_observation()
+    size = len(nodes) + network_interface.get_number_unused_deceptive_nodes()
+    assert len(obs) == 2 * size
+    assert np.flatnonzero(obs[:size]).tolist() == [1]
+    assert np.flatnonzero(obs[size:]).tolist() == [3, 5]
+
+    network_interface.reset_stored_attacks()
+    assert network_interface.true_attacks == []
+    assert not network_interface.get_current_observation().any()
@@ -0,0 +1,131 @@
+import random
+
+import numpy as np
+import pytest
+
+from yawning_titan.envs.generic.helpers.trajectory import (
+    TRAJECTORY_FIELDS,
+    TrajectoryReader,
+    TrajectoryWriter,
+)
+
+
+def _play(env, writer, episodes: int):
+    """Play random episodes, writing each step and returning the node states written by episode."""
+    rng = random.Random(1)
+    network_interface = env.network_interface
+    expected = {}
+    for episode in range(episodes):
+        env.reset()
+        done = False
+        while not done:
+            _, _, done, _ = env.step(rng.randrange(env.blue_actions))
+            writer.write_step(network_interface, episode, env.current_duration)
+            expected.setdefault(episode, []).append(
+                {
+                    field: network_interface.current_graph.get_state_array(field)
+                    for field in TRAJECTORY_FIELDS
+                }
+            )
+    return expected
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("compress", [False, True])
+def test_trajectory_round_trip(
+    create_generic_env, default_game_mode, default_network, tmp_path, compress
+):
+    """Test the node states of every step are read back as written, including episodes split across shards."""
+    env = create_generic_env(default_game_mode, default_network)
+    writer = TrajectoryWriter(tmp_path, chunk_size=7, queue_size=2, compress=compress)
+    expected = _play(env, writer, episodes=4)
+    writer.close()
+
+    reader = TrajectoryReader(tmp_path)
+    assert reader.episodes == list(expected)
+    assert reader.num_steps == sum(len(steps) for steps in expected.values())
+    assert len(reader.manifest["shards"]) == -(-reader.num_steps // 7)
+    node_uuids = [node.uuid for node in env.network_interface.current_graph.nodes]
+    for episode, steps in expected.items():
+        arrays = reader.read_episode(episode)
+        assert len(arrays["step"]) == len(steps)
+        offsets = arrays["state_offsets"]
+        for i, states in enumerate(steps):
+            for field in TRAJECTORY_FIELDS:
+                assert (
+                    arrays[field][offsets[i] : offsets[i + 1]] == states[field]
+                ).all()
+        uuids, _ = reader.get_topology(int(arrays["topology"][0]))
+        assert uuids == node_uuids
+
+
+@pytest.mark.integration_test
+def test_trajectory_is_memory_mapped(
+    create_generic_env, default_game_mode, default_network, tmp_path
+):
+    """Test an episode held in one uncompressed shard is read as views of the memory-mapped shard."""
+    env = create_generic_env(default_game_mode, default_network)
+    writer = TrajectoryWriter(tmp_path)
+    _play(env, writer, episodes=1)
+    writer.close()
+
+    arrays = TrajectoryReader(tmp_path).read_episode(0)
+    assert isinstance(arrays["vulnerability_score"], np.memmap)
+
+
+@pytest.mark.integration_test
+def test_trajectory_records_each_topology_once(
+    create_generic_env, default_game_mode, default_network, tmp_path
+):
+    """Test the topology is only recorded when it changes and a topology seen before is pointed back to."""
+    env = create_generic_env(default_game_mode, default_network)
+    env.reset()
+    network_interface = env.network_interface
+    node = next(iter(network_interface.current_graph.nodes))
+    writer = TrajectoryWriter(tmp_path)
+    writer.write_step(network_interface, 0, 1)
+    writer.write_step(network_interface, 0, 2)
+    network_interface.isolate_node(node)
+    writer.write_step(network_interface, 0, 3)
+    network_interface.reconnect_node(node)
+    writer.write_step(network_interface, 0, 4)
+    writer.close()
+
+    reader = TrajectoryReader(tmp_path)
+    arrays = reader.read_episode(0)
+    assert arrays["topology"].tolist() == [0, 0, 1, 0]
+    _, edges = reader.get_topology(0)
+    _, isolated_edges = reader.get_topology(1)
+    assert len(edges) == network_interface.current_graph.number_of_edges()
+    assert len(isolated_edges) == len(edges) - len(
+        list(network_interface.current_graph.neighbors(node))
+    )
+    time_step = reader.get_time_step(0, 2)
+    assert len(time_step["edges"]) == len(isolated_edges)
+    assert set(time_step["features"]) == {
+        n.uuid for n in network_interface.current_graph.nodes
+    }
+
+
+@pytest.mark.integration_test
+def test_env_writes_trajectory(
+    create_generic_env, default_game_mode, default_network, tmp_path
+):
+    """Test the env writes each step to a trajectory when the game mode outputs the per timestep data."""
+    default_game_mode.miscellaneous.output_timestep_data_to_json.value = True
+    env = create_generic_env(
+        default_game_mode, default_network, trajectory_dir=tmp_path
+    )
+    rng = random.Random(1)
+    steps = 0
+    for _ in range(2):
+        env.reset()
+        done = False
+        while not done:
+            _, _, done, _ = env.step(rng.randrange(env.blue_actions))
+            steps += 1
+    env.close()
+
+    reader = TrajectoryReader(tmp_path)
+    assert reader.episodes == [1, 2]
+    assert reader.num_steps == steps
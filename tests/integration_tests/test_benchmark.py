@@ -0,0 +1,69 @@
+import copy
+
+import pytest
+
+from yawning_titan.utils import benchmark
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("isolate", [False, True])
+def test_run_benchmarks(default_game_mode, isolate):
+    """Test the suite benchmarks every combination of topology, size and game mode, as well as the components and DBs."""
+    results = benchmark.run_benchmarks(
+        {"default": default_game_mode},
+        sizes=[20],
+        topologies=["mesh", "ring"],
+        steps=20,
+        resets=2,
+        turns=10,
+        db_repeats=1,
+        isolate=isolate,
+    )
+    assert set(results) == {"metadata", "settings", "benchmarks"}
+    assert results["metadata"]["cpu_count"] > 0
+    assert set(results["benchmarks"]) == {
+        "env/mesh/20/default",
+        "env/ring/20/default",
+        "components/mesh/20/default",
+        "db/mesh/20",
+    }
+    env_metrics = results["benchmarks"]["env/mesh/20/default"]
+    assert env_metrics["nodes"] == 20
+    assert env_metrics["steps_per_second"] > 0
+    assert env_metrics["reset_ms_p95"] >= env_metrics["reset_ms_mean"] > 0
+    assert env_metrics["peak_rss_mb"] > 0
+    assert results["benchmarks"]["components/mesh/20/default"]["red_turn_ms_mean"] > 0
+    assert results["benchmarks"]["db/mesh/20"]["network_load_ms_mean"] > 0
+
+
+@pytest.mark.integration_test
+def test_compare_results():
+    """Test a metric is flagged when it gets worse by more than the tolerance, in whichever direction is worse."""
+    baseline = {
+        "benchmarks": {
+            "env/mesh/20/default": {
+                "nodes": 20,
+                "steps_per_second": 1000.0,
+                "reset_ms_mean": 1.0,
+            },
+            "db/mesh/20": {"network_load_ms_mean": 1.0},
+        }
+    }
+    results = copy.deepcopy(baseline)
+    results["benchmarks"]["env/mesh/20/default"].update(
+        nodes=40, steps_per_second=850.0, reset_ms_mean=0.5
+    )
+    results["benchmarks"]["db/mesh/20"]["network_load_ms_mean"] = 1.05
+    results["benchmarks"]["db/mesh/50"] = {"network_load_ms_mean": 1.0}
+
+    comparisons = benchmark.compare_results(results, baseline, tolerance=0.1)
+    regressions = {(c["benchmark"], c["metric"]): c["regression"] for c in comparisons}
+    assert regressions == {
+        ("env/mesh/20/default", "steps_per_second"): True,
+        ("env/mesh/20/default", "reset_ms_mean"): False,
+        ("db/mesh/20", "network_load_ms_mean"): False,
+    }
+    assert not any(
+        c["regression"]
+        for c in benchmark.compare_results(results, baseline, tolerance=0.2)
+    )
@@ -0,0 +1,64 @@
+import pickle
+
+import pytest
+
+from yawning_titan.game_modes.compiled_rules import CompiledRules
+from yawning_titan.game_modes.game_mode import GameMode
+
+
+@pytest.mark.unit_test
+def test_compiled_rules_hold_every_item():
+    """Test that the compiled rules hold the value of every item in the game mode and cannot be changed."""
+    game_mode = GameMode()
+    rules = game_mode.compiled_rules
+
+    assert isinstance(rules, CompiledRules)
+    assert (
+        rules.red_agent_attack_skill_use == game_mode.red.agent_attack.skill.use.value
+    )
+    assert (
+        rules.blue_attack_discovery_failed_attacks_chance_standard_node
+        == game_mode.blue.attack_discovery.failed_attacks.chance.standard_node.value
+    )
+    assert rules.game_rules_max_steps == game_mode.game_rules.max_steps.value
+    with pytest.raises(AttributeError):
+        rules.game_rules_max_steps = 10
+    assert not hasattr(rules, "__dict__")
+    assert pickle.loads(pickle.dumps(rules)) == rules
+
+
+@pytest.mark.unit_test
+def test_compiled_rules_are_invalidated_by_edits():
+    """Test that the compiled rules are reused until the game mode is edited and then recompiled."""
+    game_mode = GameMode()
+    rules = game_mode.compiled_rules
+    assert game_mode.compiled_rules is rules
+
+    game_mode.game_rules.max_steps.value = 123
+    assert game_mode.compiled_rules is not rules
+    assert game_mode.compiled_rules.game_rules_max_steps == 123
+
+    rules = game_mode.compiled_rules
+    game_mode.set_from_dict({"rewards": {"for_loss": -7}})
+    assert game_mode.compiled_rules.rewards_for_loss == -7
+
+    # the rules are not recompiled when nothing has changed
+    assert game_mode.compiled_rules is game_mode.compiled_rules
+
+
+@pytest.mark.unit_test
+def test_compiled_rules_are_only_invalidated_by_their_game_mode():
+    """Test that editing or creating another game mode does not recompile the rules of a game mode."""
+    game_mode = GameMode()
+    rules = game_mode.compiled_rules
+
+    other_game_mode = GameMode()
+    other_game_mode.game_rules.max_steps.value = 321
+    other_game_mode.set_from_dict({"rewards": {"for_loss": -3}})
+    assert game_mode.compiled_rules is rules
+
+    version = game_mode.version
+    game_mode.blue.attack_discovery.failed_attacks.chance.standard_node.value = 0.25
+    assert game_mode.version > version
+    assert game_mode.compiled_rules is not rules
+    assert other_game_mode.compiled_rules.game_rules_max_steps == 321
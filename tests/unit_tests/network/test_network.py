@@ -1,7 +1,9 @@
+import copy
+
 import pytest
 
 from yawning_titan.exceptions import NetworkError
-from yawning_titan.networks.network import Network
+from yawning_titan.networks.network import Network, RandomHighValueNodePreference
 from yawning_titan.networks.network_db import default_18_node_network
 from yawning_titan.networks.node import Node
 
@@ -93,3 +95,134 @@ def test_setting_high_value_nodes_before_entry_nodes():
 
     with pytest.raises(NetworkError):
         network.reset_random_high_value_nodes()
+
+
+@pytest.mark.unit_test
+def test_node_lookup_index():
+    """Test that nodes can be looked up by uuid and name as they are added, removed and renamed."""
+    node_1 = Node(name="node_1")
+    node_2 = Node(name="node_2")
+    network = Network()
+    network.add_node(node_1)
+    network.add_edge(node_1, node_2)
+
+    assert network.get_node_from_uuid(node_2.uuid) is node_2
+    assert network.get_node_from_name("node_1") is node_1
+
+    network.remove_node(node_2)
+    assert network.get_node_from_uuid(node_2.uuid) is None
+    assert network.get_node_from_name("node_2") is None
+
+    node_1.name = "renamed"
+    assert network.get_node_from_name("renamed") is node_1
+    assert network.get_node_from_name("node_1") is None
+
+
+@pytest.mark.unit_test
+def test_snapshot_and_restore():
+    """Test that restoring a snapshot puts the same network objects back into their snapshotted state."""
+    nodes = [Node(name=str(i)) for i in range(5)]
+    network = Network()
+    for node_1, node_2 in zip(nodes, nodes[1:]):
+        network.add_edge(node_1, node_2)
+    network.add_edge(nodes[0], nodes[4])
+    nodes[0].entry_node = True
+    network.attach_state_store()
+    snapshot = network.snapshot()
+    edges = list(network.edges)
+
+    extra_node = Node(name="extra")
+    network.remove_edge(nodes[1], nodes[2])
+    network.add_edge(nodes[1], extra_node)
+    nodes[0].entry_node = False
+    nodes[3].true_compromised_status = 1
+    nodes[3].vulnerability = 0.9
+
+    network.restore(snapshot)
+
+    assert list(network.nodes) == nodes
+    assert list(network.edges) == edges
+    assert nodes[0].entry_node
+    assert nodes[3].true_compromised_status == 0
+    assert nodes[3].vulnerability == 0.01
+    assert network.get_node_from_name("extra") is None
+
+
+@pytest.mark.unit_test
+def test_structure_hash_and_topology_tables():
+    """Test the structure hash survives copying and serialisation, and the topology tables are shared by structure."""
+    network = default_18_node_network()
+    structure_hash = network.structure_hash
+    assert copy.deepcopy(network).structure_hash == structure_hash
+    assert (
+        Network.create(network.to_dict(json_serializable=True)).structure_hash
+        == structure_hash
+    )
+
+    tables = network._get_topology_tables()
+    assert copy.deepcopy(network)._get_topology_tables() is tables
+
+    # changing the edges changes the structure
+    node_1, node_2 = list(network.edges)[0]
+    network.remove_edge(node_1, node_2)
+    assert network.structure_hash != structure_hash
+    assert network._get_topology_tables() is not tables
+    network.add_edge(node_1, node_2)
+    assert network.structure_hash == structure_hash
+
+
+@pytest.mark.unit_test
+def test_structure_hash_after_bulk_changes():
+    """Test the structure hash and topology tables follow changes made by the networkx bulk methods."""
+    network = default_18_node_network()
+    edges = list(network.edges)
+    structure_hash = network.structure_hash
+    tables = network._get_topology_tables()
+
+    network.remove_edges_from(edges[:3])
+    assert network.structure_hash != structure_hash
+    assert network._get_topology_tables() is not tables
+
+    network.add_edges_from(edges[:3])
+    assert network.structure_hash == structure_hash
+
+    # a network built with add_edges_from shares the hash of the network it was built from
+    built = Network()
+    built.add_edges_from(edges)
+    assert built.structure_hash == structure_hash
+
+    built.clear_edges()
+    assert built.structure_hash != structure_hash
+    built.add_edges_from(edges[1:])
+    assert built.structure_hash != structure_hash
+    built.add_edges_from(edges[:1])
+    assert built.structure_hash == structure_hash
+
+    node = next(iter(network.nodes))
+    network.remove_nodes_from([node])
+    assert network.structure_hash != structure_hash
+    network.clear()
+    assert network.structure_hash == Network().structure_hash
+
+
+@pytest.mark.unit_test
+def test_reset_high_value_nodes_furthest_away_from_entry():
+    """Test the high value nodes are chosen from the nodes furthest on average from the entry nodes."""
+    nodes = [Node(name=str(i)) for i in range(8)]
+    network = Network(
+        num_of_random_high_value_nodes=1,
+        random_high_value_node_preference=RandomHighValueNodePreference.FURTHEST_AWAY_FROM_ENTRY,
+    )
+    for node_1, node_2 in zip(nodes, nodes[1:]):
+        network.add_edge(node_1, node_2)
+    nodes[0].entry_node = True
+
+    network.reset_random_high_value_nodes()
+    assert network.high_value_nodes[0] in nodes[-2:]
+
+    # every node is as far on average from both ends of the line, so the nodes first reached from the first entry
+    # node are preferred
+    nodes[-1].high_value_node = False
+    nodes[-1].entry_node = True
+    network.reset_random_high_value_nodes()
+    assert network.high_value_nodes == [nodes[1]]
@@ -0,0 +1,70 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from yawning_titan.networks import network_creator
+
+
+@pytest.mark.unit_test
+def test_triangle_pairs():
+    """Test pair indices are mapped to the pairs in the order of `combinations`."""
+    for n in range(8):
+        pairs = list(combinations(range(n), 2))
+        indices = np.arange(len(pairs), dtype=np.int64)
+        assert network_creator._triangle_pairs(indices, n).tolist() == [
+            list(pair) for pair in pairs
+        ]
+
+
+@pytest.mark.unit_test
+def test_sample_pair_indices():
+    """Test pairs are chosen in ascending order, once each and at about the right rate."""
+    rng = np.random.default_rng(1)
+    indices = network_creator._sample_pair_indices(100000, 0.05, rng)
+    assert (np.diff(indices) > 0).all()
+    assert indices[-1] < 100000
+    assert 4500 < len(indices) < 5500
+    assert len(network_creator._sample_pair_indices(10, 0, rng)) == 0
+    assert network_creator._sample_pair_indices(10, 1, rng).tolist() == list(range(10))
+
+
+@pytest.mark.unit_test
+@pytest.mark.parametrize(
+    "generator, kwargs, n_nodes",
+    [
+        (network_creator.create_mesh_sparse, {"size": 100, "connectivity": 0.1}, 100),
+        (network_creator.create_star_sparse, {"first_layer_size": 6}, 31),
+        (network_creator.create_ring_sparse, {"ring_size": 60}, 60),
+        (
+            network_creator.gnp_random_connected_graph_sparse,
+            {"n_nodes": 100, "probability_of_edge": 0.02},
+            100,
+        ),
+    ],
+)
+def test_sparse_generators_are_seeded(generator, kwargs, n_nodes):
+    """Test the sparse generators create the expected number of nodes and the same network for the same seed."""
+    network = generator(seed=1, **kwargs)
+    assert network.number_of_nodes() == n_nodes
+
+    def describe(n):
+        return [(u.name, v.name) for u, v in n.edges], [
+            (node.x_pos, node.y_pos) for node in n.nodes
+        ]
+
+    assert describe(network) == describe(generator(seed=1, **kwargs))
+
+
+@pytest.mark.unit_test
+def test_gnp_random_connected_graph_sparse():
+    """Test every node but the last is connected to a later node and the nodes are kept apart."""
+    network = network_creator.gnp_random_connected_graph_sparse(500, 0.001, seed=2)
+    nodes = list(network.nodes)
+    for i, node in enumerate(nodes[:-1]):
+        assert any(int(n.name) > i for n in network.neighbors(node))
+
+    positions = np.array([[node.x_pos, node.y_pos] for node in nodes])
+    distances = np.abs(positions[:, None] - positions[None, :]).max(axis=-1)
+    np.fill_diagonal(distances, 6)
+    assert distances.min() > 5
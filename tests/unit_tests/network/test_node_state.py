@@ -0,0 +1,79 @@
+import copy
+
+import numpy as np
+import pytest
+
+from yawning_titan.networks.network import Network
+from yawning_titan.networks.node import Node
+
+
+@pytest.mark.unit_test
+def test_node_state_moves_into_and_out_of_store():
+    """Test that node state is preserved when a node is bound to and unbound from a state store."""
+    node_1 = Node(vulnerability=0.3)
+    node_2 = Node()
+    node_1.true_compromised_status = 1
+    node_2.isolated = True
+    network = Network()
+    network.add_node(node_1)
+    network.add_node(node_2)
+
+    store = network.attach_state_store(capacity=1)
+    assert store.capacity >= 2
+    assert node_1.true_compromised_status == 1
+    assert node_1.vulnerability_score == 0.3
+    assert node_2.isolated is True
+
+    # writes go through to the store
+    node_2.blue_view_compromised_status = 1
+    assert store.blue_view_compromised_status[node_2.state_index] == 1
+
+    network.remove_node(node_2)
+    assert node_2.state_index is None
+    assert node_2.blue_view_compromised_status == 1
+    assert node_2.isolated is True
+    assert store.num_allocated == 1
+
+
+@pytest.mark.unit_test
+def test_get_nodes_filters_match_with_and_without_store():
+    """Test that the vectorised get_nodes filters return the same nodes, in the same order, as the node sweeps."""
+    network = Network()
+    nodes = [Node() for _ in range(12)]
+    for node_1, node_2 in zip(nodes, nodes[1:]):
+        network.add_edge(node_1, node_2)
+    for i, node in enumerate(nodes):
+        node.true_compromised_status = i % 2
+        node.blue_view_compromised_status = int(i % 3 == 0)
+        node.isolated = i % 4 == 0
+    plain = copy.deepcopy(network)
+    network.attach_state_store()
+
+    filters = [
+        "filter_true_compromised",
+        "filter_blue_view_compromised",
+        "filter_true_safe",
+        "filter_blue_view_safe",
+        "filter_isolated",
+        "filter_non_isolated",
+        "filter_non_deceptive",
+    ]
+    for f in filters:
+        expected = [n.uuid for n in plain.get_nodes(**{f: True})]
+        assert [n.uuid for n in network.get_nodes(**{f: True})] == expected
+    assert [
+        n.uuid
+        for n in network.get_nodes(filter_true_compromised=True, filter_isolated=True)
+    ] == [
+        n.uuid
+        for n in plain.get_nodes(filter_true_compromised=True, filter_isolated=True)
+    ]
+
+    # re-adding a node moves it to the end of the graph order
+    network.remove_node(nodes[0])
+    network.add_node(nodes[0])
+    assert network.get_nodes(filter_isolated=True)[-1] == nodes[0]
+    assert np.array_equal(
+        network.get_state_array("isolated"),
+        [n.isolated for n in network.get_nodes()],
+    )
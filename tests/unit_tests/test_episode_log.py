@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from yawning_titan.envs.generic.core.action_loops import EpisodeLog
+
+
+@pytest.mark.unit_test
+def test_episode_log_keeps_original_format():
+    """Test the log gives the action, rewards and whole info of each step by default."""
+    log = EpisodeLog(capacity=2)
+    infos = [{"safe_nodes": i} for i in range(5)]
+    for i, info in enumerate(infos):
+        log.append(np.array(i), float(i) / 2, i == 4, info)
+    results = log.to_dataframe()
+    assert list(results.columns) == ["action", "rewards", "info"]
+    assert results["action"].tolist() == [0, 1, 2, 3, 4]
+    assert results["rewards"].tolist() == [0, 0.5, 1, 1.5, 2]
+    assert results["info"].tolist() == infos
+
+
+@pytest.mark.unit_test
+def test_episode_log_info_fields():
+    """Test the selected info fields are logged as columns, widening their dtype as needed."""
+    log = EpisodeLog(info_fields=["safe_nodes", "blue_action"], capacity=1)
+    log.append(0, 0, False, {"safe_nodes": 3, "blue_action": "scan"})
+    log.append(1, 0.5, False, {"safe_nodes": 2.5})
+    log.append(2, -1.0, True, {"safe_nodes": 1, "blue_action": "restore_node"})
+    results = log.to_dataframe()
+    assert list(results.columns) == [
+        "action",
+        "rewards",
+        "done",
+        "safe_nodes",
+        "blue_action",
+    ]
+    assert results["rewards"].dtype == np.float64
+    assert results["done"].tolist() == [False, False, True]
+    assert results["safe_nodes"].tolist() == [3, 2.5, 1]
+    assert results["blue_action"].tolist() == ["scan", None, "restore_node"]
+
+    log.clear()
+    assert len(log) == 0
+    assert len(log.to_dataframe()) == 0
+
+
+@pytest.mark.unit_test
+def test_episode_log_non_scalar_values():
+    """Test array actions and list valued info fields are logged as objects."""
+    log = EpisodeLog(info_fields=["attacks"], capacity=1)
+    attacks = [[["a", "b"]], [], [["b", "c"], ["a", "c"]]]
+    for i, step_attacks in enumerate(attacks):
+        log.append(np.array([i, i + 1]), 0.0, i == 2, {"attacks": step_attacks})
+    results = log.to_dataframe()
+    assert [action.tolist() for action in results["action"]] == [[0, 1], [1, 2], [2, 3]]
+    assert results["attacks"].tolist() == attacks